@@ -0,0 +1,84 @@
+import gc
+import time
+import statistics
+
+# 已注册的基准用例: {名称: (分组, 函数)}
+CASES = {}
+
+
+def case(name, group='default'):
+    """注册基准用例
+
+    被装饰的函数接收一个 Bench 对象，调用 bench.measure() 记录结果。
+    分组决定用例在哪种屏幕布局的子进程中运行。
+    """
+    def decorator(func):
+        CASES[name] = (group, func)
+        return func
+    return decorator
+
+
+class Bench:
+    """单个子进程内的计时器，收集所有用例的结果"""
+
+    def __init__(self, layout='single', quick=False):
+        self.layout = layout
+        self.quick = quick
+        self.results = {}
+
+    def measure(self, name, func, number=10, repeat=7, warmup=1, setup=None, teardown=None):
+        """测量func单次调用的耗时（毫秒）
+
+        每轮调用func共number次，取每次的平均耗时；共repeat轮。
+        setup/teardown在每轮前后执行，不计入耗时。
+        """
+        if self.quick:
+            number = max(1, number // 5)
+            repeat = max(3, repeat // 2)
+        for _ in range(warmup):
+            if setup:
+                setup()
+            func()
+            if teardown:
+                teardown()
+        samples = []
+        gc_enabled = gc.isenabled()
+        for _ in range(repeat):
+            if setup:
+                setup()
+            gc.collect()
+            gc.disable()
+            try:
+                start = time.perf_counter()
+                for _ in range(number):
+                    func()
+                elapsed = time.perf_counter() - start
+            finally:
+                if gc_enabled:
+                    gc.enable()
+            if teardown:
+                teardown()
+            samples.append(elapsed * 1000 / number)
+        self.record(name, samples, number=number)
+
+    def record(self, name, samples, number=1, **extra):
+        """记录一组样本（毫秒）"""
+        key = name if self.layout == 'single' else f"{name}[{self.layout}]"
+        self.results[key] = summarize(samples, number=number, **extra)
+
+
+def summarize(samples, number=1, **extra):
+    """计算样本统计值"""
+    ordered = sorted(samples)
+    p95_index = min(len(ordered) - 1, int(round(0.95 * (len(ordered) - 1))))
+    result = {
+        'median_ms': round(statistics.median(ordered), 4),
+        'min_ms': round(ordered[0], 4),
+        'mean_ms': round(statistics.fmean(ordered), 4),
+        'p95_ms': round(ordered[p95_index], 4),
+        'stdev_ms': round(statistics.stdev(ordered), 4) if len(ordered) > 1 else 0.0,
+        'repeat': len(ordered),
+        'number': number,
+    }
+    result.update(extra)
+    return result
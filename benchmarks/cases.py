@@ -0,0 +1,1027 @@
+import time
+import itertools
+from benchmarks.bench import case
+from PySide6.QtCore import QCoreApplication, QEvent
+from PySide6.QtWidgets import QApplication
+
+OVERLAY_COLOR = [144, 238, 144, 128]
+
+
+def flush_deleted():
+    """立即处理deleteLater，避免对象堆积影响后续测量"""
+    QCoreApplication.sendPostedEvents(None, QEvent.DeferredDelete)
+    QApplication.processEvents()
+
+
+def dispose_main_window(window):
+    """释放MainWindow及其子窗口（不经过退出确认框）"""
+    window.timer_window.stop_timer()
+    window.core.close()
+    if getattr(window, 'watchdog', None):
+        window.watchdog.stop()
+    window.tray_icon.hide()
+    if window.settings_window is not None:
+        window.settings_window.deleteLater()
+    window.timer_window.deleteLater()
+    window.deleteLater()
+
+
+def default_config():
+    from core.config_manager import ConfigManager
+    return dict(ConfigManager().default_config)
+
+
+@case('main_window.warm_startup', 'startup')
+def bench_main_window(bench):
+    from gui.main_window import MainWindow
+    windows = []
+
+    def build():
+        windows.append(MainWindow())
+        QApplication.processEvents()
+
+    def teardown():
+        for window in windows:
+            dispose_main_window(window)
+        windows.clear()
+        flush_deleted()
+
+    bench.measure('main_window.warm_startup', build, number=1, repeat=7, teardown=teardown)
+
+
+@case('config.load_save', 'config')
+def bench_config(bench):
+    from core.config_manager import ConfigManager
+    manager = ConfigManager()
+    manager.save_config(dict(manager.default_config))
+    bench.measure('config.load_config', manager.load_config, number=20)
+    bench.measure('config.save_config', lambda: manager.save_config(manager.config), number=20)
+
+
+@case('timer.tick', 'timer')
+def bench_timer_tick(bench):
+    from core.timer import Timer
+    timer = Timer()
+    timer.time_updated.connect(lambda seconds: None)
+
+    def setup():
+        timer.start(600)
+        timer.timer.stop()
+
+    bench.measure('timer.tick', timer._update_time, number=1000, setup=setup)
+    timer.stop()
+
+
+@case('timer_window', 'timer')
+def bench_timer_window(bench):
+    from gui.timer_window import TimerWindow
+    config = default_config()
+    window = TimerWindow()
+    window.set_config(config)
+    seconds = itertools.cycle(range(3600, 0, -1))
+    bench.measure('timer_window.update_display',
+                  lambda: window.update_display(next(seconds)), number=200)
+
+    hidden_config = dict(config, hide_timer=True)
+    window.set_config(hidden_config)
+    bench.measure('timer_window.update_display.hide_timer',
+                  lambda: window.update_display(next(seconds)), number=200)
+
+    bench.measure('timer_window.set_config', lambda: window.set_config(config), number=20)
+    window.stop_timer()
+    window.deleteLater()
+    flush_deleted()
+
+
+@case('overlay_window', 'overlay')
+def bench_overlay(bench):
+    from gui.overlay_window import OverlayWindow
+    overlays = []
+
+    def build():
+        overlays.append(OverlayWindow(OVERLAY_COLOR, 10, 50))
+
+    def teardown():
+        for overlay in overlays:
+            overlay.timer.stop()
+            overlay.deleteLater()
+        overlays.clear()
+        flush_deleted()
+
+    bench.measure('overlay_window.construct', build, number=5, teardown=teardown)
+
+    overlay = OverlayWindow(OVERLAY_COLOR, 10, 50)
+    overlay.timer.stop()
+    overlay.show()
+    QApplication.processEvents()
+    bench.measure('overlay_window.paint', overlay.repaint, number=5)
+
+    def tick():
+        overlay.remaining_time = 600
+        overlay.update_countdown()
+        overlay.repaint()
+
+    bench.measure('overlay_window.countdown_tick', tick, number=5)
+    overlay.hide()
+    overlay.deleteLater()
+    flush_deleted()
+
+
+@case('settings_window', 'settings')
+def bench_settings_window(bench):
+    from gui.timer_window import TimerWindow
+    from gui.settings_window import SettingsWindow
+    config = default_config()
+    timer_window = TimerWindow()
+    timer_window.set_config(config)
+    windows = []
+
+    def build():
+        windows.append(SettingsWindow(dict(config), timer_window))
+
+    def teardown():
+        for window in windows:
+            window.deleteLater()
+        windows.clear()
+        flush_deleted()
+
+    bench.measure('settings_window.construct', build, number=3, teardown=teardown)
+    timer_window.stop_timer()
+    timer_window.deleteLater()
+    flush_deleted()
+
+
+@case('tray_countdown', 'tray')
+def bench_tray_countdown(bench):
+    from PySide6.QtGui import QIcon
+    from gui.tray_countdown import TrayCountdown
+
+    class CountingTray:
+        def __init__(self):
+            self.calls = 0
+
+        def setIcon(self, icon):
+            self.calls += 1
+
+    # 模拟一次完整的60分钟倒计时，统计托盘图标的更新次数
+    tray = CountingTray()
+    countdown = TrayCountdown(tray, QIcon())
+    countdown.set_total(3600)
+    start = time.perf_counter()
+    for seconds in range(3599, -1, -1):
+        countdown.update(seconds)
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    stats = countdown.get_stats()
+    bench.record('tray_countdown.full_cycle', [elapsed_ms], set_icon_calls=tray.calls,
+                 frames_rendered=stats['frames_rendered'])
+
+    # 缓存命中后的单次更新开销（显示值变化的情况）
+    values = itertools.cycle([120, 60])
+    bench.measure('tray_countdown.update_cached', lambda: countdown.update(next(values)), number=200)
+
+
+@case('ctl.status', 'ctl')
+def bench_ctl(bench):
+    """命令行客户端端到端耗时（含解释器启动），服务端为标准库实现的桩"""
+    import os
+    import sys
+    import socket
+    import tempfile
+    import threading
+    import subprocess
+    from utils import ipc
+    if os.name == 'nt':
+        return
+
+    runtime_dir = tempfile.mkdtemp(prefix='tcya-ctl-')
+    env = dict(os.environ, XDG_RUNTIME_DIR=runtime_dir)
+    old_runtime_dir = os.environ.get('XDG_RUNTIME_DIR')
+    os.environ['XDG_RUNTIME_DIR'] = runtime_dir
+    try:
+        path = ipc.server_name()
+    finally:
+        if old_runtime_dir is None:
+            os.environ.pop('XDG_RUNTIME_DIR', None)
+        else:
+            os.environ['XDG_RUNTIME_DIR'] = old_runtime_dir
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    server.bind(path)
+    server.listen(16)
+    status = {'ok': True, 'phase': 'work', 'remaining_seconds': 1234, 'paused': False}
+
+    def serve():
+        while True:
+            try:
+                conn, _ = server.accept()
+            except OSError:
+                return
+            with conn:
+                conn.recv(4096)
+                conn.sendall(ipc.encode_message(status))
+
+    threading.Thread(target=serve, daemon=True).start()
+    ctl = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'ctl.py')
+    for flags, name in (([], 'ctl.status_json'), (['-S'], 'ctl.status_json.no_site')):
+        command = [sys.executable] + flags + [ctl, 'status', '--json']
+        bench.measure(name, lambda: subprocess.run(command, env=env, stdout=subprocess.DEVNULL, check=True),
+                      number=3, repeat=7)
+    server.close()
+    os.unlink(path)
+    os.rmdir(runtime_dir)
+
+
+@case('resources.app_icon', 'resources')
+def bench_app_icon(bench):
+    from utils import resources
+
+    def load():
+        resources._icons.clear()
+        resources.app_icon().pixmap(22, 22)
+
+    bench.measure('resources.app_icon', load, number=20)
+
+
+@case('scheduler', 'scheduler')
+def bench_scheduler(bench):
+    from core.scheduler import Schedule, ScheduleRule
+    clock = [1_700_000_000.0]
+    rules = [ScheduleRule(f"rule{i}", 1 + i % 120, 20) for i in range(10000)]
+    schedule = Schedule(rules, now=lambda: clock[0])
+
+    def fire_next():
+        clock[0] = schedule.next_time()
+        schedule.pop_due()
+
+    bench.measure('scheduler.fire_next.10k_rules', fire_next, number=1000)
+
+
+@case('calendar_index', 'calendar')
+def bench_calendar_index(bench):
+    import os
+    import tempfile
+    from datetime import datetime, timezone
+    from core.calendar_index import CalendarIndex
+    now = datetime(2026, 1, 5, 8, 0, tzinfo=timezone.utc).timestamp()
+
+    def stamp(t):
+        return datetime.fromtimestamp(t, timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+
+    # 3万个单次事件 + 500个每日重复事件
+    workdir = tempfile.mkdtemp(prefix='tcya-ics-')
+    big = os.path.join(workdir, 'big.ics')
+    small = os.path.join(workdir, 'small.ics')
+    lines = ['BEGIN:VCALENDAR']
+    for i in range(30000):
+        start = now - 86400 * 30 + i * 3 * 3600
+        lines += ['BEGIN:VEVENT', f'UID:s{i}', f'DTSTART:{stamp(start)}', f'DTEND:{stamp(start + 1800)}', 'END:VEVENT']
+    for i in range(500):
+        lines += ['BEGIN:VEVENT', f'UID:r{i}', 'DTSTART:20250101T090000Z', 'DURATION:PT15M',
+                  'RRULE:FREQ=DAILY', 'END:VEVENT']
+    lines.append('END:VCALENDAR')
+    with open(big, 'w', encoding='utf-8') as f:
+        f.write('\n'.join(lines))
+    with open(small, 'w', encoding='utf-8') as f:
+        f.write('BEGIN:VCALENDAR\nBEGIN:VEVENT\nUID:x\nDTSTART:20260105T100000Z\n'
+                'DURATION:PT1H\nRRULE:FREQ=WEEKLY;BYDAY=MO,WE\nEND:VEVENT\nEND:VCALENDAR\n')
+
+    def build():
+        index = CalendarIndex([big, small], now=lambda: now)
+        index.refresh()
+        index.next_free(now)
+        return index
+
+    bench.measure('calendar_index.full_build.30k', build, number=1, repeat=3)
+    index = build()
+    points = itertools.cycle([now + i * 97 for i in range(10000)])
+    bench.measure('calendar_index.next_free', lambda: index.next_free(next(points)), number=1000)
+
+    def reindex_small():
+        os.utime(small, ns=(time.time_ns(), time.time_ns()))
+        index.refresh()
+        index.next_free(now)
+
+    bench.measure('calendar_index.reindex_changed_file', reindex_small, number=1, repeat=5)
+
+
+@case('exercise_animation', 'overlay')
+def bench_exercise_animation(bench):
+    import os
+    import tempfile
+    from PySide6.QtGui import QImage, QColor
+    from gui.exercise_animation import ExerciseAnimation
+    from gui.overlay_window import OverlayWindow
+
+    # 60帧 640x640 的PNG序列，解码时缩放到320x320
+    workdir = tempfile.mkdtemp(prefix='tcya-exercise-')
+    sequence = os.path.join(workdir, 'stretch')
+    os.mkdir(sequence)
+    for i in range(60):
+        image = QImage(640, 640, QImage.Format_ARGB32)
+        image.fill(QColor(i * 4, 128, 255 - i * 4))
+        image.save(os.path.join(sequence, f'{i:03d}.png'))
+
+    # 缓存上限8MB，约能容纳20帧，播放时需要不断淘汰和重新解码
+    player = ExerciseAnimation(workdir, cache_mb=8)
+    overlay = OverlayWindow(OVERLAY_COLOR, 10, 50, animation=player)
+    overlay.timer.stop()
+    overlay.show()
+    player.timer.stop()
+    QApplication.processEvents()
+
+    def wait_frame():
+        # 等待后台线程解码出当前帧，再推进一帧并重绘动画区域
+        key = (player.current, player.frame_index)
+        deadline = time.perf_counter() + 2
+        while not player.cache.contains(key) and time.perf_counter() < deadline:
+            time.sleep(0.001)
+        player._advance()
+        player.timer.stop()
+        overlay.repaint(player.rect)
+
+    # 完整播放两遍，记录耗时与缓存占用
+    start = time.perf_counter()
+    for _ in range(120):
+        wait_frame()
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    bench.record('exercise_animation.two_loops', [elapsed_ms], **player.get_stats())
+    bench.measure('exercise_animation.rect_repaint', lambda: overlay.repaint(player.rect), number=10)
+    bench.measure('exercise_animation.full_repaint', overlay.repaint, number=10)
+    overlay.close()
+    player.close()
+    overlay.deleteLater()
+    flush_deleted()
+
+
+@case('sound_cues', 'sound')
+def bench_sound_cues(bench):
+    """提示音预加载耗时与触发开销；没有声卡时（CI）播放进入空设备，只测量触发路径"""
+    from utils.sound_cues import SoundCues, CUE_NAMES
+    if not SoundCues.available():
+        return
+
+    def wait_ready(cues):
+        deadline = time.perf_counter() + 5
+        while not all(cues.is_ready(name) for name in CUE_NAMES) and time.perf_counter() < deadline:
+            QApplication.processEvents()
+            time.sleep(0.001)
+
+    samples = []
+    for _ in range(3 if bench.quick else 5):
+        start = time.perf_counter()
+        cues = SoundCues()
+        wait_ready(cues)
+        samples.append((time.perf_counter() - start) * 1000)
+        cues.deleteLater()
+        flush_deleted()
+    bench.record('sound_cues.preload', samples)
+
+    cues = SoundCues(volume=0)
+    wait_ready(cues)
+    if not all(cues.is_ready(name) for name in CUE_NAMES):
+        return
+    names = itertools.cycle(CUE_NAMES)
+
+    def trigger():
+        cues.play(next(names))
+
+    bench.measure('sound_cues.trigger', trigger, number=30)
+
+    # 从触发到开始播放的延迟
+    latencies = []
+    for name in CUE_NAMES * 3:
+        cues.effects[name].stop()
+        cues.last_latency_ms = None
+        cues.play(name)
+        deadline = time.perf_counter() + 1
+        while cues.last_latency_ms is None and time.perf_counter() < deadline:
+            QApplication.processEvents()
+        if cues.last_latency_ms is not None:
+            latencies.append(cues.last_latency_ms)
+    if latencies:
+        bench.record('sound_cues.play_latency', latencies)
+    cues.deleteLater()
+    flush_deleted()
+
+
+@case('http_api', 'http')
+def bench_http_api(bench):
+    """SSE推送：300个订阅者时GUI线程发布状态的开销，以及发布到全部订阅者收到的延迟"""
+    import socket
+    import selectors
+    from core.http_api import HttpApi
+    status = {'ok': True, 'phase': 'work', 'remaining_seconds': 3600, 'paused': False}
+    api = HttpApi(lambda command: dict(status), 0)
+    api.publish(dict(status))
+    if not api.start():
+        return
+
+    subscribers = 300
+    selector = selectors.DefaultSelector()
+    for _ in range(subscribers):
+        sock = socket.create_connection(('127.0.0.1', api.port))
+        sock.sendall(b'GET /events HTTP/1.1\r\nHost: localhost\r\n\r\n')
+        sock.setblocking(False)
+        selector.register(sock, selectors.EVENT_READ)
+
+    def drain(expected, timeout=5):
+        """等待每个订阅者都收到expected，返回耗时（毫秒）"""
+        start = time.perf_counter()
+        pending = {key.fileobj for key in selector.get_map().values()}
+        buffers = {}
+        while pending and time.perf_counter() - start < timeout:
+            for key, _ in selector.select(0.1):
+                data = buffers.get(key.fileobj, b'') + key.fileobj.recv(65536)
+                buffers[key.fileobj] = data
+                if expected in data:
+                    pending.discard(key.fileobj)
+        return (time.perf_counter() - start) * 1000
+
+    drain(b'"remaining_seconds": 3600')
+    deadline = time.perf_counter() + 5
+    while api.subscriber_count() < subscribers and time.perf_counter() < deadline:
+        time.sleep(0.01)
+
+    counter = itertools.count(3599, -1)
+
+    def publish():
+        status['remaining_seconds'] = next(counter)
+        api.publish(dict(status))
+
+    bench.measure('http_api.publish.300_subscribers', publish, number=20)
+
+    latencies = []
+    for _ in range(10):
+        publish()
+        latencies.append(drain(f'"remaining_seconds": {status["remaining_seconds"]}'.encode()))
+    bench.record('http_api.fanout.300_subscribers', latencies, subscribers=api.subscriber_count())
+
+    for key in list(selector.get_map().values()):
+        selector.unregister(key.fileobj)
+        key.fileobj.close()
+    api.stop()
+
+
+@case('status_file', 'status_file')
+def bench_status_file(bench):
+    """状态文件：写入方与读取方单次操作的耗时"""
+    import os
+    import tempfile
+    from utils.status_file import StatusFileWriter, StatusFileReader
+    path = os.path.join(tempfile.mkdtemp(prefix='tcya-status-'), 'status')
+    writer = StatusFileWriter(path)
+    writer.open()
+    writer.update({'phase': 'work', 'remaining_seconds': 3600, 'paused': False})
+    reader = StatusFileReader(path)
+    remaining = itertools.cycle(range(3600, 0, -1))
+
+    bench.measure('status_file.write', lambda: writer.write(1, next(remaining), False), number=10000)
+    # 每秒的倒计时刷新：结束时间不变，不产生写入
+    start = time.time()
+    ticks = itertools.count()
+
+    def tick():
+        i = next(ticks)
+        writer.update({'phase': 'work', 'remaining_seconds': 3600 - i % 3600, 'paused': False}, now=start + i % 3600)
+
+    bench.measure('status_file.update_tick', tick, number=10000)
+    bench.measure('status_file.read', reader.read, number=10000)
+    reader.close()
+    writer.close()
+    os.rmdir(os.path.dirname(path))
+
+
+@case('team_sync', 'team_sync')
+def bench_team_sync(bench):
+    """在一个进程内模拟多个实例：休息开始时间的对齐误差、每个实例的CPU和网络开销
+
+    每个实例的时钟有随机偏差，消息的单向延迟随机（0.2~5毫秒，两个方向不对称）。
+    """
+    import heapq
+    import random
+    from core.team_sync import TeamSyncProtocol
+
+    def simulate(count, seconds=20.0, seed=1):
+        rng = random.Random(seed)
+        true_time = [0.0]
+        peers = []
+        for _ in range(count):
+            skew = rng.uniform(-30, 30)
+            peer = TeamSyncProtocol('bench', 'bench-key', clock=lambda s=skew: true_time[0] + s)
+            peer.skew = skew
+            peer.alive = True
+            peer.break_at = None
+            peer.on_schedule = lambda at, _, p=peer: setattr(p, 'break_at', at)
+            peers.append(peer)
+        pending = []
+        order = itertools.count()
+
+        def send(source, messages):
+            # 目的地为None时发往所有实例（组播），否则为接收时传入的来源实例（单播）
+            for data, to in messages:
+                for peer in (peers if to is None else [to]):
+                    if peer is not source and peer.alive:
+                        heapq.heappush(pending, (true_time[0] + rng.uniform(0.0002, 0.005), next(order),
+                                                 peer, data, source))
+
+        def run(until):
+            # 事件驱动：按消息送达和定时器触发的先后顺序推进时间
+            tick = true_time[0]
+            while tick < until:
+                tick += 0.25
+                while pending and pending[0][0] <= tick:
+                    when, _, peer, data, source = heapq.heappop(pending)
+                    true_time[0] = when
+                    if peer.alive:
+                        send(peer, peer.receive(data, source=source))
+                true_time[0] = tick
+                for peer in peers:
+                    if peer.alive:
+                        send(peer, peer.tick())
+
+        def align_error(leader):
+            target = leader.schedule['break_at'] - leader.skew
+            errors = [abs(p.break_at - p.skew - target) for p in peers
+                      if p.alive and p is not leader and p.break_at is not None]
+            return max(errors) * 1000 if errors else None, len(errors)
+
+        start = time.process_time()
+        run(6)
+        leader = next(p for p in peers if p.is_leader())
+        send(leader, leader.set_local_schedule(leader.clock() + 600, 300))
+        run(10)
+        first = align_error(leader)
+        # 负责人离开，剩余实例重新选举并对齐
+        leader.alive = False
+        run(16)
+        leader = next(p for p in peers if p.alive and p.is_leader())
+        send(leader, leader.set_local_schedule(leader.clock() + 900, 300))
+        run(seconds)
+        second = align_error(leader)
+        cpu = time.process_time() - start
+        bytes_sent = sum(p.bytes_sent for p in peers) / count / seconds
+        bytes_received = sum(p.bytes_received for p in peers) / count / seconds
+        return first, second, cpu / count / seconds * 1000, bytes_sent, bytes_received
+
+    for count in (10, 50):
+        first, second, cpu_ms, sent, received = simulate(count)
+        bench.record(f'team_sync.align_error.{count}_peers', [first[0], second[0]],
+                     aligned=first[1], realigned_after_leader_left=second[1])
+        bench.record(f'team_sync.cpu_per_peer_second.{count}_peers', [cpu_ms],
+                     bytes_sent_per_second=round(sent, 1), bytes_received_per_second=round(received, 1))
+
+
+@case('simulation.day', 'timer')
+def bench_simulation_day(bench):
+    """虚拟时钟逐秒推进一天、快进一周的工作/休息循环，并核对事件序列"""
+    from benchmarks.simulation import simulate, first_mismatch
+    samples = []
+    for _ in range(3):
+        events, expected, elapsed_ms = simulate(1, fast=False)
+        samples.append(elapsed_ms)
+        flush_deleted()
+    bench.record('simulation.day', samples, events=len(events),
+                 sequence_ok=first_mismatch(events, expected) is None)
+    # 快进：只在单次定时器之间跳转
+    samples = []
+    for _ in range(3):
+        events, expected, elapsed_ms = simulate(7)
+        samples.append(elapsed_ms)
+        flush_deleted()
+    bench.record('simulation.week_fast_forward', samples, events=len(events),
+                 sequence_ok=first_mismatch(events, expected) is None)
+
+
+@case('simulation.memory', 'memory')
+def bench_simulation_memory(bench):
+    """模拟24小时，分别在默认模式和低内存模式下跟踪RSS（各用独立进程，互不影响）"""
+    import sys
+    import json
+    import subprocess
+    for mode, flags in (('default', []), ('low_memory', ['--low-memory'])):
+        start = time.perf_counter()
+        output = subprocess.run(
+            [sys.executable, '-m', 'benchmarks.simulation', '--memory', '24', '--json'] + flags,
+            capture_output=True, text=True, check=True
+        ).stdout
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        samples = [rss for _, rss, _ in json.loads(output.strip().splitlines()[-1]) if rss is not None]
+        if not samples:
+            continue
+        # 前几轮仍在加载和预热，取后一半作为稳定状态
+        steady = samples[len(samples) // 2:]
+        bench.record(f'simulation.memory.{mode}', [elapsed_ms],
+                     steady_rss_mb=round(sum(steady) / len(steady) / 1048576, 1),
+                     final_rss_mb=round(samples[-1] / 1048576, 1),
+                     peak_rss_mb=round(max(samples) / 1048576, 1))
+
+
+@case('log.emit', 'log')
+def bench_log(bench):
+    """GUI线程写一条日志的开销（只追加到缓冲区，格式化和写文件在后台线程）"""
+    import tempfile
+    from utils import log
+    workdir = tempfile.mkdtemp(prefix='tcya-log-')
+    # 直接创建管道，不安装全局的未捕获异常处理
+    pipeline = log.LogPipeline(workdir, {'default': 'INFO', 'scheduler': 'WARNING'}, console=False)
+    logger = log.get_logger('config')
+    filtered = log.get_logger('scheduler')
+    counter = itertools.count()
+    bench.measure('log.emit', lambda: logger.info(f"配置项 {next(counter)} 已更新"), number=1000)
+    bench.measure('log.emit_filtered', lambda: filtered.info("低于子系统级别，不记录"), number=1000)
+    bench.measure('log.dump_recent', lambda: pipeline.dump_recent('bench'), number=3)
+    # 写入线程跟不上时丢弃的记录数，正常应为0
+    dropped = pipeline.get_stats()['dropped']
+    pipeline.close()
+    if dropped:
+        print(f"日志基准测试中丢弃了 {dropped} 条记录")
+
+
+@case('policy', 'policy')
+def bench_policy(bench):
+    """策略条件获取的往返耗时，以及大量客户端同时启动时服务器每秒收到的最大请求数"""
+    import random
+    from collections import Counter
+    from core.policy import (encode_document, decode_document, fetch, refresh_delay, generate_private_key,
+                             PolicyManager)
+    from policytool import PolicyStandIn
+
+    private_key = generate_private_key()
+    key = private_key.public_key()
+    document = encode_document({'version': 1, 'minimum': {'break_duration': 5},
+                                'settings': {'allow_escape': False}}, private_key)
+    stand_in = PolicyStandIn(document=document).start()
+    first = fetch(stand_in.url)
+    bench.measure('policy.fetch_full', lambda: fetch(stand_in.url), number=10)
+    bench.measure('policy.fetch_not_modified', lambda: fetch(stand_in.url, first.etag, first.last_modified), number=10)
+    bench.measure('policy.verify', lambda: decode_document(document, key), number=100)
+    stand_in.stop()
+
+    # 5000个客户端在同一秒启动（没有缓存），模拟两小时内的请求分布
+    clients, interval, horizon = 5000, 3600.0, 7200.0
+    rng = random.Random(1)
+    for name, spread in (('no_jitter', 0.0), ('jitter', PolicyManager.STARTUP_SPREAD)):
+        start = time.perf_counter()
+        buckets = Counter()
+        for _ in range(clients):
+            t = rng.uniform(0, spread)
+            while t < horizon:
+                buckets[int(t)] += 1
+                t += refresh_delay(interval, rng) if spread else interval
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        bench.record(f'policy.stampede.{name}', [elapsed_ms], clients=clients,
+                     peak_requests_per_second=max(buckets.values()))
+
+
+@case('plugins', 'plugins')
+def bench_plugins(bench):
+    """GUI线程分发钩子的开销，以及超时/卡住的插件被隔离所需的时间"""
+    from importlib.metadata import EntryPoint
+    from core.plugins import PluginManager, ENTRY_POINT_GROUP
+
+    def entry_point(name, attr):
+        return EntryPoint(name, f'benchmarks.sample_plugins:{attr}', ENTRY_POINT_GROUP)
+
+    def wait(condition, timeout=10):
+        deadline = time.monotonic() + timeout
+        while not condition() and time.monotonic() < deadline:
+            QApplication.processEvents()
+            time.sleep(0.005)
+
+    # 4个快速插件，GUI线程只负责提交
+    fast = PluginManager([entry_point(f'fast{i}', 'FastPlugin') for i in range(4)])
+    event = {'phase': 'break', 'remaining_seconds': 300, 'paused': False}
+    fast.dispatch('on_break_start', event)
+    wait(lambda: all(host.calls for host in fast.hosts))
+    bench.record('plugins.import', [host.import_ms for host in fast.hosts])
+    bench.measure('plugins.dispatch', lambda: fast.dispatch('on_break_start', event), number=100)
+    fast.close()
+
+    # 连续超时的插件和卡住的插件分别在多长时间后被隔离
+    for name, attr in (('slow', 'SlowPlugin'), ('hanging', 'HangingPlugin')):
+        manager = PluginManager([entry_point(name, attr)], budget_ms=50)
+        host = manager.hosts[0]
+        start = time.perf_counter()
+        dispatch_ms = []
+        while not host.isolated and time.perf_counter() - start < 10:
+            calls = host.calls
+            t = time.perf_counter()
+            manager.dispatch('on_break_start', event)
+            dispatch_ms.append((time.perf_counter() - t) * 1000)
+            wait(lambda: host.calls > calls or host.isolated, timeout=1)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        bench.record(f'plugins.isolate.{name}', [elapsed_ms], isolated=host.isolated,
+                     max_dispatch_ms=round(max(dispatch_ms), 4))
+        manager.close()
+
+
+@case('overlay_damage', 'overlay')
+def bench_overlay_damage(bench):
+    """休息遮罩层每秒重绘的面积（远程桌面服务器需要编码传输的区域）
+
+    用事件过滤器统计遮罩层收到的绘制区域，相当于按 X Damage 扩展发送更新的 VNC 服务器看到的损坏区域；
+    字节数按未压缩的32位像素（VNC Raw 编码）估算。
+    """
+    from PySide6.QtCore import QObject
+    from core.clock import VirtualClock
+    from gui.overlay_window import OverlayWindow
+
+    class DamageCounter(QObject):
+        def __init__(self):
+            super().__init__()
+            self.pixels = 0
+
+        def eventFilter(self, obj, event):
+            if event.type() == QEvent.Paint:
+                region = event.region()
+                try:
+                    rects = list(region)
+                except TypeError:
+                    rects = [region.boundingRect()]
+                self.pixels += sum(rect.width() * rect.height() for rect in rects)
+            return False
+
+    seconds = 120
+    for name, options in (('normal', {}),
+                          ('low_bandwidth', {'low_bandwidth': True}),
+                          ('low_bandwidth_minutes', {'low_bandwidth': True, 'minute_text': True})):
+        clock = VirtualClock()
+        overlay = OverlayWindow(OVERLAY_COLOR, 10, 50, clock=clock, **options)
+        overlay.show()
+        QApplication.processEvents()
+        counter = DamageCounter()
+        overlay.installEventFilter(counter)
+        start = time.perf_counter()
+        for _ in range(seconds):
+            clock.advance(1)
+            QApplication.processEvents()
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        overlay.removeEventFilter(counter)
+        per_second = counter.pixels / seconds
+        bench.record(f'overlay_damage.{name}', [elapsed_ms / seconds],
+                     damage_px_per_second=round(per_second),
+                     raw_kb_per_second=round(per_second * 4 / 1024, 1))
+        overlay.close()
+        overlay.deleteLater()
+        flush_deleted()
+
+
+@case('supervisor', 'supervisor')
+def bench_supervisor(bench):
+    """结束或冻结子进程后，到计时状态恢复（控制接口重新返回status）所需的时间
+
+    分别测量使用已完成导入的备用进程和冷启动的情况；每次重启后检查剩余时间是否接上崩溃前的计时。
+    """
+    import os
+    import signal
+    import tempfile
+    import threading
+    from utils.ipc import send_command, InstanceNotResponding
+    from utils.supervisor import Supervisor, child_command
+
+    script = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'main.py')
+    # 独立的运行时目录，避免连接到正在使用的实例
+    runtime_dir = tempfile.mkdtemp(prefix='tcya-supervisor-')
+    previous_runtime_dir = os.environ.get('XDG_RUNTIME_DIR')
+    os.environ['XDG_RUNTIME_DIR'] = runtime_dir
+
+    def wait_status(timeout=60):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            try:
+                response = send_command('status', timeout=0.5)
+            except InstanceNotResponding:
+                response = None
+            if response is not None and response.get('ok'):
+                return response
+            time.sleep(0.01)
+        return None
+
+    def wait_until(condition, timeout=60):
+        deadline = time.monotonic() + timeout
+        while not condition() and time.monotonic() < deadline:
+            time.sleep(0.05)
+
+    rounds = 2 if bench.quick else 5
+    try:
+        for name, standby in (('warm', True), ('cold', False)):
+            supervisor = Supervisor(child_command(script), heartbeat=0.2, hang_timeout=2.0,
+                                    stable_after=0, standby=standby)
+            thread = threading.Thread(target=supervisor.run, daemon=True)
+            thread.start()
+            wait_status()
+            signals = [('kill', signal.SIGKILL if hasattr(signal, 'SIGKILL') else signal.SIGTERM)]
+            if hasattr(signal, 'SIGSTOP'):
+                signals.append(('hang', signal.SIGSTOP))
+            for kind, signum in signals:
+                samples = []
+                drift = []
+                for _ in range(rounds):
+                    # 等待备用进程完成导入、监督进程拿到最新状态
+                    wait_until(lambda: supervisor.last_heartbeat is not None and
+                               (not standby or supervisor.standby is not None and supervisor.standby.ready.is_set()))
+                    before = wait_status()
+                    restarts = supervisor.restarts
+                    start = time.monotonic()
+                    os.kill(supervisor.active.process.pid, signum)
+                    # 等到旧进程被替换后再查询，冻结的进程仍占用着控制接口
+                    wait_until(lambda: supervisor.restarts > restarts)
+                    after = wait_status()
+                    elapsed = time.monotonic() - start
+                    samples.append(elapsed * 1000)
+                    if before and after:
+                        drift.append(abs(before['remaining_seconds'] - elapsed - after['remaining_seconds']))
+                bench.record(f'supervisor.restore.{kind}.{name}', samples,
+                             max_remaining_drift_s=round(max(drift), 1) if drift else None)
+            supervisor.stop()
+            thread.join(timeout=15)
+    finally:
+        if previous_runtime_dir is None:
+            os.environ.pop('XDG_RUNTIME_DIR', None)
+        else:
+            os.environ['XDG_RUNTIME_DIR'] = previous_runtime_dir
+
+
+@case('notifications', 'notifications')
+def bench_notifications(bench):
+    """休息预告通知：通知服务很慢时GUI线程的开销，以及点击“稍后提醒”到收到信号的延迟
+
+    使用私有的 dbus-daemon 和模拟的通知服务，需要 jeepney 和 dbus-daemon。
+    """
+    from benchmarks import mock_notifications
+    from core.notifications import DesktopNotifier
+    if not mock_notifications.available():
+        print("未找到dbus-daemon，跳过通知基准测试")
+        return
+    bus = mock_notifications.PrivateBus()
+    try:
+        for name, delay in (('slow_daemon', 2.0), ('fast_daemon', 0.0)):
+            server = mock_notifications.MockNotificationServer(bus.address, delay=delay)
+            notifier = DesktopNotifier(bus=bus.address)
+            actions = []
+            notifier.action_invoked.connect(lambda tag, action: actions.append(action))
+            notifier.start()
+            # 服务每次调用都要等 delay 秒，GUI线程只放入队列
+            bench.measure(f'notifications.notify.{name}',
+                          lambda: notifier.notify('break_warning', "1 分钟后休息", actions=[('snooze', "稍后提醒")]),
+                          number=10, repeat=3, warmup=0)
+            if delay == 0:
+                deadline = time.monotonic() + 5
+                while not server.notifications and time.monotonic() < deadline:
+                    time.sleep(0.01)
+                notification_id = next(iter(server.notifications))
+                samples = []
+                for _ in range(20):
+                    count = len(actions)
+                    start = time.perf_counter()
+                    server.invoke_action(notification_id, 'snooze')
+                    while len(actions) == count and time.perf_counter() - start < 5:
+                        QApplication.processEvents()
+                    samples.append((time.perf_counter() - start) * 1000)
+                # 同一标识的通知互相替换，服务端只应保留一条
+                bench.record('notifications.action_roundtrip', samples, notifications=len(server.notifications))
+            notifier.stop()
+            server.close()
+    finally:
+        bus.close()
+
+
+@case('history', 'history')
+def bench_history(bench):
+    """几百万条历史记录：打开窗口、滚动、汇总统计的耗时，以及缓存的记录数"""
+    import os
+    import random
+    import tempfile
+    from core.history import HistoryStore, HEADER, RECORD, MAGIC, VERSION, WORK, BREAK
+    from gui.history_window import HistoryWindow
+
+    rows = 200_000 if bench.quick else 2_000_000
+    workdir = tempfile.mkdtemp(prefix='tcya-history-')
+    path = os.path.join(workdir, 'history.bin')
+    # 约每天16段，从多年前开始
+    start = time.time() - rows * 5400
+    with open(path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, VERSION, RECORD.size))
+        chunk = []
+        for i in range(rows):
+            kind = BREAK if i % 2 else WORK
+            chunk.append(RECORD.pack(start + i * 5400, 600 if kind == BREAK else 3000, 600 if kind == BREAK else 3600,
+                                     kind, i % 7 != 0))
+            if len(chunk) == 65536:
+                f.write(b''.join(chunk))
+                chunk.clear()
+        f.write(b''.join(chunk))
+    store = HistoryStore(path)
+
+    windows = []
+
+    def open_window():
+        window = HistoryWindow(store, release_on_close=True)
+        window.show()
+        QApplication.processEvents()
+        windows.append(window)
+
+    def close_windows():
+        for window in windows:
+            window.close()
+        windows.clear()
+        flush_deleted()
+
+    bench.measure('history.open', open_window, number=1, repeat=5, teardown=close_windows)
+
+    window = HistoryWindow(store)
+    window.show()
+    # 等后台统计完成，避免影响滚动的测量
+    while window._aggregating:
+        QApplication.processEvents()
+        time.sleep(0.01)
+    QApplication.processEvents()
+    view, model = window.view, window.model
+    bar = view.verticalScrollBar()
+
+    def scroll_page():
+        # 翻到底部时由视图触发 fetchMore
+        bar.setValue(bar.value() + bar.pageStep())
+        if bar.value() == bar.maximum() and model.canFetchMore():
+            model.fetchMore()
+        view.viewport().repaint()
+
+    bench.measure('history.scroll_page', scroll_page, number=50)
+
+    while model.canFetchMore():
+        model.fetchMore()
+    rng = random.Random(1)
+
+    def jump():
+        bar.setValue(rng.randrange(bar.maximum() + 1))
+        view.viewport().repaint()
+
+    bench.measure('history.jump', jump, number=50)
+    bench.record('history.cache', [0.0], rows=rows, cached_pages=len(model.pages),
+                 cached_rows=sum(len(page) for page in model.pages.values()), page_reads=model.page_reads)
+
+    if os.path.exists(store.aggregate_path):
+        os.remove(store.aggregate_path)
+    t = time.perf_counter()
+    store.aggregate()
+    bench.record('history.aggregate_full', [(time.perf_counter() - t) * 1000], rows=rows)
+    for _ in range(100):
+        store.append(WORK, time.time(), 3000, 3600, True)
+
+    def incremental():
+        store.append(BREAK, time.time(), 600, 600, True)
+        store.aggregate()
+
+    bench.measure('history.aggregate_incremental', incremental, number=5, repeat=5)
+    window.close()
+    window.deleteLater()
+    store.close()
+    flush_deleted()
+
+
+@case('tui', 'tui')
+def bench_tui(bench):
+    """终端界面：每次刷新输出的字节数和绘制耗时（工作状态行、全屏休息画面）"""
+    import io
+    from core.clock import VirtualClock
+    from tui import TerminalFrontend
+
+    class FakeTerminal:
+        def __init__(self, width, height):
+            self.out = io.StringIO()
+            self.width, self.height = width, height
+
+        def size(self):
+            return self.width, self.height
+
+    config = dict(default_config(), work_duration=60, break_duration=10, schedules=[])
+    for width, height in ((80, 24), (200, 60)):
+        clock = VirtualClock()
+        terminal = FakeTerminal(width, height)
+        frontend = TerminalFrontend(config, terminal, clock=clock)
+        frontend.session.start_work()
+        first = frontend.screen.bytes_written
+        label = f"{width}x{height}"
+        ticks = [0]
+
+        def tick():
+            clock.advance(1)
+            ticks[0] += 1
+
+        written = frontend.screen.bytes_written
+        bench.measure(f'tui.work_tick[{label}]', tick, number=60, repeat=5)
+        bench.record(f'tui.work_bytes[{label}]', [0.0], first_frame=first,
+                     bytes_per_tick=round((frontend.screen.bytes_written - written) / ticks[0], 1))
+
+        written = frontend.screen.bytes_written
+        frontend.session.start_break()
+        first = frontend.screen.bytes_written - written
+        written = frontend.screen.bytes_written
+        ticks[0] = 0
+        bench.measure(f'tui.break_tick[{label}]', tick, number=60, repeat=5)
+        bench.record(f'tui.break_bytes[{label}]', [0.0], first_frame=first,
+                     bytes_per_tick=round((frontend.screen.bytes_written - written) / ticks[0], 1))
+        # 没有变化时不输出
+        written = frontend.screen.bytes_written
+        frontend.redraw()
+        bench.record(f'tui.idle_bytes[{label}]', [0.0], bytes=frontend.screen.bytes_written - written)
+        frontend.close()
@@ -0,0 +1,91 @@
+"""基准测试用的私有D-Bus会话总线和模拟通知服务"""
+import queue
+import shutil
+import signal
+import subprocess
+import threading
+from jeepney import DBusAddress, HeaderFields, MessageType, new_method_return, new_signal, new_error
+from jeepney.bus_messages import message_bus
+from jeepney.io.blocking import open_dbus_connection, Proxy
+
+PATH = '/org/freedesktop/Notifications'
+INTERFACE = 'org.freedesktop.Notifications'
+
+
+class PrivateBus:
+    """独立的 dbus-daemon，不影响当前桌面会话"""
+
+    def __init__(self):
+        self.process = subprocess.Popen(['dbus-daemon', '--session', '--nofork', '--print-address'],
+                                        stdout=subprocess.PIPE)
+        self.address = self.process.stdout.readline().decode().strip()
+
+    def close(self):
+        self.process.send_signal(signal.SIGTERM)
+        self.process.wait(timeout=5)
+
+
+class MockNotificationServer:
+    """实现 Notify/CloseNotification/GetCapabilities，可以模拟响应很慢的通知服务"""
+
+    def __init__(self, address, delay=0.0):
+        self.delay = delay
+        self.notifications = {}  # ID -> (摘要, 动作列表)
+        self.calls = []
+        self._next_id = 1
+        self._outgoing = queue.Queue()
+        self._stop = threading.Event()
+        self.connection = open_dbus_connection(address)
+        Proxy(message_bus, self.connection).RequestName(INTERFACE)
+        self._thread = threading.Thread(target=self._run, name='MockNotificationServer', daemon=True)
+        self._thread.start()
+
+    def invoke_action(self, notification_id, action):
+        """模拟用户点击通知上的按钮"""
+        self._outgoing.put(new_signal(DBusAddress(PATH, interface=INTERFACE), 'ActionInvoked', 'us',
+                                      (notification_id, action)))
+
+    def _run(self):
+        while not self._stop.is_set():
+            while not self._outgoing.empty():
+                self.connection.send(self._outgoing.get())
+            try:
+                message = self.connection.receive(timeout=0.02)
+            except TimeoutError:
+                continue
+            if message.header.message_type == MessageType.method_call:
+                self._handle(message)
+
+    def _handle(self, message):
+        member = message.header.fields.get(HeaderFields.member)
+        self.calls.append(member)
+        if member == 'GetCapabilities':
+            reply = new_method_return(message, 'as', (['actions', 'body'],))
+        elif member == 'Notify':
+            if self.delay:
+                self._stop.wait(self.delay)
+            replaces_id = message.body[1]
+            notification_id = replaces_id or self._next_id
+            if not replaces_id:
+                self._next_id += 1
+            self.notifications[notification_id] = (message.body[3], message.body[5])
+            reply = new_method_return(message, 'u', (notification_id,))
+        elif member == 'CloseNotification':
+            notification_id = message.body[0]
+            self.notifications.pop(notification_id, None)
+            reply = new_method_return(message)
+            self.connection.send(reply)
+            reply = new_signal(DBusAddress(PATH, interface=INTERFACE), 'NotificationClosed', 'uu',
+                               (notification_id, 3))
+        else:
+            reply = new_error(message, 'org.freedesktop.DBus.Error.UnknownMethod')
+        self.connection.send(reply)
+
+    def close(self):
+        self._stop.set()
+        self._thread.join(timeout=2)
+        self.connection.close()
+
+
+def available():
+    return shutil.which('dbus-daemon') is not None
@@ -0,0 +1,250 @@
+"""性能基准测试
+
+在无界面的 offscreen 平台下运行，结果保存为 JSON，并可与基线对比。
+
+    python -m benchmarks.run run                       # 运行并写入 benchmarks/results/latest.json
+    python -m benchmarks.run run --save-baseline       # 同时更新 benchmarks/baseline.json
+    python -m benchmarks.run compare [结果文件]          # 与基线对比，发现性能回退时返回1
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import importlib
+import platform
+import tempfile
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BENCH_DIR = os.path.join(ROOT, 'benchmarks')
+DEFAULT_OUTPUT = os.path.join(BENCH_DIR, 'results', 'latest.json')
+DEFAULT_BASELINE = os.path.join(BENCH_DIR, 'baseline.json')
+
+# 屏幕布局（offscreen平台的虚拟屏幕）
+LAYOUTS = {
+    'single': [
+        {'name': 'S1', 'x': 0, 'y': 0, 'width': 1920, 'height': 1080},
+    ],
+    'dual': [
+        {'name': 'S1', 'x': 0, 'y': 0, 'width': 1920, 'height': 1080},
+        {'name': 'S2', 'x': 1920, 'y': 0, 'width': 1920, 'height': 1080},
+    ],
+    'triple': [
+        {'name': 'S1', 'x': 0, 'y': 0, 'width': 2560, 'height': 1440},
+        {'name': 'S2', 'x': 2560, 'y': 0, 'width': 3840, 'height': 2160},
+        {'name': 'S3', 'x': -1080, 'y': 0, 'width': 1080, 'height': 1920},
+    ],
+}
+# 多屏布局下只需重复运行与屏幕几何相关的分组
+MULTI_SCREEN_GROUPS = {'overlay'}
+
+
+def child_env(layout, workdir):
+    """构造子进程环境，固定影响结果的变量"""
+    config_file = os.path.join(workdir, 'screens.json')
+    screens = [dict(screen, logicalDpi=96, logicalBaseDpi=96, dpr=1) for screen in LAYOUTS[layout]]
+    with open(config_file, 'w', encoding='utf-8') as f:
+        json.dump({'screens': screens}, f)
+    env = dict(os.environ)
+    env.update({
+        'QT_QPA_PLATFORM': f'offscreen:configfile={config_file}',
+        'QT_SCALE_FACTOR': '1',
+        'PYTHONHASHSEED': '0',
+        'PYTHONDONTWRITEBYTECODE': '1',
+        'PYTHONPATH': os.pathsep.join(filter(None, [ROOT, os.environ.get('PYTHONPATH')])),
+    })
+    return env
+
+
+def spawn(args, layout):
+    """在独立的临时目录中运行子进程，避免读写仓库中的 config.yaml"""
+    with tempfile.TemporaryDirectory(prefix='tcya-bench-') as workdir:
+        out_file = os.path.join(workdir, 'result.json')
+        start = time.perf_counter()
+        proc = subprocess.run(
+            [sys.executable, '-m', 'benchmarks.run'] + args + ['--out', out_file],
+            cwd=workdir, env=child_env(layout, workdir)
+        )
+        wall_ms = (time.perf_counter() - start) * 1000
+        if proc.returncode != 0:
+            raise RuntimeError(f"基准子进程失败: {' '.join(args)} (退出码 {proc.returncode})")
+        with open(out_file, 'r', encoding='utf-8') as f:
+            return json.load(f), wall_ms
+
+
+def run_worker(args):
+    """子进程：创建QApplication并运行指定分组的用例"""
+    from PySide6.QtWidgets import QApplication
+    app = QApplication.instance() or QApplication([])
+    from benchmarks.bench import Bench, CASES
+    # 导入时注册用例
+    importlib.import_module('benchmarks.cases')
+
+    groups = set(args.groups.split(',')) if args.groups else None
+    bench = Bench(layout=args.layout, quick=args.quick)
+    for name, (group, func) in CASES.items():
+        if groups is not None and group not in groups:
+            continue
+        if args.filter and args.filter not in name:
+            continue
+        func(bench)
+    with open(args.out, 'w', encoding='utf-8') as f:
+        json.dump(bench.results, f)
+    app.quit()
+
+
+def run_cold(args):
+    """子进程：冷启动一次MainWindow，记录进程内耗时"""
+    start = time.perf_counter()
+    from PySide6.QtWidgets import QApplication
+    app = QApplication([])
+    from gui.main_window import MainWindow
+    imported = time.perf_counter()
+    window = MainWindow()
+    app.processEvents()
+    ready = time.perf_counter()
+    with open(args.out, 'w', encoding='utf-8') as f:
+        json.dump({'import_ms': (imported - start) * 1000,
+                   'construct_ms': (ready - imported) * 1000}, f)
+    # 不走退出确认流程，直接结束进程
+    window.hide()
+    os._exit(0)
+
+
+def collect_meta():
+    meta = {
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+    }
+    try:
+        import PySide6
+        meta['pyside6'] = PySide6.__version__
+    except ImportError:
+        pass
+    try:
+        meta['commit'] = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT,
+                                        capture_output=True, text=True).stdout.strip()
+    except OSError:
+        pass
+    return meta
+
+
+def run_all(args):
+    from benchmarks.bench import summarize
+    results = {}
+    extra = ['--quick'] if args.quick else []
+    if args.filter:
+        extra += ['--filter', args.filter]
+    for layout in LAYOUTS:
+        worker_args = ['worker', '--layout', layout] + extra
+        if layout != 'single':
+            worker_args += ['--groups', ','.join(sorted(MULTI_SCREEN_GROUPS))]
+        print(f"运行基准: 布局 {layout} ...", flush=True)
+        layout_results, _ = spawn(worker_args, layout)
+        results.update(layout_results)
+
+    if not args.filter or args.filter in 'main_window.cold_startup':
+        print("运行基准: 冷启动 ...", flush=True)
+        walls, constructs = [], []
+        for _ in range(3 if args.quick else args.cold_runs):
+            child, wall_ms = spawn(['cold'], 'single')
+            walls.append(wall_ms)
+            constructs.append(child['construct_ms'])
+        results['main_window.cold_startup'] = summarize(walls)
+        results['main_window.cold_construct'] = summarize(constructs)
+
+    report = {'meta': collect_meta(), 'results': results}
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2, ensure_ascii=False, sort_keys=True)
+    print(f"结果已写入 {args.output}")
+    if args.save_baseline:
+        with open(DEFAULT_BASELINE, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False, sort_keys=True)
+        print(f"基线已更新 {DEFAULT_BASELINE}")
+    print_table(results)
+
+
+def print_table(results):
+    width = max((len(name) for name in results), default=10)
+    print(f"{'用例'.ljust(width)}  {'中位数(ms)':>12}  {'p95(ms)':>10}")
+    for name in sorted(results):
+        r = results[name]
+        print(f"{name.ljust(width)}  {r['median_ms']:>12.3f}  {r['p95_ms']:>10.3f}")
+
+
+def compare(args):
+    """对比结果与基线，中位数变慢超过阈值且超过噪声下限即视为回退"""
+    with open(args.baseline, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)['results']
+    with open(args.current, 'r', encoding='utf-8') as f:
+        current = json.load(f)['results']
+
+    regressions = []
+    width = max((len(name) for name in current), default=10)
+    print(f"{'用例'.ljust(width)}  {'基线(ms)':>10}  {'当前(ms)':>10}  {'变化':>8}")
+    for name in sorted(set(baseline) | set(current)):
+        if name not in current or name not in baseline:
+            state = '新增' if name in current else '缺失'
+            print(f"{name.ljust(width)}  {state}")
+            continue
+        old = baseline[name]['median_ms']
+        new = current[name]['median_ms']
+        ratio = new / old if old > 0 else 1.0
+        flag = ''
+        if ratio > 1 + args.threshold and new - old > args.min_delta:
+            flag = '  <-- 回退'
+            regressions.append(name)
+        print(f"{name.ljust(width)}  {old:>10.3f}  {new:>10.3f}  {(ratio - 1) * 100:>+7.1f}%{flag}")
+
+    if regressions:
+        print(f"\n发现 {len(regressions)} 项性能回退（阈值 {args.threshold * 100:.0f}%）")
+        return 1
+    print("\n未发现性能回退")
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='TakeCareYourAss 性能基准测试')
+    sub = parser.add_subparsers(dest='command')
+
+    p_run = sub.add_parser('run', help='运行全部基准')
+    p_run.add_argument('--output', default=DEFAULT_OUTPUT, help='结果文件路径')
+    p_run.add_argument('--save-baseline', action='store_true', help='同时保存为基线')
+    p_run.add_argument('--quick', action='store_true', help='减少重复次数，快速运行')
+    p_run.add_argument('--filter', default='', help='只运行名称包含该字符串的用例')
+    p_run.add_argument('--cold-runs', type=int, default=7, help='冷启动重复次数')
+
+    p_cmp = sub.add_parser('compare', help='与基线对比')
+    p_cmp.add_argument('current', nargs='?', default=DEFAULT_OUTPUT, help='当前结果文件')
+    p_cmp.add_argument('--baseline', default=DEFAULT_BASELINE, help='基线文件')
+    p_cmp.add_argument('--threshold', type=float, default=0.2, help='允许的相对变慢比例')
+    p_cmp.add_argument('--min-delta', type=float, default=0.05, help='忽略小于该值(ms)的差异')
+
+    p_worker = sub.add_parser('worker')
+    p_worker.add_argument('--layout', default='single')
+    p_worker.add_argument('--groups', default='')
+    p_worker.add_argument('--filter', default='')
+    p_worker.add_argument('--quick', action='store_true')
+    p_worker.add_argument('--out', required=True)
+
+    p_cold = sub.add_parser('cold')
+    p_cold.add_argument('--out', required=True)
+
+    args = parser.parse_args(argv)
+    if args.command == 'compare':
+        return compare(args)
+    if args.command == 'worker':
+        return run_worker(args)
+    if args.command == 'cold':
+        return run_cold(args)
+    if args.command is None:
+        args = parser.parse_args(['run'] + (argv or sys.argv[1:]))
+    return run_all(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,41 @@
+"""基准测试用的示例插件（不通过安装包注册，由用例直接构造入口点）"""
+import time
+
+
+class FastPlugin:
+    """每个钩子只记录事件"""
+
+    def __init__(self, context):
+        self.context = context
+        self.events = []
+
+    def on_work_start(self, event):
+        self.events.append(event['hook'])
+
+    def on_break_start(self, event):
+        self.events.append(event['hook'])
+
+    def on_break_end(self, event):
+        self.events.append(event['hook'])
+
+
+class SlowPlugin:
+    """每次都超过时间预算（例如同步调用很慢的外部服务）"""
+
+    DELAY = 0.1
+
+    def __init__(self, context):
+        self.context = context
+
+    def on_break_start(self, event):
+        time.sleep(self.DELAY)
+
+
+class HangingPlugin:
+    """钩子一直不返回"""
+
+    def __init__(self, context):
+        self.context = context
+
+    def on_break_start(self, event):
+        time.sleep(3600)
@@ -0,0 +1,279 @@
+"""虚拟时钟模拟：推进一周的工作/休息循环并核对事件序列
+
+TimerWindow、遮罩层和调度器使用 VirtualClock，按脚本执行暂停、继续和ESC跳过休息，
+记录休息开始、结束前一分钟提醒、休息结束等事件，与按配置推算出的期望序列逐条比较。
+默认用 fast_forward 在计时结束等单次定时器之间跳转，一周只需几百毫秒；
+--per-tick 逐个触发每秒刷新等所有定时器，与真实运行的时序一致，一天（约20轮）约两秒。
+
+--memory 按模拟的小时数运行，每轮打开并关闭一次设置窗口、休息时播放动作动画，
+每轮结束后采样RSS，用于比较低内存模式与默认模式的稳定内存占用。
+
+    python -m benchmarks.simulation          # 模拟一周，序列不一致时返回1
+    python -m benchmarks.simulation --days 1 --per-tick
+    python -m benchmarks.simulation --memory 24 --low-memory
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+
+WORK_MINUTES = 60
+BREAK_MINUTES = 10
+PAUSE_AT = 20 * 60  # 暂停发生在工作开始后的秒数
+PAUSE_LENGTH = 15 * 60
+SKIP_AFTER = 2 * 60  # 休息开始后多久按ESC
+
+
+def pauses_in(cycle):
+    return cycle % 7 == 2
+
+
+def skips_in(cycle):
+    return cycle % 5 == 4
+
+
+class Simulation:
+    def __init__(self, config=None, fast=False):
+        from PySide6.QtCore import QEvent, Qt
+        from PySide6.QtGui import QKeyEvent
+        from core.clock import VirtualClock
+        from core.config_manager import ConfigManager
+        from gui.timer_window import TimerWindow
+        self._escape = lambda: QKeyEvent(QEvent.KeyPress, Qt.Key_Escape, Qt.NoModifier)
+
+        self.clock = VirtualClock()
+        self.fast = fast
+        self.start = self.clock.monotonic()
+        self.events = []
+        # 只使用内存中的配置，不在当前目录写入 config.yaml
+        defaults = dict(ConfigManager(config_file=None).default_config)
+        defaults.update({
+            'work_duration': WORK_MINUTES,
+            'break_duration': BREAK_MINUTES,
+            'presentation_defer': False,
+            'calendar_files': [],
+            'schedules': [],
+            'exercise_dir': '',
+            'hide_timer': False,
+        })
+        config = dict(defaults, **(config or {}))
+        self.config = config
+        self.window = TimerWindow(clock=self.clock)
+        self.window.set_config(config)
+        self.window.break_started.connect(lambda: self.log('break_start'))
+        self.window.break_ended.connect(lambda completed: self.log('break_end' if completed else 'break_skipped'))
+        self.window.one_minute_warning.connect(lambda: self.log('one_minute_warning'))
+        self.window.start_timer()
+
+    def now(self):
+        return round(self.clock.monotonic() - self.start, 3)
+
+    def log(self, name):
+        self.events.append((self.now(), name))
+
+    def run(self, seconds):
+        if self.fast:
+            # 跳过中间的每秒刷新，结束时补触发一次
+            self.clock.fast_forward(seconds)
+        else:
+            # 逐个触发定时器（包括每秒刷新），与真实运行的时序一致
+            self.clock.advance(seconds)
+
+    def press_escape(self):
+        self.window.overlay.keyPressEvent(self._escape())
+
+    def close(self):
+        self.window.stop_timer()
+        self.window.deleteLater()
+
+
+def expected_events(cycles):
+    """按配置推算的期望事件序列"""
+    events = []
+    t = 0
+    for cycle in range(cycles):
+        work = WORK_MINUTES * 60 + (PAUSE_LENGTH if pauses_in(cycle) else 0)
+        t += work
+        events.append((t - 60, 'one_minute_warning'))
+        events.append((t, 'break_start'))
+        if skips_in(cycle):
+            t += SKIP_AFTER
+            events.append((t, 'break_skipped'))
+        else:
+            t += BREAK_MINUTES * 60
+            events.append((t, 'break_end'))
+    return events
+
+
+def run_cycle(sim, cycle, during_break=None):
+    work = WORK_MINUTES * 60
+    if pauses_in(cycle):
+        sim.run(PAUSE_AT)
+        sim.window.toggle_pause()
+        sim.run(PAUSE_LENGTH)
+        sim.window.toggle_pause()
+        work -= PAUSE_AT
+    # 分两段推进，快进模式下结束前一分钟的那次刷新也会触发
+    sim.run(work - 60)
+    sim.run(60)
+    if during_break is not None:
+        during_break()
+    if skips_in(cycle):
+        sim.run(SKIP_AFTER)
+        sim.press_escape()
+    else:
+        sim.run(BREAK_MINUTES * 60)
+
+
+def run_cycles(sim, cycles):
+    for cycle in range(cycles):
+        run_cycle(sim, cycle)
+
+
+def cycles_for_days(days):
+    return days * 24 * 60 // (WORK_MINUTES + BREAK_MINUTES)
+
+
+def simulate(days=7, fast=True):
+    """模拟指定天数，返回 (实际事件, 期望事件, 耗时毫秒)；fast 为False时逐秒推进"""
+    cycles = cycles_for_days(days)
+    started = time.perf_counter()
+    sim = Simulation(fast=fast)
+    try:
+        run_cycles(sim, cycles)
+        events = list(sim.events)
+    finally:
+        sim.close()
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    return events, expected_events(cycles), elapsed_ms
+
+
+def make_exercise_content(directory, frames=60, size=640):
+    """生成一组PNG序列帧作为动作动画"""
+    from PySide6.QtGui import QImage, QColor
+    sequence = os.path.join(directory, 'stretch')
+    os.makedirs(sequence, exist_ok=True)
+    for i in range(frames):
+        image = QImage(size, size, QImage.Format_ARGB32)
+        image.fill(QColor(i * 4 % 256, 128, 255 - i * 4 % 256))
+        image.save(os.path.join(sequence, f'{i:03d}.png'))
+    return directory
+
+
+def play_animation(animation, frames):
+    """逐帧播放动作动画，等待后台线程解码（虚拟时钟下动画定时器不会触发）"""
+    for _ in range(frames):
+        key = (animation.current, animation.frame_index)
+        deadline = time.perf_counter() + 2
+        while animation.current is not None and not animation.cache.contains(key) \
+                and time.perf_counter() < deadline:
+            time.sleep(0.001)
+        animation._advance()
+
+
+def flush_deleted():
+    from PySide6.QtCore import QCoreApplication, QEvent
+    QCoreApplication.sendPostedEvents(None, QEvent.DeferredDelete)
+    QCoreApplication.processEvents()
+
+
+def memory_profile(hours=24, low_memory=False, frames=60):
+    """模拟指定小时数，返回每轮结束后的 (模拟小时, RSS字节, 已开始的休息次数)
+
+    每轮按MainWindow的方式打开并关闭一次设置窗口（默认模式下隐藏后复用，低内存模式下销毁），
+    休息时播放一遍动作动画；低内存模式在休息结束后释放缓存并归还空闲内存。
+    """
+    from gui.settings_window import SettingsWindow
+    from utils import memory
+
+    content_dir = make_exercise_content(tempfile.mkdtemp(prefix='tcya-memory-'))
+    sim = Simulation({'low_memory_mode': low_memory, 'exercise_dir': content_dir})
+    settings = []
+    samples = []
+
+    def open_settings():
+        if not settings:
+            window = SettingsWindow(sim.config, sim.window, release_on_close=low_memory)
+            window.destroyed.connect(lambda: settings.clear())
+            settings.append(window)
+        settings[0].show()
+        flush_deleted()
+        settings[0].close()
+
+    def during_break():
+        if sim.window.exercise is not None:
+            play_animation(sim.window.exercise, frames)
+
+    try:
+        cycle = 0
+        while sim.now() < hours * 3600:
+            open_settings()
+            run_cycle(sim, cycle, during_break)
+            cycle += 1
+            flush_deleted()
+            if low_memory:
+                sim.window.release_caches()
+                memory.release()
+            breaks = sum(1 for _, name in sim.events if name == 'break_start')
+            samples.append((round(sim.now() / 3600, 2), memory.rss_bytes(), breaks))
+    finally:
+        sim.close()
+        for window in settings:
+            window.deleteLater()
+        flush_deleted()
+        shutil.rmtree(content_dir, ignore_errors=True)
+    return samples
+
+
+def first_mismatch(events, expected):
+    for index, (actual, wanted) in enumerate(zip(events, expected)):
+        if actual != wanted:
+            return index, actual, wanted
+    if len(events) != len(expected):
+        index = min(len(events), len(expected))
+        return index, events[index] if index < len(events) else None, \
+            expected[index] if index < len(expected) else None
+    return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='虚拟时钟模拟')
+    parser.add_argument('--days', type=int, default=7)
+    parser.add_argument('--per-tick', action='store_true', help='逐秒推进，不快进')
+    parser.add_argument('--memory', type=int, metavar='HOURS', help='按小时采样RSS')
+    parser.add_argument('--low-memory', action='store_true', help='启用低内存模式')
+    parser.add_argument('--json', action='store_true', help='以JSON输出采样')
+    args = parser.parse_args(argv)
+
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from PySide6.QtWidgets import QApplication
+    # PySide 持有 QApplication 实例（qApp），不需要保存引用
+    QApplication.instance() or QApplication([])
+
+    if args.memory:
+        samples = memory_profile(args.memory, args.low_memory)
+        if args.json:
+            print(json.dumps(samples))
+            return 0
+        from utils.memory import format_bytes
+        for hour, rss, breaks in samples:
+            print(f"{hour:7.2f} h  {format_bytes(rss)}  休息 {breaks} 次")
+        return 0
+
+    events, expected, elapsed_ms = simulate(args.days, fast=not args.per_tick)
+    mismatch = first_mismatch(events, expected)
+    print(f"模拟 {args.days} 天，{len(events)} 个事件，耗时 {elapsed_ms:.1f} ms")
+    if mismatch is not None:
+        index, actual, wanted = mismatch
+        print(f"第 {index} 个事件不一致：实际 {actual}，期望 {wanted}")
+        return 1
+    print("事件序列与期望一致")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -30,18 +30,34 @@ cleanup() {
     rm -rf dist
 }
 
+# 编译Qt资源包（图标等打包为单个文件，运行时整体映射读取）
+build_resources() {
+    echo "编译资源包..."
+    RCC_DATA=(--add-data "resources/icons:resources/icons" --add-data "resources/sounds:resources/sounds")
+    if command -v pyside6-rcc &> /dev/null; then
+        if pyside6-rcc --binary --no-compress resources/resources.qrc -o resources/resources.rcc; then
+            RCC_DATA=(--add-data "resources/resources.rcc:resources")
+        fi
+    else
+        echo "警告: 未找到 pyside6-rcc，将使用零散的图标和提示音文件"
+    fi
+}
+
 # 主打包函数
 build() {
     echo "开始打包..."
+    build_resources
     
     # 构建命令
     if [ -f "favicon.ico" ]; then
         pyinstaller --noconfirm --clean --onefile --windowed \
             --icon=favicon.ico \
             --add-data "favicon.ico:." \
+            "${RCC_DATA[@]}" \
             -n TakeCareYourAss main.py
     else
         pyinstaller --noconfirm --clean --onefile --windowed \
+            "${RCC_DATA[@]}" \
             -n TakeCareYourAss main.py
     fi
     
@@ -39,6 +39,16 @@ if exist __pycache__ rmdir /s /q __pycache__
 if exist main.spec del /q main.spec
 if exist dist rmdir /s /q dist
 
+echo 编译资源包...
+set RCC_DATA=--add-data "resources\icons;resources\icons" --add-data "resources\sounds;resources\sounds"
+where pyside6-rcc >nul 2>nul
+if %errorlevel% equ 0 (
+    pyside6-rcc --binary --no-compress resources\resources.qrc -o resources\resources.rcc
+    if !errorlevel! equ 0 set RCC_DATA=--add-data "resources\resources.rcc;resources"
+) else (
+    echo 警告: 未找到pyside6-rcc，将使用零散的图标和提示音文件
+)
+
 echo 开始打包...
 
 REM 构建命令
@@ -46,9 +56,11 @@ if exist favicon.ico (
     pyinstaller --noconfirm --clean --onefile --windowed ^
         --icon=favicon.ico ^
         --add-data "favicon.ico;." ^
+        !RCC_DATA! ^
         -n TakeCareYourAss main.py
 ) else (
     pyinstaller --noconfirm --clean --onefile --windowed ^
+        !RCC_DATA! ^
         -n TakeCareYourAss main.py
 )
 
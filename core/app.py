@@ -0,0 +1,223 @@
+"""图形界面和终端界面共用的启动流程
+
+读取配置、应用管理员策略（启动时先用本地缓存，之后在后台定期刷新），并按配置运行与界面无关的服务：
+状态文件、本地HTTP接口、局域网团队同步和工作/休息历史记录。只依赖 QtCore，前端把自己的
+BreakSession 交给 attach()，策略更新后收到 policy_changed 再让配置生效。
+"""
+from PySide6.QtCore import QObject, Signal
+from core.config_manager import ConfigManager
+from core.http_api import HttpApi
+from core.team_sync import TeamSync
+from core.policy import PolicyManager, load_settings as load_policy_settings
+from core.history import HistoryStore, SessionRecorder
+from utils.status_file import StatusFileWriter
+from utils import log
+
+logger = log.get_logger('app')
+
+
+class AppCore(QObject):
+    policy_changed = Signal(object)  # 新策略，已合并到配置中
+
+    def __init__(self, config_file='config.yaml', parent=None):
+        super().__init__(parent)
+        # 初始化配置
+        self.config = {
+            'work_duration': 60,
+            'break_duration': 5,
+            'timer_width': 160,
+            'timer_height': 80,
+            'timer_font_size': 24,
+            'overlay_color': [0, 0, 0, 128],  # 修改为RGBA数组格式
+            'timer_position': {'x': 0, 'y': 0}
+        }
+
+        # 加载配置
+        self.config_manager = ConfigManager(config_file)
+        saved_config = self.config_manager.load_config()
+        if saved_config:
+            self.config.update(saved_config)
+        log.set_levels(self.config.get('log_levels', {}))
+
+        # 管理员策略：启动时先应用本地缓存，之后在后台定期刷新
+        self.policy_manager = None
+        policy_settings = load_policy_settings()
+        if policy_settings:
+            self.policy_manager = PolicyManager(policy_settings['source'], policy_settings['public_key'],
+                                                policy_settings['refresh_minutes'], parent=self)
+            self.config_manager.set_policy(self.policy_manager.load_cache())
+            self.config_manager.apply_policy(self.config)
+            self.policy_manager.policy_changed.connect(self.on_policy_changed)
+
+        self.session = None
+        # 前端额外支持的控制命令，如图形界面的 show_settings
+        self.commands = {}
+        self.http_api = None
+        self.http_api_port = None
+        self.status_file = None
+        self.team_sync = None
+        self.team_sync_settings = None
+        self.history_store = None
+        self.history = None
+
+    def attach(self, session, commands=None):
+        """开始为前端的状态机提供服务"""
+        self.session = session
+        self.commands = dict(commands or {})
+        session.set_config(self.config)
+        session.status_changed.connect(self.publish_status)
+
+        # 工作和休息记录
+        self.history_store = HistoryStore(self.config.get('history_file', 'history.bin'))
+        if self.config.get('history_enabled', True):
+            self.history = SessionRecorder(self.history_store)
+            session.work_started.connect(lambda: self.history.work_started(session.timer.total_seconds))
+            session.break_started.connect(self.history.break_started)
+            session.break_ended.connect(self.history.break_ended)
+
+        self.update_services()
+
+    def start(self):
+        """开始在后台刷新策略"""
+        if self.policy_manager is not None:
+            self.policy_manager.start()
+
+    def save_config(self, config):
+        self.config = config
+        self.config_manager.save_config(config)
+
+    def on_policy_changed(self, policy):
+        """管理员策略更新：重新合并配置，由前端让配置生效"""
+        self.config_manager.set_policy(policy)
+        self.config_manager.apply_policy(self.config)
+        self.policy_changed.emit(policy)
+
+    def apply_config(self):
+        """让当前配置在状态机和各服务中生效，不重新开始计时"""
+        log.set_levels(self.config.get('log_levels', {}))
+        if self.session is not None:
+            self.session.set_config(self.config)
+        self.update_services()
+
+    def update_services(self):
+        self.update_http_api()
+        self.update_status_file()
+        self.update_team_sync()
+
+    def update_http_api(self):
+        """按配置启动、停止或切换HTTP接口端口"""
+        port = self.config.get('http_api_port', 47321) if self.config.get('http_api_enabled', False) else None
+        allowed_origin = self.config.get('http_api_allowed_origin', '')
+        if port == self.http_api_port:
+            if self.http_api is not None:
+                self.http_api.allowed_origin = allowed_origin
+            return
+        if self.http_api is not None:
+            self.http_api.stop()
+            self.http_api.deleteLater()
+            self.http_api = None
+        self.http_api_port = port
+        if port is not None:
+            self.http_api = HttpApi(self.handle_command, port, allowed_origin=allowed_origin, parent=self)
+            self.http_api.publish(self.session.get_status())
+            if not self.http_api.start():
+                self.http_api.deleteLater()
+                self.http_api = None
+
+    def update_status_file(self):
+        """按配置创建或删除状态文件"""
+        enabled = self.config.get('status_file', True)
+        if enabled and self.status_file is None:
+            status_file = StatusFileWriter()
+            if status_file.open():
+                self.status_file = status_file
+                status_file.update(self.session.get_status())
+        elif not enabled and self.status_file is not None:
+            self.status_file.close()
+            self.status_file = None
+
+    def update_team_sync(self):
+        """按配置启动或停止团队同步"""
+        settings = None
+        if self.config.get('team_sync_enabled', False):
+            settings = (self.config.get('team_sync_team', 'default'), self.config.get('team_sync_key', ''),
+                        self.config.get('team_sync_port', 47322))
+            if not settings[1]:
+                logger.error("团队同步需要设置共享密钥 team_sync_key")
+                settings = None
+        if settings == self.team_sync_settings:
+            return
+        self.team_sync_settings = settings
+        if self.team_sync is not None:
+            self.team_sync.stop()
+            self.team_sync.deleteLater()
+            self.team_sync = None
+        if settings is not None:
+            team_sync = TeamSync(*settings, parent=self)
+            if team_sync.start():
+                team_sync.break_scheduled.connect(self.on_team_break_scheduled)
+                team_sync.leader_changed.connect(lambda leader: self.publish_status())
+                self.team_sync = team_sync
+            else:
+                team_sync.deleteLater()
+
+    def on_team_break_scheduled(self, break_at, break_seconds):
+        """负责人的休息计划（已换算为本机时间）"""
+        self.session.align_break(break_at)
+
+    def sync_team_schedule(self):
+        """把本机计划告诉团队；本机为负责人时，自己也按广播出去的时间精确对齐"""
+        break_at = self.session.next_break_at()
+        break_seconds = self.config['break_duration'] * 60
+        self.team_sync.set_local_schedule(break_at, break_seconds)
+        if self.team_sync.is_leader() and break_at is not None and break_at != self.session.synced_break_at:
+            self.session.align_break(break_at)
+
+    def publish_status(self):
+        if self.team_sync is not None:
+            self.sync_team_schedule()
+        if self.http_api is None and self.status_file is None:
+            return
+        status = self.session.get_status()
+        if self.http_api is not None:
+            self.http_api.publish(status)
+        if self.status_file is not None:
+            self.status_file.update(status)
+
+    def handle_command(self, command):
+        """处理转发来的命令，返回响应"""
+        actions = {
+            'ping': lambda: None,
+            'status': lambda: None,
+            'pause': self.session.pause,
+            'resume': self.session.resume,
+            'toggle': self.session.toggle_pause,
+            'skip': self.session.skip,
+            'increase': self.session.increase_time,
+            'decrease': self.session.decrease_time,
+        }
+        actions.update(self.commands)
+        action = actions.get(command)
+        if action is None:
+            return {'ok': False, 'error': f"未知命令: {command}"}
+        error = self.session.policy_refusal(command)
+        if error is not None:
+            return {'ok': False, 'error': error}
+        action()
+        response = {'ok': True}
+        response.update(self.session.get_status())
+        return response
+
+    def close(self):
+        """退出时停止各服务"""
+        if self.http_api is not None:
+            self.http_api.stop()
+        if self.status_file is not None:
+            self.status_file.close()
+            self.status_file = None
+        if self.team_sync is not None:
+            self.team_sync.stop()
+        if self.policy_manager is not None:
+            self.policy_manager.stop()
+        if self.history is not None:
+            self.history.close()
@@ -0,0 +1,489 @@
+"""本地日历（.ics）忙碌时间索引
+
+只依赖标准库。支持单次事件和常见的重复规则（RRULE 的 DAILY/WEEKLY/MONTHLY/YEARLY，
+INTERVAL、COUNT、UNTIL、BYDAY、BYMONTHDAY），以及 EXDATE、RECURRENCE-ID 和 DURATION。
+全天事件、已取消事件和标记为空闲（TRANSP:TRANSPARENT）的事件不视为忙碌。
+
+重复事件只展开到查询时间之后的一段窗口内，查询超出窗口时再继续展开。
+所有忙碌区间合并为互不重叠的有序区间，"某时刻是否忙碌"和"下一个空闲时刻"
+均通过二分查找完成。文件变化后只重新解析发生变化的文件。
+"""
+import os
+import re
+import time
+import heapq
+import threading
+from bisect import bisect_right
+from datetime import datetime, date, timedelta, timezone
+from utils.log import get_logger
+
+logger = get_logger('calendar')
+
+try:
+    from zoneinfo import ZoneInfo
+except ImportError:  # Python 3.8 及更早版本
+    ZoneInfo = None
+
+WEEKDAYS = {'MO': 0, 'TU': 1, 'WE': 2, 'TH': 3, 'FR': 4, 'SA': 5, 'SU': 6}
+DURATION_RE = re.compile(r'([+-])?P(?:(\d+)W)?(?:(\d+)D)?(?:T(?:(\d+)H)?(?:(\d+)M)?(?:(\d+)S)?)?$')
+# 重复事件的最大展开次数，防止错误的规则导致无限展开
+MAX_OCCURRENCES = 100000
+
+
+def _unfold(text):
+    """合并折行（以空格或制表符开头的行属于上一行）"""
+    lines = []
+    for raw in text.splitlines():
+        if raw[:1] in (' ', '\t') and lines:
+            lines[-1] += raw[1:]
+        elif raw:
+            lines.append(raw)
+    return lines
+
+
+def _split_property(line):
+    """拆分 NAME;PARAM=VALUE:值"""
+    head, sep, value = line.partition(':')
+    if not sep:
+        return None, {}, ''
+    if ';' not in head:
+        return head.upper(), {}, value
+    if '"' not in head:
+        return _split_params(head, value)
+    in_quotes = False
+    for i, ch in enumerate(line):
+        if ch == '"':
+            in_quotes = not in_quotes
+        elif ch == ':' and not in_quotes:
+            head, value = line[:i], line[i + 1:]
+            break
+    else:
+        return None, {}, ''
+    return _split_params(head, value)
+
+
+def _split_params(head, value):
+    parts = head.split(';')
+    params = {}
+    for part in parts[1:]:
+        if '=' in part:
+            key, val = part.split('=', 1)
+            params[key.upper()] = val.strip('"')
+    return parts[0].upper(), params, value
+
+
+def _tz(tzid):
+    if tzid and ZoneInfo is not None:
+        try:
+            return ZoneInfo(tzid)
+        except Exception:
+            pass
+    return None  # 无法识别的时区按本地时间处理
+
+
+def _parse_datetime(value, params):
+    """解析日期时间，全天事件返回date"""
+    # 不使用strptime，直接按固定位置切分，解析大量事件时快一个数量级
+    value = value.strip()
+    if params.get('VALUE') == 'DATE' or len(value) == 8:
+        return date(int(value[0:4]), int(value[4:6]), int(value[6:8]))
+    if len(value) < 15 or value[8] != 'T':
+        raise ValueError(f"无效的日期时间: {value}")
+    naive = datetime(int(value[0:4]), int(value[4:6]), int(value[6:8]),
+                     int(value[9:11]), int(value[11:13]), int(value[13:15]))
+    if value.endswith('Z'):
+        return naive.replace(tzinfo=timezone.utc)
+    tz = _tz(params.get('TZID'))
+    return naive.replace(tzinfo=tz) if tz else naive
+
+
+def _parse_duration(value):
+    match = DURATION_RE.match(value.strip())
+    if not match:
+        return None
+    sign, weeks, days, hours, minutes, seconds = match.groups()
+    delta = timedelta(weeks=int(weeks or 0), days=int(days or 0), hours=int(hours or 0),
+                      minutes=int(minutes or 0), seconds=int(seconds or 0))
+    return -delta if sign == '-' else delta
+
+
+def _timestamp(dt):
+    return dt.timestamp()
+
+
+class _Event:
+    __slots__ = ('uid', 'start', 'duration', 'rrule', 'exdates', 'recurrence_id')
+
+    def __init__(self):
+        self.uid = None
+        self.start = None
+        self.duration = None
+        self.rrule = None
+        self.exdates = set()
+        self.recurrence_id = None
+
+
+def parse_ics(text):
+    """解析ICS文本，返回 (单次事件区间列表, 重复事件列表)"""
+    singles = []
+    series = []
+    overrides = {}
+    event = None
+    end = None
+    skip = False
+    for line in _unfold(text):
+        name, params, value = _split_property(line)
+        if name is None:
+            continue
+        if name == 'BEGIN' and value.upper() == 'VEVENT':
+            event, end, skip = _Event(), None, False
+            continue
+        if event is None:
+            continue
+        try:
+            if name == 'END' and value.upper() == 'VEVENT':
+                if not skip and isinstance(event.start, datetime):
+                    if event.duration is None:
+                        event.duration = (end - event.start) if isinstance(end, datetime) else timedelta(0)
+                    if event.duration > timedelta(0):
+                        if event.recurrence_id is not None:
+                            overrides.setdefault(event.uid, set()).add(_timestamp(event.recurrence_id))
+                            singles.append((_timestamp(event.start), _timestamp(event.start + event.duration)))
+                        elif event.rrule:
+                            series.append(event)
+                        else:
+                            singles.append((_timestamp(event.start), _timestamp(event.start + event.duration)))
+                elif skip and event.recurrence_id is not None:
+                    # 被取消的单次重复实例
+                    overrides.setdefault(event.uid, set()).add(_timestamp(event.recurrence_id))
+                event = None
+            elif name == 'UID':
+                event.uid = value
+            elif name == 'DTSTART':
+                event.start = _parse_datetime(value, params)
+            elif name == 'DTEND':
+                end = _parse_datetime(value, params)
+            elif name == 'DURATION':
+                event.duration = _parse_duration(value)
+            elif name == 'RRULE':
+                event.rrule = dict(part.split('=', 1) for part in value.upper().split(';') if '=' in part)
+            elif name == 'EXDATE':
+                for item in value.split(','):
+                    exdate = _parse_datetime(item, params)
+                    if isinstance(exdate, datetime):
+                        event.exdates.add(_timestamp(exdate))
+            elif name == 'RECURRENCE-ID':
+                event.recurrence_id = _parse_datetime(value, params)
+            elif name == 'STATUS' and value.upper() == 'CANCELLED':
+                skip = True
+            elif name == 'TRANSP' and value.upper() == 'TRANSPARENT':
+                skip = True
+        except (ValueError, TypeError):
+            # 忽略无法解析的事件
+            skip = True
+    for item in series:
+        item.exdates |= overrides.get(item.uid, set())
+    singles.sort()
+    return singles, series
+
+
+def _add_months(dt, months):
+    month = dt.month - 1 + months
+    year = dt.year + month // 12
+    return year, month % 12 + 1
+
+
+def _month_days(year, month, dtstart, rule):
+    """返回某月中符合规则的日期列表"""
+    first = date(year, month, 1)
+    next_first = date(year + (month == 12), month % 12 + 1, 1)
+    last_day = (next_first - timedelta(days=1)).day
+    days = []
+    if 'BYMONTHDAY' in rule:
+        for item in rule['BYMONTHDAY'].split(','):
+            n = int(item)
+            day = n if n > 0 else last_day + n + 1
+            if 1 <= day <= last_day:
+                days.append(day)
+    elif 'BYDAY' in rule:
+        for item in rule['BYDAY'].split(','):
+            match = re.match(r'([+-]?\d+)?([A-Z]{2})$', item)
+            if not match or match.group(2) not in WEEKDAYS:
+                continue
+            weekday = WEEKDAYS[match.group(2)]
+            candidates = [d for d in range(1, last_day + 1)
+                          if (first + timedelta(days=d - 1)).weekday() == weekday]
+            if match.group(1):
+                n = int(match.group(1))
+                if -len(candidates) <= n <= len(candidates) and n != 0:
+                    days.append(candidates[n - 1 if n > 0 else n])
+            else:
+                days.extend(candidates)
+    elif dtstart.day <= last_day:
+        days.append(dtstart.day)
+    return sorted(set(days))
+
+
+def expand_series(event, lower, upper):
+    """按重复规则生成 [lower, upper) 内开始的事件区间（时间戳）"""
+    rule = event.rrule
+    start = event.start
+    freq = rule.get('FREQ')
+    interval = max(1, int(rule.get('INTERVAL', 1)))
+    count = int(rule['COUNT']) if 'COUNT' in rule else None
+    until = None
+    if 'UNTIL' in rule:
+        until_value = _parse_datetime(rule['UNTIL'], {})
+        if isinstance(until_value, date) and not isinstance(until_value, datetime):
+            until_value = datetime.combine(until_value, datetime.max.time())
+        until = _timestamp(until_value)
+    duration = event.duration
+
+    # 每日/每周规则直接跳到lower附近开始展开，跳过的次数计入COUNT
+    skip_steps = 0
+    skipped = 0
+    if freq in ('DAILY', 'WEEKLY'):
+        period = interval * (86400 if freq == 'DAILY' else 7 * 86400)
+        # 多退一步，避免夏令时等因素导致漏掉边界上的事件
+        skip_steps = max(0, int((lower - _timestamp(start)) // period) - 1)
+
+    def candidates():
+        nonlocal skipped
+        if freq == 'DAILY':
+            step = skip_steps
+            skipped = skip_steps
+            while True:
+                yield start + timedelta(days=step * interval)
+                step += 1
+        elif freq == 'WEEKLY':
+            if 'BYDAY' in rule:
+                weekdays = sorted(WEEKDAYS[d[-2:]] for d in rule['BYDAY'].split(',') if d[-2:] in WEEKDAYS)
+            else:
+                weekdays = [start.weekday()]
+            week_start = start - timedelta(days=start.weekday())
+            if skip_steps:
+                first_week = sum(1 for weekday in weekdays if weekday >= start.weekday())
+                skipped = first_week + (skip_steps - 1) * len(weekdays)
+            step = skip_steps
+            while True:
+                base = week_start + timedelta(weeks=step * interval)
+                for weekday in weekdays:
+                    yield base + timedelta(days=weekday)
+                step += 1
+        elif freq == 'MONTHLY':
+            step = 0
+            while True:
+                year, month = _add_months(start, step * interval)
+                for day in _month_days(year, month, start, rule):
+                    yield start.replace(year=year, month=month, day=day)
+                step += 1
+                if step > MAX_OCCURRENCES:
+                    return
+        elif freq == 'YEARLY':
+            step = 0
+            while True:
+                try:
+                    yield start.replace(year=start.year + step * interval)
+                except ValueError:  # 2月29日
+                    pass
+                step += 1
+                if step > MAX_OCCURRENCES:
+                    return
+
+    produced = None
+    for index, occurrence in enumerate(candidates()):
+        if produced is None:
+            produced = skipped
+        if index > MAX_OCCURRENCES * 10:
+            return
+        if occurrence < start:
+            continue
+        begin = _timestamp(occurrence)
+        if until is not None and begin > until:
+            return
+        produced += 1
+        if count is not None and produced > count:
+            return
+        if begin >= upper:
+            return
+        if begin in event.exdates:
+            continue
+        finish = _timestamp(occurrence + duration)
+        if finish > lower:
+            yield begin, finish
+
+
+class _CalendarFile:
+    """单个日历文件的解析结果"""
+
+    def __init__(self, path):
+        self.path = path
+        self.signature = None
+        self.singles = []
+        self.series = []
+        self.expanded = []  # 重复事件在当前窗口内展开的区间
+        self.expanded_range = None
+
+    def load(self, signature):
+        with open(self.path, 'r', encoding='utf-8', errors='replace') as f:
+            self.singles, self.series = parse_ics(f.read())
+        self.signature = signature
+        self.expanded = []
+        self.expanded_range = None
+
+    def expand(self, lower, upper):
+        """确保重复事件已展开到 [lower, upper)"""
+        if self.expanded_range is not None:
+            old_lower, old_upper = self.expanded_range
+            if old_lower <= lower and upper <= old_upper:
+                return False
+            # 只展开新增的部分
+            if old_lower <= lower <= old_upper:
+                extra = []
+                for event in self.series:
+                    extra.extend(item for item in expand_series(event, old_upper, upper) if item[0] >= old_upper)
+                extra.sort()
+                self.expanded = list(heapq.merge(self.expanded, extra))
+                self.expanded_range = (old_lower, upper)
+                return True
+        intervals = []
+        for event in self.series:
+            intervals.extend(expand_series(event, lower, upper))
+        intervals.sort()
+        self.expanded = intervals
+        self.expanded_range = (lower, upper)
+        return True
+
+
+class CalendarIndex:
+    """多个日历文件的忙碌区间索引
+
+    解析大文件可能耗时较长，GUI线程中应使用 refresh_in_background()，
+    查询时若后台正在重建索引，则使用上一次的结果。
+    设置文件后第一次查询时还没有任何结果可用，此时等待解析完成，保证第一次休息也能按日历推迟。
+    """
+
+    def __init__(self, paths=(), horizon_days=14, now=time.time):
+        self.now = now
+        self.horizon = horizon_days * 86400
+        self.files = {}
+        # (区间开始列表, 区间结束列表, 覆盖到的时间)，整体替换以便跨线程读取
+        self._index = ([], [], None)
+        self._lock = threading.Lock()
+        self._thread = None
+        self._loaded = False  # 设置文件后是否已经解析并建立过索引
+        self.set_paths(paths)
+
+    def set_paths(self, paths):
+        paths = [os.path.abspath(os.path.expanduser(p)) for p in paths]
+        with self._lock:
+            self.files = {p: self.files.get(p) or _CalendarFile(p) for p in paths}
+            self._index = ([], [], None)
+            self._loaded = False
+
+    def refresh_in_background(self):
+        """在后台线程中检查文件变化并重建索引"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+
+        def run():
+            with self._lock:
+                self._refresh()
+                self._build(self.now())
+                self._loaded = True
+
+        self._thread = threading.Thread(target=run, name='CalendarIndex', daemon=True)
+        self._thread.start()
+
+    def refresh(self):
+        """检查文件是否变化，只重新解析变化的文件。返回是否有变化"""
+        with self._lock:
+            return self._refresh()
+
+    def _refresh(self):
+        changed = False
+        for path, calendar in self.files.items():
+            try:
+                stat = os.stat(path)
+                signature = (stat.st_mtime_ns, stat.st_size)
+            except OSError:
+                signature = None
+            if signature == calendar.signature:
+                continue
+            changed = True
+            if signature is None:
+                calendar.signature, calendar.singles, calendar.series = None, [], []
+                calendar.expanded, calendar.expanded_range = [], None
+                continue
+            try:
+                calendar.load(signature)
+            except OSError as e:
+                logger.warning(f"读取日历文件 {path} 失败: {str(e)}")
+                calendar.signature = signature
+        if changed:
+            starts, ends, _ = self._index
+            self._index = (starts, ends, None)
+        return changed
+
+    def _ensure(self, t):
+        """保证索引覆盖时刻t，后台线程正在重建时直接使用现有索引"""
+        upper = self._index[2]
+        if upper is not None and t < upper:
+            return
+        if not self._loaded:
+            # 还没有可用的结果：等待后台线程或在这里同步解析
+            with self._lock:
+                if not self._loaded:
+                    self._refresh()
+                    self._loaded = True
+                self._build(t)
+            return
+        if not self._lock.acquire(blocking=False):
+            return
+        try:
+            self._build(t)
+        finally:
+            self._lock.release()
+
+    def _build(self, t):
+        """扩展重复事件并重建合并区间"""
+        upper = self._index[2]
+        if upper is not None and t < upper:
+            return
+        lower = self.now() - 86400
+        upper = max(t, self.now()) + self.horizon
+        for calendar in self.files.values():
+            calendar.expand(lower, upper)
+        sources = []
+        for calendar in self.files.values():
+            sources.append(calendar.singles)
+            sources.append(calendar.expanded)
+        # 合并为互不重叠的区间
+        starts, ends = [], []
+        for begin, finish in heapq.merge(*sources):
+            if finish <= lower:
+                continue
+            if ends and begin <= ends[-1]:
+                if finish > ends[-1]:
+                    ends[-1] = finish
+            else:
+                starts.append(begin)
+                ends.append(finish)
+        self._index = (starts, ends, upper)
+
+    def busy_until(self, t):
+        """t时刻处于忙碌区间时返回该区间的结束时间，否则返回None"""
+        self._ensure(t)
+        starts, ends, _ = self._index
+        i = bisect_right(starts, t) - 1
+        if i >= 0 and t < ends[i]:
+            return ends[i]
+        return None
+
+    def next_free(self, t):
+        """t时刻或之后的第一个空闲时刻"""
+        end = self.busy_until(t)
+        return t if end is None else end
+
+    def __len__(self):
+        return len(self._index[0])
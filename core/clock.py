@@ -0,0 +1,177 @@
+"""可注入的时钟
+
+计时器、遮罩层倒计时和调度器通过时钟获取当前时间、创建定时器，
+运行时使用系统时钟，模拟和基准测试中替换为 VirtualClock，不需要真的等待。
+"""
+import time
+import heapq
+import itertools
+from PySide6.QtCore import QObject, QTimer, Signal
+
+
+class Clock:
+    """系统时钟"""
+
+    def time(self):
+        """墙上时间（Unix时间戳，秒）"""
+        return time.time()
+
+    def monotonic(self):
+        """单调时间（秒），用于计算倒计时"""
+        return time.monotonic()
+
+    def create_timer(self, parent=None):
+        return QTimer(parent)
+
+
+system_clock = Clock()
+
+
+class VirtualTimer(QObject):
+    """VirtualClock 的定时器，接口与 QTimer 中用到的部分一致"""
+
+    timeout = Signal()
+
+    def __init__(self, clock, parent=None):
+        super().__init__(parent)
+        self._clock = clock
+        self._interval = 0
+        self._single_shot = False
+        self._due = None
+        self._generation = 0
+
+    def setSingleShot(self, single_shot):
+        self._single_shot = single_shot
+
+    def isSingleShot(self):
+        return self._single_shot
+
+    def setInterval(self, ms):
+        self._interval = int(ms)
+
+    def interval(self):
+        return self._interval
+
+    def setTimerType(self, timer_type):
+        pass
+
+    def start(self, ms=None):
+        if ms is not None:
+            self._interval = int(ms)
+        self._due = self._clock.monotonic() + self._interval / 1000
+        self._generation += 1
+        self._clock._schedule(self)
+
+    def stop(self):
+        self._due = None
+        self._generation += 1
+
+    def isActive(self):
+        return self._due is not None
+
+    def remainingTime(self):
+        if self._due is None:
+            return -1
+        return max(0, int((self._due - self._clock.monotonic()) * 1000))
+
+
+class VirtualClock(Clock):
+    """虚拟时钟，时间只在调用 advance/fast_forward 时前进
+
+    advance 逐个触发到期的定时器（包括每秒一次的刷新），结果与真实运行一致；
+    fast_forward 只在单次定时器（计时结束、遮罩层结束等）之间跳转，
+    中间错过的重复定时器只补触发一次（与系统休眠唤醒后的行为相同），一周的模拟只需几百毫秒。
+    """
+
+    def __init__(self, start=1_700_000_000.0):
+        self._wall_offset = start
+        self._now = 0.0
+        self._queue = []
+        self._order = itertools.count()
+        self._repeating = set()
+        self.fired = 0
+
+    def time(self):
+        return self._wall_offset + self._now
+
+    def monotonic(self):
+        return self._now
+
+    def create_timer(self, parent=None):
+        return VirtualTimer(self, parent)
+
+    def _schedule(self, timer):
+        heapq.heappush(self._queue, (timer._due, next(self._order), timer._generation, timer))
+        if not timer._single_shot:
+            self._repeating.add(timer)
+
+    def _next_entry(self, single_shot_only=False):
+        """最早的有效定时器条目，作废的条目惰性删除"""
+        skipped = []
+        entry = None
+        while self._queue:
+            candidate = self._queue[0]
+            timer = candidate[3]
+            if candidate[2] != timer._generation or timer._due is None:
+                heapq.heappop(self._queue)
+                continue
+            if single_shot_only and not timer._single_shot:
+                skipped.append(heapq.heappop(self._queue))
+                continue
+            entry = candidate
+            break
+        for item in skipped:
+            heapq.heappush(self._queue, item)
+        return entry
+
+    def _fire(self, timer):
+        if timer._single_shot:
+            timer._due = None
+        else:
+            timer._due = self._now + max(timer._interval, 1) / 1000
+            timer._generation += 1
+            self._schedule(timer)
+        self.fired += 1
+        timer.timeout.emit()
+
+    def advance(self, seconds):
+        """前进指定秒数，按时间顺序触发所有到期的定时器"""
+        target = self._now + seconds
+        while True:
+            entry = self._next_entry()
+            if entry is None or entry[0] > target:
+                break
+            heapq.heappop(self._queue)
+            self._now = max(self._now, entry[0])
+            self._fire(entry[3])
+        self._now = target
+
+    def fast_forward(self, seconds):
+        """前进指定秒数，只在单次定时器之间跳转"""
+        target = self._now + seconds
+        while True:
+            entry = self._next_entry(single_shot_only=True)
+            stop = target if entry is None else min(entry[0], target)
+            self._now = max(self._now, stop)
+            self._fire_overdue_repeating()
+            if entry is None or entry[0] > target:
+                break
+            # 重复定时器的回调可能已经停止或重启了这个定时器
+            if entry[3]._generation == entry[2] and entry[3]._due is not None:
+                self._fire(entry[3])
+
+    def _fire_overdue_repeating(self):
+        for timer in list(self._repeating):
+            if timer._due is None:
+                self._repeating.discard(timer)
+            elif timer._due <= self._now:
+                self._fire(timer)
+
+    def run_until_idle(self, limit=7 * 86400):
+        """快进直到没有单次定时器等待触发（最多limit秒）"""
+        start = self._now
+        while self._now - start < limit:
+            entry = self._next_entry(single_shot_only=True)
+            if entry is None:
+                return
+            self.fast_forward(max(0.0, entry[0] - self._now))
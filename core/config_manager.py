@@ -1,22 +1,32 @@
 import os
 import yaml
 from typing import Dict, Any
-from PySide6.QtGui import QColor
+from PySide6.QtCore import QCoreApplication
+from PySide6.QtGui import QColor, QGuiApplication
 from PySide6.QtWidgets import QApplication
+from utils.log import get_logger
+
+logger = get_logger('config')
 
 class ConfigManager:
-    def __init__(self):
-        self.config_file = 'config.yaml'
+    def __init__(self, config_file='config.yaml'):
+        # config_file 为None时只使用内存中的配置，不读写磁盘（模拟和测试）
+        self.config_file = config_file
+        # 管理员策略，以及被策略改变的配置项 -> (用户的原值, 策略值)
+        self.policy = None
+        self.enforced = {}
         # 动态获取屏幕右下角坐标
-        app = QApplication.instance() or QApplication([])
-        screen = app.primaryScreen()
-        screen_geometry = screen.geometry()
+        app = QCoreApplication.instance() or QApplication([])
         timer_width = 140
         timer_height = 70
         margin_x = 20
         margin_y = 40
-        right_x = max(0, screen_geometry.width() - timer_width - margin_x)
-        right_y = max(0, screen_geometry.height() - timer_height - margin_y)
+        right_x = right_y = 0
+        # 终端界面只创建 QCoreApplication，没有屏幕信息，位置留给图形界面启动时再计算
+        if isinstance(app, QGuiApplication):
+            screen_geometry = app.primaryScreen().geometry()
+            right_x = max(0, screen_geometry.width() - timer_width - margin_x)
+            right_y = max(0, screen_geometry.height() - timer_height - margin_y)
         self.default_config = {
             'work_duration': 60,  # 工作时间（分钟）
             'break_duration': 10,  # 休息时间（分钟）
@@ -26,24 +36,65 @@ class ConfigManager:
             'timer_width': timer_width,  # 计时器宽度
             'timer_height': timer_height,  # 计时器高度
             'timer_font_size': 25,  # 计时器字体大小
-            'hide_timer': False  # 是否隐藏计时框
+            'hide_timer': False,  # 是否隐藏计时框
+            'long_break_every': 0,  # 每隔几轮进行一次长休息（0为不启用）
+            'long_break_duration': 20,  # 长休息时间（分钟）
+            # 额外的休息规则，例如：
+            # {'name': 'eye', 'title': '护眼时间', 'interval': 20, 'duration_seconds': 20,
+            #  'working_hours': ['09:00', '18:00'], 'weekdays': [1, 2, 3, 4, 5]}
+            'schedules': [],
+            'calendar_files': [],  # 本地日历文件（.ics），会议期间推迟休息
+            'presentation_defer': True,  # 全屏/演示时推迟休息（仅X11）
+            'presentation_max_defer': 30,  # 演示时最多推迟的时间（分钟）
+            'exercise_dir': '',  # 休息时播放的动作动画目录（GIF/WebP或PNG序列帧）
+            'exercise_cache_mb': 32,  # 动画帧缓存上限（MB）
+            'tray_countdown': False,  # 托盘图标显示倒计时
+            'sound_cues': False,  # 休息开始/结束及结束前一分钟播放提示音
+            'sound_volume': 70,  # 提示音音量（0-100）
+            'break_notifications': [],  # 休息前几分钟显示桌面通知，如 [5, 1]（需要jeepney和D-Bus）
+            'allow_escape': True,  # 是否允许按ESC提前结束休息（可由管理员策略禁止）
+            'allow_snooze': True,  # 是否允许推迟休息（短休息按S键、通知上的按钮），禁止ESC时同样不允许
+            'history_enabled': True,  # 记录每段工作和休息，在托盘菜单的“历史记录”中查看
+            'history_file': 'history.bin',  # 历史记录文件
+            'low_memory_mode': False,  # 关闭时销毁次要窗口，休息结束后释放缓存并归还空闲内存
+            'remote_overlay_mode': 'auto',  # 低带宽遮罩层：auto（远程桌面会话中启用）/on/off
+            'remote_overlay_minutes': False,  # 低带宽遮罩层只显示分钟数，每分钟重绘一次
+            'autostart_backend': 'auto',  # Linux自启方式：auto/systemd/desktop
+            'autostart_delay': 5,  # 登录后延迟启动（秒）
+            'autostart_random_delay': 30,  # 额外随机延迟上限（秒）
+            'status_file': True,  # 在运行时目录写入内存映射的状态文件，供状态栏读取
+            'team_sync_enabled': False,  # 局域网团队同步休息（UDP组播）
+            'team_sync_team': 'default',  # 团队名称，同名的实例互相同步
+            'team_sync_port': 47322,  # 组播端口
+            'team_sync_key': '',  # 团队共享密钥，用于消息认证，同一团队的实例必须相同，留空时不启用同步
+            'http_api_enabled': False,  # 本地HTTP控制与状态接口（仅监听127.0.0.1）
+            'http_api_port': 47321,  # HTTP接口端口
+            'http_api_allowed_origin': '',  # 允许通过浏览器访问HTTP接口的来源，如 http://localhost:8080，留空不允许
+            'log_levels': {'default': 'INFO'},  # 各子系统的日志级别，如 {'default': 'INFO', 'team_sync': 'DEBUG'}
+            'plugins_enabled': True,  # 加载通过入口点安装的插件
+            'plugins_disabled': [],  # 不加载的插件名称
+            'plugin_budget_ms': 250,  # 插件每次钩子调用的时间预算（毫秒）
+            'watchdog_enabled': True,  # 是否启用GUI线程卡顿检测
+            'watchdog_threshold_ms': 500  # 卡顿判定阈值（毫秒）
         }
         self.config = self.load_config()
 
     def load_config(self):
         """加载配置文件"""
+        if self.config_file is None:
+            return self.default_config.copy()
         try:
             if os.path.exists(self.config_file):
                 with open(self.config_file, 'r', encoding='utf-8') as f:
                     config = yaml.safe_load(f)
                     if config is None:
-                        print("配置文件为空，使用默认配置")
+                        logger.warning("配置文件为空，使用默认配置")
                         self.save_config(self.default_config)
                         return self.default_config.copy()
                     # 确保所有必要的配置项都存在
                     for key, value in self.default_config.items():
                         if key not in config:
-                            print(f"配置项 {key} 不存在，使用默认值")
+                            logger.info(f"配置项 {key} 不存在，使用默认值")
                             config[key] = value
                     # 确保颜色值是 RGBA 数组格式
                     if isinstance(config['overlay_color'], str):
@@ -56,18 +107,18 @@ class ConfigManager:
                                 128  # 设置50%透明度
                             ]
                         except Exception as e:
-                            print(f"颜色转换错误：{str(e)}，使用默认颜色")
+                            logger.warning(f"颜色转换错误：{str(e)}，使用默认颜色")
                             config['overlay_color'] = self.default_config['overlay_color']
                     elif not isinstance(config['overlay_color'], list) or len(config['overlay_color']) != 4:
-                        print("颜色格式错误，使用默认颜色")
+                        logger.warning("颜色格式错误，使用默认颜色")
                         config['overlay_color'] = self.default_config['overlay_color']
                     return config
             else:
-                print("配置文件不存在，使用默认配置并写入配置文件")
+                logger.info("配置文件不存在，使用默认配置并写入配置文件")
                 self.save_config(self.default_config)
                 return self.default_config.copy()
         except Exception as e:
-            print(f"加载配置文件时出错：{str(e)}")
+            logger.error(f"加载配置文件时出错：{str(e)}")
             return self.default_config.copy()
 
     def save_config(self, config):
@@ -81,12 +132,45 @@ class ConfigManager:
             # 确保颜色值是 RGBA 数组格式
             if not isinstance(config['overlay_color'], list) or len(config['overlay_color']) != 4:
                 config['overlay_color'] = self.default_config['overlay_color']
+            if self.config_file is None:
+                return
             
+            # 策略强制的值不写入配置文件，保留用户自己的设置
+            saved = dict(config)
+            for key, (original, enforced) in self.enforced.items():
+                if saved.get(key) == enforced:
+                    saved[key] = original
+
             with open(self.config_file, 'w', encoding='utf-8') as f:
-                yaml.dump(config, f, allow_unicode=True, default_flow_style=False)
-            print("配置已保存")
+                yaml.dump(saved, f, allow_unicode=True, default_flow_style=False)
+            logger.info("配置已保存")
         except Exception as e:
-            print(f"保存配置时出错：{str(e)}")
+            logger.error(f"保存配置时出错：{str(e)}")
+
+    def set_policy(self, policy):
+        self.policy = policy
+
+    def apply_policy(self, config):
+        """把策略合并到配置上（原地修改），先还原上一次策略改变的项"""
+        for key, (original, enforced) in self.enforced.items():
+            if config.get(key) == enforced:
+                config[key] = original
+        self.enforced = {}
+        if self.policy is None:
+            return config
+        for key in self.policy.locked | set(self.policy.minimum) | set(self.policy.maximum):
+            if key not in self.default_config:
+                logger.warning(f"策略中的配置项 {key} 不存在，已忽略")
+                continue
+            original = config.get(key, self.default_config[key])
+            value = self.policy.enforce(key, original)
+            if value != original:
+                self.enforced[key] = (original, value)
+                config[key] = value
+        return config
+
+    def is_locked(self, key):
+        return self.policy is not None and self.policy.is_locked(key)
 
     def get_config(self):
         """获取当前配置"""
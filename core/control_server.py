@@ -0,0 +1,73 @@
+from PySide6.QtCore import QObject
+from PySide6.QtNetwork import QLocalServer
+from utils.ipc import server_name, encode_message, decode_message, probe
+from utils.log import get_logger
+
+logger = get_logger('control_server')
+
+
+class ControlServer(QObject):
+    """本地控制服务，接收第二个实例或命令行客户端转发的命令
+
+    handler(command) 在GUI线程中执行并返回响应字典。
+    """
+
+    def __init__(self, handler=None, name=None, parent=None):
+        super().__init__(parent)
+        self.handler = handler
+        self.name = name or server_name()
+        self.in_use = False  # 另一个实例正在监听
+        self.server = QLocalServer(self)
+        self.server.setSocketOptions(QLocalServer.UserAccessOption)
+        self.server.newConnection.connect(self._on_new_connection)
+        self._buffers = {}
+
+    def listen(self):
+        """开始监听；另一个实例已在监听时返回False并设置 in_use"""
+        # 设置了 socketOptions 时Qt会先在临时目录绑定再重命名，直接覆盖已有的套接字文件，
+        # 所以必须先探测：只有连接被拒绝或套接字不存在时才清理并监听
+        if probe(self.name):
+            # 不能删除正在使用的套接字（实例可能正在启动或GUI线程忙碌）
+            self.in_use = True
+            logger.error("另一个实例正在运行")
+            return False
+        # 上次异常退出残留的套接字文件
+        QLocalServer.removeServer(self.name)
+        if self.server.listen(self.name):
+            return True
+        logger.error(f"启动本地控制服务失败: {self.server.errorString()}")
+        return False
+
+    def close(self):
+        self.server.close()
+
+    def _on_new_connection(self):
+        while self.server.hasPendingConnections():
+            connection = self.server.nextPendingConnection()
+            self._buffers[connection] = b''
+            connection.readyRead.connect(lambda c=connection: self._on_ready_read(c))
+            connection.disconnected.connect(lambda c=connection: self._on_disconnected(c))
+
+    def _on_ready_read(self, connection):
+        data = self._buffers.get(connection, b'') + bytes(connection.readAll())
+        if b'\n' not in data:
+            self._buffers[connection] = data
+            return
+        line = data.split(b'\n', 1)[0]
+        self._buffers[connection] = b''
+        try:
+            request = decode_message(line)
+            if self.handler is None:
+                raise RuntimeError("实例正在启动")
+            response = self.handler(request.get('command', ''))
+        except Exception as e:
+            response = {'ok': False, 'error': str(e)}
+        connection.write(encode_message(response))
+        connection.flush()
+        connection.disconnectFromServer()
+
+    def _on_disconnected(self, connection):
+        self._buffers.pop(connection, None)
+        # 连接是 QLocalServer 的子对象；先解除父子关系，服务对象被释放时不会再直接删除等待 deleteLater 的连接
+        connection.setParent(None)
+        connection.deleteLater()
@@ -0,0 +1,168 @@
+"""工作/休息记录
+
+每次工作或休息结束时在 history.bin 末尾追加一条定长记录，文件可以积累多年的数据：
+- 记录数由文件大小直接算出，按行号读取只需一次定位和读取，不需要把文件载入内存；
+- 按天汇总的统计缓存在 history.agg.json 中，打开时只汇总缓存之后新增的记录。
+"""
+import os
+import json
+import time
+import struct
+import datetime
+import threading
+from utils.log import get_logger
+
+logger = get_logger('history')
+
+MAGIC = b'TCYH'
+VERSION = 1
+HEADER = struct.Struct('<4sHH')  # 魔数、版本、记录长度
+# 开始时间（时间戳）、实际时长（秒）、计划时长（秒）、类型、是否完成
+RECORD = struct.Struct('<dIIBB2x')
+
+WORK = 0
+BREAK = 1
+KIND_NAMES = {WORK: '工作', BREAK: '休息'}
+
+
+class HistoryStore:
+    def __init__(self, path='history.bin'):
+        self.path = path
+        self.aggregate_path = os.path.splitext(path)[0] + '.agg.json'
+        self._file = None
+        self._aggregate_lock = threading.Lock()
+
+    def _open(self):
+        if self._file is None:
+            exists = os.path.exists(self.path) and os.path.getsize(self.path) >= HEADER.size
+            self._file = open(self.path, 'r+b' if exists else 'w+b')
+            if exists:
+                magic, version, size = HEADER.unpack(self._file.read(HEADER.size))
+                if magic != MAGIC or size != RECORD.size:
+                    self._file.close()
+                    self._file = None
+                    raise ValueError(f"不支持的历史记录文件: {self.path}")
+            else:
+                self._file.write(HEADER.pack(MAGIC, VERSION, RECORD.size))
+                self._file.flush()
+        return self._file
+
+    def count(self):
+        """记录数（不读取文件内容）"""
+        try:
+            size = os.path.getsize(self.path)
+        except OSError:
+            return 0
+        return max(0, (size - HEADER.size) // RECORD.size)
+
+    def append(self, kind, start, duration, planned, completed):
+        f = self._open()
+        # 上次写入中断时文件末尾可能有不完整的记录，直接覆盖
+        f.seek(HEADER.size + self.count() * RECORD.size)
+        f.write(RECORD.pack(start, max(0, int(duration)), max(0, int(planned)), kind, int(bool(completed))))
+        f.flush()
+
+    def read(self, first, count):
+        """读取从第 first 条开始的 count 条记录（按时间先后）"""
+        count = min(count, self.count() - first)
+        if first < 0 or count <= 0:
+            return []
+        f = self._open()
+        f.seek(HEADER.size + first * RECORD.size)
+        return list(RECORD.iter_unpack(f.read(count * RECORD.size)))
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def aggregate(self, chunk=65536):
+        """按天汇总：{日期: [工作秒数, 休息秒数, 完成的休息, 提前结束的休息]}
+
+        从缓存继续汇总新增的记录，完成后更新缓存。可以在后台线程调用（使用独立的文件句柄）。
+        """
+        with self._aggregate_lock:
+            return self._aggregate(chunk)
+
+    def _aggregate(self, chunk):
+        days, done = self._load_aggregate()
+        total = self.count()
+        if done < total:
+            with open(self.path, 'rb') as f:
+                f.seek(HEADER.size + done * RECORD.size)
+                while done < total:
+                    data = f.read(min(chunk, total - done) * RECORD.size)
+                    if not data:
+                        break
+                    for start, duration, planned, kind, completed in RECORD.iter_unpack(data):
+                        day = days.setdefault(datetime.date.fromtimestamp(start).isoformat(), [0, 0, 0, 0])
+                        if kind == WORK:
+                            day[0] += duration
+                        else:
+                            day[1] += duration
+                            day[2 if completed else 3] += 1
+                    done += len(data) // RECORD.size
+            self._save_aggregate(days, done)
+        return days
+
+    def _load_aggregate(self):
+        try:
+            with open(self.aggregate_path, 'r', encoding='utf-8') as f:
+                cache = json.load(f)
+            if cache.get('record_size') == RECORD.size and cache.get('rows', 0) <= self.count():
+                return cache['days'], cache['rows']
+        except (OSError, ValueError, KeyError, TypeError):
+            pass
+        return {}, 0
+
+    def _save_aggregate(self, days, rows):
+        tmp = self.aggregate_path + '.tmp'
+        try:
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump({'record_size': RECORD.size, 'rows': rows, 'days': days}, f)
+            os.replace(tmp, self.aggregate_path)
+        except OSError as e:
+            logger.warning(f"保存历史统计缓存失败: {str(e)}")
+
+
+class SessionRecorder:
+    """根据计时器窗口的阶段信号记录每段工作和休息"""
+
+    def __init__(self, store, clock=time.time):
+        self.store = store
+        self.clock = clock
+        self.kind = None
+        self.started = None
+        self.planned = 0
+
+    def _begin(self, kind, planned):
+        self.kind = kind
+        self.started = self.clock()
+        self.planned = planned
+
+    def _end(self, completed):
+        if self.kind is None:
+            return
+        try:
+            self.store.append(self.kind, self.started, self.clock() - self.started, self.planned, completed)
+        except (OSError, ValueError) as e:
+            logger.warning(f"写入历史记录失败: {str(e)}")
+        self.kind = None
+
+    def work_started(self, planned_seconds):
+        # 工作中重新开始计时（跳过、重启）时，上一段工作记为未完成
+        self._end(False)
+        self._begin(WORK, planned_seconds)
+
+    def break_started(self, planned_seconds):
+        self._end(True)
+        self._begin(BREAK, planned_seconds)
+
+    def break_ended(self, completed):
+        if self.kind == BREAK:
+            self._end(completed)
+
+    def close(self):
+        """退出时记录进行中的一段"""
+        self._end(False)
+        self.store.close()
@@ -0,0 +1,256 @@
+"""本地HTTP控制与状态接口
+
+asyncio 事件循环运行在独立线程中，只监听 127.0.0.1：
+
+    GET  /status    当前状态（JSON）
+    GET  /events    Server-Sent Events 状态推送，状态变化时推送，无需轮询
+    POST /pause /resume /toggle /increase /decrease /skip
+
+命令通过信号排队到GUI线程执行（与本地控制服务共用同一个处理函数）。
+默认不返回CORS响应头，浏览器中的网页无法读取状态；配置了 allowed_origin 时只允许该来源读取和发送命令。
+GUI线程发布状态时只投递一次回调，向订阅者推送的工作全部在asyncio线程中完成，
+订阅者再多也不影响计时器的刷新。慢速客户端只会收到最新状态，中间状态被合并。
+"""
+import json
+import asyncio
+import threading
+import concurrent.futures
+from PySide6.QtCore import QObject, Signal
+from utils.log import get_logger
+
+logger = get_logger('http_api')
+
+# POST路径 -> 命令
+POST_COMMANDS = {
+    '/pause': 'pause',
+    '/resume': 'resume',
+    '/toggle': 'toggle',
+    '/increase': 'increase',
+    '/decrease': 'decrease',
+    '/skip': 'skip',
+}
+
+MAX_SUBSCRIBERS = 1000
+MAX_HEADER_BYTES = 8192
+KEEPALIVE_SECONDS = 15
+COMMAND_TIMEOUT = 5
+WRITE_TIMEOUT = 10
+
+REASONS = {200: 'OK', 400: 'Bad Request', 403: 'Forbidden', 404: 'Not Found',
+           405: 'Method Not Allowed', 503: 'Service Unavailable', 504: 'Gateway Timeout'}
+
+
+class HttpApi(QObject):
+    # 由asyncio线程发出，排队到GUI线程执行命令
+    _command_requested = Signal(str, object)
+
+    def __init__(self, handler, port, host='127.0.0.1', allowed_origin='', parent=None):
+        super().__init__(parent)
+        self.handler = handler
+        self.host = host
+        self.port = port
+        self.allowed_origin = allowed_origin
+        self._command_requested.connect(self._run_command)
+        self._loop = None
+        self._thread = None
+        self._server = None
+        self._subscribers = set()
+        self._writers = set()
+        self._closing = False
+        self._latest = None  # 最新状态的JSON文本
+        self._published = None
+
+    def start(self):
+        """启动服务线程，端口绑定失败时返回False"""
+        if self._thread is not None:
+            return True
+        ready = threading.Event()
+        errors = []
+        self._thread = threading.Thread(target=self._run_loop, args=(ready, errors),
+                                        name='HttpApi', daemon=True)
+        self._thread.start()
+        ready.wait(5)
+        if errors:
+            logger.error(f"启动HTTP接口失败: {errors[0]}")
+            self._thread.join(1)
+            self._thread = None
+            return False
+        return True
+
+    def stop(self):
+        if self._thread is None:
+            return
+        self._loop.call_soon_threadsafe(self._shutdown)
+        self._thread.join(2)
+        self._thread = None
+        self._loop = None
+
+    def publish(self, status):
+        """发布新状态（GUI线程调用），内容不变时不推送"""
+        payload = json.dumps(status, ensure_ascii=False)
+        if payload == self._published:
+            return
+        self._published = payload
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._broadcast, payload)
+
+    def subscriber_count(self):
+        return len(self._subscribers)
+
+    def _run_command(self, command, future):
+        """在GUI线程中执行命令"""
+        try:
+            future.set_result(self.handler(command))
+        except Exception as e:
+            future.set_result({'ok': False, 'error': str(e)})
+
+    # 以下方法在asyncio线程中运行
+
+    def _run_loop(self, ready, errors):
+        loop = asyncio.new_event_loop()
+        self._loop = loop
+        try:
+            self._server = loop.run_until_complete(
+                asyncio.start_server(self._handle, self.host, self.port))
+        except OSError as e:
+            errors.append(str(e))
+            ready.set()
+            loop.close()
+            return
+        # 端口为0时使用系统分配的端口
+        self.port = self._server.sockets[0].getsockname()[1]
+        if self._published is not None:
+            self._latest = self._published
+        self._closing = False
+        ready.set()
+        try:
+            loop.run_forever()
+            # 连接已全部关闭，等待处理协程退出
+            pending = asyncio.all_tasks(loop)
+            if pending:
+                loop.run_until_complete(asyncio.wait(pending, timeout=1))
+        finally:
+            loop.close()
+
+    def _shutdown(self):
+        self._closing = True
+        self._server.close()
+        for writer in self._writers:
+            writer.close()
+        for event in self._subscribers:
+            event.set()
+        self._loop.stop()
+
+    def _broadcast(self, payload):
+        self._latest = payload
+        for event in self._subscribers:
+            event.set()
+
+    async def _handle(self, reader, writer):
+        self._writers.add(writer)
+        try:
+            try:
+                head = await asyncio.wait_for(reader.readuntil(b'\r\n\r\n'), WRITE_TIMEOUT)
+            except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, asyncio.TimeoutError):
+                return
+            if len(head) > MAX_HEADER_BYTES:
+                await self._respond(writer, 400, {'ok': False, 'error': '请求头过大'})
+                return
+            lines = head.decode('latin-1').split('\r\n')
+            parts = lines[0].split(' ')
+            if len(parts) != 3:
+                await self._respond(writer, 400, {'ok': False, 'error': '无效的请求'})
+                return
+            method, target, _ = parts
+            path = target.split('?', 1)[0]
+            headers = {}
+            for line in lines[1:]:
+                if ':' in line:
+                    key, value = line.split(':', 1)
+                    headers[key.strip().lower()] = value.strip()
+            await self._route(method, path, headers, writer)
+        except (ConnectionError, asyncio.TimeoutError):
+            pass
+        finally:
+            self._writers.discard(writer)
+            writer.close()
+
+    async def _route(self, method, path, headers, writer):
+        if path in POST_COMMANDS:
+            if method != 'POST':
+                await self._respond(writer, 405, {'ok': False, 'error': '请使用POST'})
+                return
+            if 'origin' in headers and not self._origin_allowed(headers):
+                # 拒绝浏览器跨站发起的控制请求
+                await self._respond(writer, 403, {'ok': False, 'error': '不允许跨站请求'})
+                return
+            await self._respond(writer, *await self._command(POST_COMMANDS[path]), headers=headers)
+        elif path == '/status':
+            if method != 'GET':
+                await self._respond(writer, 405, {'ok': False, 'error': '请使用GET'})
+                return
+            await self._respond(writer, *await self._command('status'), headers=headers)
+        elif path == '/events':
+            if method != 'GET':
+                await self._respond(writer, 405, {'ok': False, 'error': '请使用GET'})
+                return
+            if len(self._subscribers) >= MAX_SUBSCRIBERS:
+                await self._respond(writer, 503, {'ok': False, 'error': '订阅者过多'})
+                return
+            await self._stream(writer, headers)
+        else:
+            await self._respond(writer, 404, {'ok': False, 'error': '未知路径'})
+
+    async def _command(self, command):
+        future = concurrent.futures.Future()
+        self._command_requested.emit(command, future)
+        try:
+            response = await asyncio.wait_for(asyncio.wrap_future(future), COMMAND_TIMEOUT)
+        except asyncio.TimeoutError:
+            return 504, {'ok': False, 'error': '处理超时'}
+        return (200 if response.get('ok') else 400), response
+
+    def _origin_allowed(self, headers):
+        return bool(self.allowed_origin) and headers.get('origin') == self.allowed_origin
+
+    def _cors_headers(self, headers):
+        """只对配置的来源返回CORS响应头"""
+        if headers is None or not self._origin_allowed(headers):
+            return ""
+        return f"Access-Control-Allow-Origin: {self.allowed_origin}\r\nVary: Origin\r\n"
+
+    async def _respond(self, writer, status, body, headers=None):
+        data = json.dumps(body, ensure_ascii=False).encode('utf-8')
+        writer.write(
+            f"HTTP/1.1 {status} {REASONS[status]}\r\n"
+            "Content-Type: application/json; charset=utf-8\r\n"
+            f"Content-Length: {len(data)}\r\n"
+            f"{self._cors_headers(headers)}"
+            "Connection: close\r\n\r\n".encode('latin-1') + data)
+        await asyncio.wait_for(writer.drain(), WRITE_TIMEOUT)
+
+    async def _stream(self, writer, headers):
+        event = asyncio.Event()
+        self._subscribers.add(event)
+        try:
+            writer.write(
+                ("HTTP/1.1 200 OK\r\n"
+                 "Content-Type: text/event-stream; charset=utf-8\r\n"
+                 "Cache-Control: no-cache\r\n"
+                 f"{self._cors_headers(headers)}"
+                 "Connection: keep-alive\r\n\r\n"
+                 "retry: 3000\n\n").encode('latin-1'))
+            sent = None
+            while not self._closing:
+                event.clear()
+                if self._latest is not None and self._latest is not sent:
+                    sent = self._latest
+                    writer.write(f"event: status\ndata: {sent}\n\n".encode('utf-8'))
+                # 写不出去的客户端超时后断开，不会无限堆积数据
+                await asyncio.wait_for(writer.drain(), WRITE_TIMEOUT)
+                try:
+                    await asyncio.wait_for(event.wait(), KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    writer.write(b": keepalive\n\n")
+        finally:
+            self._subscribers.discard(event)
@@ -0,0 +1,155 @@
+"""桌面通知（freedesktop Notifications D-Bus 接口）
+
+依赖可选的 jeepney（纯Python的D-Bus实现），未安装或没有会话总线时不可用。
+所有D-Bus调用都在后台线程中进行，GUI线程只把请求放入队列，通知服务响应慢或卡住时不会阻塞界面；
+通知被点击或关闭的结果通过Qt信号回到GUI线程。
+
+通知用调用方给定的标识（tag）区分：同一标识的新通知替换旧通知，例如“5分钟后休息”被“1分钟后休息”替换。
+"""
+import os
+import queue
+import threading
+from PySide6.QtCore import QObject, Signal
+from utils.log import get_logger
+
+logger = get_logger('notifications')
+
+try:
+    from jeepney import DBusAddress, HeaderFields, MatchRule, Message, MessageType, new_method_call
+    from jeepney.bus_messages import message_bus
+    from jeepney.io.threading import open_dbus_router, Proxy
+except ImportError:
+    open_dbus_router = None
+
+APP_NAME = 'Take Care Your Ass'
+NOTIFICATIONS_PATH = '/org/freedesktop/Notifications'
+NOTIFICATIONS_INTERFACE = 'org.freedesktop.Notifications'
+
+
+class DesktopNotifier(QObject):
+    action_invoked = Signal(str, str)  # 标识, 动作
+    notification_closed = Signal(str)  # 标识
+
+    # 单次D-Bus调用的超时（秒），只影响后台线程
+    CALL_TIMEOUT = 5.0
+
+    def __init__(self, bus='SESSION', parent=None):
+        super().__init__(parent)
+        self.bus = bus
+        self.capabilities = set()
+        self._queue = queue.Queue()
+        self._thread = None
+        self._stopping = threading.Event()
+        # 以下只在后台线程中访问
+        self._ids = {}  # 标识 -> 通知ID
+        self._tags = {}  # 通知ID -> 标识
+        self._router = None
+
+    @staticmethod
+    def available():
+        return open_dbus_router is not None and bool(os.environ.get('DBUS_SESSION_BUS_ADDRESS'))
+
+    def start(self):
+        """启动后台线程；停止后不能再次启动（后台线程可能还在等待通知服务），需要时创建新的实例"""
+        if self._thread is not None or open_dbus_router is None or self._stopping.is_set():
+            return self._thread is not None
+        self._thread = threading.Thread(target=self._run, name='DesktopNotifier', daemon=True)
+        self._thread.start()
+        return True
+
+    def stop(self):
+        """通知后台线程退出，立即返回，不等待正在进行的D-Bus调用"""
+        if self._thread is None:
+            return
+        self._stopping.set()
+        # 丢弃还没发出的请求
+        while True:
+            try:
+                self._queue.get_nowait()
+            except queue.Empty:
+                break
+        self._queue.put(None)
+        self._thread = None
+
+    def notify(self, tag, summary, body='', actions=(), timeout_ms=-1, urgency=1):
+        """显示或替换通知，actions 为 (动作, 按钮文字) 列表，立即返回"""
+        self._queue.put(('notify', tag, summary, body, tuple(actions), timeout_ms, urgency))
+
+    def close(self, tag):
+        """关闭通知，立即返回"""
+        self._queue.put(('close', tag))
+
+    def _run(self):
+        try:
+            with open_dbus_router(self.bus) as router:
+                self._router = router
+                self._subscribe(router)
+                while True:
+                    item = self._queue.get()
+                    if item is None or self._stopping.is_set():
+                        break
+                    if isinstance(item, Message):
+                        self._on_signal(item)
+                    else:
+                        self._call(item)
+        except Exception as e:
+            logger.warning(f"连接D-Bus通知服务失败: {str(e)}")
+        finally:
+            self._router = None
+
+    def _subscribe(self, router):
+        # 通知的信号放入同一个队列，按收到的顺序处理
+        for member in ('ActionInvoked', 'NotificationClosed'):
+            rule = MatchRule(type='signal', interface=NOTIFICATIONS_INTERFACE, member=member,
+                             path=NOTIFICATIONS_PATH)
+            router.filter(rule, queue=self._queue)
+            Proxy(message_bus, router, timeout=self.CALL_TIMEOUT).AddMatch(rule)
+        reply = self._send('GetCapabilities')
+        if reply is not None:
+            self.capabilities = set(reply[0])
+
+    def _send(self, method, signature=None, body=()):
+        address = DBusAddress(NOTIFICATIONS_PATH, bus_name=NOTIFICATIONS_INTERFACE,
+                              interface=NOTIFICATIONS_INTERFACE)
+        message = new_method_call(address, method, signature, body)
+        try:
+            reply = self._router.send_and_get_reply(message, timeout=self.CALL_TIMEOUT)
+        except TimeoutError:
+            logger.warning(f"通知服务 {method} 调用超时")
+            return None
+        if reply.header.message_type == MessageType.error:
+            logger.warning(f"通知服务 {method} 调用失败: {reply.body}")
+            return None
+        return reply.body
+
+    def _call(self, item):
+        if item[0] == 'close':
+            notification_id = self._ids.get(item[1])
+            if notification_id is not None:
+                self._send('CloseNotification', 'u', (notification_id,))
+            return
+        _, tag, summary, body, actions, timeout_ms, urgency = item
+        if 'actions' not in self.capabilities:
+            actions = ()
+        action_list = [value for action in actions for value in action]
+        reply = self._send('Notify', 'susssasa{sv}i', (
+            APP_NAME, self._ids.get(tag, 0), '', summary, body, action_list,
+            {'urgency': ('y', urgency)}, timeout_ms))
+        if reply is not None:
+            notification_id = reply[0]
+            self._ids[tag] = notification_id
+            self._tags[notification_id] = tag
+
+    def _on_signal(self, message):
+        member = message.header.fields.get(HeaderFields.member)
+        notification_id = message.body[0]
+        tag = self._tags.get(notification_id)
+        if tag is None or self._stopping.is_set():
+            return
+        if member == 'ActionInvoked':
+            self.action_invoked.emit(tag, message.body[1])
+        elif member == 'NotificationClosed':
+            self._tags.pop(notification_id, None)
+            if self._ids.get(tag) == notification_id:
+                del self._ids[tag]
+            self.notification_closed.emit(tag)
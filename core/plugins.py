@@ -0,0 +1,285 @@
+"""插件
+
+第三方包通过入口点（entry point）注册插件，无需修改 gui/ 和 core/：
+
+    # pyproject.toml
+    [project.entry-points."takecareyourass.plugins"]
+    ticketing = "my_company.tcya:TicketingPlugin"
+
+入口点指向一个可调用对象（通常是类），以 PluginContext 为参数创建插件实例。
+插件实现以下任意方法，参数为事件字典（hook、time 以及 get_status() 的各项）：
+
+    on_work_start(event)
+    on_one_minute_warning(event)
+    on_break_start(event)
+    on_break_end(event)        # event['completed'] 表示休息是否正常结束
+
+- 入口点的元数据在后台线程中读取；插件模块在第一次触发钩子时才在插件自己的线程中导入。
+- 钩子在插件专用的后台线程中运行，不阻塞GUI线程；需要操作界面时使用 context.call_in_gui(func)。
+- 每次调用有时间预算，超时的插件会被记录；连续超时或卡住的插件被隔离，不再调用。
+"""
+import time
+import queue
+import threading
+from collections import deque
+from importlib import metadata
+from PySide6.QtCore import QObject, QTimer, Signal
+from utils.log import get_logger
+
+logger = get_logger('plugins')
+
+ENTRY_POINT_GROUP = 'takecareyourass.plugins'
+HOOKS = ('on_work_start', 'on_one_minute_warning', 'on_break_start', 'on_break_end')
+
+
+def discover(group=ENTRY_POINT_GROUP):
+    """列出已安装的插件入口点（不导入插件模块）"""
+    entry_points = metadata.entry_points()
+    if hasattr(entry_points, 'select'):
+        return list(entry_points.select(group=group))
+    return list(entry_points.get(group, []))
+
+
+class PluginContext:
+    """传给插件的接口"""
+
+    def __init__(self, name, manager):
+        self.name = name
+        self.logger = get_logger(f'plugins.{name}')
+        self._manager = manager
+
+    def call_in_gui(self, func, *args):
+        """在GUI线程中执行 func(*args)（例如显示自定义遮罩层）"""
+        self._manager._gui_call.emit(lambda: func(*args))
+
+
+class PluginHost:
+    """单个插件：延迟导入、专用线程、耗时统计"""
+
+    # 连续超时这么多次后隔离
+    MAX_OVERRUNS = 3
+    # 导入插件模块的时间上限（秒），超过时视为卡住
+    IMPORT_BUDGET = 5.0
+
+    def __init__(self, entry_point, manager, budget_ms):
+        self.entry_point = entry_point
+        self.name = entry_point.name
+        self.manager = manager
+        self.budget = budget_ms / 1000
+        self.plugin = None
+        self.loaded = False
+        self.isolated = False
+        self.isolation_reason = None
+        self.queue = None
+        self.thread = None
+        self.running_since = None  # 当前钩子开始运行的时间（单调时间）
+        self.running_hook = None
+
+        # 统计信息
+        self.import_ms = None
+        self.calls = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.overruns = 0
+        self.consecutive_overruns = 0
+        self.errors = 0
+        self.skipped = 0
+
+    def submit(self, hook, event):
+        if self.isolated:
+            self.skipped += 1
+            return
+        if self.thread is None:
+            # 守护线程：卡住的插件不会阻止程序退出
+            self.queue = queue.SimpleQueue()
+            self.thread = threading.Thread(target=self._worker, name=f'plugin-{self.name}', daemon=True)
+            self.thread.start()
+        self.queue.put((hook, event))
+
+    def _worker(self):
+        while True:
+            item = self.queue.get()
+            if item is None or self.isolated:
+                break
+            self._run(*item)
+
+    def _load(self):
+        self.loaded = True
+        start = time.perf_counter()
+        self.running_hook = 'import'
+        self.running_since = time.monotonic()
+        try:
+            factory = self.entry_point.load()
+            self.plugin = factory(PluginContext(self.name, self.manager))
+        except Exception:
+            logger.exception(f"加载插件 {self.name} 失败")
+            self.isolate("加载失败")
+        finally:
+            self.running_since = None
+            self.running_hook = None
+            self.import_ms = (time.perf_counter() - start) * 1000
+
+    def _run(self, hook, event):
+        """在插件线程中运行"""
+        if self.isolated:
+            return
+        if not self.loaded:
+            self._load()
+            if self.plugin is None:
+                return
+        func = getattr(self.plugin, hook, None)
+        if func is None:
+            return
+        self.running_hook = hook
+        self.running_since = time.monotonic()
+        try:
+            func(event)
+        except Exception:
+            self.errors += 1
+            logger.exception(f"插件 {self.name} 的 {hook} 出错")
+        finally:
+            elapsed = time.monotonic() - self.running_since
+            self.running_since = None
+            self.running_hook = None
+            self._record(hook, elapsed)
+
+    def _record(self, hook, elapsed):
+        elapsed_ms = elapsed * 1000
+        self.calls += 1
+        self.total_ms += elapsed_ms
+        self.max_ms = max(self.max_ms, elapsed_ms)
+        if elapsed > self.budget:
+            self.overruns += 1
+            self.consecutive_overruns += 1
+            logger.warning(f"插件 {self.name} 的 {hook} 耗时 {elapsed_ms:.0f} ms，超过预算 {self.budget * 1000:.0f} ms")
+            if self.consecutive_overruns >= self.MAX_OVERRUNS:
+                self.isolate(f"连续 {self.consecutive_overruns} 次超时")
+        else:
+            self.consecutive_overruns = 0
+
+    def check_budget(self):
+        """检查正在运行的钩子是否卡住（在GUI线程中调用），返回是否仍在运行"""
+        since = self.running_since
+        if since is None or self.isolated:
+            return False
+        limit = self.IMPORT_BUDGET if self.running_hook == 'import' else self.budget * 2
+        if time.monotonic() - since > limit:
+            self.isolate(f"{self.running_hook} 运行 {limit:g} 秒仍未结束")
+            return False
+        return True
+
+    def isolate(self, reason):
+        if self.isolated:
+            return
+        self.isolated = True
+        self.isolation_reason = reason
+        logger.error(f"插件 {self.name} 已隔离: {reason}")
+        # 线程无法强制结束；不再提交新任务，排队的任务不再执行
+        self.close()
+
+    def close(self):
+        if self.queue is not None:
+            self.queue.put(None)
+
+    def get_stats(self):
+        return {
+            'name': self.name,
+            'loaded': self.plugin is not None,
+            'import_ms': round(self.import_ms, 1) if self.import_ms is not None else None,
+            'calls': self.calls,
+            'avg_ms': round(self.total_ms / self.calls, 2) if self.calls else 0.0,
+            'max_ms': round(self.max_ms, 2),
+            'overruns': self.overruns,
+            'errors': self.errors,
+            'skipped': self.skipped,
+            'isolated': self.isolated,
+            'isolation_reason': self.isolation_reason,
+        }
+
+
+class PluginManager(QObject):
+    """分发钩子；GUI线程只提交任务，不等待插件"""
+
+    _gui_call = Signal(object)
+    _discovered = Signal(object)
+
+    def __init__(self, entry_points=None, budget_ms=250, disabled=(), parent=None):
+        super().__init__(parent)
+        self.budget_ms = budget_ms
+        self.disabled = set(disabled)
+        self.hosts = []
+        self.ready = False
+        self.discovery_ms = None
+        # 入口点读取完成前触发的钩子
+        self._pending = deque(maxlen=16)
+        self._gui_call.connect(self._call_in_gui)
+        self._discovered.connect(self._on_discovered)
+        self.dispatch_ms = 0.0
+        self.dispatches = 0
+        if entry_points is not None:
+            self._on_discovered(entry_points)
+        else:
+            # 读取所有已安装包的元数据可能需要几十毫秒，不在GUI线程中进行
+            threading.Thread(target=self._discover, name='PluginDiscovery', daemon=True).start()
+
+    def _discover(self):
+        start = time.perf_counter()
+        try:
+            entry_points = discover()
+        except Exception as e:
+            logger.error(f"读取插件入口点失败: {str(e)}")
+            entry_points = []
+        self.discovery_ms = (time.perf_counter() - start) * 1000
+        try:
+            self._discovered.emit(entry_points)
+        except RuntimeError:
+            pass
+
+    def _on_discovered(self, entry_points):
+        self.hosts = [PluginHost(ep, self, self.budget_ms) for ep in entry_points if ep.name not in self.disabled]
+        self.ready = True
+        if self.hosts:
+            logger.info(f"发现插件: {', '.join(host.name for host in self.hosts)}")
+        pending = list(self._pending)
+        self._pending.clear()
+        for hook, event in pending:
+            self.dispatch(hook, event)
+
+    def dispatch(self, hook, event):
+        """把钩子提交给所有插件，超过预算两倍后检查是否卡住"""
+        if not self.ready:
+            self._pending.append((hook, event))
+            return
+        if not self.hosts:
+            return
+        start = time.perf_counter()
+        event = dict(event, hook=hook)
+        for host in self.hosts:
+            host.submit(hook, dict(event))
+        self._schedule_check()
+        self.dispatch_ms += (time.perf_counter() - start) * 1000
+        self.dispatches += 1
+
+    def _schedule_check(self):
+        QTimer.singleShot(int(self.budget_ms * 2) + 50, self.check_budgets)
+
+    def check_budgets(self):
+        running = False
+        for host in self.hosts:
+            running = host.check_budget() or running
+        if running:
+            # 还有钩子在运行，稍后再检查
+            self._schedule_check()
+
+    def _call_in_gui(self, func):
+        try:
+            func()
+        except Exception:
+            logger.exception("插件在GUI线程中执行的操作出错")
+
+    def close(self):
+        for host in self.hosts:
+            host.close()
+
+    def get_stats(self):
+        return [host.get_stats() for host in self.hosts]
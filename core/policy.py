@@ -0,0 +1,457 @@
+"""集中管理的策略
+
+管理员发布签名的策略文档（HTTP(S)地址或共享目录中的文件），客户端按条件请求
+（ETag / If-Modified-Since）定期获取，缓存在本地，并合并到配置之上：
+
+    {
+      "version": 3,
+      "settings": {"allow_escape": false},      # 强制值，这些项在设置窗口中锁定
+      "minimum": {"break_duration": 5},          # 数值下限
+      "maximum": {"work_duration": 90},          # 数值上限
+      "locked": ["autostart"]                    # 保持当前值，不允许修改
+    }
+
+文档格式为 {"payload": "<策略JSON文本>", "signature": "<Ed25519签名的base64>"}。
+管理员用私钥签名（policytool.py），客户端只持有公钥，公钥与策略地址一起部署在系统目录
+（见 bootstrap_paths），普通用户无法修改，也无法伪造策略。
+缓存的文档每次加载时重新校验；版本号小于当前策略的文档会被拒绝，防止回退到旧策略。
+
+获取在后台线程中进行，刷新间隔带随机抖动，启动时的首次获取也随机分散，
+大量客户端同时登录时不会集中请求服务器。
+"""
+import os
+import sys
+import json
+import time
+import base64
+import random
+import binascii
+import threading
+import urllib.error
+import urllib.parse
+import urllib.request
+from email.utils import parsedate_to_datetime
+import yaml
+from PySide6.QtCore import QObject, Signal
+from core.clock import system_clock
+from utils.log import get_logger
+
+try:
+    from cryptography.exceptions import InvalidSignature
+    from cryptography.hazmat.primitives import serialization
+    from cryptography.hazmat.primitives.asymmetric.ed25519 import Ed25519PrivateKey, Ed25519PublicKey
+except ImportError:
+    Ed25519PublicKey = None
+
+logger = get_logger('policy')
+
+CACHE_FILE = 'policy_cache.json'
+MAX_DOCUMENT_BYTES = 256 * 1024
+FETCH_TIMEOUT = 10
+
+
+class PolicyError(Exception):
+    pass
+
+
+class Policy:
+    def __init__(self, data):
+        if not isinstance(data, dict):
+            raise PolicyError("策略必须是JSON对象")
+        try:
+            self.version = int(data.get('version', 0))
+            self.settings = dict(data.get('settings') or {})
+            self.minimum = {key: float(value) for key, value in (data.get('minimum') or {}).items()}
+            self.maximum = {key: float(value) for key, value in (data.get('maximum') or {}).items()}
+            self.locked = set(data.get('locked') or []) | set(self.settings)
+        except (TypeError, ValueError, AttributeError) as e:
+            raise PolicyError(f"策略格式错误: {str(e)}")
+
+    def is_locked(self, key):
+        return key in self.locked
+
+    def check(self, key, value):
+        """检查数值是否在策略范围内，返回错误信息，符合时返回None"""
+        if key in self.minimum and value < self.minimum[key]:
+            return f"不能小于 {self.minimum[key]:g}（管理员策略）"
+        if key in self.maximum and value > self.maximum[key]:
+            return f"不能大于 {self.maximum[key]:g}（管理员策略）"
+        return None
+
+    def enforce(self, key, value):
+        """返回按策略调整后的值"""
+        if key in self.settings:
+            return self.settings[key]
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            if key in self.minimum and value < self.minimum[key]:
+                value = type(value)(self.minimum[key])
+            if key in self.maximum and value > self.maximum[key]:
+                value = type(value)(self.maximum[key])
+        return value
+
+
+def _require_cryptography():
+    if Ed25519PublicKey is None:
+        raise PolicyError("未安装cryptography，无法校验策略签名")
+
+
+def generate_private_key():
+    """生成新的签名私钥"""
+    _require_cryptography()
+    return Ed25519PrivateKey.generate()
+
+
+def private_key_pem(private_key):
+    """私钥的PEM文本（未加密，管理员自行妥善保管）"""
+    return private_key.private_bytes(serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8,
+                                     serialization.NoEncryption())
+
+
+def load_private_key(data):
+    """从PEM文本加载签名私钥"""
+    _require_cryptography()
+    try:
+        key = serialization.load_pem_private_key(data, password=None)
+    except (ValueError, TypeError) as e:
+        raise PolicyError(f"私钥无效: {str(e)}")
+    if not isinstance(key, Ed25519PrivateKey):
+        raise PolicyError("私钥不是Ed25519密钥")
+    return key
+
+
+def public_key_text(key):
+    """公钥的部署格式：32字节原始公钥的base64，私钥和公钥都可以传入"""
+    if isinstance(key, Ed25519PrivateKey):
+        key = key.public_key()
+    return base64.b64encode(key.public_bytes(serialization.Encoding.Raw,
+                                             serialization.PublicFormat.Raw)).decode('ascii')
+
+
+def load_public_key(text):
+    """从base64文本加载校验公钥"""
+    _require_cryptography()
+    try:
+        return Ed25519PublicKey.from_public_bytes(base64.b64decode(str(text).strip(), validate=True))
+    except (binascii.Error, ValueError) as e:
+        raise PolicyError(f"公钥无效: {str(e)}")
+
+
+def encode_document(policy, private_key):
+    """用私钥把策略签名为文档（字节）"""
+    payload = json.dumps(policy, ensure_ascii=False, sort_keys=True)
+    signature = private_key.sign(payload.encode('utf-8'))
+    return json.dumps({
+        'payload': payload,
+        'signature': base64.b64encode(signature).decode('ascii'),
+    }, ensure_ascii=False, indent=2).encode('utf-8')
+
+
+def decode_document(data, public_key):
+    """用公钥校验签名并解析策略，失败时抛出 PolicyError"""
+    try:
+        document = json.loads(data)
+        payload = document['payload'].encode('utf-8')
+        signature = base64.b64decode(str(document['signature']), validate=True)
+    except (ValueError, KeyError, TypeError, AttributeError, binascii.Error):
+        raise PolicyError("策略文档格式错误")
+    try:
+        public_key.verify(signature, payload)
+    except InvalidSignature:
+        raise PolicyError("策略签名无效")
+    try:
+        return Policy(json.loads(payload))
+    except ValueError:
+        raise PolicyError("策略内容不是有效的JSON")
+
+
+def snooze_allowed(config):
+    """是否允许推迟休息；推迟也能躲开休息，禁止ESC提前结束休息时同样不允许"""
+    return config.get('allow_snooze', True) and config.get('allow_escape', True)
+
+
+class FetchResult:
+    def __init__(self, status, body=None, etag=None, last_modified=None, retry_after=None, error=None):
+        self.status = status  # 200、304，其他HTTP状态码，0表示网络或文件错误
+        self.body = body
+        self.etag = etag
+        self.last_modified = last_modified
+        self.retry_after = retry_after
+        self.error = error
+
+
+def _is_http(source):
+    return urllib.parse.urlsplit(source).scheme in ('http', 'https')
+
+
+def _local_path(source):
+    if source.startswith('file://'):
+        return urllib.request.url2pathname(urllib.parse.urlsplit(source).path)
+    return source
+
+
+def _retry_after(value):
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def fetch(source, etag=None, last_modified=None, timeout=FETCH_TIMEOUT):
+    """条件获取策略文档；共享目录中的文件以修改时间和大小作为ETag"""
+    if _is_http(source):
+        request = urllib.request.Request(source, headers={'Accept': 'application/json',
+                                                          'User-Agent': 'TakeCareYourAss'})
+        if etag:
+            request.add_header('If-None-Match', etag)
+        if last_modified:
+            request.add_header('If-Modified-Since', last_modified)
+        try:
+            with urllib.request.urlopen(request, timeout=timeout) as response:
+                body = response.read(MAX_DOCUMENT_BYTES + 1)
+                if len(body) > MAX_DOCUMENT_BYTES:
+                    return FetchResult(0, error="策略文档过大")
+                return FetchResult(response.status, body, response.headers.get('ETag'),
+                                   response.headers.get('Last-Modified'))
+        except urllib.error.HTTPError as e:
+            if e.code == 304:
+                return FetchResult(304, etag=e.headers.get('ETag') or etag,
+                                   last_modified=e.headers.get('Last-Modified') or last_modified)
+            return FetchResult(e.code, retry_after=_retry_after(e.headers.get('Retry-After')),
+                               error=f"HTTP {e.code}")
+        except (urllib.error.URLError, OSError, ValueError) as e:
+            return FetchResult(0, error=str(e))
+
+    path = _local_path(source)
+    try:
+        stat = os.stat(path)
+        validator = f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+        if validator == etag:
+            return FetchResult(304, etag=etag)
+        if stat.st_size > MAX_DOCUMENT_BYTES:
+            return FetchResult(0, error="策略文档过大")
+        with open(path, 'rb') as f:
+            return FetchResult(200, f.read(), validator)
+    except OSError as e:
+        return FetchResult(0, error=str(e))
+
+
+def bootstrap_paths():
+    """管理员部署策略地址和密钥的位置，按顺序查找"""
+    paths = []
+    if os.environ.get('TCYA_POLICY_FILE'):
+        paths.append(os.environ['TCYA_POLICY_FILE'])
+    if sys.platform == 'win32':
+        paths.append(os.path.join(os.environ.get('ProgramData', r'C:\ProgramData'), 'TakeCareYourAss', 'policy.yaml'))
+    elif sys.platform == 'darwin':
+        paths.append('/Library/Application Support/TakeCareYourAss/policy.yaml')
+    else:
+        paths.append('/etc/takecareyourass/policy.yaml')
+    return paths
+
+
+def load_settings():
+    """读取管理员部署的策略地址、公钥和刷新间隔；未部署时返回None
+
+    只读取系统目录（或 TCYA_POLICY_FILE 指定）的部署文件，用户的 config.yaml 不能指定策略来源。
+    """
+    settings = None
+    for path in bootstrap_paths():
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                settings = yaml.safe_load(f) or {}
+            break
+        except FileNotFoundError:
+            continue
+        except (OSError, yaml.YAMLError) as e:
+            logger.error(f"读取策略部署文件 {path} 失败: {str(e)}")
+    if not settings or not settings.get('source'):
+        return None
+    if not settings.get('public_key'):
+        logger.error("配置了策略地址但没有签名公钥，忽略策略")
+        return None
+    try:
+        public_key = load_public_key(settings['public_key'])
+    except PolicyError as e:
+        logger.error(f"{str(e)}，忽略策略")
+        return None
+    return {
+        'source': str(settings['source']),
+        'public_key': public_key,
+        'refresh_minutes': max(1, float(settings.get('refresh_minutes', 60))),
+    }
+
+
+def refresh_delay(interval, rng=random):
+    """正常刷新间隔，上下浮动20%"""
+    return interval * rng.uniform(0.8, 1.2)
+
+
+def retry_delay(interval, failures, retry_after=None, rng=random):
+    """失败后的重试间隔：指数退避加随机抖动，不超过正常刷新间隔"""
+    delay = min(interval, PolicyManager.RETRY_BASE * (2 ** min(failures - 1, 10)))
+    delay *= rng.uniform(0.5, 1.0)
+    if retry_after is not None:
+        delay = max(delay, retry_after)
+    return delay
+
+
+class PolicyManager(QObject):
+    """后台获取策略，变化时发出 policy_changed"""
+
+    policy_changed = Signal(object)  # Policy，或None表示没有有效策略
+    _fetched = Signal(object)
+
+    STARTUP_SPREAD = 60.0  # 没有有效缓存时，首次获取在启动后的这么多秒内随机分散
+    RETRY_BASE = 30.0
+
+    def __init__(self, source, public_key, refresh_minutes=60, cache_file=CACHE_FILE, clock=None, parent=None):
+        super().__init__(parent)
+        self.source = source
+        self.public_key = public_key
+        self.interval = refresh_minutes * 60
+        self.cache_file = cache_file
+        self.clock = clock or system_clock
+        self.policy = None
+        self.document = None  # 当前策略文档的文本
+        self.etag = None
+        self.last_modified = None
+        self.fetched_at = None
+        self.failures = 0
+        self._busy = False
+        self.timer = self.clock.create_timer(self)
+        self.timer.setSingleShot(True)
+        self.timer.timeout.connect(self.refresh_now)
+        self._fetched.connect(self._on_fetched)
+
+        # 统计信息
+        self.fetches = 0
+        self.not_modified = 0
+        self.updates = 0
+        self.errors = 0
+        self.last_error = None
+
+    def load_cache(self):
+        """加载并校验磁盘缓存，返回缓存中的策略"""
+        try:
+            with open(self.cache_file, 'r', encoding='utf-8') as f:
+                cache = json.load(f)
+            if cache.get('source') != self.source:
+                return None
+            self.policy = decode_document(cache['document'].encode('utf-8'), self.public_key)
+            self.document = cache['document']
+            self.etag = cache.get('etag')
+            self.last_modified = cache.get('last_modified')
+            self.fetched_at = cache.get('fetched_at')
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, KeyError, TypeError, AttributeError, PolicyError) as e:
+            logger.warning(f"策略缓存无效: {str(e)}")
+            self.policy = None
+        return self.policy
+
+    def _save_cache(self):
+        cache = {
+            'source': self.source,
+            'etag': self.etag,
+            'last_modified': self.last_modified,
+            'fetched_at': self.fetched_at,
+            'document': self.document,
+        }
+        try:
+            temp_file = self.cache_file + '.tmp'
+            with open(temp_file, 'w', encoding='utf-8') as f:
+                json.dump(cache, f, ensure_ascii=False)
+            os.replace(temp_file, self.cache_file)
+        except OSError as e:
+            logger.warning(f"写入策略缓存失败: {str(e)}")
+
+    def start(self):
+        """安排首次获取：缓存未过期时等到下次刷新，否则在启动后随机分散"""
+        if self.fetched_at is not None:
+            age = max(0.0, self.clock.time() - self.fetched_at)
+            delay = max(0.0, refresh_delay(self.interval) - age)
+        else:
+            delay = random.uniform(0, self.STARTUP_SPREAD)
+        self._schedule(delay)
+
+    def stop(self):
+        self.timer.stop()
+
+    def _schedule(self, seconds):
+        self.timer.start(int(seconds * 1000))
+
+    def refresh_now(self):
+        """在后台线程中获取策略"""
+        if self._busy:
+            return
+        self._busy = True
+        self.fetches += 1
+        source, etag, last_modified = self.source, self.etag, self.last_modified
+
+        def run():
+            result = fetch(source, etag, last_modified)
+            try:
+                self._fetched.emit(result)
+            except RuntimeError:
+                # 获取完成前对象已被销毁
+                pass
+
+        threading.Thread(target=run, name='PolicyFetch', daemon=True).start()
+
+    def _on_fetched(self, result):
+        self._busy = False
+        if result.status == 304:
+            self.not_modified += 1
+            self._succeeded(result)
+        elif result.status == 200:
+            try:
+                policy = decode_document(result.body, self.public_key)
+                if self.policy is not None and policy.version < self.policy.version:
+                    raise PolicyError(f"策略版本 {policy.version} 低于当前版本 {self.policy.version}")
+            except PolicyError as e:
+                self._failed(str(e))
+                return
+            document = result.body.decode('utf-8')
+            changed = document != self.document
+            self.policy = policy
+            self.document = document
+            self._succeeded(result)
+            if changed:
+                self.updates += 1
+                logger.info(f"已应用策略版本 {policy.version}")
+                self.policy_changed.emit(policy)
+        else:
+            self._failed(result.error or f"HTTP {result.status}", result.retry_after)
+
+    def _succeeded(self, result):
+        self.failures = 0
+        self.etag = result.etag
+        self.last_modified = result.last_modified
+        self.fetched_at = self.clock.time()
+        if self.document is not None:
+            self._save_cache()
+        self._schedule(refresh_delay(self.interval))
+
+    def _failed(self, error, retry_after=None):
+        self.errors += 1
+        self.failures += 1
+        self.last_error = error
+        logger.warning(f"获取策略失败: {error}")
+        # 失败时继续使用当前（缓存的）策略
+        self._schedule(retry_delay(self.interval, self.failures, retry_after))
+
+    def get_stats(self):
+        return {
+            'version': self.policy.version if self.policy is not None else None,
+            'fetches': self.fetches,
+            'not_modified': self.not_modified,
+            'updates': self.updates,
+            'errors': self.errors,
+            'last_error': self.last_error,
+        }
@@ -0,0 +1,137 @@
+"""全屏/演示状态检测（X11）
+
+订阅根窗口的 _NET_ACTIVE_WINDOW 和当前活动窗口的 _NET_WM_STATE 属性变化事件，
+活动窗口处于全屏状态时视为正在演示。完全由事件驱动，不轮询窗口列表。
+依赖可选的 python-xlib，未安装或不在X11会话中时检测器不可用。
+"""
+import os
+import select
+import threading
+from PySide6.QtCore import QObject, Signal
+from utils.log import get_logger
+
+logger = get_logger('presentation')
+
+try:
+    from Xlib import X, Xatom
+    from Xlib import display as xdisplay
+    from Xlib import error as xerror
+except ImportError:
+    xdisplay = None
+
+
+class PresentationDetector(QObject):
+    state_changed = Signal(bool)  # True表示进入全屏/演示状态
+
+    def __init__(self, display_name=None, parent=None):
+        super().__init__(parent)
+        self.display_name = display_name
+        self.active = False
+        self._display = None
+        self._thread = None
+        self._wake_r = self._wake_w = None
+        self._stop = threading.Event()
+        self._active_window = None
+
+    @staticmethod
+    def available():
+        return xdisplay is not None and bool(os.environ.get('DISPLAY'))
+
+    def start(self):
+        """启动检测线程，不可用时返回False"""
+        if self._thread is not None:
+            return True
+        if xdisplay is None:
+            return False
+        try:
+            self._display = xdisplay.Display(self.display_name)
+        except Exception as e:
+            logger.warning(f"连接X11显示服务失败: {str(e)}")
+            return False
+        # 窗口随时可能被关闭，忽略异步的BadWindow等错误
+        self._display.set_error_handler(lambda *args: None)
+        d = self._display
+        self._atom_active = d.intern_atom('_NET_ACTIVE_WINDOW')
+        self._atom_state = d.intern_atom('_NET_WM_STATE')
+        self._atom_fullscreen = d.intern_atom('_NET_WM_STATE_FULLSCREEN')
+        self._root = d.screen().root
+        self._root.change_attributes(event_mask=X.PropertyChangeMask)
+        self._track_active_window()
+        self._evaluate(emit=True)
+
+        self._stop.clear()
+        self._wake_r, self._wake_w = os.pipe()
+        self._thread = threading.Thread(target=self._run, name='PresentationDetector', daemon=True)
+        self._thread.start()
+        return True
+
+    def stop(self):
+        if self._thread is None:
+            return
+        self._stop.set()
+        os.write(self._wake_w, b'x')
+        self._thread.join(timeout=1)
+        self._thread = None
+        for fd in (self._wake_r, self._wake_w):
+            os.close(fd)
+        self._wake_r = self._wake_w = None
+        try:
+            self._display.close()
+        except Exception:
+            pass
+        self._display = None
+
+    def _run(self):
+        d = self._display
+        fd = d.fileno()
+        while not self._stop.is_set():
+            if not d.pending_events():
+                # 没有事件时阻塞等待，不占用CPU
+                readable, _, _ = select.select([fd, self._wake_r], [], [])
+                if self._wake_r in readable:
+                    return
+            try:
+                while d.pending_events():
+                    event = d.next_event()
+                    if event.type != X.PropertyNotify:
+                        continue
+                    if event.atom == self._atom_active and event.window == self._root:
+                        self._track_active_window()
+                        self._evaluate()
+                    elif event.atom == self._atom_state:
+                        self._evaluate()
+            except Exception as e:
+                logger.error(f"处理X11事件失败: {str(e)}")
+
+    def _get_property(self, window, atom, kind):
+        try:
+            prop = window.get_full_property(atom, kind)
+        except (xerror.BadWindow, xerror.BadAtom):
+            return None
+        return prop.value if prop else None
+
+    def _track_active_window(self):
+        """改为监听新的活动窗口的属性变化"""
+        value = self._get_property(self._root, self._atom_active, Xatom.WINDOW)
+        window_id = value[0] if value is not None and len(value) else 0
+        old = self._active_window
+        if old is not None and old.id == window_id:
+            return
+        if old is not None:
+            old.change_attributes(event_mask=X.NoEventMask)
+        self._active_window = None
+        if window_id:
+            window = self._display.create_resource_object('window', window_id)
+            window.change_attributes(event_mask=X.PropertyChangeMask)
+            self._active_window = window
+        self._display.flush()
+
+    def _evaluate(self, emit=True):
+        active = False
+        if self._active_window is not None:
+            states = self._get_property(self._active_window, self._atom_state, Xatom.ATOM)
+            active = states is not None and self._atom_fullscreen in states
+        if active != self.active:
+            self.active = active
+            if emit:
+                self.state_changed.emit(active)
@@ -0,0 +1,299 @@
+import time
+import heapq
+import itertools
+from datetime import datetime, timedelta, time as dtime
+from PySide6.QtCore import QObject, Signal
+from core.clock import system_clock
+from utils.log import get_logger
+
+logger = get_logger('scheduler')
+
+
+class ScheduleRule:
+    """一条休息规则，例如每20分钟休息20秒的护眼提醒
+
+    interval 为间隔（分钟），duration 为休息时长（秒）。
+    working_hours 形如 ['09:00', '18:00']，weekdays 为ISO星期（1=周一 … 7=周日）。
+    """
+
+    def __init__(self, name, interval, duration, title='休息时间',
+                 working_hours=None, weekdays=None, enabled=True):
+        if interval <= 0:
+            raise ValueError(f"规则 {name} 的间隔必须大于0")
+        self.name = name
+        self.interval = interval * 60
+        self.duration = duration
+        self.title = title
+        self.enabled = enabled
+        self.weekdays = set(weekdays) if weekdays else None
+        self.start_time = self.end_time = None
+        if working_hours:
+            self.start_time = dtime.fromisoformat(working_hours[0])
+            self.end_time = dtime.fromisoformat(working_hours[1])
+            if self.start_time >= self.end_time:
+                raise ValueError(f"规则 {name} 的工作时间段无效")
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(
+            data['name'],
+            data['interval'],
+            data.get('duration_seconds', 60),
+            title=data.get('title', '休息时间'),
+            working_hours=data.get('working_hours'),
+            weekdays=data.get('weekdays'),
+            enabled=data.get('enabled', True),
+        )
+
+    def _window(self, t):
+        """返回包含t或在t之后的第一个允许时间段 (开始, 结束)，开始不早于t"""
+        dt = datetime.fromtimestamp(t)
+        for offset in range(8):
+            day = (dt + timedelta(days=offset)).date()
+            if self.weekdays and day.isoweekday() not in self.weekdays:
+                continue
+            if self.start_time is not None:
+                start = datetime.combine(day, self.start_time)
+                end = datetime.combine(day, self.end_time)
+            else:
+                start = datetime.combine(day, dtime.min)
+                end = start + timedelta(days=1)
+            if dt >= end:
+                continue
+            return max(dt, start).timestamp(), end.timestamp()
+        return None
+
+    def next_fire(self, after):
+        """计算after之后的下一次触发时间（时间戳），没有可用时间段时返回None"""
+        t = after + self.interval
+        for _ in range(16):
+            window = self._window(t)
+            if window is None:
+                return None
+            start, end = window
+            if start <= t:
+                return t
+            # 不在允许时间段内：从下一个时间段开始时重新计时
+            t = start + self.interval
+            if t < end:
+                return t
+            t = end
+        return None
+
+
+class Schedule:
+    """规则调度表
+
+    每条规则在最小堆中只有一个有效条目，取最早事件为O(1)，
+    触发、推迟、重新安排均为O(log n)。规则被修改时旧条目通过版本号惰性作废。
+    另外保存少量单次截止时间（如主计时的本轮工作结束），触发后不再重复。
+    暂停期间规则不触发，继续时所有规则顺延暂停的时长；截止时间由设置者自己管理，不受暂停影响。
+    """
+
+    def __init__(self, rules=(), now=time.time):
+        self.now = now
+        self.rules = {}
+        self.deadlines = {}
+        self.paused_at = None
+        self._heap = []
+        self._seq = itertools.count()
+        self._generation = {}
+        self.set_rules(rules)
+
+    def _rule_now(self):
+        """规则计时使用的当前时间，暂停期间停在暂停时刻"""
+        return self.now() if self.paused_at is None else self.paused_at
+
+    def set_rules(self, rules):
+        """替换全部规则，从当前时间开始计时"""
+        self.rules = {rule.name: rule for rule in rules if rule.enabled}
+        self._heap = []
+        self._generation = {}
+        start = self._rule_now()
+        for rule in self.rules.values():
+            self._push(rule.name, rule.next_fire(start))
+
+    def _push(self, name, when):
+        generation = self._generation.get(name, 0) + 1
+        self._generation[name] = generation
+        if when is not None:
+            heapq.heappush(self._heap, (when, next(self._seq), name, generation))
+
+    def _is_stale(self, entry):
+        return self._generation.get(entry[2]) != entry[3]
+
+    def next_time(self):
+        """最早的待触发时间，没有待触发事件时返回None"""
+        while self._heap and self._is_stale(self._heap[0]):
+            heapq.heappop(self._heap)
+        times = list(self.deadlines.values())
+        if self._heap and self.paused_at is None:
+            times.append(self._heap[0][0])
+        return min(times) if times else None
+
+    def set_deadline(self, name, when):
+        """设置单次截止时间，同名的截止时间被替换"""
+        self.deadlines[name] = when
+
+    def clear_deadline(self, name):
+        self.deadlines.pop(name, None)
+
+    def pop_due_deadlines(self, now=None):
+        """取出已到期的截止时间名称"""
+        now = self.now() if now is None else now
+        due = [name for name, when in self.deadlines.items() if when <= now]
+        for name in due:
+            del self.deadlines[name]
+        return due
+
+    def pop_due(self, now=None):
+        """取出所有已到期的事件，并为对应规则安排下一次触发"""
+        now = self.now() if now is None else now
+        events = []
+        if self.paused_at is not None:
+            return events
+        while self._heap and self._heap[0][0] <= now:
+            entry = heapq.heappop(self._heap)
+            if self._is_stale(entry):
+                continue
+            when, _, name, _ = entry
+            rule = self.rules[name]
+            events.append({'name': name, 'title': rule.title, 'duration': rule.duration,
+                           'scheduled': when})
+            # 从当前时间起算，休眠唤醒后不会补发积压的提醒
+            self._push(name, rule.next_fire(now))
+        return events
+
+    def snooze(self, name, minutes):
+        """推迟规则的下一次提醒"""
+        if name in self.rules:
+            self._push(name, self._rule_now() + minutes * 60)
+
+    def restart(self, name, start=None):
+        """从指定时间重新开始计时，例如一次长休息结束后"""
+        rule = self.rules.get(name)
+        if rule is not None:
+            self._push(name, rule.next_fire(self._rule_now() if start is None else start))
+
+    def restart_all(self, start=None):
+        """所有规则从指定时间重新开始计时"""
+        for name in self.rules:
+            self.restart(name, start)
+
+    def defer_until(self, until):
+        """把早于until的提醒统一推迟到until"""
+        for entry in list(self._heap):
+            if entry[0] < until and not self._is_stale(entry):
+                self._push(entry[2], until)
+
+    def pause(self):
+        if self.paused_at is None:
+            self.paused_at = self.now()
+
+    def resume(self):
+        """继续计时，待触发的规则顺延暂停的时长"""
+        if self.paused_at is None:
+            return
+        shift = max(0.0, self.now() - self.paused_at)
+        self.paused_at = None
+        if shift:
+            for entry in [entry for entry in self._heap if not self._is_stale(entry)]:
+                self._push(entry[2], entry[0] + shift)
+
+
+class ScheduleEngine(QObject):
+    """基于 Schedule 的调度引擎，只为最早的事件设置一个定时器
+
+    休息规则到期时发出 event_due，单次截止时间（主计时的本轮工作结束）到期时发出 deadline_due。
+    """
+
+    event_due = Signal(dict)
+    deadline_due = Signal(str)
+
+    # 单次等待的上限，防止系统休眠或调整时间后定时器长时间不触发
+    MAX_WAIT_MS = 5 * 60 * 1000
+
+    def __init__(self, clock=None, parent=None):
+        super().__init__(parent)
+        self.clock = clock or system_clock
+        self.schedule = Schedule(now=self.clock.time)
+        self.timer = self.clock.create_timer(self)
+        self.timer.setSingleShot(True)
+        self.timer.timeout.connect(self._on_timeout)
+        self.stopped = False
+
+    def load_config(self, config):
+        """从配置加载规则"""
+        rules = []
+        for item in config.get('schedules', []) or []:
+            try:
+                rules.append(ScheduleRule.from_dict(item))
+            except (KeyError, TypeError, ValueError) as e:
+                logger.warning(f"忽略无效的休息规则 {item}: {str(e)}")
+        self.schedule.set_rules(rules)
+        self.stopped = False
+        self._arm()
+
+    def snooze(self, name, minutes=5):
+        self.schedule.snooze(name, minutes)
+        self._arm()
+
+    def restart(self, name, start=None):
+        self.schedule.restart(name, start)
+        self._arm()
+
+    def restart_all(self, start=None):
+        self.schedule.restart_all(start)
+        self._arm()
+
+    def defer_until(self, until):
+        self.schedule.defer_until(until)
+        self._arm()
+
+    def set_deadline(self, name, seconds):
+        """seconds 秒后发出 deadline_due(name)"""
+        self.schedule.set_deadline(name, self.schedule.now() + seconds)
+        self._arm()
+
+    def clear_deadline(self, name):
+        self.schedule.clear_deadline(name)
+        self._arm()
+
+    def deadline(self, name):
+        """截止时间的剩余秒数，没有设置时返回None"""
+        when = self.schedule.deadlines.get(name)
+        return None if when is None else when - self.schedule.now()
+
+    def pause(self):
+        """暂停休息规则（主计时暂停时调用），截止时间仍按时触发"""
+        self.schedule.pause()
+        self._arm()
+
+    def resume(self):
+        self.schedule.resume()
+        self._arm()
+
+    @property
+    def paused(self):
+        return self.schedule.paused_at is not None
+
+    def stop(self):
+        """停止调度（退出时调用），重新加载规则后恢复"""
+        self.stopped = True
+        self.timer.stop()
+
+    def _arm(self):
+        next_time = None if self.stopped else self.schedule.next_time()
+        if next_time is None:
+            self.timer.stop()
+            return
+        delay_ms = int((next_time - self.schedule.now()) * 1000)
+        self.timer.start(max(0, min(delay_ms, self.MAX_WAIT_MS)))
+
+    def _on_timeout(self):
+        now = self.schedule.now()
+        for name in self.schedule.pop_due_deadlines(now):
+            self.deadline_due.emit(name)
+        for event in self.schedule.pop_due(now):
+            self.event_due.emit(event)
+        self._arm()
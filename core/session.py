@@ -0,0 +1,417 @@
+"""工作/休息状态机
+
+图形界面（gui.timer_window）和终端界面（tui）共用同一个 BreakSession：主计时和长休息、
+日历忙碌或全屏演示时推迟休息、按团队同步的计划对齐休息开始时间、休息预告和结束前一分钟提醒，
+以及额外休息规则触发的短休息。只依赖 QtCore，前端根据信号显示计时框、遮罩层或终端画面，
+用户的操作（暂停、跳过、ESC、稍后提醒）也都交给这里处理。
+
+阶段：work（工作中）、deferred（休息被推迟）、break（休息中）；短休息期间主计时继续运行。
+"""
+from PySide6.QtCore import QObject, Qt, Signal
+from core.timer import Timer
+from core.clock import system_clock
+from core.scheduler import ScheduleEngine
+from core.calendar_index import CalendarIndex
+from core.presentation_detector import PresentationDetector
+from core.policy import snooze_allowed
+from utils.log import get_logger
+
+logger = get_logger('session')
+
+
+class BreakSession(QObject):
+    work_started = Signal()
+    work_tick = Signal(int)  # 工作剩余秒数
+    break_started = Signal(int)  # 本次休息的秒数
+    break_tick = Signal(int)  # 休息剩余秒数
+    break_ended = Signal(bool)  # True表示休息倒计时正常结束
+    one_minute_warning = Signal()
+    break_warning = Signal(int)  # 距离休息的分钟数（按 break_notifications 配置）
+    short_break_started = Signal(dict)  # 休息规则触发的事件
+    short_break_tick = Signal(int)
+    short_break_ended = Signal()
+    phase_changed = Signal(str)
+    status_changed = Signal()  # 阶段、剩余时间或暂停状态变化
+
+    # 推迟期间重新检查的最长间隔，日历文件变化后能及时生效
+    MAX_DEFER_CHECK_MS = 60 * 1000
+    # 短休息按“稍后提醒”推迟的分钟数
+    SHORT_SNOOZE_MINUTES = 5
+
+    def __init__(self, clock=None, parent=None):
+        super().__init__(parent)
+        # 时钟可替换为虚拟时钟，用于模拟
+        self.clock = clock or system_clock
+        self.config = {}
+
+        # 调度引擎：主计时的本轮工作结束时间和额外的休息规则（护眼、站立等短休息）共用一个定时器
+        self.schedule_engine = ScheduleEngine(clock=self.clock, parent=self)
+        self.schedule_engine.event_due.connect(self.on_schedule_event)
+        self.schedules = None
+
+        self.timer = Timer(self.clock, engine=self.schedule_engine)
+        self.timer.time_updated.connect(self._on_work_tick)
+        self.timer.timer_finished.connect(self.on_work_finished)
+        self.break_timer = Timer(self.clock)
+        self.break_timer.time_updated.connect(self._on_break_tick)
+        self.break_timer.timer_finished.connect(lambda: self.end_break(completed=True))
+        self.short_timer = Timer(self.clock)
+        self.short_timer.time_updated.connect(self.short_break_tick)
+        self.short_timer.timer_finished.connect(self.end_short_break)
+
+        self.phase = 'work'
+        self.is_paused = False
+        self.cycle_count = 0  # 已完成的工作轮数，用于安排长休息
+        self.short_break = None  # 进行中的短休息
+        self.warned_minutes = set()  # 本轮工作已发出的休息预告
+        self.minute_warned = False  # 本轮工作已发出结束前一分钟提醒
+
+        # 日历忙碌时推迟休息
+        self.calendar = CalendarIndex(now=self.clock.time)
+        self.calendar_files = None
+        self.defer_timer = self.clock.create_timer(self)
+        self.defer_timer.setSingleShot(True)
+        self.defer_timer.timeout.connect(self.on_work_finished)
+        self.deferred_until = None
+
+        # 全屏/演示时推迟休息，推迟时间有上限
+        self.presentation = PresentationDetector(parent=self)
+        self.presentation.state_changed.connect(self.on_presentation_changed)
+        self.defer_started = None
+
+        # 团队同步：按负责人的计划精确对齐休息开始时间
+        self.synced_break_at = None
+        self.sync_timer = self.clock.create_timer(self)
+        self.sync_timer.setSingleShot(True)
+        self.sync_timer.setTimerType(Qt.PreciseTimer)
+        self.sync_timer.timeout.connect(self.on_sync_timeout)
+
+    def set_config(self, config):
+        """设置配置，不重新开始计时"""
+        self.config = config
+        # 休息规则变化时重新加载
+        schedules = self.config.get('schedules', [])
+        if schedules != self.schedules:
+            self.schedules = [dict(item) for item in schedules or []]
+            self.schedule_engine.load_config(self.config)
+        # 按需启动全屏检测
+        if self.config.get('presentation_defer', True) and PresentationDetector.available():
+            self.presentation.start()
+        else:
+            self.presentation.stop()
+        # 日历文件变化时重建索引
+        calendar_files = list(self.config.get('calendar_files', []) or [])
+        if calendar_files != self.calendar_files:
+            self.calendar_files = calendar_files
+            self.calendar.set_paths(calendar_files)
+            if calendar_files:
+                self.calendar.refresh_in_background()
+
+    def set_phase(self, phase):
+        if phase != self.phase:
+            self.phase = phase
+            self.phase_changed.emit(phase)
+            self.status_changed.emit()
+
+    # 工作
+
+    def start_work(self, minutes=None):
+        """开始一轮工作计时"""
+        if minutes is None and self.config:
+            minutes = self.config['work_duration']
+        self.break_timer.stop()
+        self.defer_timer.stop()
+        self.sync_timer.stop()
+        self.deferred_until = None
+        self.defer_started = None
+        if self.is_paused:
+            self.schedule_engine.resume()
+            self.is_paused = False
+        self.timer.start(minutes)
+        self.warned_minutes.clear()
+        self.minute_warned = False
+        if self.synced_break_at is not None:
+            self._apply_synced_break()
+        self.set_phase('work')
+        self.work_started.emit()
+
+    def _on_work_tick(self, seconds):
+        if self.phase == 'work':
+            # 按区间判断，界面卡顿跳过某一秒时也不会漏掉
+            if 0 < seconds <= 60 and not self.minute_warned:
+                self.minute_warned = True
+                self.one_minute_warning.emit()
+            for minutes in self.config.get('break_notifications', []):
+                if minutes * 60 - 60 < seconds <= minutes * 60 and minutes not in self.warned_minutes:
+                    self.warned_minutes.add(minutes)
+                    self.break_warning.emit(minutes)
+        self.work_tick.emit(seconds)
+        self.status_changed.emit()
+
+    def delay_allowed(self):
+        """是否允许推迟休息：增加时间、工作中跳过（重新开始一整轮）和暂停都会推迟休息，
+        与稍后提醒一样在策略禁止推迟（或禁止ESC）时不允许；减少时间和继续计时不受限制"""
+        return snooze_allowed(self.config)
+
+    def policy_refusal(self, command):
+        """控制命令被管理员策略拒绝时返回原因，允许时返回None"""
+        if command == 'skip' and self.phase == 'break':
+            if not self.config.get('allow_escape', True):
+                return "管理员策略不允许提前结束休息"
+            return None
+        delays = command in ('increase', 'skip') or (command in ('pause', 'toggle') and not self.is_paused)
+        if delays and self.phase != 'break' and not self.delay_allowed():
+            return "管理员策略不允许推迟休息"
+        return None
+
+    def toggle_pause(self):
+        """切换暂停/继续；只有工作计时可以暂停，策略禁止推迟休息时不能暂停"""
+        if self.phase != 'work':
+            return
+        if not self.is_paused and not self.delay_allowed():
+            return
+        self.cancel_synced_break()
+        # 短休息规则随主计时一起暂停，继续后顺延暂停的时长
+        if self.is_paused:
+            self.schedule_engine.resume()
+            self.timer.resume()
+        else:
+            self.timer.pause()
+            self.schedule_engine.pause()
+        self.is_paused = not self.is_paused
+        self.status_changed.emit()
+
+    def pause(self):
+        """暂停计时（已暂停时不做处理）"""
+        if not self.is_paused:
+            self.toggle_pause()
+
+    def resume(self):
+        """继续计时（未暂停时不做处理）"""
+        if self.is_paused:
+            self.toggle_pause()
+
+    def snooze(self, minutes):
+        """推迟本轮休息，策略禁止推迟时不处理"""
+        if self.phase != 'work' or not self.delay_allowed():
+            return
+        self.cancel_synced_break()
+        self.timer.remaining_seconds += minutes * 60
+        remaining = self.timer.remaining_seconds
+        # 推迟后重新发出剩余时间之后的休息预告
+        self.warned_minutes = {m for m in self.warned_minutes if m * 60 - 60 >= remaining}
+        if remaining > 60:
+            self.minute_warned = False
+        self._on_work_tick(remaining)
+
+    def increase_time(self):
+        """增加10分钟"""
+        self.snooze(10)
+
+    def decrease_time(self):
+        """减少10分钟"""
+        if self.phase != 'work':
+            return
+        self.cancel_synced_break()
+        if self.timer.remaining_seconds > 0:
+            self.timer.remaining_seconds = max(0, self.timer.remaining_seconds - 600)
+            self._on_work_tick(self.timer.remaining_seconds)
+
+    def skip(self):
+        """跳过休息：休息中立即结束休息（策略禁止ESC时不处理），否则重新开始本轮工作计时（策略禁止推迟时不处理）"""
+        if self.phase == 'break':
+            self.escape_break()
+            return
+        if not self.delay_allowed():
+            return
+        self.cancel_synced_break()
+        self.start_work()
+        self._on_work_tick(self.timer.remaining_seconds)
+
+    # 休息
+
+    def break_deferral(self, short_break=False):
+        """返回休息需要推迟的秒数，0表示可以立即休息"""
+        now = self.clock.time()
+        delay = 0
+        if self.calendar_files:
+            self.calendar.refresh_in_background()
+            delay = max(0, self.calendar.next_free(now) - now)
+        if self.presentation.active and self.config.get('presentation_defer', True):
+            if short_break:
+                # 短休息不占用主休息的推迟额度，直接顺延5分钟
+                return max(delay, 5 * 60)
+            if self.defer_started is None:
+                self.defer_started = now
+            limit = self.config.get('presentation_max_defer', 30) * 60
+            delay = max(delay, self.defer_started + limit - now)
+        return delay
+
+    def on_presentation_changed(self, active):
+        """退出全屏后立即开始被推迟的休息"""
+        if not active and self.phase == 'deferred':
+            self.defer_timer.stop()
+            self.on_work_finished()
+
+    def on_work_finished(self):
+        """本轮工作结束：需要推迟时进入 deferred，否则开始休息"""
+        self.sync_timer.stop()
+        delay = self.break_deferral()
+        if delay > 0:
+            # 会议中：推迟到会议结束后再休息
+            self.deferred_until = self.clock.time() + delay
+            self.defer_timer.start(min(int(delay * 1000), self.MAX_DEFER_CHECK_MS))
+            self.set_phase('deferred')
+            return
+        self.deferred_until = None
+        if self.config:
+            self.start_break()
+
+    def start_break(self, break_seconds=None):
+        """开始休息，break_seconds 指定本次休息的秒数（恢复中断的休息时使用）"""
+        self.cycle_count += 1
+        if break_seconds is None:
+            break_duration = self.config['break_duration']
+            long_break_every = self.config.get('long_break_every', 0)
+            if long_break_every and self.cycle_count % long_break_every == 0:
+                break_duration = self.config.get('long_break_duration', break_duration)
+            break_seconds = break_duration * 60
+        # 主休息期间不再进行短休息
+        self.end_short_break()
+        self.timer.stop()
+        self.break_timer.start(break_seconds / 60)
+        self.set_phase('break')
+        self.break_started.emit(int(break_seconds))
+
+    def _on_break_tick(self, seconds):
+        self.break_tick.emit(seconds)
+        self.status_changed.emit()
+
+    def escape_break(self):
+        """按ESC提前结束休息，策略禁止时不处理"""
+        if self.phase == 'break' and self.config.get('allow_escape', True):
+            self.end_break(completed=False)
+
+    def end_break(self, completed=False):
+        """休息结束：短休息规则重新计时，开始下一轮工作"""
+        if self.phase != 'break':
+            return
+        self.break_timer.stop()
+        self.break_ended.emit(completed)
+        self.schedule_engine.restart_all()
+        self.start_work()
+
+    # 短休息
+
+    def on_schedule_event(self, event):
+        """短休息规则触发"""
+        if self.phase != 'work' or self.short_break is not None or not self.config:
+            return
+        delay = self.break_deferral(short_break=True)
+        if delay > 0:
+            self.schedule_engine.defer_until(self.clock.time() + delay)
+            return
+        self.short_break = event
+        self.short_timer.start(event['duration'] / 60)
+        self.short_break_started.emit(event)
+
+    def escape_short_break(self):
+        if self.config.get('allow_escape', True):
+            self.end_short_break()
+
+    def snooze_short_break(self):
+        """稍后提醒：推迟这条规则的下一次提醒并结束本次短休息，策略禁止推迟时不处理"""
+        if self.short_break is None or not snooze_allowed(self.config):
+            return
+        self.schedule_engine.snooze(self.short_break['name'], self.SHORT_SNOOZE_MINUTES)
+        self.end_short_break()
+
+    def end_short_break(self):
+        if self.short_break is None:
+            return
+        self.short_timer.stop()
+        self.short_break = None
+        self.short_break_ended.emit()
+
+    # 团队同步
+
+    def align_break(self, break_at):
+        """把本轮工作的结束时间对齐到break_at（本机时间戳），休息中收到时在下一轮工作开始时对齐"""
+        self.synced_break_at = break_at
+        if self.phase == 'work' and self.timer.is_running:
+            self._apply_synced_break()
+
+    def _apply_synced_break(self):
+        delay = self.synced_break_at - self.clock.time()
+        if delay <= 0:
+            self.synced_break_at = None
+            return
+        # 由精确定时器结束本轮工作，计时器只负责显示，多留两秒避免它先结束
+        self.timer.remaining_seconds = int(delay) + 2
+        self.sync_timer.start(int(delay * 1000))
+        self._on_work_tick(int(delay))
+
+    def cancel_synced_break(self):
+        """手动调整计时后不再跟随同步计划"""
+        if self.sync_timer.isActive():
+            self.sync_timer.stop()
+            self.timer.remaining_seconds = max(0, self.timer.remaining_seconds - 2)
+        self.synced_break_at = None
+
+    def next_break_at(self):
+        """下一次休息的开始时间（本机时间戳），暂停或不在工作中时返回None"""
+        if self.sync_timer.isActive():
+            return self.synced_break_at
+        if self.phase != 'work' or not self.timer.is_running:
+            return None
+        return self.clock.time() + self.timer.remaining_seconds
+
+    def on_sync_timeout(self):
+        self.synced_break_at = None
+        self.timer.stop()
+        self.on_work_finished()
+
+    # 状态
+
+    def get_status(self):
+        """获取当前计时状态"""
+        if self.phase == 'break':
+            remaining = self.break_timer.remaining_seconds
+        elif self.phase == 'deferred' and self.deferred_until is not None:
+            remaining = max(0, int(self.deferred_until - self.clock.time()))
+        else:
+            remaining = self.timer.remaining_seconds
+        return {
+            'phase': self.phase,
+            'remaining_seconds': remaining,
+            'paused': self.is_paused,
+            'work_duration': self.config.get('work_duration'),
+            'break_duration': self.config.get('break_duration'),
+        }
+
+    def restore_status(self, status):
+        """恢复重启前的计时状态（get_status() 的结果，age 为距今的秒数）"""
+        paused = status.get('paused', False)
+        # 暂停时剩余时间不变
+        elapsed = 0 if paused else status.get('age', 0)
+        remaining = int(status.get('remaining_seconds', 0) - elapsed)
+        if remaining <= 0:
+            return
+        if status.get('phase') == 'work':
+            self.timer.remaining_seconds = remaining
+            self._on_work_tick(remaining)
+            if paused:
+                self.pause()
+        elif status.get('phase') == 'break':
+            self.timer.stop()
+            self.start_break(break_seconds=remaining)
+
+    def stop(self):
+        """停止计时（退出时调用）"""
+        self.timer.stop()
+        self.break_timer.stop()
+        self.short_timer.stop()
+        self.sync_timer.stop()
+        self.schedule_engine.stop()
+        self.defer_timer.stop()
+        self.presentation.stop()
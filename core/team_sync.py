@@ -0,0 +1,337 @@
+"""局域网团队同步休息
+
+同一子网内启用同步的实例通过UDP组播互相发现，选出一个负责人（leader），
+其他实例（follower）按负责人的计划对齐下一次休息的开始时间。
+
+- 时间源：只有负责人向组播组发送心跳（含计划），是团队唯一的时间源；
+  follower 不发心跳，只以单播向负责人发送 ping，负责人单播回复 pong，
+  每秒的组播消息数与实例数无关，总流量随实例数线性增长。
+- 选举：负责人存活时保持不变。没有负责人时（启动或负责人超时离开），每个实例按ID退避一段时间，
+  期间没有收到负责人心跳就自荐为负责人，ID越小退避越短。两个负责人同时存在时（如网络恢复），ID较大的让位。
+- 时钟：follower 按NTP方式计算与负责人的时钟偏差，取往返延迟最小的样本。
+- 计划：负责人广播下一次休息的开始时间（负责人的时钟），follower 换算为本机时间后对齐。
+- 认证：每条消息带团队共享密钥的HMAC-SHA256（截断为16字节）和发送方递增的序号，
+  密钥不同的消息和重放的旧消息直接丢弃。
+
+TeamSyncProtocol 只处理消息，不涉及网络和Qt，可以在一个进程里模拟大量实例；
+TeamSync 用 QUdpSocket 实现实际的组播和单播传输。
+"""
+import hmac
+import json
+import time
+import random
+import hashlib
+from collections import deque
+from PySide6.QtCore import QObject, QTimer, Signal
+from PySide6.QtNetwork import QUdpSocket, QHostAddress, QAbstractSocket
+from utils.log import get_logger
+
+logger = get_logger('team_sync')
+
+MULTICAST_GROUP = '239.255.42.99'
+DEFAULT_PORT = 47322
+TAG_BYTES = 16
+
+
+class TeamSyncProtocol:
+    """消息处理
+
+    tick/receive/set_local_schedule 返回需要发送的 (数据, 目的地) 列表，
+    目的地为None表示发往组播组，否则为 receive() 时传入的来源（如地址和端口）。
+    """
+
+    HEARTBEAT_INTERVAL = 1.0
+    PEER_TIMEOUT = 3.5
+    # 没有负责人时的最长退避时间，按ID在其中均匀分布
+    ELECTION_WINDOW = 2.0
+    # 时钟样本不足时快速ping，收敛后降低频率
+    FAST_PING_INTERVAL = 0.5
+    PING_INTERVAL = 10.0
+    MAX_SAMPLES = 8
+    # 至少有这么多样本后才按负责人的计划对齐
+    MIN_SAMPLES = 4
+
+    def __init__(self, team, key, peer_id=None, clock=time.time):
+        if not key:
+            raise ValueError("团队同步需要共享密钥")
+        self.team = team
+        self.key = key.encode('utf-8') if isinstance(key, str) else bytes(key)
+        self.peer_id = peer_id if peer_id is not None else random.getrandbits(62)
+        self.clock = clock
+        self.started = clock()
+        self.peers = {}  # ID -> 最后收到消息的时间
+        self.routes = {}  # ID -> 最后一条消息的来源，用于单播回复
+        self.leader_id = None
+        self.leader_seen = None
+        self.offset = 0.0  # 负责人时钟 - 本机时钟（秒）
+        self.delay = None
+        self._samples = deque(maxlen=self.MAX_SAMPLES)
+        self.schedule = None  # 负责人：本机计划 {'break_at', 'break', 'seq'}
+        self.remote_seq = None  # follower：已应用的负责人计划序号
+        self.on_schedule = None  # 回调 (本机时间的休息开始时间, 休息时长秒)
+        self._seq = 0
+        self._counter = 0  # 本机发出的消息序号，接收方据此丢弃重放的消息
+        self._last_counter = {}  # ID -> 已接受的最大序号
+        self._claim_at = self.started + self.PEER_TIMEOUT + self._backoff()
+        self._next_heartbeat = float('-inf')
+        self._next_ping = float('-inf')
+        self.messages_sent = self.messages_received = self.messages_rejected = 0
+        self.bytes_sent = self.bytes_received = 0
+
+    def _backoff(self):
+        return self.ELECTION_WINDOW * self.peer_id / 2 ** 62
+
+    def is_leader(self):
+        return self.leader_id == self.peer_id
+
+    def synced(self):
+        """follower 是否已有足够的时钟样本"""
+        return self.is_leader() or len(self._samples) >= self.MIN_SAMPLES
+
+    def set_local_schedule(self, break_at, break_seconds, now=None):
+        """本机计时变化时调用；只有负责人的计划会广播出去
+
+        break_at 为本机时间，None表示暂停等没有计划的状态。返回需要立即发送的消息。
+        """
+        if break_at is not None and self.schedule is not None and self.schedule['break_at'] is not None \
+                and abs(self.schedule['break_at'] - break_at) < 0.5 and self.schedule['break'] == break_seconds:
+            return []
+        if break_at is None and (self.schedule is None or self.schedule['break_at'] is None):
+            return []
+        self._seq += 1
+        self.schedule = {'break_at': break_at, 'break': break_seconds, 'seq': self._seq}
+        if self.is_leader():
+            # 计划变化后立即广播，不等下一次心跳
+            return [(self._heartbeat(self.clock() if now is None else now), None)]
+        return []
+
+    def tick(self, now=None):
+        """定时调用，返回需要发送的消息"""
+        now = self.clock() if now is None else now
+        out = []
+        for peer_id, seen in list(self.peers.items()):
+            if now - seen > self.PEER_TIMEOUT:
+                del self.peers[peer_id]
+                self.routes.pop(peer_id, None)
+        if self.leader_id is not None and self.leader_id != self.peer_id and \
+                (self.leader_seen is None or now - self.leader_seen > self.PEER_TIMEOUT):
+            self._set_leader(None)
+            self._claim_at = now + self._backoff()
+        if self.leader_id is None and now >= self._claim_at:
+            # 退避期间没有收到负责人心跳：自荐为负责人
+            self._set_leader(self.peer_id)
+        if self.is_leader() and now >= self._next_heartbeat:
+            self._next_heartbeat = now + self.HEARTBEAT_INTERVAL
+            out.append((self._heartbeat(now), None))
+        if self.leader_id is not None and not self.is_leader() and now >= self._next_ping:
+            route = self.routes.get(self.leader_id)
+            if route is not None:
+                interval = self.PING_INTERVAL if len(self._samples) >= self.MAX_SAMPLES else self.FAST_PING_INTERVAL
+                self._next_ping = now + interval
+                out.append((self._encode({'type': 'ping', 'to': self.leader_id, 't1': now}), route))
+        return out
+
+    def receive(self, data, now=None, source=None):
+        """处理收到的消息，返回需要发送的回复；source 为消息来源，单播回复时原样作为目的地"""
+        now = self.clock() if now is None else now
+        message = self._decode(data)
+        if message is None:
+            self.messages_rejected += 1
+            return []
+        try:
+            if message.get('team') != self.team or message.get('id') == self.peer_id:
+                return []
+            sender = message['id']
+            kind = message['type']
+            counter = int(message['n'])
+        except (KeyError, TypeError, ValueError, AttributeError):
+            return []
+        last = self._last_counter.get(sender)
+        if last is not None and counter <= last:
+            # 重放或乱序到达的旧消息
+            self.messages_rejected += 1
+            return []
+        self._last_counter[sender] = counter
+        self.messages_received += 1
+        self.bytes_received += len(data)
+        self.peers[sender] = now
+        if source is not None:
+            self.routes[sender] = source
+
+        if kind == 'heartbeat':
+            self._on_heartbeat(sender, message, now)
+        elif kind == 'ping' and message.get('to') == self.peer_id and self.is_leader():
+            pong = {'type': 'pong', 'to': sender, 't1': message.get('t1'), 't2': now, 't3': now}
+            return [(self._encode(pong), self.routes.get(sender))]
+        elif kind == 'pong' and message.get('to') == self.peer_id and sender == self.leader_id:
+            self._on_pong(message, now)
+        return []
+
+    def _on_heartbeat(self, sender, message, now):
+        if not message.get('leader'):
+            return
+        if self.is_leader():
+            if sender < self.peer_id:
+                # 同时存在两个负责人时，ID较大的让位
+                self._set_leader(sender)
+            else:
+                return
+        elif self.leader_id is None or sender == self.leader_id or sender < self.leader_id:
+            if sender != self.leader_id:
+                self._set_leader(sender)
+        else:
+            return
+        self.leader_seen = now
+        schedule = message.get('schedule')
+        if schedule and schedule.get('seq') != self.remote_seq and self.synced():
+            self.remote_seq = schedule.get('seq')
+            break_at = schedule.get('break_at')
+            if break_at is not None and self.on_schedule:
+                self.on_schedule(break_at - self.offset, schedule.get('break'))
+
+    def _on_pong(self, message, now):
+        try:
+            t1, t2, t3 = float(message['t1']), float(message['t2']), float(message['t3'])
+        except (KeyError, TypeError, ValueError):
+            return
+        delay = (now - t1) - (t3 - t2)
+        offset = ((t2 - t1) + (t3 - now)) / 2
+        self._samples.append((delay, offset))
+        # 往返延迟最小的样本受排队影响最小
+        self.delay, self.offset = min(self._samples)
+
+    def _set_leader(self, leader_id):
+        if leader_id == self.leader_id:
+            return
+        self.leader_id = leader_id
+        self.leader_seen = None
+        self.remote_seq = None
+        self._samples.clear()
+        self.delay = None
+        self.offset = 0.0
+        self._next_ping = float('-inf')
+        if leader_id == self.peer_id:
+            self._next_heartbeat = float('-inf')
+
+    def _heartbeat(self, now):
+        message = {'type': 'heartbeat', 'leader': self.is_leader()}
+        if self.is_leader() and self.schedule is not None:
+            message['schedule'] = self.schedule
+        return self._encode(message)
+
+    def _tag(self, payload):
+        return hmac.new(self.key, payload, hashlib.sha256).digest()[:TAG_BYTES]
+
+    def _encode(self, message):
+        self._counter += 1
+        message['team'] = self.team
+        message['id'] = self.peer_id
+        message['n'] = self._counter
+        payload = json.dumps(message, separators=(',', ':')).encode('utf-8')
+        data = self._tag(payload) + payload
+        self.messages_sent += 1
+        self.bytes_sent += len(data)
+        return data
+
+    def _decode(self, data):
+        """校验签名并解析消息，签名不符或格式错误时返回None"""
+        tag, payload = data[:TAG_BYTES], data[TAG_BYTES:]
+        if len(tag) != TAG_BYTES or not hmac.compare_digest(tag, self._tag(payload)):
+            return None
+        try:
+            message = json.loads(payload)
+        except ValueError:
+            return None
+        return message if isinstance(message, dict) else None
+
+
+class TeamSync(QObject):
+    """基于UDP的团队同步：组播（TTL为1，只在本子网内传播）发现负责人，单播测量时钟偏差
+
+    所有消息从本实例独占的单播套接字（系统分配的端口）发出，回复按来源地址和端口发回，
+    同一台机器上的多个实例共享组播端口时也能收到各自的回复。
+    """
+
+    break_scheduled = Signal(float, int)  # 本机时间的休息开始时间，休息时长（秒）
+    leader_changed = Signal(bool)  # 本机是否为负责人
+
+    TICK_MS = 250
+
+    def __init__(self, team, key, port=DEFAULT_PORT, group=MULTICAST_GROUP, parent=None):
+        super().__init__(parent)
+        self.protocol = TeamSyncProtocol(team, key)
+        self.protocol.on_schedule = lambda break_at, seconds: self.break_scheduled.emit(break_at, seconds)
+        self.group = QHostAddress(group)
+        self.port = port
+        self.socket = None  # 接收组播
+        self.unicast = None  # 发送消息、接收单播回复
+        self._was_leader = False
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self._tick)
+
+    def start(self):
+        if self.socket is not None:
+            return True
+        socket = QUdpSocket(self)
+        if not socket.bind(QHostAddress(QHostAddress.AnyIPv4), self.port,
+                           QAbstractSocket.ShareAddress | QAbstractSocket.ReuseAddressHint):
+            logger.error(f"团队同步绑定端口失败: {socket.errorString()}")
+            return False
+        if not socket.joinMulticastGroup(self.group):
+            logger.error(f"加入组播组失败: {socket.errorString()}")
+            socket.close()
+            return False
+        unicast = QUdpSocket(self)
+        if not unicast.bind(QHostAddress(QHostAddress.AnyIPv4), 0):
+            logger.error(f"团队同步绑定单播端口失败: {unicast.errorString()}")
+            socket.close()
+            return False
+        unicast.setSocketOption(QAbstractSocket.MulticastTtlOption, 1)
+        unicast.setSocketOption(QAbstractSocket.MulticastLoopbackOption, 1)
+        socket.readyRead.connect(lambda: self._on_ready_read(socket))
+        unicast.readyRead.connect(lambda: self._on_ready_read(unicast))
+        self.socket = socket
+        self.unicast = unicast
+        self.timer.start(self.TICK_MS)
+        return True
+
+    def stop(self):
+        self.timer.stop()
+        if self.socket is not None:
+            self.socket.leaveMulticastGroup(self.group)
+            for socket in (self.socket, self.unicast):
+                socket.close()
+                socket.deleteLater()
+            self.socket = self.unicast = None
+
+    def is_leader(self):
+        return self.protocol.is_leader()
+
+    def set_local_schedule(self, break_at, break_seconds):
+        self._send(self.protocol.set_local_schedule(break_at, break_seconds))
+
+    def _tick(self):
+        self._send(self.protocol.tick())
+        self._check_leader()
+
+    def _on_ready_read(self, socket):
+        while self.socket is not None and socket.hasPendingDatagrams():
+            datagram = socket.receiveDatagram()
+            source = (QHostAddress(datagram.senderAddress()), datagram.senderPort())
+            self._send(self.protocol.receive(bytes(datagram.data()), source=source))
+        self._check_leader()
+
+    def _check_leader(self):
+        leader = self.protocol.is_leader()
+        if leader != self._was_leader:
+            self._was_leader = leader
+            self.leader_changed.emit(leader)
+
+    def _send(self, messages):
+        if self.unicast is None:
+            return
+        for data, to in messages:
+            if to is None:
+                self.unicast.writeDatagram(data, self.group, self.port)
+            else:
+                self.unicast.writeDatagram(data, *to)
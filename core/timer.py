@@ -1,51 +1,107 @@
-from PySide6.QtCore import QTimer, QObject, Signal
+from PySide6.QtCore import QObject, Signal
 from typing import Callable
+from core.clock import system_clock
 
 class Timer(QObject):
     time_updated = Signal(int)  # 发送剩余时间（秒）
     timer_finished = Signal()   # 计时结束信号
 
-    def __init__(self):
+    def __init__(self, clock=None, engine=None, name='work'):
         super().__init__()
-        self.timer = QTimer()
+        self.clock = clock or system_clock
+        # 每秒刷新一次显示；结束时间由单独的单次定时器控制，不会因刷新延迟而累积误差
+        self.timer = self.clock.create_timer()
         self.timer.timeout.connect(self._update_time)
-        self.remaining_seconds = 0
+        # 传入调度引擎时，结束时间作为引擎的截止时间，与休息规则共用引擎的定时器
+        self.engine = engine
+        self.name = name
+        self.finish_timer = None
+        if engine is not None:
+            engine.deadline_due.connect(self._on_deadline)
+        else:
+            self.finish_timer = self.clock.create_timer()
+            self.finish_timer.setSingleShot(True)
+            self.finish_timer.timeout.connect(self._finish)
+        self.deadline = None  # 运行中的结束时间（单调时间）
+        self._remaining = 0  # 暂停或停止时的剩余秒数
+        self.total_seconds = 0
         self.is_running = False
 
+    @property
+    def remaining_seconds(self) -> int:
+        """剩余时间（秒）"""
+        if self.is_running and self.deadline is not None:
+            # 刷新定时器可能略早或略晚触发，取最接近的整秒
+            return max(0, round(self.deadline - self.clock.monotonic()))
+        return self._remaining
+
+    @remaining_seconds.setter
+    def remaining_seconds(self, seconds) -> None:
+        if self.is_running:
+            self._arm(seconds)
+        else:
+            self._remaining = max(0, int(seconds))
+
+    def _arm(self, seconds) -> None:
+        self.deadline = self.clock.monotonic() + seconds
+        if self.engine is not None:
+            self.engine.set_deadline(self.name, max(0, seconds))
+        else:
+            self.finish_timer.start(max(0, int(seconds * 1000)))
+
     def start(self, minutes: int) -> None:
         """开始计时"""
-        self.remaining_seconds = minutes * 60
+        self.total_seconds = minutes * 60
         self.is_running = True
+        self._arm(self.total_seconds)
         self.timer.start(1000)  # 每秒更新一次
 
     def stop(self) -> None:
         """停止计时"""
+        self._remaining = self.remaining_seconds
         self.timer.stop()
+        if self.engine is not None:
+            self.engine.clear_deadline(self.name)
+        else:
+            self.finish_timer.stop()
         self.is_running = False
 
     def pause(self) -> None:
         """暂停计时"""
         if self.is_running:
-            self.timer.stop()
-            self.is_running = False
+            self.stop()
 
     def resume(self) -> None:
         """恢复计时"""
-        if not self.is_running and self.remaining_seconds > 0:
-            self.timer.start(1000)
+        if not self.is_running and self._remaining > 0:
             self.is_running = True
+            self._arm(self._remaining)
+            self.timer.start(1000)
 
     def _update_time(self) -> None:
         """更新剩余时间"""
-        if self.remaining_seconds > 0:
-            self.remaining_seconds -= 1
-            self.time_updated.emit(self.remaining_seconds)
-        else:
-            self.stop()
-            self.timer_finished.emit()
+        remaining = self.remaining_seconds
+        if self.engine is not None and self.is_running:
+            # 引擎按墙上时间计时；调整系统时间后以单调时间为准重新设置截止时间
+            left = self.engine.deadline(self.name)
+            exact = self.deadline - self.clock.monotonic()
+            if left is None or abs(left - exact) > 1:
+                self.engine.set_deadline(self.name, max(0, exact))
+        if remaining > 0:
+            self.time_updated.emit(remaining)
+
+    def _on_deadline(self, name) -> None:
+        if name == self.name and self.is_running:
+            self._finish()
+
+    def _finish(self) -> None:
+        self.stop()
+        self._remaining = 0
+        self.time_updated.emit(0)
+        self.timer_finished.emit()
 
     def get_remaining_time(self) -> tuple[int, int]:
         """获取剩余时间（分钟和秒）"""
         minutes = self.remaining_seconds // 60
         seconds = self.remaining_seconds % 60
-        return minutes, seconds 
\ No newline at end of file
+        return minutes, seconds
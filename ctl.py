@@ -0,0 +1,72 @@
+#!/usr/bin/env -S python3 -S
+"""Take Care Your Ass 命令行控制客户端
+
+通过本地套接字控制运行中的实例，不导入Qt和YAML，适合在脚本和快捷键中调用。
+
+    python ctl.py status [--json]
+    python ctl.py pause | resume | toggle | skip | plus | minus | settings
+
+退出码：0 成功，1 没有运行中的实例，2 参数或命令错误，3 实例没有响应。
+使用 python -S 运行可跳过 site 初始化，进一步缩短耗时。
+"""
+import sys
+from utils.ipc import send_command, InstanceNotResponding
+
+COMMANDS = {
+    'status': 'status',
+    'pause': 'pause',
+    'resume': 'resume',
+    'toggle': 'toggle',
+    'skip': 'skip',
+    'plus': 'increase',
+    'minus': 'decrease',
+    'settings': 'show_settings',
+    'ping': 'ping',
+}
+
+PHASE_NAMES = {'work': '工作中', 'break': '休息中', 'deferred': '会议中，休息已推迟'}
+
+
+def format_status(response):
+    seconds = response.get('remaining_seconds', 0)
+    text = f"{PHASE_NAMES.get(response.get('phase'), response.get('phase'))} 剩余 {seconds // 60:02d}:{seconds % 60:02d}"
+    if response.get('paused'):
+        text += "（已暂停）"
+    return text
+
+
+def main(argv):
+    # 不使用argparse以减少启动耗时
+    as_json = '--json' in argv
+    args = [arg for arg in argv if arg != '--json']
+    if len(args) != 1 or args[0] not in COMMANDS:
+        sys.stderr.write(__doc__)
+        return 2
+
+    try:
+        response = send_command(COMMANDS[args[0]])
+    except InstanceNotResponding:
+        if as_json:
+            sys.stdout.write('{"ok": false, "running": true, "responding": false}\n')
+        else:
+            sys.stderr.write("Take Care Your Ass 正在运行，但没有响应\n")
+        return 3
+    if response is None:
+        if as_json:
+            sys.stdout.write('{"ok": false, "running": false}\n')
+        else:
+            sys.stderr.write("Take Care Your Ass 未运行\n")
+        return 1
+
+    if as_json:
+        import json
+        sys.stdout.write(json.dumps(response, ensure_ascii=False) + '\n')
+    elif not response.get('ok'):
+        sys.stderr.write(f"{response.get('error', '命令执行失败')}\n")
+    else:
+        sys.stdout.write(format_status(response) + '\n')
+    return 0 if response.get('ok') else 2
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,137 @@
+from PySide6.QtWidgets import QWidget, QVBoxLayout, QGridLayout, QLabel, QPushButton, QApplication
+from PySide6.QtCore import Qt, QTimer
+from utils import memory, log
+from utils.resources import app_icon
+
+
+class DiagnosticsWindow(QWidget):
+    """诊断信息：内存占用、缓存和卡顿统计，显示期间每秒刷新"""
+
+    REFRESH_MS = 1000
+
+    def __init__(self, main_window, release_on_close=False):
+        super().__init__()
+        self.main_window = main_window
+        self.release_on_close = release_on_close
+        self.setWindowIcon(app_icon())
+        self.setWindowTitle('诊断信息')
+        self.setWindowFlags(Qt.WindowStaysOnTopHint | Qt.WindowCloseButtonHint)
+        self.setMinimumWidth(320)
+
+        layout = QVBoxLayout(self)
+        grid = QGridLayout()
+        grid.setHorizontalSpacing(16)
+        self.values = {}
+        rows = [
+            ('rss', '常驻内存'),
+            ('peak_rss', '峰值内存'),
+            ('last_release', '上次释放'),
+            ('windows', '顶层窗口'),
+            ('tray_icons', '托盘图标缓存'),
+            ('exercise_cache', '动画帧缓存'),
+            ('stalls', '界面卡顿'),
+            ('log', '日志'),
+            ('policy', '管理员策略'),
+            ('plugins', '插件'),
+        ]
+        for row, (key, title) in enumerate(rows):
+            grid.addWidget(QLabel(title + ':'), row, 0)
+            value = QLabel('-')
+            value.setTextInteractionFlags(Qt.TextSelectableByMouse)
+            grid.addWidget(value, row, 1)
+            self.values[key] = value
+        layout.addLayout(grid)
+
+        release_button = QPushButton('立即释放内存')
+        release_button.clicked.connect(self.release_now)
+        layout.addWidget(release_button)
+
+        self.refresh_timer = QTimer(self)
+        self.refresh_timer.timeout.connect(self.refresh)
+
+    def showEvent(self, event):
+        self.refresh()
+        self.refresh_timer.start(self.REFRESH_MS)
+        super().showEvent(event)
+
+    def hideEvent(self, event):
+        self.refresh_timer.stop()
+        super().hideEvent(event)
+
+    def release_now(self):
+        self.main_window.release_memory()
+        self.refresh()
+
+    def refresh(self):
+        main = self.main_window
+        self.values['rss'].setText(memory.format_bytes(memory.rss_bytes()))
+        self.values['peak_rss'].setText(memory.format_bytes(memory.peak_rss_bytes()))
+        if main.last_release is None:
+            self.values['last_release'].setText('尚未释放')
+        else:
+            before, after = main.last_release
+            if before is None or after is None:
+                self.values['last_release'].setText('已释放')
+            else:
+                self.values['last_release'].setText(
+                    f"{memory.format_bytes(before)} → {memory.format_bytes(after)}")
+        self.values['windows'].setText(str(len(QApplication.topLevelWidgets())))
+        tray = main.tray_countdown.get_stats()
+        self.values['tray_icons'].setText(f"{tray['cached_icons']} 个图标，{tray['ring_sizes']} 种尺寸的进度环")
+        exercise = main.timer_window.exercise
+        if exercise is None:
+            self.values['exercise_cache'].setText('未启用')
+        else:
+            stats = exercise.get_stats()
+            self.values['exercise_cache'].setText(
+                f"{memory.format_bytes(stats['cache_bytes'])} / {memory.format_bytes(stats['cache_limit'])}")
+        watchdog = main.watchdog
+        if watchdog is None:
+            self.values['stalls'].setText('未启用')
+        else:
+            self.values['stalls'].setText(f"{watchdog.stall_count} 次，最长 {watchdog.max_stall_ms:.0f} ms")
+        stats = log.get_stats()
+        if stats is None:
+            self.values['log'].setText('未启用')
+        else:
+            self.values['log'].setText(f"待写入 {stats['pending']} 条，已丢弃 {stats['dropped']} 条")
+        if main.policy_manager is None:
+            self.values['policy'].setText('未配置')
+        else:
+            stats = main.policy_manager.get_stats()
+            text = f"版本 {stats['version']}" if stats['version'] is not None else '尚未获取'
+            if stats['last_error']:
+                text += f"，最近错误: {stats['last_error']}"
+            self.values['policy'].setText(text)
+        self.values['plugins'].setText(self.plugin_text(main.plugins))
+
+    @staticmethod
+    def plugin_text(plugins):
+        if plugins is None:
+            return '未启用'
+        if not plugins.ready:
+            return '正在查找'
+        if not plugins.hosts:
+            return '无'
+        lines = []
+        for stats in plugins.get_stats():
+            if stats['import_ms'] is None:
+                text = f"{stats['name']}: 未加载"
+            else:
+                text = (f"{stats['name']}: 导入 {stats['import_ms']:.0f} ms，"
+                        f"{stats['calls']} 次 平均 {stats['avg_ms']:.1f} ms 最长 {stats['max_ms']:.0f} ms，"
+                        f"超时 {stats['overruns']} 次")
+            if stats['isolated']:
+                text += f"，已隔离（{stats['isolation_reason']}）"
+            lines.append(text)
+        if plugins.dispatches:
+            lines.append(f"GUI线程分发平均 {plugins.dispatch_ms / plugins.dispatches:.2f} ms")
+        return '\n'.join(lines)
+
+    def closeEvent(self, event):
+        if self.release_on_close:
+            event.accept()
+            self.deleteLater()
+            return
+        self.hide()
+        event.ignore()
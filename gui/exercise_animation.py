@@ -0,0 +1,275 @@
+"""休息期间播放的拉伸动作动画
+
+内容目录中每个 GIF/WebP 动图，或每个包含 PNG 序列帧的子目录，视为一个动作。
+帧在后台线程中按播放顺序流式解码，放入按字节数限制大小的LRU缓存；
+播放时只重绘动画所在的矩形区域。
+"""
+import os
+import queue
+import threading
+from collections import OrderedDict
+from PySide6.QtCore import Qt, QObject, QTimer, QSize, QRect
+from PySide6.QtGui import QImageReader
+from utils.log import get_logger
+
+logger = get_logger('exercise')
+
+ANIMATION_EXTENSIONS = ('.gif', '.webp', '.png', '.apng')
+SEQUENCE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.webp')
+DEFAULT_FRAME_DELAY = 100  # PNG序列帧的默认帧间隔（毫秒）
+
+
+def find_animations(content_dir):
+    """列出内容目录中的所有动作"""
+    if not content_dir or not os.path.isdir(content_dir):
+        return []
+    animations = []
+    for name in sorted(os.listdir(content_dir)):
+        path = os.path.join(content_dir, name)
+        if os.path.isdir(path):
+            if any(f.lower().endswith(SEQUENCE_EXTENSIONS) for f in os.listdir(path)):
+                animations.append(path)
+        elif name.lower().endswith(ANIMATION_EXTENSIONS):
+            animations.append(path)
+    return animations
+
+
+class FrameCache:
+    """按字节数限制大小的LRU帧缓存，解码线程写入、GUI线程读取"""
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._frames = OrderedDict()  # (路径, 帧序号) -> (QImage, 帧间隔)
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._frames.get(key)
+            if item is None:
+                self.misses += 1
+                return None
+            self._frames.move_to_end(key)
+            self.hits += 1
+            return item
+
+    def contains(self, key):
+        with self._lock:
+            return key in self._frames
+
+    def put(self, key, image, delay):
+        size = image.sizeInBytes()
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._frames.pop(key, None)
+            if old is not None:
+                self.bytes -= old[0].sizeInBytes()
+            self._frames[key] = (image, delay)
+            self.bytes += size
+            while self.bytes > self.max_bytes and self._frames:
+                _, (evicted, _) = self._frames.popitem(last=False)
+                self.bytes -= evicted.sizeInBytes()
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._frames.clear()
+            self.bytes = 0
+
+
+class FrameDecoder:
+    """后台解码线程，从请求的帧开始向后预取若干帧"""
+
+    def __init__(self, cache, frame_size, prefetch=8):
+        self.cache = cache
+        self.frame_size = frame_size
+        self.prefetch = prefetch
+        self.frame_counts = {}  # 路径 -> 已知的总帧数
+        self._requests = queue.Queue()
+        self._readers = {}  # 路径 -> (QImageReader, 下一帧序号)
+        self._sequences = {}  # PNG序列目录 -> 帧文件列表
+        self._thread = threading.Thread(target=self._run, name='FrameDecoder', daemon=True)
+        self._thread.start()
+
+    def request(self, path, index):
+        self._requests.put((path, index))
+
+    def close(self):
+        self._requests.put(None)
+
+    def reset(self):
+        """丢弃解码器状态（缓存由调用方负责清理）"""
+        self._requests.put(('', -1))
+
+    def _run(self):
+        while True:
+            item = self._requests.get()
+            # 只处理最新的请求，跳过已过时的（途中遇到重置请求时仍然执行重置）
+            while item is not None and not self._requests.empty():
+                if item[1] < 0:
+                    self._forget()
+                item = self._requests.get()
+            if item is None:
+                return
+            path, index = item
+            if index < 0:
+                self._forget()
+                continue
+            try:
+                self._decode_range(path, index)
+            except Exception as e:
+                logger.warning(f"解码动画 {path} 失败: {str(e)}")
+
+    def _forget(self):
+        self._readers.clear()
+        self._sequences.clear()
+
+    def _decode_range(self, path, start):
+        count = self.frame_counts.get(path)
+        for offset in range(self.prefetch):
+            index = start + offset
+            if count:
+                index %= count
+            if self.cache.contains((path, index)):
+                continue
+            if not self._decode(path, index):
+                break
+
+    def _decode(self, path, index):
+        if os.path.isdir(path):
+            files = self._sequences.get(path)
+            if files is None:
+                files = sorted(os.path.join(path, f) for f in os.listdir(path)
+                               if f.lower().endswith(SEQUENCE_EXTENSIONS))
+                self._sequences[path] = files
+                self.frame_counts[path] = len(files)
+            if not files:
+                return False
+            reader = QImageReader(files[index % len(files)])
+            self._scale(reader)
+            image = reader.read()
+            if image.isNull():
+                return False
+            self.cache.put((path, index % len(files)), image, DEFAULT_FRAME_DELAY)
+            return True
+
+        reader, next_index = self._readers.get(path, (None, 0))
+        if reader is None or next_index > index:
+            # 动图只能顺序解码，需要回到开头时重新打开
+            reader = QImageReader(path)
+            self._scale(reader)
+            next_index = 0
+        while next_index <= index:
+            image = reader.read()
+            if image.isNull():
+                # 读到末尾，记录总帧数，下一轮从头开始
+                if next_index:
+                    self.frame_counts[path] = next_index
+                self._readers.pop(path, None)
+                return False
+            delay = reader.nextImageDelay() or DEFAULT_FRAME_DELAY
+            if next_index >= index or not self.cache.contains((path, next_index)):
+                self.cache.put((path, next_index), image, delay)
+            next_index += 1
+        self._readers[path] = (reader, next_index)
+        return True
+
+    def _scale(self, reader):
+        """解码时直接缩放到显示尺寸，减少内存占用"""
+        size = reader.size()
+        if size.isValid() and (size.width() > self.frame_size or size.height() > self.frame_size):
+            reader.setScaledSize(size.scaled(QSize(self.frame_size, self.frame_size), Qt.KeepAspectRatio))
+
+
+class ExerciseAnimation(QObject):
+    """动作动画播放器，在遮罩层的指定区域内播放"""
+
+    def __init__(self, content_dir, cache_mb=32, frame_size=320, parent=None):
+        super().__init__(parent)
+        self.content_dir = content_dir
+        self.frame_size = frame_size
+        self.animations = find_animations(content_dir)
+        self.cache = FrameCache(int(cache_mb * 1024 * 1024))
+        self.decoder = FrameDecoder(self.cache, frame_size)
+        self.current = None
+        self.frame_index = 0
+        self.image = None
+        self.widget = None
+        self.rect = QRect()
+        self._next = 0
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.timeout.connect(self._advance)
+
+    def has_content(self):
+        return bool(self.animations)
+
+    def start(self, widget, rect):
+        """开始在widget的rect区域播放下一个动作"""
+        if not self.animations:
+            return
+        self.widget = widget
+        self.rect = QRect(rect)
+        self.current = self.animations[self._next % len(self.animations)]
+        self._next += 1
+        self.frame_index = 0
+        self.image = None
+        self.decoder.request(self.current, 0)
+        self.timer.start(DEFAULT_FRAME_DELAY)
+
+    def stop(self):
+        self.timer.stop()
+        self.widget = None
+        self.image = None
+
+    def clear_cache(self):
+        """释放已解码的帧"""
+        self.cache.clear()
+        self.decoder.reset()
+
+    def close(self):
+        self.stop()
+        self.decoder.close()
+
+    def _advance(self):
+        if self.widget is None or self.current is None:
+            return
+        item = self.cache.get((self.current, self.frame_index))
+        delay = DEFAULT_FRAME_DELAY
+        if item is not None:
+            self.image, delay = item
+            count = self.decoder.frame_counts.get(self.current)
+            self.frame_index += 1
+            if count:
+                self.frame_index %= count
+            # 请求后续帧，解码线程会跳过已缓存的帧
+            self.decoder.request(self.current, self.frame_index)
+            self.widget.update(self.rect)
+        else:
+            count = self.decoder.frame_counts.get(self.current)
+            if count and self.frame_index >= count:
+                self.frame_index = 0
+            # 帧尚未解码完成，保持当前画面
+            self.decoder.request(self.current, self.frame_index)
+        self.timer.start(max(20, delay))
+
+    def paint(self, painter):
+        """在播放区域内居中绘制当前帧"""
+        if self.image is None:
+            return
+        x = self.rect.x() + (self.rect.width() - self.image.width()) // 2
+        y = self.rect.y() + (self.rect.height() - self.image.height()) // 2
+        painter.drawImage(x, y, self.image)
+
+    def get_stats(self):
+        return {
+            'cache_bytes': self.cache.bytes,
+            'cache_limit': self.cache.max_bytes,
+            'hits': self.cache.hits,
+            'misses': self.cache.misses,
+            'evictions': self.cache.evictions,
+        }
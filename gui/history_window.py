@@ -0,0 +1,251 @@
+import time
+import datetime
+import threading
+from collections import OrderedDict
+from PySide6.QtWidgets import QWidget, QVBoxLayout, QLabel, QTableView, QHeaderView, QAbstractItemView
+from PySide6.QtCore import Qt, QAbstractTableModel, QModelIndex, QRect, Signal
+from PySide6.QtGui import QPainter, QPixmap, QColor
+from core.history import WORK, KIND_NAMES
+from utils.resources import app_icon
+from utils.log import get_logger
+
+logger = get_logger('ui')
+
+
+def format_duration(seconds):
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}:{minutes:02d}:{seconds:02d}" if hours else f"{minutes:02d}:{seconds:02d}"
+
+
+class HistoryModel(QAbstractTableModel):
+    """按页读取历史记录，最新的在最上面
+
+    rowCount 随视图滚动通过 fetchMore 增长（只增加行数，不读取数据）；
+    data() 按需读取所在的页，只缓存最近用到的 MAX_PAGES 页，内存占用与记录总数无关。
+    """
+
+    COLUMNS = ('开始时间', '类型', '时长', '计划', '结果')
+    PAGE_SIZE = 256
+    # 可见区域加上前后预读的页数
+    MAX_PAGES = 8
+    FETCH_ROWS = 4096
+
+    def __init__(self, store, parent=None):
+        super().__init__(parent)
+        self.store = store
+        self.total = store.count()
+        self.loaded = min(self.total, self.FETCH_ROWS)
+        self.pages = OrderedDict()  # 页号（按记录顺序）-> 记录列表
+        self.page_reads = 0
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self.loaded
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.COLUMNS)
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and self.loaded < self.total
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid():
+            return
+        count = min(self.FETCH_ROWS, self.total - self.loaded)
+        if count <= 0:
+            return
+        self.beginInsertRows(QModelIndex(), self.loaded, self.loaded + count - 1)
+        self.loaded += count
+        self.endInsertRows()
+
+    def refresh(self):
+        """有新记录时插入到最上面"""
+        total = self.store.count()
+        if total <= self.total:
+            return
+        added = total - self.total
+        # 页号按记录顺序计算，新增的记录不会影响已缓存的页（最后一页可能不完整，丢弃）
+        self.pages.pop((self.total - 1) // self.PAGE_SIZE, None)
+        self.beginInsertRows(QModelIndex(), 0, added - 1)
+        self.total = total
+        self.loaded += added
+        self.endInsertRows()
+
+    def record(self, row):
+        """第 row 行的记录（行0是最新的记录）"""
+        index = self.total - 1 - row
+        page_number = index // self.PAGE_SIZE
+        page = self.pages.get(page_number)
+        if page is None:
+            page = self.store.read(page_number * self.PAGE_SIZE, self.PAGE_SIZE)
+            self.page_reads += 1
+            self.pages[page_number] = page
+            while len(self.pages) > self.MAX_PAGES:
+                self.pages.popitem(last=False)
+        else:
+            self.pages.move_to_end(page_number)
+        offset = index - page_number * self.PAGE_SIZE
+        return page[offset] if offset < len(page) else None
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        if role == Qt.TextAlignmentRole and index.column() >= 2:
+            return int(Qt.AlignRight | Qt.AlignVCenter)
+        if role != Qt.DisplayRole:
+            return None
+        record = self.record(index.row())
+        if record is None:
+            return None
+        start, duration, planned, kind, completed = record
+        column = index.column()
+        if column == 0:
+            return time.strftime('%Y-%m-%d %H:%M', time.localtime(start))
+        if column == 1:
+            return KIND_NAMES.get(kind, str(kind))
+        if column == 2:
+            return format_duration(duration)
+        if column == 3:
+            return format_duration(planned)
+        if kind == WORK:
+            return '完成' if completed else '中断'
+        return '完成' if completed else '提前结束'
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self.COLUMNS[section]
+        return None
+
+
+class HistoryChart(QWidget):
+    """最近若干天的工作和休息时长柱状图，绘制结果缓存为QPixmap，数据或大小变化时才重绘"""
+
+    DAYS = 30
+    WORK_COLOR = QColor(33, 150, 243)
+    BREAK_COLOR = QColor(144, 200, 120)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.days = None
+        self._pixmap = None
+        self.setMinimumHeight(140)
+
+    def set_days(self, days):
+        self.days = days
+        self._pixmap = None
+        self.update()
+
+    def resizeEvent(self, event):
+        self._pixmap = None
+        super().resizeEvent(event)
+
+    def paintEvent(self, event):
+        if self._pixmap is None or self._pixmap.size() != self.size():
+            self._pixmap = self.render_chart()
+        QPainter(self).drawPixmap(0, 0, self._pixmap)
+
+    def render_chart(self):
+        pixmap = QPixmap(self.size())
+        pixmap.fill(Qt.white)
+        painter = QPainter(pixmap)
+        painter.setPen(Qt.darkGray)
+        if self.days is None:
+            painter.drawText(self.rect(), Qt.AlignCenter, '正在统计…')
+            painter.end()
+            return pixmap
+        today = datetime.date.today()
+        dates = [(today - datetime.timedelta(days=i)).isoformat() for i in range(self.DAYS - 1, -1, -1)]
+        values = [self.days.get(date, [0, 0, 0, 0]) for date in dates]
+        peak = max([value[0] + value[1] for value in values] + [1])
+        margin, label_height = 8, 18
+        height = self.height() - margin * 2 - label_height
+        slot = (self.width() - margin * 2) / self.DAYS
+        bar = max(1, int(slot * 0.7))
+        for i, value in enumerate(values):
+            x = int(margin + i * slot)
+            work_height = int(height * value[0] / peak)
+            break_height = int(height * value[1] / peak)
+            bottom = margin + height
+            painter.fillRect(QRect(x, bottom - work_height, bar, work_height), self.WORK_COLOR)
+            painter.fillRect(QRect(x, bottom - work_height - break_height, bar, break_height), self.BREAK_COLOR)
+        painter.drawText(QRect(margin, self.height() - label_height, self.width() - margin * 2, label_height),
+                         Qt.AlignLeft | Qt.AlignVCenter, dates[0][5:])
+        painter.drawText(QRect(margin, self.height() - label_height, self.width() - margin * 2, label_height),
+                         Qt.AlignRight | Qt.AlignVCenter, '今天')
+        painter.drawText(QRect(margin, margin, self.width() - margin * 2, label_height),
+                         Qt.AlignRight | Qt.AlignTop, f"最近{self.DAYS}天  最多 {format_duration(peak)}")
+        painter.end()
+        return pixmap
+
+
+class HistoryWindow(QWidget):
+    """历史记录：表格按需分页读取，统计图在后台线程中汇总"""
+
+    _aggregated = Signal(object)
+
+    def __init__(self, store, release_on_close=False):
+        super().__init__()
+        self.store = store
+        self.release_on_close = release_on_close
+        self.setWindowIcon(app_icon())
+        self.setWindowTitle('历史记录')
+        self.resize(560, 600)
+
+        layout = QVBoxLayout(self)
+        self.chart = HistoryChart()
+        layout.addWidget(self.chart)
+        self.summary = QLabel()
+        layout.addWidget(self.summary)
+
+        self.model = HistoryModel(store, self)
+        self.view = QTableView()
+        self.view.setModel(self.model)
+        self.view.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.view.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        # 固定行高，视图不需要测量每一行
+        header = self.view.verticalHeader()
+        header.setSectionResizeMode(QHeaderView.Fixed)
+        header.setDefaultSectionSize(self.view.fontMetrics().height() + 6)
+        header.hide()
+        self.view.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        layout.addWidget(self.view)
+
+        self._aggregated.connect(self.chart.set_days)
+        self._aggregating = False
+        self.update_summary()
+
+    def showEvent(self, event):
+        self.model.refresh()
+        self.update_summary()
+        self.start_aggregate()
+        super().showEvent(event)
+
+    def update_summary(self):
+        self.summary.setText(f"共 {self.model.total} 条记录")
+
+    def start_aggregate(self):
+        if self._aggregating:
+            return
+        self._aggregating = True
+        threading.Thread(target=self._aggregate, name='HistoryAggregate', daemon=True).start()
+
+    def _aggregate(self):
+        try:
+            days = self.store.aggregate()
+        except (OSError, ValueError) as e:
+            logger.warning(f"统计历史记录失败: {str(e)}")
+            days = {}
+        self._aggregating = False
+        try:
+            self._aggregated.emit(days)
+        except RuntimeError:
+            # 窗口已销毁
+            pass
+
+    def closeEvent(self, event):
+        if self.release_on_close:
+            event.accept()
+            self.deleteLater()
+            return
+        self.hide()
+        event.ignore()
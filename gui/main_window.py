@@ -1,43 +1,88 @@
 from PySide6.QtWidgets import QMainWindow, QSystemTrayIcon, QMenu, QWidget, QMessageBox
-from PySide6.QtGui import QIcon, QAction
-from PySide6.QtCore import Qt
+from PySide6.QtGui import QAction
+from PySide6.QtCore import Qt, QTimer
 from .timer_window import TimerWindow
 from .settings_window import SettingsWindow
-from core.config_manager import ConfigManager
-import os
+from .diagnostics_window import DiagnosticsWindow
+from .history_window import HistoryWindow
+from .tray_countdown import TrayCountdown
+from core.app import AppCore
+from core.control_server import ControlServer
+from core.policy import snooze_allowed
+from core.plugins import PluginManager
+from core.notifications import DesktopNotifier
+from utils.watchdog import StallWatchdog
+from utils import sd_notify
+from utils.resources import app_icon
+from utils.sound_cues import SoundCues
+from utils import memory, log, remote_session
+import time
 from PySide6.QtWidgets import QApplication
-import sys
 
-# 资源路径兼容PyInstaller打包和源码运行
-def resource_path(relative_path):
-    if hasattr(sys, '_MEIPASS'):
-        return os.path.join(sys._MEIPASS, relative_path)
-    return os.path.join(os.path.abspath('.'), relative_path)
+logger = log.get_logger('ui')
 
 class MainWindow(QMainWindow):
-    def __init__(self):
+    # 休息结束后等遮罩层销毁完成再释放内存
+    RELEASE_DELAY_MS = 2000
+    # 休息预告通知中“稍后提醒”推迟的分钟数
+    SNOOZE_MINUTES = 5
+
+    def __init__(self, restore=None, control_server=None):
         super().__init__()
-        # 初始化配置
-        self.config = {
-            'work_duration': 60,
-            'break_duration': 5,
-            'timer_width': 160,
-            'timer_height': 80,
-            'timer_font_size': 24,
-            'overlay_color': [0, 0, 0, 128],  # 修改为RGBA数组格式
-            'timer_position': {'x': 0, 'y': 0}
-        }
-        
-        # 加载配置
-        self.config_manager = ConfigManager()
-        saved_config = self.config_manager.load_config()
-        if saved_config:
-            self.config.update(saved_config)
+        # 尽早开始监听，缩短两个实例同时启动的竞争窗口（main.py 在创建窗口前就已开始监听）
+        # 命令在事件循环启动后才会被处理，此时窗口已初始化完成
+        if control_server is None:
+            control_server = ControlServer()
+            control_server.listen()
+        control_server.setParent(self)
+        self.control_server = control_server
+
+        # 配置和管理员策略与终端界面共用同一套启动流程
+        self.core = AppCore(parent=self)
+        self.core.policy_changed.connect(self.on_policy_changed)
+        control_server.handler = self.core.handle_command
+        # 远程会话检测可能要启动loginctl，在后台进行，第一次休息时不阻塞界面
+        remote_session.start_detection()
         
         self.init_ui()
+        self.core.start()
         
-        # 启动计时器
+        # 启动计时器；由监督进程重启时恢复崩溃前的状态
         self.start_timer()
+        if restore:
+            self.timer_window.restore_status(restore)
+
+        # 启动GUI线程卡顿检测
+        self.watchdog = None
+        if self.config.get('watchdog_enabled', True):
+            self.watchdog = StallWatchdog(self.config.get('watchdog_threshold_ms', 500))
+            self.watchdog.start()
+
+        # 由systemd启动时，事件循环开始运行（托盘图标已创建）后报告就绪
+        # 同时恢复自启动单元启动期间降低的CPU/IO权重
+        QTimer.singleShot(0, sd_notify.ready)
+        watchdog_ms = sd_notify.watchdog_interval_ms()
+        if watchdog_ms:
+            # 心跳由GUI线程发送，界面卡死时systemd会重启程序
+            self.systemd_watchdog = QTimer(self)
+            self.systemd_watchdog.timeout.connect(lambda: sd_notify.notify('WATCHDOG=1'))
+            self.systemd_watchdog.start(watchdog_ms)
+
+    @property
+    def config(self):
+        return self.core.config
+
+    @property
+    def config_manager(self):
+        return self.core.config_manager
+
+    @property
+    def policy_manager(self):
+        return self.core.policy_manager
+
+    @property
+    def history_store(self):
+        return self.core.history_store
 
     def init_ui(self):
         """初始化UI"""
@@ -45,30 +90,72 @@ class MainWindow(QMainWindow):
         self.setWindowFlags(Qt.WindowStaysOnTopHint)
         
         # 创建系统托盘图标
-        icon_path = resource_path('favicon.ico')
-        self.tray_icon = QSystemTrayIcon(QIcon(icon_path), self)
+        self.app_icon = app_icon()
+        self.tray_icon = QSystemTrayIcon(self.app_icon, self)
         self.tray_icon.setToolTip("Take Care Your Ass")
         self.tray_icon.show()
-        self.setWindowIcon(QIcon(icon_path))
+        self.setWindowIcon(self.app_icon)
+        self.tray_countdown = TrayCountdown(self.tray_icon, self.app_icon)
         
         # 创建托盘菜单
         tray_menu = QMenu()
         settings_action = QAction("设置", self)
         settings_action.triggered.connect(self.show_settings)
+        history_action = QAction("历史记录", self)
+        history_action.triggered.connect(self.show_history)
+        diagnostics_action = QAction("诊断信息", self)
+        diagnostics_action.triggered.connect(self.show_diagnostics)
         quit_action = QAction("退出", self)
         quit_action.triggered.connect(self.close)
         
         tray_menu.addAction(settings_action)
+        tray_menu.addAction(history_action)
+        tray_menu.addAction(diagnostics_action)
         tray_menu.addAction(quit_action)
         self.tray_icon.setContextMenu(tray_menu)
         
         # 创建计时器窗口
         self.timer_window = TimerWindow()
         self.timer_window.set_config(self.config)
+        self.timer_window.timer.time_updated.connect(self.update_tray_countdown)
+        self.timer_window.timer.timer_finished.connect(self.tray_countdown.reset)
+
+        # 提示音在启动时预先加载，触发时直接播放
+        self.sound_cues = None
+        self.update_sound_cues()
+        # 休息前的桌面通知
+        self.notifier = None
+        self.update_notifier()
+        self.timer_window.break_warning.connect(self.on_break_warning)
+        self.timer_window.break_started.connect(self.close_break_warning)
+        self.timer_window.break_started.connect(lambda: self.play_cue('break_start'))
+        self.timer_window.one_minute_warning.connect(lambda: self.play_cue('warning'))
+        self.timer_window.break_ended.connect(lambda completed: completed and self.play_cue('break_end'))
+
+        # 第三方插件：钩子在插件自己的线程中运行
+        self.plugins = None
+        if self.config.get('plugins_enabled', True):
+            self.plugins = PluginManager(budget_ms=self.config.get('plugin_budget_ms', 250),
+                                         disabled=self.config.get('plugins_disabled', []), parent=self)
+            self.timer_window.work_started.connect(lambda: self.dispatch_plugins('on_work_start'))
+            self.timer_window.one_minute_warning.connect(lambda: self.dispatch_plugins('on_one_minute_warning'))
+            self.timer_window.break_started.connect(lambda: self.dispatch_plugins('on_break_start'))
+            self.timer_window.break_ended.connect(
+                lambda completed: self.dispatch_plugins('on_break_end', completed=completed))
+
+        # 状态文件、HTTP接口、团队同步和历史记录
+        self.core.attach(self.timer_window.session, commands={'show_settings': self.show_settings})
+        self.history_window = None
+
+        # 低内存模式：休息结束后释放缓存并归还空闲内存
+        self.last_release = None
+        self.timer_window.break_ended.connect(self.on_break_ended)
         
-        # 创建设置窗口，传入timer_window
-        self.settings_window = SettingsWindow(self.config, self.timer_window)
-        self.settings_window.settings_saved.connect(self.on_settings_saved)
+        # 创建设置窗口，传入timer_window；低内存模式下首次打开时才创建
+        self.settings_window = None
+        if not self.low_memory_mode():
+            self.create_settings_window()
+        self.diagnostics_window = None
         
         # 设置窗口位置
         if self.config['timer_position']['x'] != 0 or self.config['timer_position']['y'] != 0:
@@ -87,16 +174,147 @@ class MainWindow(QMainWindow):
         """启动计时器"""
         self.timer_window.start_timer()
 
+    def update_tray_countdown(self, seconds):
+        """刷新托盘图标倒计时"""
+        if self.config.get('tray_countdown', False):
+            self.tray_countdown.set_total(self.timer_window.timer.total_seconds)
+            self.tray_countdown.update(seconds)
+
+    def update_sound_cues(self):
+        """按配置创建或调整提示音"""
+        if not self.config.get('sound_cues', False):
+            if self.sound_cues is not None:
+                self.sound_cues.enabled = False
+            return
+        if self.sound_cues is None:
+            if not SoundCues.available():
+                logger.warning("未安装QtMultimedia，无法播放提示音")
+                return
+            self.sound_cues = SoundCues(self.config.get('sound_volume', 70), parent=self)
+        self.sound_cues.enabled = True
+        self.sound_cues.set_volume(self.config.get('sound_volume', 70))
+
+    def update_notifier(self):
+        """按配置启动或停止休息预告通知"""
+        if not self.config.get('break_notifications'):
+            if self.notifier is not None:
+                self.notifier.stop()
+                self.notifier = None
+            return
+        if self.notifier is None:
+            if not DesktopNotifier.available():
+                logger.warning("未安装jeepney或没有D-Bus会话总线，无法显示桌面通知")
+                return
+            self.notifier = DesktopNotifier(parent=self)
+            self.notifier.action_invoked.connect(self.on_notification_action)
+            self.notifier.start()
+
+    def on_break_warning(self, minutes):
+        if self.notifier is not None:
+            # 同一个标识，1分钟的预告替换5分钟的预告；策略禁止推迟时不显示按钮
+            actions = [('snooze', f"{self.SNOOZE_MINUTES} 分钟后再提醒")] if snooze_allowed(self.config) else []
+            self.notifier.notify('break_warning', f"{minutes} 分钟后休息", "到时将显示休息遮罩层",
+                                 actions=actions, timeout_ms=60000)
+
+    def close_break_warning(self):
+        if self.notifier is not None:
+            self.notifier.close('break_warning')
+
+    def on_notification_action(self, tag, action):
+        if tag == 'break_warning' and action == 'snooze' and self.timer_window.phase == 'work' \
+                and snooze_allowed(self.config):
+            self.timer_window.snooze(self.SNOOZE_MINUTES)
+
+    def play_cue(self, name):
+        if self.sound_cues is not None:
+            self.sound_cues.play(name)
+
+    def dispatch_plugins(self, hook, **extra):
+        if self.plugins is not None:
+            event = self.timer_window.get_status()
+            event.update(extra, time=time.time())
+            self.plugins.dispatch(hook, event)
+
+    def low_memory_mode(self):
+        return self.config.get('low_memory_mode', False)
+
+    def create_settings_window(self):
+        self.settings_window = SettingsWindow(self.config, self.timer_window,
+                                              release_on_close=self.low_memory_mode(),
+                                              policy=self.config_manager.policy)
+        self.settings_window.settings_saved.connect(self.on_settings_saved)
+        self.settings_window.destroyed.connect(self.on_settings_destroyed)
+
+    def on_settings_destroyed(self):
+        self.settings_window = None
+
+    def on_diagnostics_destroyed(self):
+        self.diagnostics_window = None
+
+    def on_break_ended(self, completed):
+        if self.low_memory_mode():
+            QTimer.singleShot(self.RELEASE_DELAY_MS, self.release_memory)
+
+    def release_memory(self):
+        """释放休息之外用不到的缓存，并把空闲堆内存归还给系统"""
+        self.timer_window.release_caches()
+        self.tray_countdown.clear_cache(rings=True)
+        self.last_release = memory.release()
+
+    def on_history_destroyed(self):
+        self.history_window = None
+
+    def show_history(self):
+        """显示历史记录窗口"""
+        if self.history_window is None:
+            self.history_window = HistoryWindow(self.history_store, release_on_close=self.low_memory_mode())
+            self.history_window.destroyed.connect(self.on_history_destroyed)
+        self.history_window.show()
+        self.history_window.raise_()
+        self.history_window.activateWindow()
+
+    def show_diagnostics(self):
+        """显示诊断信息窗口"""
+        if self.diagnostics_window is None:
+            self.diagnostics_window = DiagnosticsWindow(self, release_on_close=self.low_memory_mode())
+            self.diagnostics_window.destroyed.connect(self.on_diagnostics_destroyed)
+        self.diagnostics_window.show()
+        self.diagnostics_window.raise_()
+        self.diagnostics_window.activateWindow()
+
     def show_settings(self):
         """显示设置窗口"""
+        if self.settings_window is None:
+            self.create_settings_window()
         self.settings_window.show()
+        self.settings_window.raise_()
+        self.settings_window.activateWindow()
 
     def on_settings_saved(self, new_config):
         """设置保存时的处理"""
-        self.config = new_config
-        self.config_manager.save_config(self.config)
+        self.core.save_config(new_config)
+        self.apply_config()
+
+    def on_policy_changed(self, policy):
+        """管理员策略更新：配置已重新合并，立即生效"""
+        self.apply_config()
+        if self.settings_window is not None:
+            self.settings_window.set_policy(policy)
+
+    def apply_config(self):
+        """让当前配置生效"""
+        self.core.apply_config()
         # 只更新计时器窗口的配置，不重新开始计时
         self.timer_window.set_config(self.config)
+        self.update_sound_cues()
+        self.update_notifier()
+        for window in (self.settings_window, self.diagnostics_window, self.history_window):
+            if window is not None:
+                window.release_on_close = self.low_memory_mode()
+        if self.config.get('tray_countdown', False):
+            self.update_tray_countdown(self.timer_window.timer.remaining_seconds)
+        else:
+            self.tray_countdown.reset()
 
     def closeEvent(self, event):
         """关闭窗口事件"""
@@ -150,12 +368,30 @@ class MainWindow(QMainWindow):
             # 停止计时器
             if hasattr(self, 'timer_window'):
                 self.timer_window.stop_timer()
+
+            # 停止本地控制服务
+            if hasattr(self, 'control_server'):
+                self.control_server.close()
+            if hasattr(self, 'core'):
+                self.core.close()
+            if getattr(self, 'plugins', None):
+                self.plugins.close()
+            if getattr(self, 'notifier', None):
+                self.notifier.stop()
+
+            # 停止卡顿检测
+            if getattr(self, 'watchdog', None):
+                self.watchdog.stop()
             
             # 关闭所有窗口
             if hasattr(self, 'timer_window'):
                 self.timer_window.close()
-            if hasattr(self, 'settings_window'):
+            if getattr(self, 'settings_window', None):
                 self.settings_window.close()
+            if getattr(self, 'diagnostics_window', None):
+                self.diagnostics_window.close()
+            if getattr(self, 'history_window', None):
+                self.history_window.close()
             
             # 退出应用
             QApplication.quit()
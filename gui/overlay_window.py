@@ -1,19 +1,51 @@
 from PySide6.QtWidgets import QWidget, QApplication
-from PySide6.QtCore import Qt, QTimer, Signal
-from PySide6.QtGui import QColor, QPainter, QKeyEvent, QFont
+from PySide6.QtCore import Qt, Signal, QRect
+from PySide6.QtGui import QColor, QPainter, QKeyEvent, QFont, QFontMetrics
+from core.clock import system_clock
 
 class OverlayWindow(QWidget):
     # 添加信号
     overlay_closed = Signal()  # 遮罩层关闭信号
+    snooze_requested = Signal()  # 请求稍后提醒信号
+    time_updated = Signal(int)  # 剩余时间（秒）
 
-    def __init__(self, color, duration, opacity=50):
+    # 动作动画区域的边长
+    ANIMATION_SIZE = 320
+    # 低带宽模式下文字背景的颜色（不透明）
+    LOW_BANDWIDTH_BOX_COLOR = QColor(32, 32, 32)
+
+    def __init__(self, color, duration, opacity=50, seconds=None, title="休息时间", allow_snooze=False,
+                 animation=None, clock=None, allow_escape=True, low_bandwidth=False, minute_text=False,
+                 countdown=True):
         super().__init__()
         self.duration = duration
-        # 根据透明度设置计算alpha值（0-255）
-        alpha = int((100 - opacity) * 255 / 100)
-        self.overlay_color = QColor(color[0], color[1], color[2], alpha)
+        self.clock = clock or system_clock
+        self.animation = animation
+        self.completed = False  # 倒计时是否正常结束（而不是按ESC提前结束）
+        # seconds 用于不足一分钟的短休息，优先于 duration（分钟）
+        self.total_seconds = seconds if seconds is not None else duration * 60
+        self.title = title
+        self.allow_snooze = allow_snooze
+        self.allow_escape = allow_escape  # 管理员策略可以禁止按ESC提前结束休息
+        # 低带宽模式（远程桌面会话）：不透明纯色、无动画，每秒只重绘倒计时所在的小矩形
+        self.low_bandwidth = low_bandwidth
+        self.minute_text = minute_text  # 只显示分钟，每分钟才重绘一次
+        if low_bandwidth:
+            self.animation = None
+            self.overlay_color = QColor(color[0], color[1], color[2])
+        else:
+            # 根据透明度设置计算alpha值（0-255）
+            alpha = int((100 - opacity) * 255 / 100)
+            self.overlay_color = QColor(color[0], color[1], color[2], alpha)
+        self.text_font = QFont()
+        self.text_font.setPointSize(36)
+        self.timer = self.end_timer = None
         self.init_ui()
-        self.start_countdown()
+        # countdown 为False时由调用方（core.session.BreakSession）计时，通过 set_remaining 更新显示
+        if countdown:
+            self.start_countdown()
+        else:
+            self.update_display()
 
     def init_ui(self):
         """初始化UI"""
@@ -25,7 +57,11 @@ class OverlayWindow(QWidget):
         )
         
         # 设置窗口属性
-        self.setAttribute(Qt.WA_TranslucentBackground)  # 透明背景
+        if self.low_bandwidth:
+            # 不透明窗口，绘制前不清除背景
+            self.setAttribute(Qt.WA_OpaquePaintEvent)
+        else:
+            self.setAttribute(Qt.WA_TranslucentBackground)  # 透明背景
         self.setAttribute(Qt.WA_ShowWithoutActivating)  # 显示时不激活
         
         # 获取所有屏幕
@@ -39,81 +75,139 @@ class OverlayWindow(QWidget):
             self.setGeometry(total_geometry)
         # 记录1号屏幕的geometry
         self.first_screen_geometry = screens[0].geometry() if screens else None
-        self.display_text = "休息时间"
-        self.remaining_time = self.duration * 60
+        self.display_text = self.title
+        self.shortcut_text = ""
+        self.remaining_time = self.total_seconds
+        self.animation_rect = QRect()
+        if self.animation is not None and self.first_screen_geometry:
+            # 动画放在1号屏幕中央文字的上方，坐标相对于遮罩窗口
+            size = self.ANIMATION_SIZE
+            center = self.first_screen_geometry.center() - self.geometry().topLeft()
+            self.animation_rect = QRect(center.x() - size // 2, center.y() - size - 80, size, size)
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        if self.animation is not None and not self.animation_rect.isNull():
+            self.animation.start(self, self.animation_rect)
+
+    def text_rect(self):
+        """倒计时文字背景框的位置（与绘制时的坐标一致），未知时返回空矩形"""
+        if not self.first_screen_geometry:
+            return QRect()
+        metrics = QFontMetrics(self.text_font)
+        text_width = metrics.horizontalAdvance(self.display_text)
+        shortcut_width = metrics.horizontalAdvance(self.shortcut_text) if self.shortcut_text else 0
+        text_height = metrics.height()
+        # 计算1号屏幕中心
+        center_x = self.first_screen_geometry.x() + self.first_screen_geometry.width() // 2
+        center_y = self.first_screen_geometry.y() + self.first_screen_geometry.height() // 2
+        if self.shortcut_text:
+            # 两行文字
+            rect_width = max(text_width, shortcut_width) + 60
+            rect_height = text_height * 2 + 60
+        else:
+            # 只显示一行文字，背景更紧凑
+            rect_width = text_width + 48
+            rect_height = text_height + 32
+        return QRect(center_x - rect_width // 2, center_y - rect_height // 2, rect_width, rect_height)
 
     def paintEvent(self, event):
         painter = QPainter(self)
-        painter.setRenderHint(QPainter.Antialiasing)
-        painter.fillRect(self.rect(), self.overlay_color)
-        if self.first_screen_geometry:
-            # 在1号屏幕中央绘制文字
-            font = QFont()
-            font.setPointSize(36)
-            painter.setFont(font)
-            painter.setPen(Qt.white)
-            
-            # 计算文字大小
-            metrics = painter.fontMetrics()
-            text_width = metrics.horizontalAdvance(self.display_text)
-            shortcut_width = metrics.horizontalAdvance(self.shortcut_text) if hasattr(self, 'shortcut_text') else 0
-            text_height = metrics.height()
-            
-            # 计算1号屏幕中心
-            center_x = self.first_screen_geometry.x() + self.first_screen_geometry.width() // 2
-            center_y = self.first_screen_geometry.y() + self.first_screen_geometry.height() // 2
-            
-            if hasattr(self, 'shortcut_text') and self.shortcut_text:
-                # 两行文字
-                rect_width = max(text_width, shortcut_width) + 60
-                rect_height = text_height * 2 + 60
-                rect_x = center_x - rect_width // 2
-                rect_y = center_y - rect_height // 2
-                painter.setBrush(QColor(0,0,0,180))
-                painter.setPen(Qt.NoPen)
-                painter.drawRoundedRect(rect_x, rect_y, rect_width, rect_height, 16, 16)
-                # 绘制第一行文字
-                painter.setPen(Qt.white)
-                painter.drawText(center_x - text_width // 2, center_y - text_height // 2, self.display_text)
-                # 绘制第二行文字
-                painter.setPen(Qt.white)
-                painter.drawText(center_x - shortcut_width // 2, center_y + text_height // 2, self.shortcut_text)
-            else:
-                # 只显示一行文字，背景更紧凑
-                rect_width = text_width + 48
-                rect_height = text_height + 32
-                rect_x = center_x - rect_width // 2
-                rect_y = center_y - rect_height // 2
-                painter.setBrush(QColor(0,0,0,180))
-                painter.setPen(Qt.NoPen)
-                painter.drawRoundedRect(rect_x, rect_y, rect_width, rect_height, 12, 12)
-                painter.setPen(Qt.white)
-                painter.drawText(center_x - text_width // 2, center_y + text_height // 2 - 8, self.display_text)
+        if not self.low_bandwidth:
+            painter.setRenderHint(QPainter.Antialiasing)
+        painter.fillRect(event.rect(), self.overlay_color)
+        if self.animation is not None and self.animation_rect.intersects(event.rect()):
+            self.animation.paint(painter)
+            # 只需重绘动画帧时跳过文字
+            if self.animation_rect.contains(event.rect()):
+                return
+        rect = self.text_rect()
+        if rect.isNull() or not rect.intersects(event.rect()):
+            return
+        # 在1号屏幕中央绘制文字
+        painter.setFont(self.text_font)
+        metrics = painter.fontMetrics()
+        text_width = metrics.horizontalAdvance(self.display_text)
+        text_height = metrics.height()
+        center_x = rect.x() + rect.width() // 2
+        center_y = rect.y() + rect.height() // 2
+        if self.low_bandwidth:
+            # 不透明纯色，不做alpha混合和抗锯齿
+            painter.fillRect(rect, self.LOW_BANDWIDTH_BOX_COLOR)
+        else:
+            painter.setBrush(QColor(0, 0, 0, 180))
+            painter.setPen(Qt.NoPen)
+            radius = 16 if self.shortcut_text else 12
+            painter.drawRoundedRect(rect, radius, radius)
+        painter.setPen(Qt.white)
+        if self.shortcut_text:
+            shortcut_width = metrics.horizontalAdvance(self.shortcut_text)
+            painter.drawText(center_x - text_width // 2, center_y - text_height // 2, self.display_text)
+            painter.drawText(center_x - shortcut_width // 2, center_y + text_height // 2, self.shortcut_text)
+        else:
+            painter.drawText(center_x - text_width // 2, center_y + text_height // 2 - 8, self.display_text)
 
     def start_countdown(self):
         """开始倒计时"""
-        self.remaining_time = self.duration * 60
+        self.remaining_time = self.total_seconds
+        self.deadline = self.clock.monotonic() + self.total_seconds
         self.update_display()
-        self.timer = QTimer()
+        self.timer = self.clock.create_timer()
         self.timer.timeout.connect(self.update_countdown)
         self.timer.start(1000)  # 每秒更新一次
+        # 按结束时间关闭，不受每秒刷新的延迟影响
+        self.end_timer = self.clock.create_timer()
+        self.end_timer.setSingleShot(True)
+        self.end_timer.timeout.connect(self.finish)
+        self.end_timer.start(self.total_seconds * 1000)
 
     def update_countdown(self):
         """更新倒计时"""
-        self.remaining_time -= 1
+        self.remaining_time = max(0, round(self.deadline - self.clock.monotonic()))
         if self.remaining_time <= 0:
-            self.timer.stop()
-            self.close()
+            self.finish()
         else:
             self.update_display()
 
+    def set_remaining(self, seconds):
+        """由外部计时时更新剩余时间"""
+        self.remaining_time = max(0, int(seconds))
+        self.update_display()
+
+    def finish(self):
+        """倒计时正常结束"""
+        if self.timer is not None:
+            self.timer.stop()
+        self.remaining_time = 0
+        self.completed = True
+        self.close()
+
     def update_display(self):
         """更新显示的时间"""
+        old_rect = self.text_rect()
+        old_text = (self.display_text, self.shortcut_text)
         minutes = self.remaining_time // 60
         seconds = self.remaining_time % 60
-        self.display_text = f"休息时间: {minutes:02d}:{seconds:02d}"
-        self.shortcut_text = "按 ESC 键结束休息"
-        self.update()
+        if self.minute_text:
+            # 剩余分钟数向上取整
+            if self.remaining_time > 60:
+                self.display_text = f"{self.title}: 还剩 {-(-self.remaining_time // 60)} 分钟"
+            else:
+                self.display_text = f"{self.title}: 不到 1 分钟"
+        else:
+            self.display_text = f"{self.title}: {minutes:02d}:{seconds:02d}"
+        if self.allow_snooze and self.allow_escape:
+            self.shortcut_text = "按 ESC 键结束休息，按 S 键稍后提醒"
+        elif self.allow_snooze:
+            self.shortcut_text = "按 S 键稍后提醒"
+        elif self.allow_escape:
+            self.shortcut_text = "按 ESC 键结束休息"
+        else:
+            self.shortcut_text = ""
+        if (self.display_text, self.shortcut_text) != old_text:
+            # 只重绘文字框（新旧文字宽度可能不同），遮罩其余部分和动画区域不受影响
+            self.update(old_rect.united(self.text_rect()))
+        self.time_updated.emit(self.remaining_time)
 
     def mousePressEvent(self, event):
         """鼠标按下事件，点击不关闭遮罩层"""
@@ -121,13 +215,21 @@ class OverlayWindow(QWidget):
 
     def keyPressEvent(self, event: QKeyEvent):
         """键盘按下事件"""
-        if event.key() == Qt.Key_Escape:
-            self.timer.stop()
+        # 计时器在 closeEvent 中停止
+        if event.key() == Qt.Key_Escape and self.allow_escape:
+            self.close()
+        elif event.key() == Qt.Key_S and self.allow_snooze:
+            self.snooze_requested.emit()
             self.close()
         else:
             super().keyPressEvent(event)
 
     def closeEvent(self, event):
         """关闭窗口事件"""
+        if self.timer is not None:
+            self.timer.stop()
+            self.end_timer.stop()
+        if self.animation is not None:
+            self.animation.stop()
         self.overlay_closed.emit()  # 发送遮罩层关闭信号
         super().closeEvent(event) 
\ No newline at end of file
@@ -5,9 +5,9 @@ from PySide6.QtWidgets import (
     QSlider, QSizePolicy
 )
 from PySide6.QtCore import Qt, Signal, QTimer
-from PySide6.QtGui import QColor, QPalette, QIntValidator, QIcon, QFont
-import os
+from PySide6.QtGui import QColor, QPalette, QIntValidator, QFont
 from utils.autostart import AutoStartManager
+from utils.resources import app_icon
 from gui.overlay_window import OverlayWindow
 
 class HelpLabel(QLabel):
@@ -33,14 +33,21 @@ class HelpLabel(QLabel):
 class SettingsWindow(QWidget):
     settings_saved = Signal(dict)
 
-    def __init__(self, config, timer_window):
+    def __init__(self, config, timer_window, release_on_close=False, policy=None):
         super().__init__()
         self.config = config
         self.timer_window = timer_window
-        self.autostart_manager = AutoStartManager()
+        # 管理员策略：锁定的项不可编辑，数值项限制范围
+        self.policy = policy
+        # 低内存模式下关闭时销毁窗口，下次打开时重新创建
+        self.release_on_close = release_on_close
+        self.autostart_manager = AutoStartManager(
+            backend=config.get('autostart_backend', 'auto'),
+            delay=config.get('autostart_delay', 0),
+            random_delay=config.get('autostart_random_delay', 0)
+        )
         # 设置窗口图标
-        icon_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'favicon.ico')
-        self.setWindowIcon(QIcon(icon_path))
+        self.setWindowIcon(app_icon())
         self.setWindowTitle('设置')
         self.setFixedSize(400, 500)
         # 只显示关闭按钮，禁用最小化和最大化
@@ -50,6 +57,38 @@ class SettingsWindow(QWidget):
         )
         self.init_ui()
         self.load_settings()
+        self.apply_policy_locks()
+
+    def policy_widgets(self):
+        """配置项 -> 对应的控件"""
+        return {
+            'work_duration': [self.work_duration_input],
+            'break_duration': [self.break_duration_input],
+            'timer_width': [self.timer_width_input],
+            'timer_height': [self.timer_height_input],
+            'timer_font_size': [self.font_size_input],
+            'overlay_color': [self.color_button],
+            'overlay_opacity': [self.opacity_slider],
+            'hide_timer': [self.hide_timer_checkbox],
+            'tray_countdown': [self.tray_countdown_checkbox],
+            'sound_cues': [self.sound_cues_checkbox],
+            'low_memory_mode': [self.low_memory_checkbox],
+            'autostart': [self.autostart_checkbox],
+        }
+
+    def set_policy(self, policy):
+        """策略更新后刷新显示的值和锁定状态"""
+        self.policy = policy
+        self.load_settings()
+        self.apply_policy_locks()
+
+    def apply_policy_locks(self):
+        """被策略锁定的项显示为灰色"""
+        for key, widgets in self.policy_widgets().items():
+            locked = self.policy is not None and self.policy.is_locked(key)
+            for widget in widgets:
+                widget.setEnabled(not locked)
+                widget.setToolTip("此项由管理员策略锁定" if locked else "")
 
     def init_ui(self):
         # 主背景色
@@ -387,6 +426,42 @@ class SettingsWindow(QWidget):
         hide_timer_layout.addWidget(self.hide_timer_checkbox)
         frame_layout.addLayout(hide_timer_layout)
 
+        # 托盘图标倒计时设置
+        tray_countdown_layout = QHBoxLayout()
+        tray_countdown_layout.setSpacing(12)
+        tray_countdown_label = QLabel("托盘图标显示倒计时:")
+        tray_countdown_label.setStyleSheet(label_style)
+        self.tray_countdown_checkbox = QCheckBox()
+        self.tray_countdown_checkbox.setStyleSheet(checkbox_style)
+        tray_countdown_layout.addWidget(tray_countdown_label)
+        tray_countdown_layout.addStretch()
+        tray_countdown_layout.addWidget(self.tray_countdown_checkbox)
+        frame_layout.addLayout(tray_countdown_layout)
+
+        # 提示音设置
+        sound_cues_layout = QHBoxLayout()
+        sound_cues_layout.setSpacing(12)
+        sound_cues_label = QLabel("休息开始/结束时播放提示音:")
+        sound_cues_label.setStyleSheet(label_style)
+        self.sound_cues_checkbox = QCheckBox()
+        self.sound_cues_checkbox.setStyleSheet(checkbox_style)
+        sound_cues_layout.addWidget(sound_cues_label)
+        sound_cues_layout.addStretch()
+        sound_cues_layout.addWidget(self.sound_cues_checkbox)
+        frame_layout.addLayout(sound_cues_layout)
+
+        # 低内存模式
+        low_memory_layout = QHBoxLayout()
+        low_memory_layout.setSpacing(12)
+        low_memory_label = QLabel("低内存模式:")
+        low_memory_label.setStyleSheet(label_style)
+        self.low_memory_checkbox = QCheckBox()
+        self.low_memory_checkbox.setStyleSheet(checkbox_style)
+        low_memory_layout.addWidget(low_memory_label)
+        low_memory_layout.addStretch()
+        low_memory_layout.addWidget(self.low_memory_checkbox)
+        frame_layout.addLayout(low_memory_layout)
+
         # 开机自启设置
         autostart_layout = QHBoxLayout()
         autostart_layout.setSpacing(12)  # 增加水平间距
@@ -423,7 +498,7 @@ class SettingsWindow(QWidget):
         main_layout.addWidget(info_label)
 
         # 调整窗口高度以适应所有控件
-        self.setFixedSize(400, 600)  # 增加窗口高度
+        self.setFixedSize(400, 735)  # 增加窗口高度
 
     def update_color_button(self):
         """更新颜色按钮的显示"""
@@ -468,11 +543,19 @@ class SettingsWindow(QWidget):
         ]
         opacity = self.opacity_slider.value()
         # 创建遮罩层窗口，持续3秒
-        self._preview_overlay = OverlayWindow(color, 0, opacity)  # duration=0, 不显示倒计时
-        self._preview_overlay.display_text = "遮罩效果预览"
-        self._preview_overlay.shortcut_text = ""
-        self._preview_overlay.show()
-        QTimer.singleShot(3000, self._preview_overlay.close)
+        overlay = OverlayWindow(color, 0, opacity)  # duration=0, 不显示倒计时
+        overlay.display_text = "遮罩效果预览"
+        overlay.shortcut_text = ""
+        overlay.overlay_closed.connect(lambda: self.release_preview(overlay))
+        self._preview_overlay = overlay
+        overlay.show()
+        QTimer.singleShot(3000, overlay.close)
+
+    def release_preview(self, overlay):
+        """预览结束后销毁遮罩层，不保留全屏窗口的缓冲区"""
+        overlay.deleteLater()
+        if self._preview_overlay is overlay:
+            self._preview_overlay = None
 
     def load_settings(self):
         self.work_duration_input.setText(str(self.config.get('work_duration', 60)))
@@ -481,6 +564,9 @@ class SettingsWindow(QWidget):
         self.timer_height_input.setText(str(self.config.get('timer_height', 200)))
         self.font_size_input.setText(str(self.config.get('timer_font_size', 24)))
         self.hide_timer_checkbox.setChecked(self.config.get('hide_timer', False))
+        self.tray_countdown_checkbox.setChecked(self.config.get('tray_countdown', False))
+        self.sound_cues_checkbox.setChecked(self.config.get('sound_cues', False))
+        self.low_memory_checkbox.setChecked(self.config.get('low_memory_mode', False))
         self.autostart_checkbox.setChecked(self.config.get('autostart', False))
         self.opacity_slider.setValue(self.config.get('overlay_opacity', 50))
         self.update_color_button()
@@ -495,6 +581,9 @@ class SettingsWindow(QWidget):
             timer_height = int(self.timer_height_input.text())
             font_size = int(self.font_size_input.text())
             hide_timer = self.hide_timer_checkbox.isChecked()
+            tray_countdown = self.tray_countdown_checkbox.isChecked()
+            sound_cues = self.sound_cues_checkbox.isChecked()
+            low_memory_mode = self.low_memory_checkbox.isChecked()
             autostart = self.autostart_checkbox.isChecked()
             overlay_opacity = self.opacity_slider.value()
             
@@ -508,6 +597,19 @@ class SettingsWindow(QWidget):
             if not (12 <= font_size <= 72):
                 QMessageBox.warning(self, "输入错误", "文字大小必须在12-72像素之间")
                 return
+            if self.policy is not None:
+                for key, title, value in (
+                    ('work_duration', '工作时间', work_duration),
+                    ('break_duration', '休息时间', break_duration),
+                    ('timer_width', '计时器宽度', timer_width),
+                    ('timer_height', '计时器高度', timer_height),
+                    ('timer_font_size', '文字大小', font_size),
+                    ('overlay_opacity', '遮罩透明度', overlay_opacity),
+                ):
+                    error = self.policy.check(key, value)
+                    if error:
+                        QMessageBox.warning(self, "输入错误", f"{title}{error}")
+                        return
             
             # 设置开机自启
             if autostart != self.autostart_manager.is_autostart_enabled():
@@ -532,6 +634,9 @@ class SettingsWindow(QWidget):
                 'overlay_opacity': overlay_opacity,  # 保存遮罩层透明度
                 'timer_position': timer_position,  # 保存计时器位置
                 'hide_timer': hide_timer,  # 保存隐藏计时框设置
+                'tray_countdown': tray_countdown,  # 保存托盘倒计时设置
+                'sound_cues': sound_cues,  # 保存提示音设置
+                'low_memory_mode': low_memory_mode,  # 保存低内存模式设置
                 'autostart': autostart  # 保存开机自启设置
             })
             
@@ -583,6 +688,10 @@ class SettingsWindow(QWidget):
 
     def closeEvent(self, event):
         """关闭窗口事件"""
+        if self.release_on_close:
+            event.accept()
+            self.deleteLater()
+            return
         # 隐藏窗口而不是关闭
         self.hide()
         event.ignore() 
\ No newline at end of file
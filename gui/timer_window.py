@@ -1,12 +1,29 @@
 from PySide6.QtWidgets import QWidget, QLabel, QVBoxLayout, QPushButton, QHBoxLayout, QSizePolicy
-from PySide6.QtCore import Qt, QPoint
-from PySide6.QtGui import QColor, QPalette
-from core.timer import Timer
+from PySide6.QtCore import Qt, QPoint, Signal
+from PySide6.QtGui import QColor, QPalette, QPixmapCache
+from core.clock import system_clock
+from core.session import BreakSession
+from core.policy import snooze_allowed
 from .overlay_window import OverlayWindow
+from .exercise_animation import ExerciseAnimation
+from utils.log import get_logger
+from utils import remote_session
+
+logger = get_logger('ui')
 
 class TimerWindow(QWidget):
-    def __init__(self, parent=None):
+    # 阶段切换信号，供提示音等功能使用
+    work_started = Signal()
+    break_started = Signal()
+    break_ended = Signal(bool)  # True表示休息倒计时正常结束
+    one_minute_warning = Signal()
+    break_warning = Signal(int)  # 距离休息的分钟数（按 break_notifications 配置）
+    status_changed = Signal()  # 阶段、剩余时间或暂停状态变化
+
+    def __init__(self, parent=None, clock=None):
         super().__init__(parent)
+        # 时钟可替换为虚拟时钟，用于模拟
+        self.clock = clock or system_clock
         # 初始化配置
         self.config = {
             'timer_width': 140,
@@ -148,17 +165,50 @@ class TimerWindow(QWidget):
         # 设置初始位置（右下角）
         self.move_to_corner()
 
-        # 初始化计时器
-        self.timer = Timer()
-        self.timer.time_updated.connect(self.update_display)
-        self.timer.timer_finished.connect(self.on_timer_finished)
+        # 工作/休息状态机与终端界面共用，这里只负责显示计时框和遮罩层
+        self.session = BreakSession(clock=self.clock, parent=self)
+        self.session.work_started.connect(self.on_work_started)
+        self.session.work_tick.connect(self.update_display)
+        self.session.phase_changed.connect(self.on_phase_changed)
+        self.session.break_started.connect(self.on_break_started)
+        self.session.break_tick.connect(self.on_break_tick)
+        self.session.break_ended.connect(self.on_break_ended)
+        self.session.short_break_started.connect(self.on_short_break_started)
+        self.session.short_break_tick.connect(self.on_short_break_tick)
+        self.session.short_break_ended.connect(self.on_short_break_ended)
+        self.session.one_minute_warning.connect(self.one_minute_warning)
+        self.session.break_warning.connect(self.break_warning)
+        self.session.status_changed.connect(self.on_status_changed)
+        self.overlay = None
+        self.short_overlay = None
 
         # 用于拖动窗口
         self.dragging = False
         self.drag_position = QPoint()
-        
-        # 暂停状态
-        self.is_paused = False
+
+        # 休息时播放的动作动画，配置了内容目录时才创建
+        self.exercise = None
+        self.exercise_settings = None
+
+    @property
+    def timer(self):
+        return self.session.timer
+
+    @property
+    def schedule_engine(self):
+        return self.session.schedule_engine
+
+    @property
+    def phase(self):
+        return self.session.phase
+
+    @property
+    def is_paused(self):
+        return self.session.is_paused
+
+    @property
+    def synced_break_at(self):
+        return self.session.synced_break_at
 
     def move_to_corner(self):
         """将窗口移动到屏幕右下角"""
@@ -187,7 +237,7 @@ class TimerWindow(QWidget):
         minutes = seconds // 60
         remaining_seconds = seconds % 60
         self.time_label.setText(f"{minutes:02d}:{remaining_seconds:02d}")
-        
+
         # 如果启用了隐藏计时框功能
         if self.config.get('hide_timer', False):
             # 当剩余时间大于1分钟时隐藏窗口
@@ -197,19 +247,112 @@ class TimerWindow(QWidget):
             else:
                 self.show()
 
-    def on_timer_finished(self):
-        """计时结束时的处理"""
-        self.hide()
-        if self.config:
-            # 显示休息提醒
-            self.overlay = OverlayWindow(
-                self.config['overlay_color'],
-                self.config['break_duration'],
-                self.config.get('overlay_opacity', 50)  # 获取透明度设置，默认为50
-            )
-            # 连接遮罩层关闭信号
-            self.overlay.overlay_closed.connect(self.start_timer)
-            self.overlay.show()
+    def on_status_changed(self):
+        self.pause_button.setText("继续" if self.session.is_paused else "暂停")
+        self.update_buttons()
+        self.status_changed.emit()
+
+    def update_buttons(self):
+        """策略禁止推迟休息时不能增加时间，也不能暂停（已暂停时仍可继续）"""
+        delay_allowed = self.session.delay_allowed()
+        self.plus_button.setEnabled(delay_allowed)
+        self.pause_button.setEnabled(delay_allowed or self.session.is_paused)
+
+    def on_phase_changed(self, phase):
+        # 休息或推迟休息期间不显示计时框
+        if phase != 'work':
+            self.hide()
+
+    def on_work_started(self):
+        self.show()
+        self.work_started.emit()
+
+    def on_break_started(self, seconds):
+        """显示休息遮罩层，倒计时由状态机负责"""
+        self.overlay = OverlayWindow(
+            self.config['overlay_color'],
+            seconds // 60,
+            self.config.get('overlay_opacity', 50),  # 获取透明度设置，默认为50
+            seconds=seconds,
+            animation=self.exercise,
+            clock=self.clock,
+            allow_escape=self.config.get('allow_escape', True),
+            countdown=False,
+            **self.overlay_options()
+        )
+        # 按ESC关闭遮罩层时提前结束休息
+        self.overlay.overlay_closed.connect(self.on_overlay_closed)
+        self.overlay.show()
+        self.break_started.emit()
+
+    def overlay_options(self):
+        """远程桌面会话中使用低带宽遮罩层"""
+        low_bandwidth = remote_session.low_bandwidth_enabled(self.config)
+        return {
+            'low_bandwidth': low_bandwidth,
+            'minute_text': low_bandwidth and self.config.get('remote_overlay_minutes', False),
+        }
+
+    def on_break_tick(self, seconds):
+        if self.overlay is not None:
+            self.overlay.set_remaining(seconds)
+
+    def on_overlay_closed(self):
+        overlay, self.overlay = self.overlay, None
+        if overlay is None:
+            return
+        overlay.deleteLater()
+        self.session.end_break(completed=False)
+
+    def on_break_ended(self, completed):
+        """休息结束（倒计时结束、跳过或按ESC）：关闭遮罩层"""
+        overlay, self.overlay = self.overlay, None
+        if overlay is not None:
+            overlay.completed = completed
+            overlay.close()
+            overlay.deleteLater()
+        self.break_ended.emit(completed)
+
+    def on_short_break_started(self, event):
+        """休息规则触发的短休息"""
+        self.short_overlay = OverlayWindow(
+            self.config['overlay_color'],
+            0,
+            self.config.get('overlay_opacity', 50),
+            seconds=event['duration'],
+            title=event['title'],
+            allow_snooze=snooze_allowed(self.config),
+            clock=self.clock,
+            allow_escape=self.config.get('allow_escape', True),
+            countdown=False,
+            **self.overlay_options()
+        )
+        self.short_overlay.snooze_requested.connect(self.session.snooze_short_break)
+        self.short_overlay.overlay_closed.connect(self.on_short_overlay_closed)
+        self.short_overlay.show()
+
+    def on_short_break_tick(self, seconds):
+        if self.short_overlay is not None:
+            self.short_overlay.set_remaining(seconds)
+
+    def on_short_overlay_closed(self):
+        overlay, self.short_overlay = self.short_overlay, None
+        if overlay is None:
+            return
+        overlay.deleteLater()
+        self.session.end_short_break()
+
+    def on_short_break_ended(self):
+        overlay, self.short_overlay = self.short_overlay, None
+        if overlay is not None:
+            overlay.close()
+            overlay.deleteLater()
+
+    def release_caches(self):
+        """释放休息之外用不到的缓存（动画帧、QPixmapCache）"""
+        if self.exercise is not None:
+            self.exercise.clear_cache()
+        QPixmapCache.clear()
 
     def mousePressEvent(self, event):
         """鼠标按下事件"""
@@ -232,14 +375,17 @@ class TimerWindow(QWidget):
 
     def start_timer(self, minutes: int = None):
         """开始计时"""
-        if minutes is None and self.config:
-            minutes = self.config['work_duration']
-        self.show()
-        self.timer.start(minutes)
+        self.session.start_work(minutes)
+
+    def restore_status(self, status):
+        """恢复重启前的计时状态"""
+        self.session.restore_status(status)
 
     def stop_timer(self):
         """停止计时"""
-        self.timer.stop()
+        self.session.stop()
+        if self.exercise is not None:
+            self.exercise.close()
         self.hide()
 
     def set_config(self, config):
@@ -257,6 +403,9 @@ class TimerWindow(QWidget):
                 font-size: {self.config['timer_font_size']}px;
             }}
         """)
+        self.session.set_config(self.config)
+        self.update_buttons()
+        self.update_exercise()
         # 应用保存的位置
         if 'timer_position' in self.config:
             self.move(self.config['timer_position']['x'], self.config['timer_position']['y'])
@@ -270,6 +419,26 @@ class TimerWindow(QWidget):
             # 如果取消隐藏计时框，则显示窗口
             self.show()
 
+    def update_exercise(self):
+        """动作动画目录或缓存上限变化时重新创建播放器"""
+        settings = (self.config.get('exercise_dir', ''), self.config.get('exercise_cache_mb', 32))
+        if settings == self.exercise_settings:
+            return
+        self.exercise_settings = settings
+        if self.exercise is not None:
+            self.exercise.close()
+            self.exercise.deleteLater()
+            self.exercise = None
+        content_dir, cache_mb = settings
+        if content_dir:
+            exercise = ExerciseAnimation(content_dir, cache_mb, parent=self)
+            if exercise.has_content():
+                self.exercise = exercise
+            else:
+                logger.warning(f"动作动画目录中没有可用的动画: {content_dir}")
+                exercise.close()
+                exercise.deleteLater()
+
     def closeEvent(self, event):
         """关闭窗口事件"""
         # 保存位置到配置
@@ -282,22 +451,39 @@ class TimerWindow(QWidget):
 
     def toggle_pause(self):
         """切换暂停/继续状态"""
-        if self.is_paused:
-            self.timer.resume()
-            self.pause_button.setText("暂停")
-            self.is_paused = False
-        else:
-            self.timer.pause()
-            self.pause_button.setText("继续")
-            self.is_paused = True
+        self.session.toggle_pause()
+
+    def pause_timer(self):
+        """暂停计时（已暂停时不做处理）"""
+        self.session.pause()
+
+    def resume_timer(self):
+        """继续计时（未暂停时不做处理）"""
+        self.session.resume()
+
+    def skip(self):
+        """跳过休息：休息中立即结束休息（策略禁止ESC时不处理），工作中重新开始本轮工作计时"""
+        self.session.skip()
+
+    def get_status(self):
+        """获取当前计时状态"""
+        return self.session.get_status()
 
     def decrease_time(self):
         """减少10分钟"""
-        if self.timer.remaining_seconds > 0:
-            self.timer.remaining_seconds = max(0, self.timer.remaining_seconds - 600)
-            self.update_display(self.timer.remaining_seconds)
+        self.session.decrease_time()
 
     def increase_time(self):
         """增加10分钟"""
-        self.timer.remaining_seconds += 600
-        self.update_display(self.timer.remaining_seconds) 
\ No newline at end of file
+        self.session.increase_time()
+
+    def snooze(self, minutes):
+        """推迟本轮休息"""
+        self.session.snooze(minutes)
+
+    def align_break(self, break_at):
+        """按团队同步的计划对齐休息开始时间"""
+        self.session.align_break(break_at)
+
+    def next_break_at(self):
+        return self.session.next_break_at()
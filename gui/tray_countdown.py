@@ -0,0 +1,147 @@
+import time
+from collections import OrderedDict
+from PySide6.QtCore import Qt, QRectF
+from PySide6.QtGui import QIcon, QPixmap, QPainter, QColor, QPen, QFont
+
+
+class TrayCountdown:
+    """托盘图标倒计时
+
+    进度环按图标尺寸预先渲染一次；每个显示值（剩余分钟数，最后一分钟为秒数）
+    对应的图标只合成一次并缓存。只有显示值变化时才调用 setIcon，
+    因此最后一分钟之外每分钟最多更新一次托盘图标。
+    """
+
+    SIZES = (16, 22, 24, 32, 48, 64)
+    RING_STEPS = 24  # 进度环的离散档位
+    MAX_CACHED_ICONS = 128
+
+    def __init__(self, tray_icon, default_icon, sizes=SIZES):
+        self.tray_icon = tray_icon
+        self.default_icon = default_icon
+        self.sizes = tuple(sizes)
+        self.total_seconds = 0
+        self._ring_frames = {}  # 尺寸 -> 各档位的进度环
+        self._icons = OrderedDict()  # (文字, 档位, 是否最后一分钟) -> QIcon
+        self._last_key = None
+
+        # 统计信息
+        self.icon_updates = 0
+        self.frames_rendered = 0
+        self.icons_composed = 0
+        self.update_time_ms = 0.0
+
+    def set_total(self, seconds):
+        """设置本轮倒计时总时长，用于计算进度"""
+        self.total_seconds = max(1, seconds)
+
+    def display_key(self, seconds):
+        """计算剩余时间对应的显示值"""
+        seconds = max(0, seconds)
+        final_minute = seconds <= 60
+        if final_minute:
+            value = seconds
+            label = str(seconds)
+        else:
+            minutes = (seconds + 59) // 60
+            value = minutes * 60
+            label = str(minutes) if minutes < 100 else f"{minutes // 60}h"
+        fraction = min(1.0, value / self.total_seconds) if self.total_seconds else 0.0
+        step = round(fraction * self.RING_STEPS)
+        return label, step, final_minute
+
+    def update(self, seconds):
+        """根据剩余秒数刷新托盘图标，显示值未变化时不做任何事"""
+        key = self.display_key(seconds)
+        if key == self._last_key:
+            return False
+        start = time.perf_counter()
+        icon = self._get_icon(key)
+        self.tray_icon.setIcon(icon)
+        self._last_key = key
+        self.icon_updates += 1
+        self.update_time_ms += (time.perf_counter() - start) * 1000
+        return True
+
+    def reset(self):
+        """恢复默认图标"""
+        if self._last_key is not None:
+            self.tray_icon.setIcon(self.default_icon)
+            self.icon_updates += 1
+            self._last_key = None
+
+    def clear_cache(self, rings=False):
+        """释放已合成的图标；rings为True时连同进度环帧一起释放，下次使用时重新渲染"""
+        self._icons.clear()
+        if rings:
+            self._ring_frames.clear()
+
+    def _get_icon(self, key):
+        icon = self._icons.get(key)
+        if icon is not None:
+            self._icons.move_to_end(key)
+            return icon
+        label, step, final_minute = key
+        icon = QIcon()
+        for size in self.sizes:
+            icon.addPixmap(self._compose(size, label, step, final_minute))
+        self._icons[key] = icon
+        self.icons_composed += 1
+        if len(self._icons) > self.MAX_CACHED_ICONS:
+            self._icons.popitem(last=False)
+        return icon
+
+    def _ring_frame(self, size, step):
+        """获取进度环帧，首次使用某尺寸时一次性渲染全部档位"""
+        frames = self._ring_frames.get(size)
+        if frames is None:
+            frames = [self._render_ring(size, i) for i in range(self.RING_STEPS + 1)]
+            self._ring_frames[size] = frames
+        return frames[step]
+
+    def _render_ring(self, size, step):
+        pixmap = QPixmap(size, size)
+        pixmap.fill(Qt.transparent)
+        painter = QPainter(pixmap)
+        painter.setRenderHint(QPainter.Antialiasing)
+        width = max(2.0, size / 8)
+        rect = QRectF(width / 2, width / 2, size - width, size - width)
+        # 底色圆盘
+        painter.setPen(Qt.NoPen)
+        painter.setBrush(QColor(0, 0, 0, 180))
+        painter.drawEllipse(rect)
+        # 剩余进度环，从12点方向顺时针
+        if step > 0:
+            pen = QPen(QColor(144, 238, 144), width)
+            pen.setCapStyle(Qt.FlatCap)
+            painter.setPen(pen)
+            painter.setBrush(Qt.NoBrush)
+            span = int(-360 * 16 * step / self.RING_STEPS)
+            painter.drawArc(rect, 90 * 16, span)
+        painter.end()
+        self.frames_rendered += 1
+        return pixmap
+
+    def _compose(self, size, label, step, final_minute):
+        pixmap = QPixmap(self._ring_frame(size, step))
+        painter = QPainter(pixmap)
+        painter.setRenderHint(QPainter.TextAntialiasing)
+        font = QFont()
+        font.setBold(True)
+        font.setPixelSize(max(7, int(size * (0.5 if len(label) < 3 else 0.38))))
+        painter.setFont(font)
+        painter.setPen(QColor(255, 120, 100) if final_minute else Qt.white)
+        painter.drawText(pixmap.rect(), Qt.AlignCenter, label)
+        painter.end()
+        return pixmap
+
+    def get_stats(self):
+        """获取托盘图标更新统计"""
+        return {
+            'icon_updates': self.icon_updates,
+            'frames_rendered': self.frames_rendered,
+            'icons_composed': self.icons_composed,
+            'avg_update_ms': round(self.update_time_ms / self.icon_updates, 3) if self.icon_updates else 0.0,
+            'cached_icons': len(self._icons),
+            'ring_sizes': len(self._ring_frames),
+        }
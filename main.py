@@ -1,11 +1,103 @@
 import sys
-from PySide6.QtWidgets import QApplication
-from gui.main_window import MainWindow
 import os
+import json
+import argparse
+from utils.ipc import send_command, InstanceNotResponding
+
+# 命令行参数与转发给运行中实例的命令
+ACTIONS = {
+    'settings': 'show_settings',
+    'pause': 'pause',
+    'resume': 'resume',
+    'skip': 'skip',
+    'plus': 'increase',
+    'minus': 'decrease',
+}
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description='Take Care Your Ass')
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument('--settings', dest='action', action='store_const', const='settings', help='打开设置窗口')
+    group.add_argument('--pause', dest='action', action='store_const', const='pause', help='暂停计时')
+    group.add_argument('--resume', dest='action', action='store_const', const='resume', help='继续计时')
+    group.add_argument('--skip', dest='action', action='store_const', const='skip', help='跳过休息')
+    group.add_argument('--plus', dest='action', action='store_const', const='plus', help='增加10分钟')
+    group.add_argument('--minus', dest='action', action='store_const', const='minus', help='减少10分钟')
+    parser.add_argument('--tui', action='store_true', help='在终端中运行（SSH、控制台等没有图形界面的会话）')
+    parser.add_argument('--supervise', action='store_true', help='由监督进程启动，崩溃或无响应时自动重启')
+    # 开机自启动（.desktop、systemd单元、启动文件夹快捷方式）时附加，已有实例在运行时不打开设置窗口
+    parser.add_argument('--autostart', action='store_true', help=argparse.SUPPRESS)
+    # 监督进程启动的备用进程，完成导入后等待激活
+    parser.add_argument('--standby', action='store_true', help=argparse.SUPPRESS)
+    # 忽略Qt自身的参数
+    args, _ = parser.parse_known_args(argv)
+    return args
+
+def wait_for_activation():
+    """备用进程：预先导入Qt和界面模块，然后等待监督进程激活，返回需要恢复的计时状态"""
+    import PySide6.QtWidgets  # noqa: F401
+    import gui.main_window  # noqa: F401
+    if sys.stdin is None or sys.stdout is None:
+        # 以 --noconsole 打包时没有标准输入输出，直接运行
+        return None
+    sys.stdout.write('ready\n')
+    sys.stdout.flush()
+    line = sys.stdin.readline()
+    if not line:
+        # 监督进程已退出
+        sys.exit(0)
+    return json.loads(line).get('restore')
+
+def forward(command):
+    """把命令转发给运行中的实例，返回是否有实例在运行"""
+    try:
+        return send_command(command) is not None
+    except InstanceNotResponding:
+        # 实例正在启动或GUI线程忙碌：多等一会儿，仍然没有响应也不能再启动一个实例
+        try:
+            send_command(command, timeout=10)
+        except InstanceNotResponding:
+            sys.stderr.write("已有实例在运行，但没有响应\n")
+        return True
+
+def default_command(args):
+    """已有实例在运行时转发的命令：未指定操作时，手动启动打开设置窗口，自启动只确认实例存活"""
+    command = ACTIONS.get(args.action)
+    if command:
+        return command
+    return 'ping' if args.autostart else 'show_settings'
+
+def exit_forwarded():
+    """命令已转发给运行中的实例，退出"""
+    # 由systemd单元（Type=notify）启动时先报告就绪，否则退出会被视为启动失败并按 Restart=on-failure 反复重启
+    from utils import sd_notify
+    sd_notify.notify('READY=1\nSTATUS=已有实例在运行')
+    sys.exit(0)
 
 def main():
+    args = parse_args(sys.argv[1:])
+    command = ACTIONS.get(args.action)
+    restore = None
+
+    if args.standby:
+        # 监督进程保证同时只激活一个实例
+        restore = wait_for_activation()
+    elif args.tui and not command:
+        if forward('ping'):
+            sys.stderr.write("已有实例在运行，可以使用 ctl.py 控制\n")
+            sys.exit(1)
+    # 已有实例在运行时，转发命令后直接退出，不创建任何窗口
+    elif forward(default_command(args)):
+        exit_forwarded()
+
+    if args.supervise:
+        from utils import log
+        from utils.supervisor import Supervisor, child_command
+        log.setup(os.path.join(log.LOG_DIR, 'supervisor'))
+        sys.exit(Supervisor(child_command(__file__)).run())
+
     # 隐藏控制台窗口
-    if os.name == 'nt':  # Windows系统
+    if os.name == 'nt' and not args.tui:  # Windows系统
         import ctypes
         ctypes.windll.user32.ShowWindow(
             ctypes.windll.kernel32.GetConsoleWindow(), 0
@@ -14,10 +106,30 @@ def main():
     # pyinstaller --noconsole main.py
     # 或
     # pyinstaller -w main.py
-    
+
+    # 日志写入后台线程的滚动文件，以 --noconsole 打包时也不会丢失
+    from utils import log
+    # 终端界面占用整个终端，日志只写入文件
+    log.setup(console=not args.tui)
+
+    if args.tui:
+        import tui
+        sys.exit(tui.main())
+
+    from PySide6.QtWidgets import QApplication
+    from core.control_server import ControlServer
+    from gui.main_window import MainWindow
+
     app = QApplication(sys.argv)
-    window = MainWindow()
+    # 创建窗口之前先占用本地服务，两个实例同时启动时后启动的一个转发命令后退出
+    control_server = ControlServer()
+    if not control_server.listen() and control_server.in_use:
+        forward(default_command(args))
+        exit_forwarded()
+    window = MainWindow(restore=restore, control_server=control_server)
+    if command:
+        window.core.handle_command(command)
     sys.exit(app.exec())
 
 if __name__ == '__main__':
-    main() 
\ No newline at end of file
+    main()
\ No newline at end of file
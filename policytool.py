@@ -0,0 +1,225 @@
+"""管理员策略工具
+
+    python policytool.py keygen private.pem                                          # 生成私钥并显示公钥
+    python policytool.py sign policy.json --key-file private.pem -o policy.signed.json   # 用私钥签名策略
+    python policytool.py verify policy.signed.json --public-key <公钥>               # 校验签名并显示内容
+    python policytool.py serve policy.signed.json --port 8080                        # 本地HTTP替身服务器
+
+替身服务器每次请求时重新读取文件，支持 ETag / If-None-Match 和 Last-Modified / If-Modified-Since，
+可以模拟延迟和 503 + Retry-After，用于测试客户端的条件请求、缓存和重试。
+"""
+import os
+import sys
+import json
+import time
+import random
+import hashlib
+import argparse
+import threading
+from email.utils import formatdate, parsedate_to_datetime
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from core.policy import (encode_document, decode_document, PolicyError, generate_private_key, private_key_pem,
+                         load_private_key, load_public_key, public_key_text)
+
+
+class PolicyStandIn:
+    """策略服务器的本地替身"""
+
+    def __init__(self, path=None, document=None, host='127.0.0.1', port=0, delay=0.0, failure_rate=0.0,
+                 retry_after=None):
+        self.path = path
+        self.document = document
+        self.modified = time.time()
+        self.delay = delay
+        self.failure_rate = failure_rate
+        self.retry_after = retry_after
+        self.requests = 0
+        self.not_modified = 0
+        self.failures = 0
+        self._lock = threading.Lock()
+        stand_in = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                stand_in._handle(self)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self.server.server_address[:2]
+        return f'http://{host}:{port}/policy.json'
+
+    def set_document(self, document):
+        with self._lock:
+            self.document = document
+            self.modified = time.time()
+
+    def _current(self):
+        if self.path is not None:
+            with open(self.path, 'rb') as f:
+                return f.read(), os.path.getmtime(self.path)
+        with self._lock:
+            return self.document, self.modified
+
+    def _handle(self, request):
+        with self._lock:
+            self.requests += 1
+        if self.delay:
+            time.sleep(self.delay)
+        if self.failure_rate and random.random() < self.failure_rate:
+            with self._lock:
+                self.failures += 1
+            request.send_response(503)
+            if self.retry_after is not None:
+                request.send_header('Retry-After', str(self.retry_after))
+            request.send_header('Content-Length', '0')
+            request.end_headers()
+            return
+        try:
+            body, modified = self._current()
+        except OSError:
+            body = None
+        if body is None:
+            request.send_error(404)
+            return
+        etag = '"' + hashlib.sha256(body).hexdigest()[:16] + '"'
+        last_modified = formatdate(int(modified), usegmt=True)
+        if self._not_modified(request, etag, int(modified)):
+            with self._lock:
+                self.not_modified += 1
+            request.send_response(304)
+            request.send_header('ETag', etag)
+            request.send_header('Last-Modified', last_modified)
+            request.end_headers()
+            return
+        request.send_response(200)
+        request.send_header('Content-Type', 'application/json')
+        request.send_header('Content-Length', str(len(body)))
+        request.send_header('ETag', etag)
+        request.send_header('Last-Modified', last_modified)
+        request.end_headers()
+        request.wfile.write(body)
+
+    @staticmethod
+    def _not_modified(request, etag, modified):
+        if_none_match = request.headers.get('If-None-Match')
+        if if_none_match is not None:
+            # 有 If-None-Match 时忽略 If-Modified-Since
+            return etag in [tag.strip() for tag in if_none_match.split(',')]
+        if_modified_since = request.headers.get('If-Modified-Since')
+        if if_modified_since:
+            try:
+                return modified <= parsedate_to_datetime(if_modified_since).timestamp()
+            except (TypeError, ValueError):
+                return False
+        return False
+
+    def start(self):
+        self._thread = threading.Thread(target=self.server.serve_forever, name='PolicyStandIn', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def read_private_key(path):
+    with open(path, 'rb') as f:
+        return load_private_key(f.read())
+
+
+def read_public_key(args):
+    """校验用的公钥：直接给出的公钥文本，或从私钥文件推出"""
+    if args.public_key:
+        return load_public_key(args.public_key)
+    return read_private_key(args.key_file).public_key()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='管理员策略工具')
+    sub = parser.add_subparsers(dest='command', required=True)
+    p_keygen = sub.add_parser('keygen')
+    p_keygen.add_argument('file', help='私钥输出文件（PEM），只有签名时需要，不要部署到客户端')
+    p_sign = sub.add_parser('sign')
+    p_sign.add_argument('file')
+    p_sign.add_argument('--key-file', required=True, help='私钥文件（PEM）')
+    p_sign.add_argument('-o', '--output', help='输出文件，默认输出到标准输出')
+    p_verify = sub.add_parser('verify')
+    p_verify.add_argument('file')
+    key = p_verify.add_mutually_exclusive_group(required=True)
+    key.add_argument('--public-key', help='部署到客户端的公钥（base64）')
+    key.add_argument('--key-file', help='私钥文件（PEM）')
+    p_serve = sub.add_parser('serve')
+    p_serve.add_argument('file', help='已签名的策略文档')
+    p_serve.add_argument('--host', default='127.0.0.1')
+    p_serve.add_argument('--port', type=int, default=8080)
+    p_serve.add_argument('--delay-ms', type=int, default=0, help='每个请求的延迟')
+    p_serve.add_argument('--failure-rate', type=float, default=0.0, help='返回503的比例（0-1）')
+    p_serve.add_argument('--retry-after', type=int, help='503响应的Retry-After秒数')
+    args = parser.parse_args(argv)
+
+    if args.command == 'keygen':
+        private_key = generate_private_key()
+        # 私钥只允许当前用户读写，不覆盖已有的密钥
+        try:
+            fd = os.open(args.file, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        except FileExistsError:
+            print(f"{args.file} 已存在")
+            return 1
+        with os.fdopen(fd, 'wb') as f:
+            f.write(private_key_pem(private_key))
+        print(f"私钥已写入 {args.file}")
+        print(f"公钥（写入客户端 policy.yaml 的 public_key）: {public_key_text(private_key)}")
+        return 0
+
+    if args.command == 'sign':
+        with open(args.file, 'r', encoding='utf-8') as f:
+            policy = json.load(f)
+        try:
+            document = encode_document(policy, read_private_key(args.key_file))
+        except PolicyError as e:
+            print(f"签名失败: {str(e)}")
+            return 1
+        if args.output:
+            with open(args.output, 'wb') as f:
+                f.write(document)
+        else:
+            sys.stdout.write(document.decode('utf-8') + '\n')
+        return 0
+
+    if args.command == 'verify':
+        with open(args.file, 'rb') as f:
+            data = f.read()
+        try:
+            policy = decode_document(data, read_public_key(args))
+        except PolicyError as e:
+            print(f"校验失败: {str(e)}")
+            return 1
+        print(f"签名有效，策略版本 {policy.version}")
+        print(json.dumps({'settings': policy.settings, 'minimum': policy.minimum,
+                          'maximum': policy.maximum, 'locked': sorted(policy.locked)},
+                         ensure_ascii=False, indent=2))
+        return 0
+
+    stand_in = PolicyStandIn(path=args.file, host=args.host, port=args.port, delay=args.delay_ms / 1000,
+                             failure_rate=args.failure_rate, retry_after=args.retry_after)
+    print(f"策略替身服务器: {stand_in.url}")
+    try:
+        stand_in.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stand_in.server.server_close()
+    print(f"请求 {stand_in.requests} 次，未修改 {stand_in.not_modified} 次，失败 {stand_in.failures} 次")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
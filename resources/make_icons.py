@@ -0,0 +1,94 @@
+"""从 favicon.ico 生成预先缩放好的 PNG 图标
+
+只依赖标准库，修改 favicon.ico 后运行一次即可：
+
+    python resources/make_icons.py
+"""
+import os
+import struct
+import zlib
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SIZES = (16, 22, 24, 32, 48, 64, 128)
+
+
+def read_ico(path):
+    """读取ICO中最大的一张32位BMP图像，返回 (宽, 高, RGBA行列表)"""
+    with open(path, 'rb') as f:
+        data = f.read()
+    _, _, count = struct.unpack('<HHH', data[:6])
+    entries = []
+    for i in range(count):
+        w, h, _, _, _, bpp, size, offset = struct.unpack('<BBBBHHII', data[6 + 16 * i:22 + 16 * i])
+        entries.append((w or 256, bpp, size, offset))
+    width, bpp, size, offset = max(entries)
+    image = data[offset:offset + size]
+    if image[:8] == b'\x89PNG\r\n\x1a\n':
+        raise ValueError("暂不支持PNG格式的ICO图像")
+    header_size, bmp_w, bmp_h, _, bit_count = struct.unpack('<IiiHH', image[:16])
+    if bit_count != 32:
+        raise ValueError("只支持32位ICO图像")
+    height = bmp_h // 2
+    stride = bmp_w * 4
+    pixels = image[header_size:header_size + stride * height]
+    rows = []
+    # BMP按从下到上存储，像素为BGRA
+    for y in range(height - 1, -1, -1):
+        row = pixels[y * stride:(y + 1) * stride]
+        rgba = bytearray(stride)
+        rgba[0::4] = row[2::4]
+        rgba[1::4] = row[1::4]
+        rgba[2::4] = row[0::4]
+        rgba[3::4] = row[3::4]
+        rows.append(rgba)
+    return bmp_w, height, rows
+
+
+def resize(width, height, rows, size):
+    """按面积平均缩放（预乘alpha，避免透明边缘发黑）"""
+    out = []
+    for oy in range(size):
+        y0, y1 = oy * height // size, max(oy * height // size + 1, (oy + 1) * height // size)
+        line = bytearray(size * 4)
+        for ox in range(size):
+            x0, x1 = ox * width // size, max(ox * width // size + 1, (ox + 1) * width // size)
+            r = g = b = a = 0
+            for y in range(y0, y1):
+                row = rows[y]
+                for x in range(x0, x1):
+                    pa = row[x * 4 + 3]
+                    r += row[x * 4] * pa
+                    g += row[x * 4 + 1] * pa
+                    b += row[x * 4 + 2] * pa
+                    a += pa
+            n = (y1 - y0) * (x1 - x0)
+            if a:
+                line[ox * 4:ox * 4 + 4] = bytes((r // a, g // a, b // a, a // n))
+        out.append(line)
+    return out
+
+
+def write_png(path, size, rows):
+    def chunk(kind, body):
+        return struct.pack('>I', len(body)) + kind + body + struct.pack('>I', zlib.crc32(kind + body))
+    raw = b''.join(b'\x00' + bytes(row) for row in rows)
+    png = (b'\x89PNG\r\n\x1a\n'
+           + chunk(b'IHDR', struct.pack('>IIBBBBB', size, size, 8, 6, 0, 0, 0))
+           + chunk(b'IDAT', zlib.compress(raw, 9))
+           + chunk(b'IEND', b''))
+    with open(path, 'wb') as f:
+        f.write(png)
+
+
+def main():
+    width, height, rows = read_ico(os.path.join(ROOT, 'favicon.ico'))
+    out_dir = os.path.join(ROOT, 'resources', 'icons')
+    os.makedirs(out_dir, exist_ok=True)
+    for size in SIZES:
+        scaled = rows if size == width else resize(width, height, rows, size)
+        write_png(os.path.join(out_dir, f'icon_{size}.png'), size, scaled)
+        print(f"已生成 icon_{size}.png")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,58 @@
+"""生成休息提示音（WAV）
+
+只依赖标准库，调整音色后运行一次即可：
+
+    python resources/make_sounds.py
+
+输出16位单声道PCM，QSoundEffect 可直接加载，无需额外解码器。
+"""
+import os
+import math
+import struct
+import wave
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SAMPLE_RATE = 22050
+
+# 提示音名称 -> [(频率Hz, 时长秒), ...]
+CUES = {
+    'break_start': [(660, 0.16), (880, 0.28)],
+    'warning': [(740, 0.18)],
+    'break_end': [(880, 0.16), (660, 0.28)],
+}
+
+
+def tone(frequency, duration, volume=0.5):
+    """生成一段带淡入淡出的正弦音，避免爆音"""
+    count = int(SAMPLE_RATE * duration)
+    fade = int(SAMPLE_RATE * 0.01)
+    samples = []
+    for i in range(count):
+        envelope = min(1.0, i / fade, (count - i) / fade)
+        value = math.sin(2 * math.pi * frequency * i / SAMPLE_RATE) * volume * envelope
+        samples.append(int(value * 32767))
+    return samples
+
+
+def write_wav(path, samples):
+    with wave.open(path, 'wb') as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(SAMPLE_RATE)
+        f.writeframes(struct.pack(f'<{len(samples)}h', *samples))
+
+
+def main():
+    out_dir = os.path.join(ROOT, 'resources', 'sounds')
+    os.makedirs(out_dir, exist_ok=True)
+    for name, notes in CUES.items():
+        samples = []
+        for frequency, duration in notes:
+            samples += tone(frequency, duration)
+        path = os.path.join(out_dir, f'{name}.wav')
+        write_wav(path, samples)
+        print(f"已生成 {path}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+#!/usr/bin/env -S python3 -S
+"""Take Care Your Ass 状态栏输出（Waybar/polybar/i3blocks）
+
+读取运行中实例写入的内存映射状态文件，不连接套接字，不导入Qt。
+
+    python statusbar.py            # 输出一次当前状态
+    python statusbar.py --follow   # 常驻进程，每秒输出一行（i3blocks interval=persist / polybar tail=true）
+    python statusbar.py --waybar   # 输出Waybar的JSON格式，可与 --follow 同时使用
+
+常驻模式下每秒只读取映射的内存，除了sleep之外不产生系统调用。
+"""
+import sys
+import time
+from utils.status_file import StatusFileReader
+
+PHASE_NAMES = {'work': '工作', 'break': '休息', 'deferred': '推迟'}
+# 实例未运行时重新尝试打开状态文件的间隔（秒）
+REOPEN_INTERVAL = 5
+
+
+def format_line(status, waybar):
+    if status is None:
+        text = ''
+        css_class = 'stopped'
+    else:
+        seconds = status['remaining_seconds']
+        text = f"{PHASE_NAMES.get(status['phase'], status['phase'])} {seconds // 60:02d}:{seconds % 60:02d}"
+        if status['paused']:
+            text += ' ⏸'
+        css_class = 'paused' if status['paused'] else status['phase']
+    if waybar:
+        import json
+        return json.dumps({'text': text, 'class': css_class, 'alt': css_class}, ensure_ascii=False)
+    return text
+
+
+def open_reader():
+    try:
+        return StatusFileReader()
+    except (OSError, ValueError):
+        return None
+
+
+def main(argv):
+    follow = '--follow' in argv
+    waybar = '--waybar' in argv
+    reader = open_reader()
+    if not follow:
+        status = reader.read() if reader else None
+        sys.stdout.write(format_line(status, waybar) + '\n')
+        return 0 if status is not None else 1
+
+    last_line = None
+    next_reopen = 0
+    while True:
+        status = reader.read() if reader else None
+        if status is None and time.monotonic() >= next_reopen:
+            # 实例重启后状态文件是新文件，需要重新映射
+            if reader:
+                reader.close()
+            reader = open_reader()
+            status = reader.read() if reader else None
+            next_reopen = time.monotonic() + REOPEN_INTERVAL
+        line = format_line(status, waybar)
+        if line != last_line:
+            sys.stdout.write(line + '\n')
+            sys.stdout.flush()
+            last_line = line
+        # 对齐到整秒，与倒计时同步刷新
+        time.sleep(1 - time.time() % 1 + 0.01)
+
+
+if __name__ == '__main__':
+    try:
+        sys.exit(main(sys.argv[1:]))
+    except KeyboardInterrupt:
+        sys.exit(0)
@@ -0,0 +1,40 @@
+import os
+import sys
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+# 无界面运行，与基准测试相同
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+
+@pytest.fixture(scope='session')
+def qapp():
+    from PySide6.QtWidgets import QApplication
+    return QApplication.instance() or QApplication([])
+
+
+@pytest.fixture(autouse=True)
+def isolated(tmp_path, monkeypatch):
+    """每个测试使用独立的工作目录（config.yaml、history.bin 等）、配置目录和运行时目录（本地套接字、状态文件）"""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv('XDG_CONFIG_HOME', str(tmp_path / 'config'))
+    runtime_dir = tmp_path / 'run'
+    runtime_dir.mkdir()
+    monkeypatch.setenv('XDG_RUNTIME_DIR', str(runtime_dir))
+    return tmp_path
+
+
+def process_events(until=None, timeout=5.0):
+    """处理Qt事件，直到 until() 为真或超时，返回 until() 的结果"""
+    import time
+    from PySide6.QtCore import QCoreApplication
+    deadline = time.monotonic() + timeout
+    while True:
+        QCoreApplication.processEvents()
+        if until is None or until():
+            return True
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.001)
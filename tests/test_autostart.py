@@ -0,0 +1,92 @@
+import os
+import platform
+import pytest
+from utils.autostart import AutoStartManager
+
+pytestmark = pytest.mark.skipif(platform.system() != 'Linux', reason='Linux自启动')
+
+
+@pytest.fixture
+def config_home(isolated, monkeypatch):
+    # 不通知真实的用户管理器
+    monkeypatch.setattr(AutoStartManager, 'systemd_available', lambda self: False)
+    return isolated / 'config'
+
+
+def read(path):
+    with open(path, encoding='utf-8') as f:
+        return f.read()
+
+
+def test_systemd_units(config_home):
+    manager = AutoStartManager(backend='systemd', delay=30, random_delay=10)
+    assert manager.set_autostart(True)
+    assert manager.is_autostart_enabled()
+
+    systemd_dir = config_home / 'systemd' / 'user'
+    service = read(systemd_dir / 'TakeCareAss.service')
+    timer = read(systemd_dir / 'TakeCareAss.timer')
+    assert 'Type=notify' in service
+    assert 'IOScheduling' not in service
+    # 服务在用户管理器启动完成后才由定时器拉起，Startup*Weight 不会生效
+    assert 'StartupCPUWeight' not in service and 'StartupIOWeight' not in service
+    assert 'CPUWeight=10\n' in service and 'IOWeight=10\n' in service
+    assert 'Environment=TCYA_SYSTEMD_UNIT=TakeCareAss.service\n' in service
+    # 已有实例在运行时，自启动不弹出设置窗口
+    assert [line for line in service.splitlines() if line.startswith('ExecStart=')][0].endswith(' --autostart')
+    assert 'OnActiveSec=30\n' in timer
+    assert 'OnStartupSec' not in timer
+    assert 'RandomizedDelaySec=10\n' in timer
+    assert 'WantedBy=graphical-session.target\n' in timer
+
+    link = systemd_dir / 'graphical-session.target.wants' / 'TakeCareAss.timer'
+    assert os.readlink(link) == os.path.join('..', 'TakeCareAss.timer')
+    assert os.path.samefile(link, systemd_dir / 'TakeCareAss.timer')
+    assert not (config_home / 'autostart' / 'TakeCareAss.desktop').exists()
+
+    assert manager.set_autostart(False)
+    assert not manager.is_autostart_enabled()
+    assert not os.path.lexists(link)
+    assert not (systemd_dir / 'TakeCareAss.service').exists()
+
+
+def test_legacy_timer_link_is_replaced(config_home):
+    manager = AutoStartManager(backend='systemd')
+    os.makedirs(os.path.dirname(manager.legacy_timer_link))
+    os.symlink(os.path.join('..', 'TakeCareAss.timer'), manager.legacy_timer_link)
+    assert manager.is_autostart_enabled()
+
+    assert manager.set_autostart(True)
+    assert not os.path.lexists(manager.legacy_timer_link)
+    assert os.path.lexists(manager.timer_link)
+    assert manager.set_autostart(False)
+    assert not manager.is_autostart_enabled()
+
+
+def test_desktop_backend(config_home):
+    systemd = AutoStartManager(backend='systemd')
+    assert systemd.set_autostart(True)
+
+    manager = AutoStartManager(backend='desktop', delay=15)
+    assert manager.set_autostart(True)
+    content = read(config_home / 'autostart' / 'TakeCareAss.desktop')
+    assert 'X-GNOME-Autostart-Delay=15\n' in content
+    assert [line for line in content.splitlines() if line.startswith('Exec=')][0].endswith(' --autostart')
+    # 切换方式后只保留一种自启动
+    assert not os.path.lexists(manager.timer_link)
+    assert not (config_home / 'systemd' / 'user' / 'TakeCareAss.service').exists()
+
+
+def test_ready_restores_weights(monkeypatch):
+    from utils import sd_notify
+    calls = []
+    monkeypatch.setattr(sd_notify.subprocess, 'Popen', lambda args, **kwargs: calls.append(args))
+    monkeypatch.delenv('NOTIFY_SOCKET', raising=False)
+    monkeypatch.delenv(sd_notify.UNIT_ENV, raising=False)
+    # 不是由自启动单元启动时不调整权重
+    sd_notify.ready()
+    assert calls == []
+    monkeypatch.setenv(sd_notify.UNIT_ENV, 'TakeCareAss.service')
+    sd_notify.ready()
+    assert calls == [['systemctl', '--user', 'set-property', '--runtime', 'TakeCareAss.service',
+                      'CPUWeight=100', 'IOWeight=100']]
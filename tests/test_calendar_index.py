@@ -0,0 +1,152 @@
+"""日历索引：重复规则展开、忙碌区间查询和增量更新"""
+import os
+from datetime import datetime, timezone
+from core.calendar_index import CalendarIndex, parse_ics, expand_series
+
+# 2024-01-01 是星期一
+T0 = datetime(2024, 1, 1, tzinfo=timezone.utc).timestamp()
+HOUR = 3600
+DAY = 86400
+
+
+def ics(*events):
+    body = ''.join(f"BEGIN:VEVENT\r\n{event.strip()}\r\nEND:VEVENT\r\n" for event in events)
+    return f"BEGIN:VCALENDAR\r\nVERSION:2.0\r\n{body}END:VCALENDAR\r\n"
+
+
+def series_starts(text, days=60):
+    """第一个重复事件在 [T0, T0+days) 内的开始时间（相对T0的小时数）"""
+    _, series = parse_ics(text)
+    return [(begin - T0) / HOUR for begin, _ in expand_series(series[0], T0, T0 + days * DAY)]
+
+
+def test_single_events():
+    singles, series = parse_ics(ics(
+        "UID:a\r\nDTSTART:20240101T090000Z\r\nDTEND:20240101T100000Z",
+        "UID:b\r\nDTSTART:20240101T110000Z\r\nDURATION:PT30M",
+        "UID:c\r\nDTSTART;VALUE=DATE:20240102\r\nDTEND;VALUE=DATE:20240103",
+        "UID:d\r\nDTSTART:20240101T120000Z\r\nDTEND:20240101T130000Z\r\nSTATUS:CANCELLED",
+        "UID:e\r\nDTSTART:20240101T140000Z\r\nDTEND:20240101T150000Z\r\nTRANSP:TRANSPARENT",
+    ))
+    # 全天、已取消和标记为空闲的事件不算忙碌
+    assert singles == [(T0 + 9 * HOUR, T0 + 10 * HOUR), (T0 + 11 * HOUR, T0 + 11.5 * HOUR)]
+    assert series == []
+
+
+def test_daily_count():
+    text = ics("UID:a\r\nDTSTART:20240101T090000Z\r\nDURATION:PT1H\r\nRRULE:FREQ=DAILY;COUNT=3")
+    assert series_starts(text) == [9, 33, 57]
+
+
+def test_daily_interval_until():
+    text = ics("UID:a\r\nDTSTART:20240101T090000Z\r\nDURATION:PT1H\r\n"
+               "RRULE:FREQ=DAILY;INTERVAL=2;UNTIL=20240107T090000Z")
+    assert series_starts(text) == [9, 57, 105, 153]
+
+
+def test_weekly_byday():
+    text = ics("UID:a\r\nDTSTART:20240101T090000Z\r\nDURATION:PT1H\r\nRRULE:FREQ=WEEKLY;BYDAY=MO,WE;COUNT=4")
+    # 1月1日（一）、3日（三）、8日（一）、10日（三）
+    assert series_starts(text) == [9, 57, 177, 225]
+
+
+def test_weekly_count_after_skipping():
+    """查询窗口远在开始之后时，跳过的次数仍计入COUNT"""
+    _, series = parse_ics(ics("UID:a\r\nDTSTART:20240101T090000Z\r\nDURATION:PT1H\r\n"
+                              "RRULE:FREQ=WEEKLY;BYDAY=MO,FR;COUNT=10"))
+    occurrences = list(expand_series(series[0], T0 + 21 * DAY, T0 + 60 * DAY))
+    # 第7～10次：1月22、26、29日和2月2日
+    assert [(begin - T0) // DAY for begin, _ in occurrences] == [21, 25, 28, 32]
+
+
+def test_monthly_rules():
+    second_tuesday = ics("UID:a\r\nDTSTART:20240109T090000Z\r\nDURATION:PT1H\r\n"
+                         "RRULE:FREQ=MONTHLY;BYDAY=2TU;COUNT=3")
+    # 1月9日、2月13日、3月12日
+    assert series_starts(second_tuesday, days=120) == [8 * 24 + 9, 43 * 24 + 9, 71 * 24 + 9]
+    last_day = ics("UID:b\r\nDTSTART:20240131T090000Z\r\nDURATION:PT1H\r\n"
+                   "RRULE:FREQ=MONTHLY;BYMONTHDAY=-1;COUNT=3")
+    # 1月31日、2月29日、3月31日
+    assert series_starts(last_day, days=120) == [30 * 24 + 9, 59 * 24 + 9, 90 * 24 + 9]
+
+
+def test_yearly():
+    _, series = parse_ics(ics("UID:a\r\nDTSTART:20240101T090000Z\r\nDURATION:PT1H\r\nRRULE:FREQ=YEARLY;COUNT=2"))
+    occurrences = list(expand_series(series[0], T0, T0 + 800 * DAY))
+    assert [datetime.fromtimestamp(begin, timezone.utc).year for begin, _ in occurrences] == [2024, 2025]
+
+
+def test_exdate_and_recurrence_id():
+    text = ics(
+        "UID:a\r\nDTSTART:20240101T090000Z\r\nDURATION:PT1H\r\nRRULE:FREQ=DAILY;COUNT=4\r\n"
+        "EXDATE:20240102T090000Z",
+        # 第三次改到下午，第四次取消
+        "UID:a\r\nRECURRENCE-ID:20240103T090000Z\r\nDTSTART:20240103T150000Z\r\nDURATION:PT1H",
+        "UID:a\r\nRECURRENCE-ID:20240104T090000Z\r\nDTSTART:20240104T090000Z\r\nDURATION:PT1H\r\n"
+        "STATUS:CANCELLED",
+    )
+    singles, series = parse_ics(text)
+    assert [(begin - T0) / HOUR for begin, _ in expand_series(series[0], T0, T0 + 10 * DAY)] == [9]
+    assert singles == [(T0 + 63 * HOUR, T0 + 64 * HOUR)]
+
+
+def write(path, text):
+    path.write_text(text, encoding='utf-8', newline='')
+    # 保证修改后的签名（修改时间、大小）与之前不同
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+
+def test_busy_until_and_next_free(isolated):
+    path = isolated / 'work.ics'
+    write(path, ics(
+        "UID:a\r\nDTSTART:20240101T090000Z\r\nDTEND:20240101T100000Z",
+        # 与上一个事件相接，合并为一个忙碌区间
+        "UID:b\r\nDTSTART:20240101T100000Z\r\nDTEND:20240101T103000Z",
+        "UID:c\r\nDTSTART:20240101T140000Z\r\nDURATION:PT1H\r\nRRULE:FREQ=DAILY",
+    ))
+    index = CalendarIndex([str(path)], horizon_days=7, now=lambda: T0)
+    assert index.busy_until(T0 + 9.5 * HOUR) == T0 + 10.5 * HOUR
+    assert index.next_free(T0 + 9 * HOUR) == T0 + 10.5 * HOUR
+    assert index.busy_until(T0 + 10.5 * HOUR) is None
+    assert index.next_free(T0 + 12 * HOUR) == T0 + 12 * HOUR
+    assert index.busy_until(T0 + DAY + 14.5 * HOUR) == T0 + DAY + 15 * HOUR
+
+
+def test_expands_beyond_horizon_incrementally(isolated):
+    path = isolated / 'work.ics'
+    write(path, ics("UID:a\r\nDTSTART:20240101T140000Z\r\nDURATION:PT1H\r\nRRULE:FREQ=DAILY"))
+    index = CalendarIndex([str(path)], horizon_days=7, now=lambda: T0)
+    assert index.busy_until(T0 + 14.5 * HOUR)
+    calendar = next(iter(index.files.values()))
+    expanded = list(calendar.expanded)
+    lower, upper = calendar.expanded_range
+    assert upper == T0 + 14.5 * HOUR + 7 * DAY
+    # 查询超出窗口时只展开新增的部分
+    later = T0 + 20 * DAY + 14.5 * HOUR
+    assert index.busy_until(later) == T0 + 20 * DAY + 15 * HOUR
+    assert calendar.expanded_range == (lower, later + 7 * DAY)
+    assert calendar.expanded[:len(expanded)] == expanded
+    assert len(calendar.expanded) == 28
+
+
+def test_refresh_reparses_changed_file(isolated):
+    path = isolated / 'work.ics'
+    write(path, ics("UID:a\r\nDTSTART:20240101T090000Z\r\nDTEND:20240101T100000Z"))
+    index = CalendarIndex([str(path)], now=lambda: T0)
+    assert index.busy_until(T0 + 9.5 * HOUR)
+    assert not index.refresh()
+    write(path, ics("UID:a\r\nDTSTART:20240101T110000Z\r\nDTEND:20240101T120000Z"))
+    assert index.refresh()
+    assert index.busy_until(T0 + 9.5 * HOUR) is None
+    assert index.busy_until(T0 + 11.5 * HOUR) == T0 + 12 * HOUR
+
+
+def test_first_query_after_set_paths(isolated):
+    """设置文件后立即查询（后台线程可能还在解析）也能得到结果，第一次休息同样会推迟"""
+    path = isolated / 'work.ics'
+    write(path, ics("UID:a\r\nDTSTART:20240101T090000Z\r\nDTEND:20240101T100000Z"))
+    index = CalendarIndex(now=lambda: T0)
+    index.set_paths([str(path)])
+    index.refresh_in_background()
+    assert index.next_free(T0 + 9.5 * HOUR) == T0 + 10 * HOUR
@@ -0,0 +1,108 @@
+import os
+import socket
+import threading
+import pytest
+from utils import ipc
+from utils.ipc import send_command, InstanceNotResponding
+from conftest import process_events
+
+pytestmark = pytest.mark.skipif(os.name == 'nt', reason='使用Unix域套接字')
+
+
+def test_no_instance():
+    assert send_command('ping', timeout=0.2) is None
+    assert not ipc.probe()
+
+
+def test_stale_socket_is_replaced(qapp):
+    from core.control_server import ControlServer
+    # 上次异常退出留下的套接字文件：存在但没有进程监听
+    stale = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    stale.bind(ipc.server_name())
+    stale.close()
+    assert os.path.exists(ipc.server_name())
+
+    server = ControlServer(lambda command: {'ok': True, 'command': command})
+    try:
+        assert server.listen()
+        assert not server.in_use
+        result = {}
+        thread = threading.Thread(target=lambda: result.update(send_command('status', timeout=5)))
+        thread.start()
+        assert process_events(lambda: not thread.is_alive())
+        assert result == {'ok': True, 'command': 'status'}
+    finally:
+        server.close()
+
+
+def test_busy_instance_is_not_replaced(qapp):
+    """实例正在启动（已监听但还没有处理请求）时，第二个实例不能删除它的套接字"""
+    from core.control_server import ControlServer
+    busy = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    busy.bind(ipc.server_name())
+    busy.listen(4)
+    try:
+        with pytest.raises(InstanceNotResponding):
+            send_command('ping', timeout=0.2)
+        assert ipc.probe()
+
+        server = ControlServer(lambda command: {'ok': True})
+        assert not server.listen()
+        assert server.in_use
+        # 原实例的套接字仍然可用
+        assert os.path.exists(ipc.server_name())
+        client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        client.connect(ipc.server_name())
+        client.close()
+        server.close()
+    finally:
+        busy.close()
+
+
+def test_closed_without_response_is_not_treated_as_absent():
+    listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    listener.bind(ipc.server_name())
+    listener.listen(1)
+
+    def accept_and_close():
+        conn, _ = listener.accept()
+        conn.recv(4096)
+        conn.close()
+
+    thread = threading.Thread(target=accept_and_close)
+    thread.start()
+    try:
+        with pytest.raises(InstanceNotResponding):
+            send_command('status', timeout=2)
+    finally:
+        thread.join()
+        listener.close()
+
+
+@pytest.mark.parametrize('args, expected', [
+    ([], 'show_settings'),
+    (['--autostart'], 'ping'),
+    (['--autostart', '--pause'], 'pause'),
+])
+def test_second_launch_forwards(qapp, isolated, monkeypatch, args, expected):
+    """再次启动时转发命令后退出；自启动不打开设置窗口，并向systemd报告就绪"""
+    import sys
+    import subprocess
+    from conftest import ROOT
+    from core.control_server import ControlServer
+    notify = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+    notify.bind(str(isolated / 'notify'))
+    notify.settimeout(5)
+    monkeypatch.setenv('NOTIFY_SOCKET', str(isolated / 'notify'))
+    commands = []
+    server = ControlServer(lambda command: commands.append(command) or {'ok': True})
+    try:
+        assert server.listen()
+        process = subprocess.Popen([sys.executable, os.path.join(ROOT, 'main.py')] + args)
+        assert process_events(lambda: process.poll() is not None, timeout=30)
+        assert process.returncode == 0
+        assert commands == [expected]
+        assert notify.recv(256).decode('utf-8').startswith('READY=1\n')
+    finally:
+        server.close()
+        notify.close()
@@ -0,0 +1,73 @@
+"""动作动画：帧缓存的LRU淘汰和解码线程的重置请求"""
+import threading
+from PySide6.QtGui import QImage, QColor
+from gui.exercise_animation import FrameCache, FrameDecoder
+
+
+def make_image(size=10):
+    image = QImage(size, size, QImage.Format_ARGB32)
+    image.fill(QColor(0, 128, 255))
+    return image
+
+
+def make_sequence(directory, frames=4):
+    sequence = directory / 'stretch'
+    sequence.mkdir()
+    for i in range(frames):
+        make_image(16).save(str(sequence / f'{i:03d}.png'))
+    return str(sequence)
+
+
+def test_frame_cache_lru(qapp):
+    frame_bytes = make_image().sizeInBytes()
+    cache = FrameCache(frame_bytes * 2 + frame_bytes // 2)
+    cache.put('a', make_image(), 100)
+    cache.put('b', make_image(), 100)
+    assert cache.get('a')[1] == 100
+    # 超出字节数上限时淘汰最久未用的帧
+    cache.put('c', make_image(), 100)
+    assert cache.contains('a') and cache.contains('c') and not cache.contains('b')
+    assert cache.get('b') is None
+    assert (cache.hits, cache.misses, cache.evictions) == (1, 1, 1)
+    assert cache.bytes == frame_bytes * 2
+    # 替换已有的帧不重复计算大小
+    cache.put('c', make_image(), 50)
+    assert cache.bytes == frame_bytes * 2 and cache.get('c')[1] == 50
+    # 单帧超过上限时不缓存
+    cache.put('big', make_image(100), 100)
+    assert not cache.contains('big') and cache.bytes == frame_bytes * 2
+    cache.clear()
+    assert cache.bytes == 0 and not cache.contains('a')
+
+
+class GatedCache(FrameCache):
+    """解码线程第一次查询缓存时等待，让测试在队列中排好请求"""
+
+    def __init__(self, max_bytes):
+        super().__init__(max_bytes)
+        self.entered = threading.Event()
+        self.gate = threading.Event()
+
+    def contains(self, key):
+        self.entered.set()
+        self.gate.wait(5)
+        return super().contains(key)
+
+
+def test_reset_not_skipped_with_newer_requests(qapp, isolated):
+    sequence = make_sequence(isolated)
+    cache = GatedCache(1024 * 1024)
+    decoder = FrameDecoder(cache, 320)
+    decoder.request(sequence, 0)
+    assert cache.entered.wait(5)
+    decoder._sequences['removed'] = []
+    # 重置请求夹在两个过时的请求之间，跳过过时请求时仍要执行
+    decoder.request(sequence, 1)
+    decoder.reset()
+    decoder.request(sequence, 2)
+    decoder.close()
+    cache.gate.set()
+    decoder._thread.join(5)
+    assert not decoder._thread.is_alive()
+    assert 'removed' not in decoder._sequences
+    assert cache.contains((sequence, 3))
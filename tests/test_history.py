@@ -0,0 +1,144 @@
+"""历史记录：追加、按页读取、新记录插入和按天汇总的增量更新"""
+import os
+import json
+from datetime import datetime
+from core.history import HistoryStore, HEADER, RECORD, WORK, BREAK
+from gui.history_window import HistoryModel
+
+DAY1 = datetime(2024, 1, 1, 12).timestamp()
+DAY2 = datetime(2024, 1, 2, 12).timestamp()
+
+
+def make_store(directory, count=0, start=DAY1):
+    store = HistoryStore(str(directory / 'history.bin'))
+    for i in range(count):
+        store.append(WORK, start + i * 60, i, 3600, True)
+    return store
+
+
+def test_torn_tail_overwritten(isolated):
+    store = make_store(isolated, 2)
+    store.close()
+    # 模拟写入中断：末尾只写了半条记录
+    with open(store.path, 'ab') as f:
+        f.write(b'\xff' * (RECORD.size // 2))
+    assert store.count() == 2
+    store.append(BREAK, DAY2, 600, 600, False)
+    assert os.path.getsize(store.path) == HEADER.size + 3 * RECORD.size
+    assert store.read(0, 10) == [
+        (DAY1, 0, 3600, WORK, 1),
+        (DAY1 + 60, 1, 3600, WORK, 1),
+        (DAY2, 600, 600, BREAK, 0),
+    ]
+    store.close()
+
+
+def small_model(store):
+    model = HistoryModel(store)
+    model.PAGE_SIZE = 4
+    model.MAX_PAGES = 3
+    return model
+
+
+def test_page_cache_bounded(qapp, isolated):
+    store = make_store(isolated, 40)
+    model = small_model(store)
+    try:
+        assert model.rowCount() == 40
+        # 行0是最新的记录
+        assert model.record(0)[1] == 39 and model.record(39)[1] == 0
+        assert model.page_reads == 2
+        for row in range(40):
+            assert model.record(row)[1] == 39 - row
+            assert len(model.pages) <= model.MAX_PAGES
+        assert model.page_reads == 2 + 9
+        assert list(model.pages) == [2, 1, 0]
+        # 最近用过的页留在缓存中，最久未用的被淘汰
+        model.record(39 - 8)
+        model.record(39 - 12)
+        assert list(model.pages) == [0, 2, 3]
+        assert model.page_reads == 12
+    finally:
+        store.close()
+
+
+def test_refresh_inserts_at_top(qapp, isolated):
+    store = make_store(isolated, 10)
+    model = small_model(store)
+    inserted = []
+    model.rowsInserted.connect(lambda parent, first, last: inserted.append((first, last)))
+    try:
+        assert model.record(0)[1] == 9
+        model.refresh()
+        assert inserted == []
+        for i in range(10, 13):
+            store.append(WORK, DAY1 + i * 60, i, 3600, True)
+        model.refresh()
+        assert inserted == [(0, 2)]
+        assert model.rowCount() == 13
+        # 原来不完整的最后一页重新读取，包含新增的记录
+        assert [model.record(row)[1] for row in range(13)] == list(range(12, -1, -1))
+    finally:
+        store.close()
+
+
+def test_fetch_more_grows_rows(qapp, isolated):
+    store = make_store(isolated, 10)
+    model = HistoryModel(store)
+    model.FETCH_ROWS = 4
+    model.loaded = 4
+    try:
+        assert model.canFetchMore()
+        model.fetchMore()
+        model.fetchMore()
+        assert model.rowCount() == 10 and not model.canFetchMore()
+        # 只增加行数，不读取数据
+        assert model.page_reads == 0
+    finally:
+        store.close()
+
+
+def test_aggregate_by_day(isolated):
+    store = make_store(isolated)
+    store.append(WORK, DAY1, 3000, 3600, True)
+    store.append(BREAK, DAY1 + 3600, 600, 600, True)
+    store.append(BREAK, DAY1 + 7200, 120, 600, False)
+    store.append(WORK, DAY2, 1800, 3600, False)
+    assert store.aggregate(chunk=3) == {
+        '2024-01-01': [3000, 720, 1, 1],
+        '2024-01-02': [1800, 0, 0, 0],
+    }
+    store.close()
+
+
+def test_aggregate_resumes_from_cache(isolated):
+    store = make_store(isolated, 3)
+    assert store.aggregate() == {'2024-01-01': [3, 0, 0, 0]}
+    with open(store.aggregate_path, encoding='utf-8') as f:
+        cache = json.load(f)
+    assert cache['rows'] == 3
+    # 在缓存中做标记：之后的汇总只累加新增的记录，标记应保留
+    cache['days']['2023-12-31'] = [1, 0, 0, 0]
+    with open(store.aggregate_path, 'w', encoding='utf-8') as f:
+        json.dump(cache, f)
+    store.append(BREAK, DAY2, 600, 600, True)
+    days = store.aggregate()
+    assert days == {
+        '2023-12-31': [1, 0, 0, 0],
+        '2024-01-01': [3, 0, 0, 0],
+        '2024-01-02': [0, 600, 1, 0],
+    }
+    with open(store.aggregate_path, encoding='utf-8') as f:
+        assert json.load(f)['rows'] == 4
+    store.close()
+
+
+def test_aggregate_cache_ignored_when_file_shrinks(isolated):
+    store = make_store(isolated, 3)
+    store.aggregate()
+    store.close()
+    # 记录文件被替换成更短的文件时缓存失效，从头汇总
+    os.remove(store.path)
+    store = make_store(isolated, 1, start=DAY2)
+    assert store.aggregate() == {'2024-01-02': [0, 0, 0, 0]}
+    store.close()
@@ -0,0 +1,141 @@
+import json
+import threading
+import http.client
+import pytest
+from conftest import process_events
+
+ALLOWED = 'http://localhost:8080'
+
+
+@pytest.fixture
+def api(qapp):
+    from core.http_api import HttpApi
+    commands = []
+
+    def handler(command):
+        commands.append(command)
+        return {'ok': True, 'phase': 'work'}
+
+    api = HttpApi(handler, 0)
+    assert api.start()
+    api.commands = commands
+    yield api
+    api.stop()
+
+
+def request(api, method, path, origin=None):
+    """在线程中发送请求，同时处理GUI线程的事件（命令在GUI线程中执行）"""
+    result = {}
+
+    def run():
+        conn = http.client.HTTPConnection('127.0.0.1', api.port, timeout=5)
+        headers = {'Origin': origin} if origin else {}
+        conn.request(method, path, headers=headers)
+        response = conn.getresponse()
+        result['status'] = response.status
+        result['headers'] = {key.lower(): value for key, value in response.getheaders()}
+        response.read()
+        conn.close()
+
+    thread = threading.Thread(target=run)
+    thread.start()
+    assert process_events(lambda: not thread.is_alive())
+    return result
+
+
+def test_no_cors_by_default(api):
+    response = request(api, 'GET', '/status')
+    assert response['status'] == 200
+    assert 'access-control-allow-origin' not in response['headers']
+
+    response = request(api, 'GET', '/status', origin='https://evil.example')
+    assert 'access-control-allow-origin' not in response['headers']
+    response = request(api, 'POST', '/pause', origin='https://evil.example')
+    assert response['status'] == 403
+    assert api.commands == ['status', 'status']
+
+
+def test_configured_origin(api):
+    api.allowed_origin = ALLOWED
+    response = request(api, 'GET', '/status', origin=ALLOWED)
+    assert response['headers']['access-control-allow-origin'] == ALLOWED
+    assert response['headers']['vary'] == 'Origin'
+
+    response = request(api, 'GET', '/status', origin='https://evil.example')
+    assert 'access-control-allow-origin' not in response['headers']
+
+    assert request(api, 'POST', '/pause', origin=ALLOWED)['status'] == 200
+    assert request(api, 'POST', '/pause', origin='https://evil.example')['status'] == 403
+    assert api.commands == ['status', 'status', 'pause']
+
+
+def test_events_stream_headers(api):
+    api.allowed_origin = ALLOWED
+    api.publish({'phase': 'work'})
+    for origin, expected in ((ALLOWED, ALLOWED), ('https://evil.example', None)):
+        conn = http.client.HTTPConnection('127.0.0.1', api.port, timeout=5)
+        conn.request('GET', '/events', headers={'Origin': origin})
+        response = conn.getresponse()
+        assert response.status == 200
+        assert response.getheader('Access-Control-Allow-Origin') == expected
+        conn.close()
+
+
+class EventStream:
+    """读取 /events 推送的 status 事件"""
+
+    def __init__(self, api):
+        import socket
+        self.sock = socket.create_connection(('127.0.0.1', api.port), timeout=5)
+        self.sock.sendall(b"GET /events HTTP/1.1\r\nHost: 127.0.0.1\r\n\r\n")
+        self.buffer = b''
+        while b'\r\n\r\n' not in self.buffer:
+            self.buffer += self.sock.recv(4096)
+        head, self.buffer = self.buffer.split(b'\r\n\r\n', 1)
+        assert head.startswith(b'HTTP/1.1 200')
+
+    def next_status(self):
+        while True:
+            while b'\n\n' not in self.buffer:
+                self.buffer += self.sock.recv(4096)
+            frame, self.buffer = self.buffer.split(b'\n\n', 1)
+            lines = frame.decode('utf-8').split('\n')
+            if lines[0] == 'event: status':
+                return json.loads(lines[1][len('data: '):])
+
+    def close(self):
+        self.sock.close()
+
+
+def test_events_pushed_without_polling(api):
+    api.publish({'phase': 'work', 'remaining_seconds': 600})
+    stream = EventStream(api)
+    try:
+        # 连接后立即收到最新状态
+        assert stream.next_status()['remaining_seconds'] == 600
+        api.publish({'phase': 'work', 'remaining_seconds': 599})
+        assert stream.next_status()['remaining_seconds'] == 599
+        api.publish({'phase': 'break', 'remaining_seconds': 300})
+        assert stream.next_status() == {'phase': 'break', 'remaining_seconds': 300}
+        assert api.subscriber_count() == 1
+    finally:
+        stream.close()
+
+
+def test_slow_client_gets_latest_state(api):
+    api.publish({'remaining_seconds': 10})
+    stream = EventStream(api)
+    try:
+        assert stream.next_status()['remaining_seconds'] == 10
+        # 服务线程忙时发布的多个状态只推送最新的一个
+        busy, release = threading.Event(), threading.Event()
+        api._loop.call_soon_threadsafe(lambda: (busy.set(), release.wait(5)))
+        assert busy.wait(5)
+        for remaining in (9, 8, 7):
+            api.publish({'remaining_seconds': remaining})
+        release.set()
+        assert stream.next_status()['remaining_seconds'] == 7
+        api.publish({'remaining_seconds': 6})
+        assert stream.next_status()['remaining_seconds'] == 6
+    finally:
+        stream.close()
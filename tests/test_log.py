@@ -0,0 +1,65 @@
+"""结构化日志：环形缓冲、按子系统设置级别、JSON行输出和最近记录的转储"""
+import json
+import logging
+import pytest
+from utils.log import LogPipeline, RingBufferHandler, ROOT_LOGGER, get_logger
+
+
+@pytest.fixture
+def pipeline(tmp_path):
+    pipeline = LogPipeline(log_dir=str(tmp_path), levels={'default': 'WARNING', 'team_sync': 'DEBUG'},
+                           recent=3, console=False)
+    yield pipeline
+    pipeline.close()
+    # 恢复标准库的默认级别，避免影响其他测试
+    pipeline.set_levels({'default': 'NOTSET'})
+
+
+def read_lines(path):
+    with open(path, encoding='utf-8') as f:
+        return [json.loads(line) for line in f]
+
+
+def test_ring_buffer_drops_oldest():
+    handler = RingBufferHandler(capacity=3, recent=2)
+    for i in range(5):
+        handler.handle(logging.makeLogRecord({'msg': f'记录{i}'}))
+    assert [record.getMessage() for record in handler.pending] == ['记录2', '记录3', '记录4']
+    assert [record.getMessage() for record in handler.snapshot()] == ['记录3', '记录4']
+    assert handler.dropped == 2
+
+
+def test_json_lines_and_levels(pipeline, tmp_path):
+    get_logger('team_sync').debug('同步', extra={'fields': {'peers': 2}})
+    get_logger('ui').info('不写出')
+    get_logger('ui').warning('窗口')
+    pipeline.flush()
+    lines = read_lines(tmp_path / 'app.jsonl')
+    assert [(line['subsystem'], line['level'], line['msg']) for line in lines] == [
+        ('team_sync', 'DEBUG', '同步'),
+        ('ui', 'WARNING', '窗口'),
+    ]
+    assert lines[0]['peers'] == 2
+    assert set(lines[1]) == {'ts', 'level', 'subsystem', 'msg', 'thread'}
+    # 重新设置后，未单独设置的子系统恢复使用默认级别
+    pipeline.set_levels({'default': 'INFO'})
+    assert get_logger('team_sync').getEffectiveLevel() == logging.INFO
+    assert logging.getLogger(ROOT_LOGGER).level == logging.INFO
+
+
+def test_dump_recent(pipeline, tmp_path):
+    logger = get_logger('ui')
+    for i in range(5):
+        logger.warning(f'记录{i}')
+    try:
+        raise RuntimeError('出错')
+    except RuntimeError:
+        logger.exception('崩溃')
+    for reason in ('crash', 'stall'):
+        path = pipeline.dump_recent(reason)
+        assert path == str(tmp_path / f'dump-{reason}.jsonl')
+        lines = read_lines(path)
+        # 只保留最近的记录
+        assert [line['msg'] for line in lines] == ['记录3', '记录4', '崩溃']
+        assert 'RuntimeError: 出错' in lines[-1]['exc']
+    assert pipeline.get_stats()['recent'] == 3
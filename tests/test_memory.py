@@ -0,0 +1,57 @@
+"""按模拟小时跟踪RSS：休息确实发生，低内存模式的稳定内存低于默认模式且不随时间增长"""
+import os
+import sys
+import json
+import subprocess
+import pytest
+from conftest import ROOT
+from benchmarks.simulation import WORK_MINUTES, BREAK_MINUTES
+
+HOURS = 8
+MB = 1024 * 1024
+
+pytestmark = pytest.mark.skipif(not sys.platform.startswith('linux'), reason='需要 /proc 读取RSS')
+
+
+def profile(tmp_path, *flags):
+    env = dict(os.environ, PYTHONPATH=ROOT, QT_QPA_PLATFORM='offscreen')
+    output = subprocess.run(
+        [sys.executable, '-m', 'benchmarks.simulation', '--memory', str(HOURS), '--json', *flags],
+        capture_output=True, text=True, check=True, cwd=tmp_path, env=env, timeout=300
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def steady(samples):
+    # 前几轮仍在加载和预热，取后一半作为稳定状态
+    values = [rss for _, rss, _ in samples[len(samples) // 2:]]
+    return sum(values) / len(values)
+
+
+@pytest.fixture(scope='module')
+def profiles(tmp_path_factory):
+    tmp_path = tmp_path_factory.mktemp('memory')
+    return profile(tmp_path), profile(tmp_path, '--low-memory')
+
+
+def test_breaks_happened(profiles):
+    cycles = HOURS * 60 // (WORK_MINUTES + BREAK_MINUTES)
+    for samples in profiles:
+        assert len(samples) >= cycles
+        breaks = [count for _, _, count in samples]
+        # 每轮都开始了一次休息
+        assert breaks == list(range(1, len(samples) + 1))
+        assert all(rss for _, rss, _ in samples)
+
+
+def test_low_memory_reduces_steady_rss(profiles):
+    default, low = profiles
+    assert steady(low) <= steady(default) * 0.9
+    assert steady(default) - steady(low) >= 10 * MB
+
+
+def test_low_memory_rss_does_not_grow(profiles):
+    _, low = profiles
+    half = len(low) // 2
+    first = max(rss for _, rss, _ in low[:half])
+    assert max(rss for _, rss, _ in low[half:]) <= first + 4 * MB
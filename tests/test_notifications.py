@@ -0,0 +1,79 @@
+"""私有 dbus-daemon 上的模拟通知服务"""
+import time
+import pytest
+
+pytest.importorskip('jeepney')
+
+from conftest import process_events
+from benchmarks import mock_notifications
+from core.notifications import DesktopNotifier
+
+pytestmark = pytest.mark.skipif(not mock_notifications.available(), reason='需要dbus-daemon')
+
+
+@pytest.fixture
+def bus():
+    bus = mock_notifications.PrivateBus()
+    yield bus
+    bus.close()
+
+
+@pytest.fixture
+def server(bus):
+    server = mock_notifications.MockNotificationServer(bus.address)
+    yield server
+    server.close()
+
+
+@pytest.fixture
+def notifier(qapp, bus, server):
+    notifier = DesktopNotifier(bus=bus.address)
+    assert notifier.start()
+    yield notifier
+    notifier.stop()
+
+
+def test_replace_and_action(notifier, server):
+    actions = []
+    notifier.action_invoked.connect(lambda tag, action: actions.append((tag, action)))
+    notifier.notify('break_warning', "5 分钟后休息", actions=[('snooze', "稍后提醒")])
+    notifier.notify('break_warning', "1 分钟后休息", actions=[('snooze', "稍后提醒")])
+    assert process_events(lambda: server.calls.count('Notify') == 2)
+    # 同一标识的通知替换旧通知
+    assert len(server.notifications) == 1
+    notification_id, (summary, action_list) = next(iter(server.notifications.items()))
+    assert summary == "1 分钟后休息"
+    assert action_list == ['snooze', "稍后提醒"]
+    server.invoke_action(notification_id, 'snooze')
+    assert process_events(lambda: actions)
+    assert actions == [('break_warning', 'snooze')]
+
+
+def test_close(notifier, server):
+    closed = []
+    notifier.notification_closed.connect(closed.append)
+    notifier.notify('break_warning', "1 分钟后休息")
+    assert process_events(lambda: server.notifications)
+    notifier.close('break_warning')
+    assert process_events(lambda: closed)
+    assert closed == ['break_warning'] and not server.notifications
+
+
+def test_stop_does_not_wait_for_slow_server(qapp, bus):
+    server = mock_notifications.MockNotificationServer(bus.address, delay=2.0)
+    notifier = DesktopNotifier(bus=bus.address)
+    try:
+        notifier.start()
+        notifier.notify('break_warning', "1 分钟后休息")
+        assert process_events(lambda: 'Notify' in server.calls)
+        thread = notifier._thread
+        # 后台线程正在等待通知服务的回复
+        started = time.perf_counter()
+        notifier.stop()
+        assert time.perf_counter() - started < 0.05
+        assert thread.is_alive()
+        assert not notifier.start()
+        thread.join(DesktopNotifier.CALL_TIMEOUT + 1)
+        assert not thread.is_alive()
+    finally:
+        server.close()
@@ -0,0 +1,156 @@
+"""插件：延迟导入、时间预算、超时隔离和入口点读取完成前的钩子"""
+import time
+import threading
+from conftest import process_events
+from core import plugins
+from core.plugins import PluginManager
+
+
+class FakeEntryPoint:
+    """代替 importlib.metadata.EntryPoint，记录导入（load）的次数"""
+
+    def __init__(self, name, factory):
+        self.name = name
+        self.factory = factory
+        self.loads = 0
+
+    def load(self):
+        self.loads += 1
+        return self.factory
+
+
+class Recorder:
+    def __init__(self, context):
+        self.context = context
+        self.events = []
+
+    def on_work_start(self, event):
+        self.events.append(event)
+
+    def on_break_start(self, event):
+        self.context.call_in_gui(lambda: self.events.append(threading.current_thread()))
+
+
+class Slow:
+    DELAY = 0.06
+
+    def __init__(self, context):
+        pass
+
+    def on_work_start(self, event):
+        time.sleep(self.DELAY)
+
+
+class Raising:
+    def __init__(self, context):
+        pass
+
+    def on_work_start(self, event):
+        raise RuntimeError('插件出错')
+
+
+def make_hanging(release):
+    class Hanging:
+        def __init__(self, context):
+            pass
+
+        def on_work_start(self, event):
+            release.wait(10)
+
+    return Hanging
+
+
+def instance(manager, name):
+    return next(host for host in manager.hosts if host.name == name)
+
+
+def test_lazy_import_and_dispatch(qapp):
+    entry_point = FakeEntryPoint('recorder', Recorder)
+    manager = PluginManager([entry_point])
+    try:
+        assert entry_point.loads == 0
+        manager.dispatch('on_work_start', {'phase': 'work'})
+        host = instance(manager, 'recorder')
+        assert process_events(lambda: host.calls == 1)
+        assert entry_point.loads == 1
+        assert host.plugin.events == [{'phase': 'work', 'hook': 'on_work_start'}]
+        # 需要操作界面时在GUI线程中执行
+        manager.dispatch('on_break_start', {})
+        assert process_events(lambda: len(host.plugin.events) == 2)
+        assert host.plugin.events[1] is threading.main_thread()
+        assert entry_point.loads == 1
+    finally:
+        manager.close()
+
+
+def test_disabled_plugin_not_loaded(qapp):
+    entry_point = FakeEntryPoint('recorder', Recorder)
+    manager = PluginManager([entry_point], disabled=['recorder'])
+    manager.dispatch('on_work_start', {})
+    assert manager.hosts == [] and entry_point.loads == 0
+
+
+def test_consecutive_overruns_isolate(qapp):
+    manager = PluginManager([FakeEntryPoint('slow', Slow)], budget_ms=50)
+    try:
+        host = instance(manager, 'slow')
+        for _ in range(host.MAX_OVERRUNS):
+            manager.dispatch('on_work_start', {})
+        assert process_events(lambda: host.isolated)
+        assert host.overruns == host.MAX_OVERRUNS
+        assert '超时' in host.isolation_reason
+        manager.dispatch('on_work_start', {})
+        assert host.get_stats()['skipped'] == 1
+    finally:
+        manager.close()
+
+
+def test_hung_hook_isolated(qapp):
+    release = threading.Event()
+    manager = PluginManager([FakeEntryPoint('hanging', make_hanging(release))], budget_ms=30)
+    try:
+        host = instance(manager, 'hanging')
+        started = time.perf_counter()
+        manager.dispatch('on_work_start', {})
+        # GUI线程不等待插件，由 check_budget 发现卡住的钩子
+        assert time.perf_counter() - started < 0.05
+        assert process_events(lambda: host.isolated)
+        assert 'on_work_start' in host.isolation_reason
+    finally:
+        release.set()
+        manager.close()
+
+
+def test_errors_do_not_isolate(qapp):
+    manager = PluginManager([FakeEntryPoint('raising', Raising)])
+    try:
+        host = instance(manager, 'raising')
+        manager.dispatch('on_work_start', {})
+        manager.dispatch('on_work_start', {})
+        assert process_events(lambda: host.calls == 2)
+        assert host.errors == 2 and not host.isolated
+    finally:
+        manager.close()
+
+
+def test_dispatch_before_discovery_is_queued(qapp, monkeypatch):
+    entry_point = FakeEntryPoint('recorder', Recorder)
+    release = threading.Event()
+
+    def discover():
+        release.wait(5)
+        return [entry_point]
+
+    monkeypatch.setattr(plugins, 'discover', discover)
+    manager = PluginManager()
+    try:
+        manager.dispatch('on_work_start', {'n': 1})
+        manager.dispatch('on_work_start', {'n': 2})
+        assert not manager.ready and entry_point.loads == 0
+        release.set()
+        assert process_events(lambda: manager.ready)
+        host = instance(manager, 'recorder')
+        assert process_events(lambda: host.calls == 2)
+        assert [event['n'] for event in host.plugin.events] == [1, 2]
+    finally:
+        manager.close()
@@ -0,0 +1,141 @@
+import json
+import pytest
+
+pytest.importorskip('cryptography')
+
+from PySide6.QtCore import QEvent, Qt
+from PySide6.QtGui import QKeyEvent
+from core import policy
+from core.policy import (PolicyError, encode_document, decode_document, generate_private_key, load_public_key,
+                         public_key_text, load_settings, snooze_allowed)
+import policytool
+
+POLICY = {'version': 2, 'settings': {'allow_escape': False}, 'minimum': {'break_duration': 5}}
+
+
+@pytest.fixture
+def private_key():
+    return generate_private_key()
+
+
+@pytest.fixture
+def bootstrap(isolated, monkeypatch):
+    path = isolated / 'policy.yaml'
+    monkeypatch.setenv('TCYA_POLICY_FILE', str(path))
+    monkeypatch.setattr(policy.sys, 'platform', 'test')
+    return path
+
+
+def test_sign_and_verify_with_public_key(private_key):
+    document = encode_document(POLICY, private_key)
+    public_key = load_public_key(public_key_text(private_key))
+    result = decode_document(document, public_key)
+    assert result.version == 2
+    assert result.is_locked('allow_escape')
+
+
+def test_public_key_cannot_sign(private_key):
+    public_key = private_key.public_key()
+    assert not hasattr(public_key, 'sign')
+
+
+def test_rejects_other_key_and_tampering(private_key):
+    document = encode_document(POLICY, private_key)
+    with pytest.raises(PolicyError):
+        decode_document(document, generate_private_key().public_key())
+    data = json.loads(document)
+    data['payload'] = data['payload'].replace('"version": 2', '"version": 9')
+    with pytest.raises(PolicyError):
+        decode_document(json.dumps(data).encode(), private_key.public_key())
+
+
+def test_settings_only_from_bootstrap_file(bootstrap, private_key):
+    assert load_settings() is None
+    bootstrap.write_text(f"source: https://example.invalid/policy.json\npublic_key: {public_key_text(private_key)}\n")
+    settings = load_settings()
+    assert settings['source'] == 'https://example.invalid/policy.json'
+    assert settings['public_key'].public_bytes_raw() == private_key.public_key().public_bytes_raw()
+
+
+def test_bootstrap_without_public_key_ignored(bootstrap):
+    bootstrap.write_text("source: https://example.invalid/policy.json\nkey: shared-secret\n")
+    assert load_settings() is None
+
+
+def test_policytool_round_trip(isolated, capsys):
+    policy_file = isolated / 'policy.json'
+    policy_file.write_text(json.dumps(POLICY))
+    assert policytool.main(['keygen', str(isolated / 'private.pem')]) == 0
+    public = capsys.readouterr().out.strip().rsplit(' ', 1)[-1]
+    assert (isolated / 'private.pem').stat().st_mode & 0o077 == 0
+    assert policytool.main(['keygen', str(isolated / 'private.pem')]) == 1
+    signed = isolated / 'signed.json'
+    assert policytool.main(['sign', str(policy_file), '--key-file', str(isolated / 'private.pem'),
+                            '-o', str(signed)]) == 0
+    assert policytool.main(['verify', str(signed), '--public-key', public]) == 0
+    other = public_key_text(generate_private_key())
+    assert policytool.main(['verify', str(signed), '--public-key', other]) == 1
+
+
+def test_snooze_follows_escape_policy():
+    assert snooze_allowed({})
+    assert not snooze_allowed({'allow_escape': False})
+    assert not snooze_allowed({'allow_snooze': False})
+
+
+def test_short_break_snooze_locked(qapp):
+    from benchmarks.simulation import Simulation, flush_deleted
+    sim = Simulation({'allow_escape': False})
+    try:
+        sim.window.session.on_schedule_event({'name': 'eye', 'title': '护眼时间', 'duration': 20})
+        overlay = sim.window.short_overlay
+        snoozed = []
+        overlay.snooze_requested.connect(lambda: snoozed.append(True))
+        overlay.keyPressEvent(QKeyEvent(QEvent.KeyPress, Qt.Key_S, Qt.NoModifier))
+        overlay.keyPressEvent(QKeyEvent(QEvent.KeyPress, Qt.Key_Escape, Qt.NoModifier))
+        assert not snoozed
+        assert sim.window.short_overlay is overlay
+        assert overlay.shortcut_text == ''
+    finally:
+        sim.close()
+        flush_deleted()
+
+
+def test_delay_commands_refused_when_locked(qapp):
+    from core.app import AppCore
+    from core.clock import VirtualClock
+    from core.session import BreakSession
+    core = AppCore(config_file=None)
+    core.config.update(allow_snooze=False)
+    session = BreakSession(clock=VirtualClock())
+    core.attach(session)
+    try:
+        session.start_work()
+        full = session.timer.remaining_seconds
+        for command in ('increase', 'skip', 'pause', 'toggle'):
+            response = core.handle_command(command)
+            assert not response['ok'] and '策略' in response['error']
+        status = core.handle_command('decrease')
+        assert status['ok'] and status['remaining_seconds'] == full - 600 and not status['paused']
+        # 按键和按钮直接调用状态机时同样不推迟
+        session.increase_time()
+        session.skip()
+        session.toggle_pause()
+        assert session.timer.remaining_seconds == full - 600 and not session.is_paused
+    finally:
+        core.close()
+
+
+def test_timer_buttons_locked(qapp):
+    from benchmarks.simulation import Simulation, flush_deleted
+    sim = Simulation({'allow_escape': False})
+    try:
+        window = sim.window
+        assert not window.plus_button.isEnabled() and not window.pause_button.isEnabled()
+        assert window.minus_button.isEnabled()
+        remaining = window.timer.remaining_seconds
+        window.increase_time()
+        assert window.timer.remaining_seconds == remaining
+    finally:
+        sim.close()
+        flush_deleted()
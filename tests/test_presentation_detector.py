@@ -0,0 +1,94 @@
+import os
+import shutil
+import subprocess
+import pytest
+from conftest import process_events
+
+pytest.importorskip('Xlib')
+from Xlib import Xatom, display as xdisplay  # noqa: E402
+
+pytestmark = pytest.mark.skipif(shutil.which('Xvfb') is None, reason='需要Xvfb')
+
+
+@pytest.fixture
+def x_display():
+    """启动独立的Xvfb，返回显示名"""
+    read_fd, write_fd = os.pipe()
+    proc = subprocess.Popen(['Xvfb', '-displayfd', str(write_fd), '-screen', '0', '640x480x24',
+                             '-nolisten', 'tcp'], pass_fds=(write_fd,),
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    os.close(write_fd)
+    with os.fdopen(read_fd) as f:
+        number = f.readline().strip()
+    if not number:
+        proc.kill()
+        pytest.skip('Xvfb启动失败')
+    try:
+        yield f':{number}'
+    finally:
+        proc.terminate()
+        proc.wait(timeout=5)
+
+
+class FakeWindowManager:
+    """只维护EWMH属性的窗口管理器：活动窗口和全屏状态"""
+
+    def __init__(self, name):
+        self.display = xdisplay.Display(name)
+        self.root = self.display.screen().root
+        self.atom_active = self.display.intern_atom('_NET_ACTIVE_WINDOW')
+        self.atom_state = self.display.intern_atom('_NET_WM_STATE')
+        self.atom_fullscreen = self.display.intern_atom('_NET_WM_STATE_FULLSCREEN')
+
+    def create_window(self):
+        screen = self.display.screen()
+        window = self.root.create_window(0, 0, 100, 100, 0, screen.root_depth)
+        self.display.flush()
+        return window
+
+    def activate(self, window):
+        self.root.change_property(self.atom_active, Xatom.WINDOW, 32, [window.id])
+        self.display.flush()
+
+    def set_fullscreen(self, window, fullscreen):
+        window.change_property(self.atom_state, Xatom.ATOM, 32,
+                               [self.atom_fullscreen] if fullscreen else [])
+        self.display.flush()
+
+    def close(self):
+        self.display.close()
+
+
+def test_detects_fullscreen_active_window(qapp, x_display, monkeypatch):
+    from core.presentation_detector import PresentationDetector
+    monkeypatch.setenv('DISPLAY', x_display)
+    assert PresentationDetector.available()
+
+    wm = FakeWindowManager(x_display)
+    slides = wm.create_window()
+    editor = wm.create_window()
+    wm.activate(editor)
+    detector = PresentationDetector(display_name=x_display)
+    changes = []
+    detector.state_changed.connect(changes.append)
+    try:
+        assert detector.start()
+        assert not detector.active
+
+        wm.set_fullscreen(slides, True)
+        wm.activate(slides)
+        assert process_events(lambda: detector.active)
+
+        # 全屏窗口不再是活动窗口
+        wm.activate(editor)
+        assert process_events(lambda: not detector.active)
+        wm.activate(slides)
+        assert process_events(lambda: detector.active)
+
+        # 活动窗口退出全屏
+        wm.set_fullscreen(slides, False)
+        assert process_events(lambda: not detector.active)
+        assert process_events(lambda: changes == [True, False, True, False])
+    finally:
+        detector.stop()
+        wm.close()
@@ -0,0 +1,52 @@
+import time
+import pytest
+from utils import remote_session
+
+
+@pytest.fixture
+def slow_logind(monkeypatch):
+    """loginctl需要半秒才返回，会话为远程会话"""
+    monkeypatch.setattr(remote_session, '_detected', remote_session._UNKNOWN)
+    monkeypatch.setattr(remote_session, '_detect_thread', None)
+    for name in remote_session.REMOTE_ENV_VARS:
+        monkeypatch.delenv(name, raising=False)
+    monkeypatch.delenv('SSH_CONNECTION', raising=False)
+    monkeypatch.delenv('SSH_CLIENT', raising=False)
+    monkeypatch.setenv('XDG_SESSION_ID', '3')
+    monkeypatch.setattr(remote_session.os, 'name', 'posix')
+
+    def logind_remote(session_id):
+        time.sleep(0.5)
+        return True
+
+    monkeypatch.setattr(remote_session, '_logind_remote', logind_remote)
+
+
+def test_detection_does_not_block(slow_logind):
+    started = time.perf_counter()
+    assert not remote_session.low_bandwidth_enabled({})
+    assert time.perf_counter() - started < 0.1
+    remote_session._detect_thread.join(5)
+    assert remote_session.low_bandwidth_enabled({})
+
+
+def test_detects_once(slow_logind):
+    remote_session.start_detection()
+    thread = remote_session._detect_thread
+    remote_session.start_detection()
+    assert remote_session._detect_thread is thread
+    thread.join(5)
+    assert remote_session._detected == 'logind远程会话'
+
+
+def test_env_vars_without_logind(slow_logind, monkeypatch):
+    monkeypatch.setenv('XRDP_SESSION', '1')
+    assert remote_session.low_bandwidth_enabled({})
+    assert remote_session.detect(logind=False) == 'xrdp'
+    remote_session._detect_thread.join(5)
+
+
+def test_config_overrides_detection(slow_logind):
+    assert remote_session.low_bandwidth_enabled({'remote_overlay_mode': 'on'})
+    assert not remote_session.low_bandwidth_enabled({'remote_overlay_mode': 'off'})
+    assert remote_session._detect_thread is None
@@ -0,0 +1,116 @@
+import pytest
+from core.clock import VirtualClock
+from core.scheduler import Schedule, ScheduleRule, ScheduleEngine
+from core.timer import Timer
+
+START = 1_700_000_000.0
+
+
+def rule(interval=20, duration=20):
+    return ScheduleRule('eyes', interval, duration)
+
+
+def test_schedule_pause_shifts_rules():
+    now = [START]
+    schedule = Schedule([rule()], now=lambda: now[0])
+    now[0] += 10 * 60
+    schedule.pause()
+    now[0] += 60 * 60
+    # 暂停期间不触发，也不参与下一次触发时间
+    assert schedule.pop_due() == []
+    assert schedule.next_time() is None
+    schedule.resume()
+    # 暂停前已计时10分钟，继续后再过10分钟触发
+    assert schedule.next_time() == pytest.approx(now[0] + 10 * 60)
+
+
+def test_deadline_is_not_paused():
+    now = [START]
+    schedule = Schedule([rule()], now=lambda: now[0])
+    schedule.set_deadline('work', START + 30)
+    schedule.pause()
+    assert schedule.next_time() == START + 30
+    now[0] += 30
+    assert schedule.pop_due_deadlines() == ['work']
+    assert schedule.pop_due_deadlines() == []
+
+
+@pytest.fixture
+def engine(qapp):
+    clock = VirtualClock(start=START)
+    engine = ScheduleEngine(clock=clock)
+    engine.load_config({'schedules': [{'name': 'eyes', 'interval': 20, 'duration_seconds': 20}]})
+    events = []
+    engine.event_due.connect(events.append)
+    return clock, engine, events
+
+
+def test_engine_pause(engine):
+    clock, engine, events = engine
+    clock.advance(10 * 60)
+    engine.pause()
+    clock.advance(2 * 3600)
+    assert events == []
+    engine.resume()
+    clock.advance(10 * 60 - 1)
+    assert events == []
+    clock.advance(1)
+    assert [event['name'] for event in events] == ['eyes']
+
+
+def test_timer_cadence_through_engine(engine):
+    clock, engine, events = engine
+    timer = Timer(clock, engine=engine)
+    assert timer.finish_timer is None
+    finished = []
+    timer.timer_finished.connect(lambda: finished.append(clock.monotonic()))
+    timer.start(60)
+    # 暂停休息规则不影响主计时
+    engine.pause()
+    clock.advance(60 * 60 - 1)
+    assert finished == [] and events == []
+    assert timer.remaining_seconds == 1
+    clock.advance(1)
+    assert finished == [pytest.approx(3600)]
+    assert engine.deadline('work') is None
+
+
+def test_timer_pause_clears_deadline(engine):
+    clock, engine, _ = engine
+    timer = Timer(clock, engine=engine)
+    finished = []
+    timer.timer_finished.connect(lambda: finished.append(clock.monotonic()))
+    timer.start(1)
+    clock.advance(30)
+    timer.pause()
+    assert engine.deadline('work') is None
+    clock.advance(600)
+    assert finished == []
+    timer.resume()
+    clock.advance(30)
+    assert finished == [pytest.approx(660)]
+
+
+def test_timer_window_pauses_short_breaks(qapp):
+    from core.config_manager import ConfigManager
+    from gui.timer_window import TimerWindow
+    config = dict(ConfigManager().default_config)
+    config['schedules'] = [{'name': 'eyes', 'interval': 20, 'duration_seconds': 20}]
+    config['presentation_defer'] = False
+    clock = VirtualClock(start=START)
+    window = TimerWindow(clock=clock)
+    window.set_config(config)
+    window.start_timer()
+    try:
+        clock.advance(10 * 60)
+        window.toggle_pause()
+        assert window.schedule_engine.paused
+        clock.advance(3600)
+        assert window.short_overlay is None
+        window.toggle_pause()
+        clock.advance(10 * 60)
+        assert window.short_overlay is not None
+        window.short_overlay.close()
+    finally:
+        window.stop_timer()
+        window.close()
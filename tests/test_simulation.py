@@ -0,0 +1,61 @@
+import os
+import pytest
+from benchmarks.simulation import Simulation, simulate, expected_events, cycles_for_days, flush_deleted
+
+
+@pytest.fixture
+def sim(qapp):
+    sim = Simulation()
+    yield sim
+    sim.close()
+    flush_deleted()
+
+
+def test_one_day_sequence(qapp):
+    events, expected, _ = simulate(1, fast=False)
+    assert len(expected) == 3 * cycles_for_days(1)
+    assert events == expected
+
+
+def test_week_fast_forward(qapp):
+    events, expected, elapsed_ms = simulate(7)
+    assert len(expected) == 3 * cycles_for_days(7)
+    assert events == expected
+    assert elapsed_ms < 1000
+
+
+def test_does_not_write_config(sim):
+    assert not os.path.exists('config.yaml')
+
+
+def test_timer_started(sim):
+    assert sim.window.phase == 'work'
+    assert sim.window.timer.is_running
+    sim.run(60 * 60)
+    assert sim.window.phase == 'break'
+    assert [name for _, name in sim.events] == ['one_minute_warning', 'break_start']
+
+
+def test_late_tick_still_warns(sim):
+    """GUI线程卡顿跳过了剩余60秒的那次刷新，提醒仍然发出且只发一次"""
+    sim.run(60 * 60 - 62)
+    sim.window.timer.timer.stop()
+    sim.run(4)
+    sim.window.timer.timer.start(1000)
+    sim.run(1)
+    assert sim.events == [(60 * 60 - 57, 'one_minute_warning')]
+    sim.run(30)
+    assert len(sim.events) == 1
+
+
+def test_snooze_rearms_warning(sim):
+    sim.run(60 * 60 - 30)
+    sim.window.snooze(5)
+    sim.run(5 * 60)
+    assert [name for _, name in sim.events] == ['one_minute_warning', 'one_minute_warning']
+    assert sim.events[1][0] == 60 * 60 + 4 * 60
+
+
+def test_expected_events_start_with_warning():
+    assert expected_events(1) == [(59 * 60, 'one_minute_warning'), (60 * 60, 'break_start'),
+                                  (70 * 60, 'break_end')]
@@ -0,0 +1,81 @@
+import os
+import sys
+import json
+import time
+import shutil
+import statistics
+import subprocess
+import pytest
+from conftest import ROOT
+
+pytest.importorskip('PySide6.QtMultimedia', exc_type=ImportError)
+pytestmark = pytest.mark.skipif(shutil.which('pulseaudio') is None, reason='需要PulseAudio（空设备）')
+
+# 在子进程中测量：Qt在应用启动时枚举音频设备，需要先指定声音服务器
+MEASURE = r'''
+import json, time
+from PySide6.QtWidgets import QApplication
+app = QApplication([])
+from utils.sound_cues import SoundCues, CUE_NAMES
+
+cues = SoundCues(volume=0)
+deadline = time.perf_counter() + 5
+while not all(cues.is_ready(name) for name in CUE_NAMES) and time.perf_counter() < deadline:
+    app.processEvents()
+    time.sleep(0.001)
+result = {'ready': [name for name in CUE_NAMES if cues.is_ready(name)], 'trigger': [], 'latency': []}
+for name in CUE_NAMES * 5:
+    cues.effects[name].stop()
+    app.processEvents()
+    cues.last_latency_ms = None
+    start = time.perf_counter()
+    cues.play(name)
+    result['trigger'].append((time.perf_counter() - start) * 1000)
+    deadline = time.perf_counter() + 1
+    while cues.last_latency_ms is None and time.perf_counter() < deadline:
+        app.processEvents()
+    if cues.last_latency_ms is not None:
+        result['latency'].append(cues.last_latency_ms)
+print(json.dumps(result))
+'''
+
+
+@pytest.fixture
+def null_sink(tmp_path):
+    """启动只有空设备（module-null-sink）的私有PulseAudio，返回 PULSE_SERVER"""
+    socket_path = tmp_path / 'pulse' / 'native'
+    socket_path.parent.mkdir()
+    env = dict(os.environ, PULSE_RUNTIME_PATH=str(socket_path.parent), HOME=str(tmp_path))
+    proc = subprocess.Popen(
+        ['pulseaudio', '-n', '--daemonize=no', '--exit-idle-time=-1', '--disable-shm=yes',
+         '--use-pid-file=no', '--system=no',
+         '-L', 'module-null-sink sink_name=null',
+         '-L', f'module-native-protocol-unix socket={socket_path} auth-anonymous=1'],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.monotonic() + 10
+    while not socket_path.exists():
+        if proc.poll() is not None or time.monotonic() > deadline:
+            proc.kill()
+            pytest.skip('PulseAudio启动失败')
+        time.sleep(0.05)
+    try:
+        yield f'unix:{socket_path}'
+    finally:
+        proc.terminate()
+        proc.wait(timeout=5)
+
+
+def test_cue_latency(null_sink):
+    env = dict(os.environ, PULSE_SERVER=null_sink, PULSE_SINK='null', PYTHONPATH=ROOT,
+               QT_QPA_PLATFORM='offscreen')
+    proc = subprocess.run([sys.executable, '-c', MEASURE], env=env, cwd=ROOT,
+                          capture_output=True, text=True, timeout=60)
+    assert proc.returncode == 0, proc.stderr
+    result = json.loads(proc.stdout.strip().splitlines()[-1])
+    assert result['ready'] == ['break_start', 'warning', 'break_end']
+    # 触发时不读盘也不解码：play() 本身只需要几毫秒
+    assert statistics.median(result['trigger']) < 5
+    # 每次触发都开始播放，从触发到开始播放的延迟在几十毫秒以内
+    assert len(result['latency']) == len(result['trigger'])
+    assert statistics.median(result['latency']) < 20
+    assert max(result['latency']) < 100
@@ -0,0 +1,99 @@
+"""状态文件：写入与读取的往返、序号一致性检查和崩溃后残留的状态"""
+import os
+import sys
+import threading
+import subprocess
+import pytest
+from utils import status_file
+from utils.status_file import StatusFileWriter, StatusFileReader, SEQ, SEQ_OFFSET
+
+NOW = 1_700_000_000.0
+
+
+@pytest.fixture
+def writer(isolated):
+    writer = StatusFileWriter(str(isolated / 'status'))
+    assert writer.open()
+    yield writer
+    writer.close()
+
+
+def test_round_trip(writer):
+    reader = StatusFileReader(writer.path)
+    try:
+        assert reader.read(now=NOW) is None
+        writer.write(1, 600, False, now=NOW)
+        assert reader.read(now=NOW + 10.5) == {'phase': 'work', 'remaining_seconds': 589, 'paused': False,
+                                               'pid': os.getpid()}
+        writer.update({'phase': 'break', 'remaining_seconds': 300, 'paused': True}, now=NOW)
+        assert reader.read(now=NOW + 100) == {'phase': 'break', 'remaining_seconds': 300, 'paused': True,
+                                              'pid': os.getpid()}
+        # 运行中的进程：结束时间已过时显示0，不视为未运行
+        writer.write(3, 5, False, now=NOW)
+        assert reader.read(now=NOW + 60)['remaining_seconds'] == 0
+    finally:
+        reader.close()
+
+
+def test_update_skips_unchanged_deadline(writer):
+    writer.update({'phase': 'work', 'remaining_seconds': 600, 'paused': False}, now=NOW)
+    writer.update({'phase': 'work', 'remaining_seconds': 599, 'paused': False}, now=NOW + 1)
+    assert writer.writes == 1
+    # 加减时间改变了结束时间
+    writer.update({'phase': 'work', 'remaining_seconds': 1199, 'paused': False}, now=NOW + 2)
+    assert writer.writes == 2
+
+
+def test_reader_retries_while_writing(writer):
+    writer.write(1, 600, False, now=NOW)
+    reader = StatusFileReader(writer.path)
+    try:
+        # 序号为奇数：写入未完成，读不到一致的快照
+        SEQ.pack_into(writer._mmap, SEQ_OFFSET, writer._seq + 1)
+        assert reader.read_raw(retries=10) is None
+        SEQ.pack_into(writer._mmap, SEQ_OFFSET, writer._seq)
+        assert reader.read_raw()[3] == 600
+    finally:
+        reader.close()
+
+
+def test_concurrent_reads_are_consistent(writer):
+    reader = StatusFileReader(writer.path)
+    stop = threading.Event()
+
+    def write_loop():
+        remaining = 0
+        while not stop.is_set():
+            remaining = (remaining + 1) % 10000
+            # 结束时间与剩余秒数一起写入，读到的快照中两者必须对应
+            writer.write(1, remaining, False, now=NOW)
+
+    thread = threading.Thread(target=write_loop)
+    thread.start()
+    try:
+        for _ in range(20000):
+            data = reader.read_raw()
+            if data is not None:
+                _, _, deadline_ms, remaining, _, _ = data
+                assert deadline_ms == int((NOW + remaining) * 1000)
+    finally:
+        stop.set()
+        thread.join()
+        reader.close()
+
+
+def test_crashed_instance_not_shown(writer, monkeypatch):
+    """进程被强制结束后文件中仍是最后的状态：结束时间已过或暂停时检查进程是否存在"""
+    process = subprocess.Popen([sys.executable, '-c', 'pass'])
+    process.wait()
+    monkeypatch.setattr(status_file.os, 'getpid', lambda: process.pid)
+    reader = StatusFileReader(writer.path)
+    try:
+        writer.write(1, 600, False, now=NOW)
+        # 结束时间之前不检查进程
+        assert reader.read(now=NOW + 10)['remaining_seconds'] == 590
+        assert reader.read(now=NOW + 601) is None
+        writer.write(1, 600, True, now=NOW)
+        assert reader.read(now=NOW) is None
+    finally:
+        reader.close()
@@ -0,0 +1,72 @@
+"""结束被监督的子进程，测量到倒计时恢复（控制接口重新返回接续的剩余时间）所需的时间"""
+import os
+import signal
+import threading
+import time
+import pytest
+from conftest import ROOT
+from utils.ipc import send_command, InstanceNotResponding
+from utils.supervisor import Supervisor, child_command
+
+pytestmark = pytest.mark.skipif(not hasattr(signal, 'SIGKILL'), reason='需要SIGKILL')
+
+# 使用已完成导入的备用进程时，恢复应在几秒内完成
+RESTORE_LIMIT = 10.0
+
+
+def status(timeout=0.5):
+    try:
+        response = send_command('status', timeout=timeout)
+    except InstanceNotResponding:
+        return None
+    return response if response is not None and response.get('ok') else None
+
+
+def wait_until(condition, timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        result = condition()
+        if result:
+            return result
+        time.sleep(0.02)
+    return None
+
+
+@pytest.fixture
+def supervisor(isolated):
+    supervisor = Supervisor(child_command(os.path.join(ROOT, 'main.py')), heartbeat=0.2, hang_timeout=2.0,
+                            stable_after=0, env=dict(os.environ, QT_QPA_PLATFORM='offscreen'))
+    thread = threading.Thread(target=supervisor.run, daemon=True)
+    thread.start()
+    yield supervisor
+    supervisor.stop()
+    thread.join(15)
+    assert not thread.is_alive()
+
+
+def test_kill_restores_countdown(supervisor):
+    assert wait_until(status), "子进程没有启动"
+    # 等备用进程完成导入、监督进程通过心跳拿到最新状态
+    assert wait_until(lambda: supervisor.last_heartbeat is not None and supervisor.standby is not None
+                      and supervisor.standby.ready.is_set())
+    # 先减少10分钟，恢复后的剩余时间不能与重新开始的一整轮混淆
+    send_command('decrease')
+    before = status()
+    assert before['phase'] == 'work'
+    assert before['remaining_seconds'] <= before['work_duration'] * 60 - 590
+    # 等心跳记录到减少后的状态
+    assert wait_until(lambda: supervisor.last_status['remaining_seconds'] <= before['remaining_seconds'])
+    killed = supervisor.active.process
+    restarts = supervisor.restarts
+    started = time.monotonic()
+    killed.send_signal(signal.SIGKILL)
+
+    assert wait_until(lambda: supervisor.restarts > restarts, timeout=RESTORE_LIMIT)
+    after = wait_until(status, timeout=RESTORE_LIMIT)
+    elapsed = time.monotonic() - started
+    assert after is not None, "倒计时没有恢复"
+    assert supervisor.active.process.pid != killed.pid
+    assert elapsed < RESTORE_LIMIT
+    # 剩余时间接着崩溃前的倒计时，而不是重新开始一整轮
+    assert after['phase'] == 'work'
+    assert abs(before['remaining_seconds'] - elapsed - after['remaining_seconds']) <= 3
@@ -0,0 +1,180 @@
+import heapq
+import random
+import itertools
+import pytest
+from core.team_sync import TeamSyncProtocol, TAG_BYTES
+
+KEY = 'team-secret'
+
+
+class Network:
+    """进程内模拟：每个实例的时钟有固定偏差，消息延迟随机"""
+
+    def __init__(self, count, key=KEY, seed=1):
+        self.rng = random.Random(seed)
+        self.now = 0.0
+        self.pending = []
+        self.order = itertools.count()
+        self.multicast = {}  # 发送方ID -> 组播消息数
+        self.peers = []
+        for _ in range(count):
+            self.add(key)
+
+    def add(self, key=KEY):
+        skew = self.rng.uniform(-30, 30)
+        peer = TeamSyncProtocol('team', key, peer_id=self.rng.getrandbits(62),
+                                clock=lambda: self.now + skew)
+        peer.skew = skew
+        peer.alive = True
+        peer.break_at = None
+        peer.on_schedule = lambda at, _: setattr(peer, 'break_at', at)
+        self.peers.append(peer)
+        return peer
+
+    def send(self, source, messages):
+        for data, to in messages:
+            if to is None:
+                self.multicast[source.peer_id] = self.multicast.get(source.peer_id, 0) + 1
+            for peer in (self.peers if to is None else [to]):
+                if peer is not source and peer.alive:
+                    self.deliver(peer, data, source)
+
+    def deliver(self, peer, data, source):
+        heapq.heappush(self.pending, (self.now + self.rng.uniform(0.0002, 0.005), next(self.order),
+                                      peer, data, source))
+
+    def run(self, seconds):
+        until = self.now + seconds
+        tick = self.now
+        while tick < until:
+            tick += 0.25
+            while self.pending and self.pending[0][0] <= tick:
+                when, _, peer, data, source = heapq.heappop(self.pending)
+                self.now = when
+                if peer.alive:
+                    self.send(peer, peer.receive(data, source=source))
+            self.now = tick
+            for peer in self.peers:
+                if peer.alive:
+                    self.send(peer, peer.tick())
+
+    def leaders(self):
+        return [peer for peer in self.peers if peer.alive and peer.is_leader()]
+
+
+def test_single_time_source():
+    net = Network(20)
+    net.run(8)
+    leaders = net.leaders()
+    assert len(leaders) == 1
+    leader = leaders[0]
+    assert all(peer.leader_id == leader.peer_id for peer in net.peers)
+
+    net.multicast.clear()
+    received = {peer.peer_id: peer.messages_received for peer in net.peers}
+    net.run(20)
+    # 只有负责人发组播
+    assert set(net.multicast) == {leader.peer_id}
+    # follower 每秒只收到负责人的心跳和自己的 pong，与实例数无关
+    for peer in net.peers:
+        if peer is not leader:
+            assert (peer.messages_received - received[peer.peer_id]) / 20 < 3
+
+
+def test_traffic_is_linear():
+    def per_peer(count):
+        net = Network(count)
+        net.run(30)
+        return sum(peer.messages_received for peer in net.peers) / count / 30
+
+    # 实例数增加到4倍，每个实例收到的消息数基本不变
+    assert per_peer(40) < per_peer(10) * 1.5
+
+
+def test_alignment_and_reelection():
+    net = Network(10)
+    net.run(8)
+    leader = net.leaders()[0]
+    net.send(leader, leader.set_local_schedule(leader.clock() + 600, 300))
+    net.run(4)
+    target = leader.schedule['break_at'] - leader.skew
+    followers = [peer for peer in net.peers if peer is not leader]
+    assert all(abs(peer.break_at - peer.skew - target) < 0.01 for peer in followers)
+
+    leader.alive = False
+    net.run(10)
+    leaders = net.leaders()
+    assert len(leaders) == 1
+    # ID最小的存活实例退避最短，接任负责人
+    assert leaders[0].peer_id == min(peer.peer_id for peer in followers)
+
+
+def test_rejects_foreign_key_and_replay():
+    net = Network(5)
+    net.run(8)
+    leader = net.leaders()[0]
+    follower = next(peer for peer in net.peers if peer is not leader)
+
+    # 密钥不同的实例自称负责人（ID最小），不能接管团队
+    intruder = TeamSyncProtocol('team', 'wrong-key', peer_id=0, clock=lambda: net.now)
+    intruder._set_leader(0)
+    forged = intruder._heartbeat(net.now)
+    rejected = follower.messages_rejected
+    assert follower.receive(forged, now=net.now) == []
+    assert follower.messages_rejected == rejected + 1
+    assert follower.leader_id == leader.peer_id
+
+    # 篡改负责人的计划
+    data = leader._heartbeat(net.now)
+    tampered = data[:TAG_BYTES] + data[TAG_BYTES:].replace(b'"leader":true', b'"leader":null')
+    follower.receive(tampered, now=net.now)
+    assert follower.messages_rejected == rejected + 2
+
+    # 重放已经收到过的消息
+    net.send(leader, leader.set_local_schedule(leader.clock() + 600, 300))
+    net.run(1)
+    old = leader._heartbeat(net.now)
+    follower.receive(old, now=net.now)
+    before = follower.break_at
+    net.send(leader, leader.set_local_schedule(leader.clock() + 900, 300))
+    net.run(1)
+    assert follower.break_at != before
+    follower.receive(old, now=net.now)
+    assert follower.messages_rejected == rejected + 3
+
+
+def test_key_required():
+    with pytest.raises(ValueError):
+        TeamSyncProtocol('team', '')
+
+
+def test_udp_loopback(qapp, monkeypatch):
+    """两个实例通过本机组播和单播完成选举、时钟测量和计划对齐"""
+    import time
+    from conftest import process_events
+    from core.team_sync import TeamSync
+    for name, value in (('HEARTBEAT_INTERVAL', 0.2), ('PEER_TIMEOUT', 1.0),
+                        ('ELECTION_WINDOW', 0.5), ('FAST_PING_INTERVAL', 0.05)):
+        monkeypatch.setattr(TeamSyncProtocol, name, value)
+    port = random.randint(47400, 47900)
+    first, second = TeamSync('team', KEY, port=port), TeamSync('team', KEY, port=port)
+    outsider = TeamSync('team', 'other-key', port=port)
+    try:
+        if not (first.start() and second.start() and outsider.start()):
+            pytest.skip('不支持组播')
+        if not process_events(lambda: first.is_leader() != second.is_leader() and
+                              min(first.protocol.synced(), second.protocol.synced()), timeout=10):
+            pytest.skip('组播消息无法送达')
+        leader, follower = (first, second) if first.is_leader() else (second, first)
+        scheduled = []
+        follower.break_scheduled.connect(lambda at, seconds: scheduled.append(at))
+        break_at = time.time() + 600
+        leader.set_local_schedule(break_at, 300)
+        assert process_events(lambda: scheduled, timeout=5)
+        assert abs(scheduled[0] - break_at) < 0.05
+        # 密钥不同的实例收不到可用的消息，自己成为另一个“团队”的负责人
+        assert outsider.protocol.messages_received == 0
+        assert outsider.protocol.messages_rejected > 0
+    finally:
+        for sync in (first, second, outsider):
+            sync.stop()
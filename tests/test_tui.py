@@ -0,0 +1,135 @@
+"""终端界面使用与图形界面相同的状态机（core.session）和启动流程（core.app）"""
+import io
+import json
+import pytest
+from core.clock import VirtualClock
+from tui import TerminalFrontend
+
+
+class FakeTerminal:
+    def __init__(self, width=80, height=24):
+        self.out = io.StringIO()
+        self.width, self.height = width, height
+
+    def size(self):
+        return self.width, self.height
+
+
+@pytest.fixture
+def clock():
+    return VirtualClock()
+
+
+@pytest.fixture
+def frontend(qapp, clock):
+    config = {'work_duration': 60, 'break_duration': 10, 'schedules': [], 'presentation_defer': True}
+    frontend = TerminalFrontend(config, FakeTerminal(), clock=clock)
+    frontend.session.start_work()
+    yield frontend
+    frontend.close()
+
+
+def test_late_tick_still_rings(frontend, clock):
+    """跳过了剩余60秒的那次刷新，终端仍然响铃且只响一次"""
+    timer = frontend.session.timer
+    clock.advance(60 * 60 - 62)
+    timer.timer.stop()
+    clock.advance(4)
+    timer.timer.start(1000)
+    clock.advance(30)
+    assert frontend.terminal.out.getvalue().count('\a') == 1
+
+
+def test_presentation_defers_break(frontend, clock):
+    session = frontend.session
+    session.presentation.active = True
+    clock.advance(60 * 60)
+    assert session.phase == 'deferred'
+    assert session.get_status()['phase'] == 'deferred'
+    assert '推迟' in frontend.terminal.out.getvalue()
+    session.presentation.active = False
+    session.on_presentation_changed(False)
+    assert session.phase == 'break'
+    frontend.on_key('esc')
+    assert session.phase == 'work'
+
+
+def test_main_applies_cached_policy(qapp, isolated, monkeypatch, clock):
+    pytest.importorskip('cryptography')
+    from core import policy
+    from core.app import AppCore
+    private_key = policy.generate_private_key()
+    source = 'https://example.invalid/policy.json'
+    bootstrap = isolated / 'policy.yaml'
+    bootstrap.write_text(f"source: {source}\npublic_key: {policy.public_key_text(private_key)}\n")
+    monkeypatch.setenv('TCYA_POLICY_FILE', str(bootstrap))
+    monkeypatch.setattr(policy.sys, 'platform', 'test')
+    document = policy.encode_document({'version': 1, 'settings': {'allow_escape': False}}, private_key)
+    (isolated / policy.CACHE_FILE).write_text(json.dumps({'source': source, 'document': document.decode()}))
+
+    core = AppCore()
+    frontend = TerminalFrontend(core.config, FakeTerminal(), clock=clock, core=core)
+    try:
+        assert core.config['allow_escape'] is False
+        frontend.session.start_work()
+        frontend.session.start_break()
+        frontend.on_key('esc')
+        assert frontend.session.phase == 'break'
+        assert '按 ESC' not in frontend.terminal.out.getvalue()
+    finally:
+        frontend.close()
+
+
+def test_terminal_eof_stops_input(qapp, isolated, monkeypatch):
+    """终端关闭后描述符一直可读：停止监视并退出，而不是让事件循环空转"""
+    import os
+    from PySide6.QtCore import QCoreApplication, QSocketNotifier
+    from conftest import process_events
+    from utils.terminal import Terminal
+    read_fd, write_fd = os.pipe()
+    os.set_blocking(read_fd, False)
+    terminal = Terminal(fd_in=read_fd, out=io.StringIO())
+    config = {'work_duration': 60, 'break_duration': 10, 'schedules': [], 'presentation_defer': True}
+    frontend = TerminalFrontend(config, terminal, clock=VirtualClock())
+    quits = []
+    monkeypatch.setattr(QCoreApplication, 'quit', lambda: quits.append(True))
+    notifier = QSocketNotifier(read_fd, QSocketNotifier.Read, frontend)
+    notifier.activated.connect(frontend.on_input)
+    frontend._input_notifier = notifier
+    try:
+        frontend.session.start_work()
+        os.write(write_fd, b'p')
+        assert process_events(lambda: frontend.session.is_paused)
+        assert not terminal.closed and quits == []
+        os.close(write_fd)
+        assert process_events(lambda: quits)
+        assert terminal.closed and not notifier.isEnabled()
+        process_events(timeout=0.05)
+        assert quits == [True]
+    finally:
+        frontend.close()
+        os.close(read_fd)
+
+
+def test_main_reports_running_instance(qapp, isolated, monkeypatch, capsys):
+    """控制接口已被占用时，恢复终端之后提示已有实例在运行"""
+    import tui
+    from core.control_server import ControlServer
+
+    class StubTerminal(FakeTerminal):
+        available = staticmethod(lambda: True)
+
+        def enter(self):
+            pass
+
+        def exit(self):
+            pass
+
+    monkeypatch.setattr(tui, 'Terminal', StubTerminal)
+    server = ControlServer(lambda command: {'ok': True})
+    try:
+        assert server.listen()
+        assert tui.main() == 1
+        assert '已有实例在运行' in capsys.readouterr().err
+    finally:
+        server.close()
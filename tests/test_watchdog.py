@@ -0,0 +1,43 @@
+"""GUI线程卡顿看门狗：发现卡顿、记录主线程调用栈和卡顿时长"""
+import time
+import logging
+from conftest import process_events
+from utils.watchdog import StallWatchdog
+
+
+def block_gui_thread(seconds):
+    time.sleep(seconds)
+
+
+def test_stall_detected_with_stack(qapp, isolated):
+    log_file = isolated / 'logs' / 'stall.log'
+    watchdog = StallWatchdog(threshold_ms=100, log_file=str(log_file))
+    watchdog.start()
+    try:
+        process_events(timeout=0.2)
+        assert watchdog.stall_count == 0
+        assert not log_file.exists()
+        block_gui_thread(0.5)
+        # 心跳恢复后记录卡顿时长
+        assert process_events(lambda: watchdog.last_stall_ms > 0)
+    finally:
+        watchdog.stop()
+    stats = watchdog.get_stats()
+    assert stats['stall_count'] == 1 and stats['threshold_ms'] == 100
+    assert 300 < stats['max_stall_ms'] < 2000
+    content = log_file.read_text(encoding='utf-8')
+    assert '检测到GUI线程卡顿 #1' in content
+    # 主线程调用栈停在阻塞的函数中
+    assert 'in block_gui_thread' in content and 'time.sleep(seconds)' in content
+    assert 'GUI线程卡顿结束' in content
+
+
+def test_log_file_error_reported(qapp, isolated, caplog):
+    (isolated / 'logs').write_text('')
+    watchdog = StallWatchdog(log_file=str(isolated / 'logs' / 'stall.log'))
+    with caplog.at_level(logging.ERROR):
+        stall_logger = watchdog._get_logger()
+    # 卡顿日志不可用时，错误通过看门狗的logger记录
+    assert [record.name for record in caplog.records] == ['takecareyourass.watchdog']
+    assert '创建卡顿日志失败' in caplog.records[0].getMessage()
+    assert watchdog._get_logger() is stall_logger
@@ -0,0 +1,235 @@
+"""Take Care Your Ass 终端界面（SSH、tmux 等没有图形界面的会话）
+
+    python main.py --tui
+
+与图形界面共用启动流程（core.app：配置、管理员策略、状态文件、HTTP接口、团队同步和历史记录）
+和工作/休息状态机（core.session），在终端底部显示倒计时状态行，休息时切换为占满整个终端的休息画面。
+只输出变化的单元格；计时器每秒触发一次，按键和信号通过文件描述符通知，两次刷新之间不占用CPU。
+同时提供本地控制接口，ctl.py 和 statusbar.py（例如 tmux 状态栏）可以照常使用。
+
+按键：p 暂停/继续，s 跳过（短休息中为稍后提醒），+/- 增减10分钟，q 退出；休息中 ESC 结束休息。
+"""
+import sys
+import signal
+import socket
+from PySide6.QtCore import QCoreApplication, QObject, QSocketNotifier
+from core.app import AppCore
+from core.session import BreakSession
+from core.control_server import ControlServer
+from core.policy import snooze_allowed
+from utils.terminal import Terminal, Screen, Canvas, text_width
+from utils.log import get_logger
+
+logger = get_logger('tui')
+
+PHASE_NAMES = {'work': '工作', 'deferred': '推迟', 'break': '休息'}
+WORK_HINT = 'p 暂停  s 跳过  +/- 10分钟  q 退出'
+# 管理员策略禁止推迟休息时只能减少时间
+LOCKED_HINT = '- 减少10分钟  q 退出'
+
+
+def format_time(seconds):
+    seconds = max(0, int(seconds))
+    return f"{seconds // 60:02d}:{seconds % 60:02d}"
+
+
+class TerminalFrontend(QObject):
+    STATUS_STYLE = '7'  # 反显
+    PAUSED_STYLE = '30;43'
+    TEXT_STYLE = '1;97'
+
+    def __init__(self, config, terminal, clock=None, core=None, parent=None):
+        super().__init__(parent)
+        self.config = config
+        self.terminal = terminal
+        self.screen = Screen(terminal.out)
+        self.core = core
+
+        # 状态机与图形界面共用，这里只负责绘制和按键
+        self.session = BreakSession(clock=clock, parent=self)
+        self.session.status_changed.connect(self.redraw)
+        self.session.short_break_started.connect(lambda event: self.redraw())
+        self.session.short_break_tick.connect(lambda seconds: self.redraw())
+        self.session.short_break_ended.connect(self.redraw)
+        self.session.one_minute_warning.connect(self.on_one_minute_warning)
+        if core is not None:
+            core.attach(self.session)
+            core.policy_changed.connect(self.on_policy_changed)
+        else:
+            self.session.set_config(config)
+
+        self.control_server = ControlServer(parent=self)
+        self._notifiers = []
+        self._input_notifier = None
+        self._wake_r = self._wake_w = None
+
+    def start(self):
+        """开始计时；已有实例在运行时返回False"""
+        if self.core is not None:
+            self.control_server.handler = self.core.handle_command
+            if not self.control_server.listen() and self.control_server.in_use:
+                return False
+            self.core.start()
+        self._watch_input()
+        logger.info("终端界面已启动")
+        self.session.start_work()
+        return True
+
+    def _watch_input(self):
+        notifier = QSocketNotifier(self.terminal.fd_in, QSocketNotifier.Read, self)
+        notifier.activated.connect(self.on_input)
+        self._notifiers.append(notifier)
+        self._input_notifier = notifier
+        # 信号处理函数只有在解释器取得控制权时才会运行，用 wakeup fd 让事件循环立即得到通知
+        self._wake_r, self._wake_w = socket.socketpair()
+        for sock in (self._wake_r, self._wake_w):
+            sock.setblocking(False)
+        signal.set_wakeup_fd(self._wake_w.fileno())
+        for signum in (signal.SIGWINCH, signal.SIGINT, signal.SIGTERM, signal.SIGHUP):
+            signal.signal(signum, lambda *args: None)
+        notifier = QSocketNotifier(self._wake_r.fileno(), QSocketNotifier.Read, self)
+        notifier.activated.connect(self.on_signal)
+        self._notifiers.append(notifier)
+
+    def close(self):
+        self.session.stop()
+        self.control_server.close()
+        if self.core is not None:
+            self.core.close()
+        if self._wake_w is not None:
+            signal.set_wakeup_fd(-1)
+            self._wake_r.close()
+            self._wake_w.close()
+            self._wake_r = self._wake_w = None
+
+    def on_policy_changed(self, policy):
+        """管理员策略更新：配置已重新合并，立即生效"""
+        self.core.apply_config()
+        self.redraw()
+
+    def on_one_minute_warning(self):
+        # 终端响铃，tmux 会在窗口列表中标记
+        self.terminal.out.write('\a')
+
+    # 输入
+
+    def on_input(self):
+        for key in self.terminal.read_keys():
+            self.on_key(key)
+        if self.terminal.closed:
+            # 终端已关闭：描述符一直可读，继续监视会让事件循环空转
+            if self._input_notifier is not None:
+                self._input_notifier.setEnabled(False)
+            logger.info("终端已关闭，退出")
+            QCoreApplication.quit()
+
+    def on_key(self, key):
+        session = self.session
+        if session.short_break is not None:
+            if key == 'esc':
+                session.escape_short_break()
+            elif key in ('s', 'S'):
+                session.snooze_short_break()
+            return
+        if session.phase == 'break':
+            if key == 'esc':
+                session.escape_break()
+            return
+        if key in ('p', 'P', ' '):
+            session.toggle_pause()
+        elif key in ('s', 'S'):
+            session.skip()
+        elif key in ('+', '='):
+            session.increase_time()
+        elif key == '-':
+            session.decrease_time()
+        elif key in ('q', 'Q'):
+            QCoreApplication.quit()
+
+    def on_signal(self):
+        try:
+            data = self._wake_r.recv(64)
+        except OSError:
+            return
+        for signum in data:
+            if signum == signal.SIGWINCH:
+                self.screen.invalidate()
+                self.redraw()
+            elif signum in (signal.SIGINT, signal.SIGTERM, signal.SIGHUP):
+                QCoreApplication.quit()
+
+    # 绘制
+
+    def redraw(self):
+        session = self.session
+        width, height = self.terminal.size()
+        if session.short_break is not None:
+            canvas = self.draw_break(width, height, session.short_break['title'],
+                                     session.short_timer.remaining_seconds, snooze=True)
+        elif session.phase == 'break':
+            canvas = self.draw_break(width, height, '休息时间', session.break_timer.remaining_seconds)
+        else:
+            canvas = self.draw_status(width, height)
+        self.screen.render(canvas)
+
+    def draw_status(self, width, height):
+        """工作中（或休息被推迟时）：最后一行显示状态"""
+        status = self.session.get_status()
+        canvas = Canvas(width, height)
+        style = self.PAUSED_STYLE if status['paused'] else self.STATUS_STYLE
+        row = height - 1
+        canvas.fill_row(row, style)
+        text = f" {PHASE_NAMES[status['phase']]} {format_time(status['remaining_seconds'])}"
+        if status['paused']:
+            text += ' 已暂停'
+        canvas.put(row, 0, text, style)
+        hint = WORK_HINT if self.session.delay_allowed() else LOCKED_HINT
+        if text_width(text) + text_width(hint) + 2 <= width:
+            canvas.put(row, width - text_width(hint) - 1, hint, style)
+        return canvas
+
+    def draw_break(self, width, height, title, remaining, snooze=False):
+        """休息中：占满终端的纯色画面，与图形界面的遮罩层相同"""
+        r, g, b = self.config.get('overlay_color', [144, 238, 144, 128])[:3]
+        background = f'48;2;{r};{g};{b}'
+        canvas = Canvas(width, height, background)
+        text_style = f'{self.TEXT_STYLE};{background}'
+        middle = height // 2
+        canvas.center(middle - 1 if height > 2 else 0, f"{title}: {format_time(remaining)}", text_style)
+        allow_escape = self.config.get('allow_escape', True)
+        snooze = snooze and snooze_allowed(self.config)
+        if snooze and allow_escape:
+            hint = '按 ESC 键结束休息，按 S 键稍后提醒'
+        elif snooze:
+            hint = '按 S 键稍后提醒'
+        elif allow_escape:
+            hint = '按 ESC 键结束休息'
+        else:
+            hint = ''
+        if hint and height > 2:
+            canvas.center(middle + 1, hint, background)
+        return canvas
+
+
+def main():
+    if not Terminal.available():
+        sys.stderr.write("终端界面需要在POSIX终端中运行\n")
+        return 2
+    app = QCoreApplication.instance() or QCoreApplication(sys.argv[:1])
+    core = AppCore()
+    terminal = Terminal()
+    frontend = TerminalFrontend(core.config, terminal, core=core)
+    terminal.enter()
+    try:
+        if frontend.start():
+            return app.exec()
+    finally:
+        frontend.close()
+        terminal.exit()
+    # 恢复终端之后再输出，否则会随备用屏幕一起被清除
+    sys.stderr.write("已有实例在运行，可以使用 ctl.py 控制\n")
+    return 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
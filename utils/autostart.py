@@ -1,13 +1,28 @@
 import os
 import sys
+import shlex
+import shutil
 import platform
+import subprocess
 from pathlib import Path
+from utils.log import get_logger
+from utils.sd_notify import UNIT_ENV, STARTUP_WEIGHT
+
+logger = get_logger('autostart')
+
+# 自启动时附加的参数，已有实例在运行时不打开设置窗口（见 main.py）
+AUTOSTART_ARG = '--autostart'
 
 class AutoStartManager:
-    def __init__(self):
+    def __init__(self, backend='auto', delay=0, random_delay=0):
         self.app_name = "TakeCareAss"
         self.is_windows = platform.system().lower() == "windows"
         self.is_linux = platform.system().lower() == "linux"
+        # Linux自启方式：auto（优先systemd用户单元）、systemd、desktop
+        self.backend = backend
+        # 登录后延迟启动的秒数，以及额外的随机延迟上限，用于错开大量用户同时登录时的启动高峰
+        self.delay = max(0, int(delay))
+        self.random_delay = max(0, int(random_delay))
         if self.is_windows:
             import winreg
             import win32com.client
@@ -16,8 +31,18 @@ class AutoStartManager:
             self.startup_folder = self._get_startup_folder()
             self.shortcut_path = os.path.join(self.startup_folder, f"{self.app_name}.lnk")
         elif self.is_linux:
-            self.autostart_dir = os.path.expanduser("~/.config/autostart")
+            config_home = os.environ.get('XDG_CONFIG_HOME') or os.path.expanduser("~/.config")
+            self.autostart_dir = os.path.join(config_home, "autostart")
             self.desktop_file = os.path.join(self.autostart_dir, f"{self.app_name}.desktop")
+            self.systemd_dir = os.path.join(config_home, "systemd", "user")
+            self.service_file = os.path.join(self.systemd_dir, f"{self.app_name}.service")
+            self.timer_file = os.path.join(self.systemd_dir, f"{self.app_name}.timer")
+            # 定时器随图形会话启动，OnActiveSec 从登录时开始计算
+            self.timer_link = os.path.join(self.systemd_dir, "graphical-session.target.wants",
+                                           f"{self.app_name}.timer")
+            # 旧版本安装在 timers.target 下的链接（OnStartupSec 从用户管理器启动时计算）
+            self.legacy_timer_link = os.path.join(self.systemd_dir, "timers.target.wants",
+                                                  f"{self.app_name}.timer")
 
     def _get_startup_folder(self):
         """获取Windows启动文件夹路径"""
@@ -41,11 +66,12 @@ class AutoStartManager:
             shell = self.win32com.client.Dispatch("WScript.Shell")
             shortcut = shell.CreateShortCut(self.shortcut_path)
             shortcut.Targetpath = app_path
+            shortcut.Arguments = AUTOSTART_ARG
             shortcut.WorkingDirectory = os.path.dirname(app_path)
             shortcut.save()
             return True
         except Exception as e:
-            print(f"创建快捷方式失败: {str(e)}")
+            logger.error(f"创建快捷方式失败: {str(e)}")
             return False
 
     def remove_shortcut(self):
@@ -55,7 +81,7 @@ class AutoStartManager:
                 os.remove(self.shortcut_path)
             return True
         except Exception as e:
-            print(f"删除快捷方式失败: {str(e)}")
+            logger.error(f"删除快捷方式失败: {str(e)}")
             return False
 
     def create_desktop_file(self):
@@ -66,12 +92,15 @@ class AutoStartManager:
             else:
                 app_path = os.path.abspath(sys.argv[0])
             os.makedirs(self.autostart_dir, exist_ok=True)
-            content = f"""[Desktop Entry]\nType=Application\nExec={app_path}\nHidden=false\nNoDisplay=false\nX-GNOME-Autostart-enabled=true\nName={self.app_name}\n"""
+            content = f"""[Desktop Entry]\nType=Application\nExec={app_path} {AUTOSTART_ARG}\nHidden=false\nNoDisplay=false\nX-GNOME-Autostart-enabled=true\nName={self.app_name}\n"""
+            if self.delay:
+                # GNOME等桌面环境支持的延迟启动
+                content += f"X-GNOME-Autostart-Delay={self.delay}\n"
             with open(self.desktop_file, 'w', encoding='utf-8') as f:
                 f.write(content)
             return True
         except Exception as e:
-            print(f"创建.desktop文件失败: {str(e)}")
+            logger.error(f"创建.desktop文件失败: {str(e)}")
             return False
 
     def remove_desktop_file(self):
@@ -81,14 +110,119 @@ class AutoStartManager:
                 os.remove(self.desktop_file)
             return True
         except Exception as e:
-            print(f"删除.desktop文件失败: {str(e)}")
+            logger.error(f"删除.desktop文件失败: {str(e)}")
+            return False
+
+    def systemd_available(self):
+        """当前系统是否由systemd管理且可以使用用户单元"""
+        return (self.is_linux and os.path.isdir("/run/systemd/system")
+                and shutil.which("systemctl") is not None)
+
+    def use_systemd(self):
+        if self.backend == 'desktop':
+            return False
+        if self.backend == 'systemd':
+            return True
+        return self.systemd_available()
+
+    def _exec_command(self):
+        """systemd单元中使用的启动命令"""
+        if getattr(sys, 'frozen', False):
+            args = [sys.executable]
+        else:
+            args = [sys.executable, os.path.abspath(sys.argv[0])]
+        return ' '.join(shlex.quote(arg) for arg in args + [AUTOSTART_ARG])
+
+    def service_content(self):
+        """生成systemd服务单元内容"""
+        working_dir = os.getcwd()
+        return f"""[Unit]
+Description=Take Care Your Ass
+PartOf=graphical-session.target
+After=graphical-session.target
+
+[Service]
+# 托盘图标创建完成后程序通过sd_notify报告就绪
+Type=notify
+NotifyAccess=main
+ExecStart={self._exec_command()}
+WorkingDirectory={working_dir}
+Restart=on-failure
+RestartSec=10
+WatchdogSec=60
+# 定时器在图形会话启动之后才拉起服务，此时用户管理器早已启动完成，只在其启动期间生效的权重设置不起作用；
+# 因此以低CPU和IO权重启动，程序报告就绪后用 systemctl set-property --runtime 恢复默认权重
+Environment={UNIT_ENV}={self.app_name}.service
+CPUWeight={STARTUP_WEIGHT}
+IOWeight={STARTUP_WEIGHT}
+"""
+
+    def timer_content(self):
+        """生成延迟启动的systemd定时器单元内容"""
+        return f"""[Unit]
+Description=Delayed start of Take Care Your Ass
+PartOf=graphical-session.target
+After=graphical-session.target
+
+[Timer]
+# 从定时器激活（图形会话启动）开始计时，而不是从用户管理器启动时（启用linger时可能早于登录）
+OnActiveSec={max(1, self.delay)}
+RandomizedDelaySec={self.random_delay}
+AccuracySec=1s
+Unit={self.app_name}.service
+
+[Install]
+WantedBy=graphical-session.target
+"""
+
+    def create_systemd_unit(self):
+        """创建systemd用户服务及延迟启动定时器"""
+        try:
+            os.makedirs(os.path.dirname(self.timer_link), exist_ok=True)
+            with open(self.service_file, 'w', encoding='utf-8') as f:
+                f.write(self.service_content())
+            with open(self.timer_file, 'w', encoding='utf-8') as f:
+                f.write(self.timer_content())
+            # 直接创建启用链接，等价于 systemctl --user enable，无需等待子进程
+            for path in (self.timer_link, self.legacy_timer_link):
+                if os.path.lexists(path):
+                    os.remove(path)
+            os.symlink(os.path.join("..", f"{self.app_name}.timer"), self.timer_link)
+            self._daemon_reload()
+            return True
+        except Exception as e:
+            logger.error(f"创建systemd用户单元失败: {str(e)}")
+            return False
+
+    def remove_systemd_unit(self):
+        """删除systemd用户服务及定时器"""
+        try:
+            for path in (self.timer_link, self.legacy_timer_link, self.timer_file, self.service_file):
+                if os.path.lexists(path):
+                    os.remove(path)
+            self._daemon_reload()
+            return True
+        except Exception as e:
+            logger.error(f"删除systemd用户单元失败: {str(e)}")
             return False
 
+    def _daemon_reload(self):
+        """异步通知systemd重新加载单元，不阻塞GUI线程"""
+        if not self.systemd_available():
+            return
+        try:
+            subprocess.Popen(["systemctl", "--user", "daemon-reload"],
+                             stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL,
+                             stderr=subprocess.DEVNULL)
+        except OSError as e:
+            logger.error(f"重新加载systemd单元失败: {str(e)}")
+
     def is_autostart_enabled(self):
         if self.is_windows:
             return os.path.exists(self.shortcut_path)
         elif self.is_linux:
-            return os.path.exists(self.desktop_file)
+            return (os.path.exists(self.desktop_file) or os.path.lexists(self.timer_link)
+                    or os.path.lexists(self.legacy_timer_link))
         return False
 
     def set_autostart(self, enable):
@@ -99,7 +233,10 @@ class AutoStartManager:
                 return self.remove_shortcut()
         elif self.is_linux:
             if enable:
-                return self.create_desktop_file()
+                # 两种方式只保留一种，避免重复启动
+                if self.use_systemd():
+                    return self.create_systemd_unit() and self.remove_desktop_file()
+                return self.create_desktop_file() and self.remove_systemd_unit()
             else:
-                return self.remove_desktop_file()
+                return self.remove_desktop_file() and self.remove_systemd_unit()
         return False 
\ No newline at end of file
@@ -0,0 +1,152 @@
+"""本地进程间通信
+
+运行中的实例通过本地套接字（Linux/macOS为Unix域套接字，Windows为命名管道）
+接收命令。本模块只依赖标准库，不导入Qt或YAML，供第二个实例和命令行客户端使用。
+
+协议：客户端发送一行JSON请求 {"command": "..."}，服务端返回一行JSON响应。
+为了让命令行客户端尽快返回，这里尽量避免在模块级导入较重的标准库模块。
+"""
+import os
+import json
+import time
+
+APP_NAME = "TakeCareAss"
+
+# 支持的命令
+COMMANDS = (
+    'ping',           # 检测实例是否存在
+    'status',         # 查询当前状态
+    'show_settings',  # 打开设置窗口
+    'pause',          # 暂停计时
+    'resume',         # 继续计时
+    'toggle',         # 切换暂停/继续
+    'skip',           # 跳过休息（休息中立即结束，工作中重新开始本轮工作计时）
+    'increase',       # 增加10分钟
+    'decrease',       # 减少10分钟
+)
+
+
+def _user_tag():
+    user = os.environ.get('USER') or os.environ.get('USERNAME') or os.environ.get('LOGNAME')
+    if not user:
+        user = str(os.getuid()) if hasattr(os, 'getuid') else 'user'
+    return ''.join(c if c.isalnum() or c in '_.-' else '_' for c in user)
+
+
+def runtime_path(suffix):
+    """运行时文件的完整路径，优先放在 $XDG_RUNTIME_DIR 下"""
+    runtime_dir = os.environ.get('XDG_RUNTIME_DIR')
+    if runtime_dir and os.path.isdir(runtime_dir):
+        base = runtime_dir
+    else:
+        import tempfile
+        base = tempfile.gettempdir()
+    return os.path.join(base, f"{APP_NAME}-{_user_tag()}{suffix}")
+
+
+def server_name():
+    """获取本地服务名，Windows返回管道名，其他系统返回套接字文件的完整路径"""
+    if os.name == 'nt':
+        return f"{APP_NAME}-{_user_tag()}"
+    return runtime_path('.sock')
+
+
+def encode_message(message):
+    return (json.dumps(message, ensure_ascii=False) + '\n').encode('utf-8')
+
+
+def decode_message(data):
+    return json.loads(data.decode('utf-8'))
+
+
+class InstanceNotResponding(Exception):
+    """实例存在（套接字可以连接），但没有在超时前返回响应，例如正在启动或GUI线程忙碌"""
+
+
+def send_command(command, timeout=1.0, name=None):
+    """向运行中的实例发送命令
+
+    返回实例的响应（dict）；没有运行中的实例时返回None。
+    连接成功但超时未响应时抛出 InstanceNotResponding，调用方不能把它当作没有实例。
+    """
+    name = name or server_name()
+    request = encode_message({'command': command})
+    try:
+        if os.name == 'nt':
+            return _send_pipe(name, request, timeout)
+        return _send_socket(name, request, timeout)
+    except (FileNotFoundError, ConnectionRefusedError):
+        return None
+    except (OSError, ValueError) as e:
+        raise InstanceNotResponding(str(e) or type(e).__name__)
+
+
+def probe(name=None, timeout=1.0):
+    """是否有进程在监听本地服务；返回False时可以清理残留的套接字文件
+
+    只有连接被拒绝或套接字不存在才返回False，连接超时（实例忙碌）视为在运行。
+    """
+    name = name or server_name()
+    if os.name == 'nt':
+        # 命名管道随进程退出自动删除，不存在残留
+        return os.path.exists(r'\\.\pipe' + '\\' + name)
+    import socket
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.settimeout(timeout)
+        sock.connect(name)
+        return True
+    except (FileNotFoundError, ConnectionRefusedError):
+        return False
+    except OSError:
+        return True
+    finally:
+        sock.close()
+
+
+def _send_socket(path, request, timeout):
+    import socket
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.settimeout(timeout)
+        sock.connect(path)
+        sock.sendall(request)
+        data = b''
+        while not data.endswith(b'\n'):
+            chunk = sock.recv(4096)
+            if not chunk:
+                break
+            data += chunk
+        if not data:
+            # 已连接但对方没有响应就关闭了连接
+            raise ConnectionResetError("实例关闭了连接")
+        return decode_message(data)
+    finally:
+        sock.close()
+
+
+def _send_pipe(name, request, timeout):
+    path = r'\\.\pipe' + '\\' + name
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            pipe = open(path, 'r+b', buffering=0)
+            break
+        except FileNotFoundError:
+            return None
+        except OSError:
+            # 管道实例全部忙碌，稍后重试
+            if time.monotonic() >= deadline:
+                raise
+            time.sleep(0.01)
+    with pipe:
+        pipe.write(request)
+        data = b''
+        while not data.endswith(b'\n'):
+            chunk = pipe.read(4096)
+            if not chunk:
+                break
+            data += chunk
+    if not data:
+        raise ConnectionResetError("实例关闭了连接")
+    return decode_message(data)
@@ -0,0 +1,249 @@
+"""结构化日志
+
+各模块通过 get_logger('子系统') 获取标准库 logger。setup() 之后：
+- 调用线程（通常是GUI线程）只把 LogRecord 追加到有界的 deque 中，不格式化、不做IO、不加锁；
+  写入线程来不及处理时丢弃最旧的记录，不会阻塞调用方。
+- 后台线程定期取出记录，格式化为JSON行写入滚动日志文件；有控制台时同时把警告输出到stderr。
+- 最近的若干条记录保留在内存中，程序崩溃或GUI线程卡顿时写入 dump-<原因>.jsonl。
+- 每个子系统可以单独设置级别，例如 {'default': 'INFO', 'team_sync': 'DEBUG'}。
+
+未调用 setup() 时（命令行工具、基准测试）记录按标准库的默认行为处理，警告及以上输出到stderr。
+"""
+import os
+import sys
+import json
+import atexit
+import time
+import logging
+import threading
+import traceback
+from collections import deque
+from logging.handlers import RotatingFileHandler
+
+ROOT_LOGGER = 'takecareyourass'
+LOG_DIR = 'logs'
+
+_pipeline = None
+
+
+def get_logger(subsystem):
+    """获取子系统的logger"""
+    return logging.getLogger(f'{ROOT_LOGGER}.{subsystem}')
+
+
+class JsonFormatter(logging.Formatter):
+    """每条记录格式化为一行JSON"""
+
+    def format(self, record):
+        entry = {
+            'ts': time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(record.created)) + f'.{int(record.msecs):03d}',
+            'level': record.levelname,
+            'subsystem': record.name[len(ROOT_LOGGER) + 1:] if record.name.startswith(ROOT_LOGGER + '.') else record.name,
+            'msg': record.getMessage(),
+            'thread': record.threadName,
+        }
+        fields = getattr(record, 'fields', None)
+        if fields:
+            entry.update(fields)
+        if record.exc_text:
+            entry['exc'] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class RingBufferHandler(logging.Handler):
+    """只把记录追加到 deque，deque.append 在CPython中是原子的，不需要加锁"""
+
+    def __init__(self, capacity, recent):
+        super().__init__()
+        self.pending = deque(maxlen=capacity)
+        self.recent = deque(maxlen=recent)
+        self.dropped = 0
+
+    def handle(self, record):
+        # 不获取Handler自带的锁
+        if not self.filter(record):
+            return False
+        self.emit(record)
+        return True
+
+    def emit(self, record):
+        if record.exc_info:
+            # 异常很少见，立即格式化，避免缓冲区中的记录让调用栈上的对象一直存活
+            record.exc_text = ''.join(traceback.format_exception(*record.exc_info))
+            record.exc_info = None
+        if len(self.pending) == self.pending.maxlen:
+            self.dropped += 1  # 只用于统计，不需要精确
+        self.pending.append(record)
+        self.recent.append(record)
+
+    def snapshot(self):
+        """最近的记录（可在任意线程调用）"""
+        for _ in range(3):
+            try:
+                return list(self.recent)
+            except RuntimeError:
+                # 复制期间其他线程追加了记录
+                continue
+        return []
+
+
+class LogPipeline:
+    FLUSH_INTERVAL = 0.25
+
+    def __init__(self, log_dir=LOG_DIR, levels=None, max_bytes=1024 * 1024, backup_count=3,
+                 capacity=10000, recent=500, console=True):
+        self.log_dir = log_dir
+        self.buffer = RingBufferHandler(capacity, recent)
+        self.formatter = JsonFormatter()
+        self.handlers = []
+        try:
+            os.makedirs(log_dir, exist_ok=True)
+            file_handler = RotatingFileHandler(os.path.join(log_dir, 'app.jsonl'), maxBytes=max_bytes,
+                                               backupCount=backup_count, encoding='utf-8', delay=True)
+            file_handler.setFormatter(self.formatter)
+            self.handlers.append(file_handler)
+        except OSError as e:
+            if sys.stderr is not None:
+                sys.stderr.write(f"创建日志目录失败: {str(e)}\n")
+        # 以 --noconsole 打包时 sys.stderr 为 None
+        if console and sys.stderr is not None:
+            stream_handler = logging.StreamHandler(sys.stderr)
+            stream_handler.setLevel(logging.WARNING)
+            stream_handler.setFormatter(logging.Formatter('%(name)s %(levelname)s: %(message)s'))
+            self.handlers.append(stream_handler)
+
+        self.logger = logging.getLogger(ROOT_LOGGER)
+        self.logger.addHandler(self.buffer)
+        self.logger.propagate = False
+        self.set_levels(levels or {})
+
+        self._stop_event = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='LogWriter', daemon=True)
+        self._thread.start()
+
+    def set_levels(self, levels):
+        """设置各子系统的级别，'default' 对应未单独设置的子系统"""
+        self.logger.setLevel(_level(levels.get('default', 'INFO')))
+        for name in list(logging.Logger.manager.loggerDict):
+            if name.startswith(ROOT_LOGGER + '.'):
+                logging.getLogger(name).setLevel(logging.NOTSET)
+        for subsystem, level in levels.items():
+            if subsystem != 'default':
+                get_logger(subsystem).setLevel(_level(level))
+
+    def _run(self):
+        while not self._stop_event.wait(self.FLUSH_INTERVAL):
+            self.flush()
+        self.flush()
+
+    def flush(self):
+        """写出等待中的记录（在写入线程中调用）"""
+        pending = self.buffer.pending
+        written = False
+        while pending:
+            try:
+                record = pending.popleft()
+            except IndexError:
+                break
+            for handler in self.handlers:
+                if record.levelno >= handler.level:
+                    try:
+                        handler.handle(record)
+                    except Exception:
+                        handler.handleError(record)
+            written = True
+        if written:
+            for handler in self.handlers:
+                handler.flush()
+
+    def dump_recent(self, reason):
+        """把内存中最近的记录写入 dump-<reason>.jsonl，返回文件路径"""
+        path = os.path.join(self.log_dir, f'dump-{reason}.jsonl')
+        try:
+            with open(path, 'w', encoding='utf-8') as f:
+                for record in self.buffer.snapshot():
+                    f.write(self.formatter.format(record) + '\n')
+        except OSError:
+            return None
+        return path
+
+    def close(self):
+        self._stop_event.set()
+        self._thread.join(timeout=2)
+        self.logger.removeHandler(self.buffer)
+        self.logger.propagate = True
+        for handler in self.handlers:
+            handler.close()
+
+    def get_stats(self):
+        return {
+            'pending': len(self.buffer.pending),
+            'recent': len(self.buffer.recent),
+            'dropped': self.buffer.dropped,
+        }
+
+
+def _level(level):
+    if isinstance(level, int):
+        return level
+    value = logging.getLevelName(str(level).upper())
+    return value if isinstance(value, int) else logging.INFO
+
+
+def setup(log_dir=LOG_DIR, levels=None, **kwargs):
+    """启动日志写入线程并安装未捕获异常的处理，重复调用时只更新级别"""
+    global _pipeline
+    if _pipeline is not None:
+        _pipeline.set_levels(levels or {})
+        return _pipeline
+    _pipeline = LogPipeline(log_dir, levels, **kwargs)
+    _install_excepthooks()
+    atexit.register(shutdown)
+    return _pipeline
+
+
+def set_levels(levels):
+    if _pipeline is not None:
+        _pipeline.set_levels(levels or {})
+
+
+def dump_recent(reason):
+    """崩溃或卡顿时保存最近的记录，未启用时返回None"""
+    if _pipeline is None:
+        return None
+    return _pipeline.dump_recent(reason)
+
+
+def get_stats():
+    """等待写入、保留在内存中和被丢弃的记录数，未启用时返回None"""
+    if _pipeline is None:
+        return None
+    return _pipeline.get_stats()
+
+
+def shutdown():
+    global _pipeline
+    if _pipeline is not None:
+        _pipeline.close()
+        _pipeline = None
+
+
+def _install_excepthooks():
+    logger = get_logger('crash')
+    previous_hook = sys.excepthook
+    previous_thread_hook = threading.excepthook
+
+    def excepthook(exc_type, exc, tb):
+        logger.critical("未捕获的异常", exc_info=(exc_type, exc, tb))
+        dump_recent('crash')
+        previous_hook(exc_type, exc, tb)
+
+    def thread_excepthook(args):
+        if args.exc_type is not SystemExit:
+            logger.critical(f"线程 {args.thread.name if args.thread else '?'} 中未捕获的异常",
+                            exc_info=(args.exc_type, args.exc_value, args.exc_traceback))
+            dump_recent('crash')
+        previous_thread_hook(args)
+
+    sys.excepthook = excepthook
+    threading.excepthook = thread_excepthook
@@ -0,0 +1,107 @@
+"""进程内存：读取常驻内存（RSS），把空闲的堆内存归还给系统
+
+Python和Qt释放的小块内存通常留在glibc的堆里，RSS不会下降；
+Linux上调用 malloc_trim 可以把堆顶和空闲页归还给系统。其他平台只读取RSS。
+"""
+import gc
+import os
+import sys
+import ctypes
+import ctypes.util
+
+_libc = None
+_libc_loaded = False
+
+
+def _glibc():
+    """加载glibc，非glibc平台（musl、macOS、Windows）返回None"""
+    global _libc, _libc_loaded
+    if not _libc_loaded:
+        _libc_loaded = True
+        if sys.platform.startswith('linux'):
+            try:
+                libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6')
+                libc.malloc_trim.argtypes = [ctypes.c_size_t]
+                libc.malloc_trim.restype = ctypes.c_int
+                _libc = libc
+            except (OSError, AttributeError):
+                _libc = None
+    return _libc
+
+
+def rss_bytes():
+    """当前常驻内存（字节），无法获取时返回None"""
+    if sys.platform.startswith('linux'):
+        try:
+            with open('/proc/self/statm', 'rb') as f:
+                return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+        except (OSError, ValueError, IndexError):
+            return None
+    if sys.platform == 'win32':
+        return _windows_memory_info('WorkingSetSize')
+    return None
+
+
+def peak_rss_bytes():
+    """进程启动以来的最大常驻内存（字节），无法获取时返回None"""
+    if sys.platform == 'win32':
+        return _windows_memory_info('PeakWorkingSetSize')
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS以字节为单位，Linux以KB为单位
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def _windows_memory_info(field):
+    from ctypes import wintypes
+
+    class ProcessMemoryCounters(ctypes.Structure):
+        _fields_ = [
+            ('cb', wintypes.DWORD),
+            ('PageFaultCount', wintypes.DWORD),
+            ('PeakWorkingSetSize', ctypes.c_size_t),
+            ('WorkingSetSize', ctypes.c_size_t),
+            ('QuotaPeakPagedPoolUsage', ctypes.c_size_t),
+            ('QuotaPagedPoolUsage', ctypes.c_size_t),
+            ('QuotaPeakNonPagedPoolUsage', ctypes.c_size_t),
+            ('QuotaNonPagedPoolUsage', ctypes.c_size_t),
+            ('PagefileUsage', ctypes.c_size_t),
+            ('PeakPagefileUsage', ctypes.c_size_t),
+        ]
+
+    counters = ProcessMemoryCounters()
+    counters.cb = ctypes.sizeof(counters)
+    try:
+        process = ctypes.windll.kernel32.GetCurrentProcess()
+        if not ctypes.windll.psapi.GetProcessMemoryInfo(process, ctypes.byref(counters), counters.cb):
+            return None
+    except (AttributeError, OSError):
+        return None
+    return getattr(counters, field)
+
+
+def malloc_trim():
+    """把glibc堆中的空闲内存归还给系统，不支持时返回False"""
+    libc = _glibc()
+    if libc is None:
+        return False
+    return bool(libc.malloc_trim(0))
+
+
+def release():
+    """回收循环引用并归还空闲堆内存，返回释放前后的RSS"""
+    before = rss_bytes()
+    gc.collect()
+    malloc_trim()
+    return before, rss_bytes()
+
+
+def format_bytes(size):
+    if size is None:
+        return '未知'
+    if size < 1024 * 1024:
+        return f"{size / 1024:.0f} KB"
+    return f"{size / (1024 * 1024):.1f} MB"
@@ -0,0 +1,105 @@
+"""远程桌面会话检测
+
+VNC/RDP/X2Go 等远程会话中，每次重绘的区域都要经过网络传输。
+根据环境变量和会话类型判断当前是否为远程会话，返回原因（用于日志），本地会话返回None。
+查询 systemd-logind 需要启动 loginctl，启动时在后台线程中检测一次（start_detection），
+检测完成前只按环境变量判断，不阻塞GUI线程。
+"""
+import os
+import threading
+import subprocess
+from utils.log import get_logger
+
+logger = get_logger('remote_session')
+
+_UNKNOWN = object()
+_detected = _UNKNOWN  # 会话类型在进程运行期间不变，只检测一次
+_detect_thread = None
+_lock = threading.Lock()
+
+# 远程桌面软件在会话中设置的环境变量
+REMOTE_ENV_VARS = {
+    'X2GO_SESSION': 'X2Go',
+    'X2GO_AGENT_PID': 'X2Go',
+    'XRDP_SESSION': 'xrdp',
+    'XRDP_SOCKET_PATH': 'xrdp',
+    'NXSESSIONID': 'NX',
+    'VNCDESKTOP': 'VNC',
+    'CHROME_REMOTE_DESKTOP_DEFAULT_DESKTOP_SIZES': 'Chrome Remote Desktop',
+}
+
+
+def detect(environ=None, logind=True):
+    """检测远程会话，返回原因字符串或None；logind为False时不查询logind（不启动子进程）"""
+    environ = os.environ if environ is None else environ
+    if os.name == 'nt':
+        return _detect_windows(environ)
+    for name, reason in REMOTE_ENV_VARS.items():
+        if environ.get(name):
+            return reason
+    display = environ.get('DISPLAY', '')
+    if display and (environ.get('SSH_CONNECTION') or environ.get('SSH_CLIENT')):
+        # 通过SSH转发X11（DISPLAY=localhost:10.0）
+        if display.split(':')[0] not in ('', 'unix'):
+            return 'SSH X11转发'
+    session_id = environ.get('XDG_SESSION_ID')
+    if logind and session_id and _logind_remote(session_id):
+        return 'logind远程会话'
+    return None
+
+
+def _logind_remote(session_id):
+    """systemd-logind 中会话的 Remote 属性"""
+    try:
+        result = subprocess.run(['loginctl', 'show-session', session_id, '-p', 'Remote', '--value'],
+                                capture_output=True, text=True, timeout=1)
+    except (OSError, subprocess.SubprocessError):
+        return False
+    return result.returncode == 0 and result.stdout.strip() == 'yes'
+
+
+def start_detection():
+    """在后台线程中检测当前会话，重复调用只检测一次"""
+    global _detect_thread
+    with _lock:
+        if _detect_thread is not None or _detected is not _UNKNOWN:
+            return
+        _detect_thread = threading.Thread(target=_run_detection, name='RemoteSession', daemon=True)
+        _detect_thread.start()
+
+
+def _run_detection():
+    global _detected
+    reason = detect()
+    _detected = reason
+    if reason:
+        logger.info(f"检测到远程会话（{reason}），休息时使用低带宽遮罩层")
+
+
+def _detect_windows(environ):
+    if environ.get('SESSIONNAME', '').upper().startswith('RDP-'):
+        return 'RDP'
+    try:
+        import ctypes
+        SM_REMOTESESSION = 0x1000
+        if ctypes.windll.user32.GetSystemMetrics(SM_REMOTESESSION):
+            return 'RDP'
+    except (AttributeError, OSError):
+        pass
+    return None
+
+
+def low_bandwidth_enabled(config, environ=None):
+    """根据配置决定是否使用低带宽遮罩层：'auto' 时按会话类型检测"""
+    mode = config.get('remote_overlay_mode', 'auto')
+    if mode == 'on':
+        return True
+    if mode != 'auto':
+        return False
+    if environ is not None:
+        return detect(environ) is not None
+    if _detected is _UNKNOWN:
+        # 后台检测还没有完成：先按环境变量判断
+        start_detection()
+        return detect(logind=False) is not None
+    return _detected is not None
@@ -0,0 +1,66 @@
+import os
+import sys
+from PySide6.QtCore import QResource, QSize
+from PySide6.QtGui import QIcon
+
+# 编译后的Qt资源包，由打包脚本通过 pyside6-rcc --binary 生成
+RCC_FILE = os.path.join('resources', 'resources.rcc')
+# 预先缩放好的图标尺寸，与 resources/make_icons.py 保持一致
+ICON_SIZES = (16, 22, 24, 32, 48, 64, 128)
+
+_registered = None
+_icons = {}
+
+
+# 资源路径兼容PyInstaller打包和源码运行
+def resource_path(relative_path):
+    if hasattr(sys, '_MEIPASS'):
+        return os.path.join(sys._MEIPASS, relative_path)
+    base = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    return os.path.join(base, relative_path)
+
+
+def register_resources():
+    """注册资源包（只注册一次）
+
+    QResource.registerResource 会直接映射整个文件，一次读取即可访问所有图标。
+    资源包不存在时（例如源码运行且未编译）回退到零散文件。
+    """
+    global _registered
+    if _registered is None:
+        path = resource_path(RCC_FILE)
+        _registered = os.path.exists(path) and QResource.registerResource(path)
+    return _registered
+
+
+def _icon_file(size):
+    if register_resources():
+        return f":/icons/icon_{size}.png"
+    path = resource_path(os.path.join('resources', 'icons', f'icon_{size}.png'))
+    return path if os.path.exists(path) else None
+
+
+def sound_file(name):
+    """提示音文件路径，优先使用资源包中的文件"""
+    if register_resources():
+        return f":/sounds/{name}.wav"
+    path = resource_path(os.path.join('resources', 'sounds', f'{name}.wav'))
+    return path if os.path.exists(path) else None
+
+
+def app_icon():
+    """获取程序图标，全进程共享同一个QIcon
+
+    各尺寸图标按需解码，托盘和窗口使用同一份数据。
+    """
+    icon = _icons.get('app')
+    if icon is None:
+        icon = QIcon()
+        for size in ICON_SIZES:
+            path = _icon_file(size)
+            if path:
+                icon.addFile(path, QSize(size, size))
+        if icon.isNull():
+            icon = QIcon(resource_path('favicon.ico'))
+        _icons['app'] = icon
+    return icon
@@ -0,0 +1,68 @@
+"""systemd 服务状态通知（sd_notify 协议的最小实现）
+
+不依赖 libsystemd，未由 systemd 启动（没有 NOTIFY_SOCKET）时所有调用均为空操作。
+"""
+import os
+import socket
+import subprocess
+from utils.log import get_logger
+
+logger = get_logger('systemd')
+
+# 自启动的systemd单元通过环境变量把单元名传给程序
+UNIT_ENV = 'TCYA_SYSTEMD_UNIT'
+# 单元以低CPU/IO权重启动，程序就绪后恢复为systemd的默认权重
+STARTUP_WEIGHT = 10
+DEFAULT_WEIGHT = 100
+
+
+def notify(state):
+    """向 systemd 发送状态，如 READY=1、WATCHDOG=1、STATUS=..."""
+    address = os.environ.get('NOTIFY_SOCKET')
+    if not address:
+        return False
+    if address.startswith('@'):
+        # 抽象命名空间套接字
+        address = '\0' + address[1:]
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM) as sock:
+            sock.sendto(state.encode('utf-8'), address)
+        return True
+    except OSError as e:
+        logger.warning(f"发送systemd通知失败: {str(e)}")
+        return False
+
+
+def watchdog_interval_ms():
+    """返回建议的看门狗心跳间隔（毫秒），未启用看门狗时返回0"""
+    usec = os.environ.get('WATCHDOG_USEC')
+    pid = os.environ.get('WATCHDOG_PID')
+    if not usec or (pid and pid != str(os.getpid())):
+        return 0
+    try:
+        # 按systemd建议，以超时时间的一半发送心跳
+        return max(1, int(usec) // 2000)
+    except ValueError:
+        return 0
+
+
+def ready():
+    """报告就绪，并恢复启动期间降低的CPU/IO权重"""
+    notify('READY=1')
+    restore_weights()
+
+
+def restore_weights():
+    """由自启动单元启动时，把单元的CPU/IO权重恢复为默认值（--runtime，只在本次运行中生效）"""
+    unit = os.environ.get(UNIT_ENV)
+    if not unit:
+        return False
+    try:
+        # 异步执行，不阻塞GUI线程
+        subprocess.Popen(["systemctl", "--user", "set-property", "--runtime", unit,
+                          f"CPUWeight={DEFAULT_WEIGHT}", f"IOWeight={DEFAULT_WEIGHT}"],
+                         stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        return True
+    except OSError as e:
+        logger.warning(f"恢复systemd单元权重失败: {str(e)}")
+        return False
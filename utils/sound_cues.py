@@ -0,0 +1,63 @@
+"""休息提示音
+
+启动时把所有提示音预先加载到 QSoundEffect（解码后的PCM常驻内存），
+触发时只需调用 play()，不读盘也不解码。QtMultimedia 为可选模块，不可用时静默跳过。
+"""
+import time
+from PySide6.QtCore import QObject, QUrl
+
+try:
+    from PySide6.QtMultimedia import QSoundEffect
+except ImportError:
+    QSoundEffect = None
+
+from utils.resources import sound_file
+
+CUE_NAMES = ('break_start', 'warning', 'break_end')
+
+
+class SoundCues(QObject):
+    def __init__(self, volume=70, parent=None):
+        super().__init__(parent)
+        self.effects = {}
+        self.enabled = True
+        self.last_latency_ms = None
+        self._triggered_at = None
+        if QSoundEffect is None:
+            return
+        for name in CUE_NAMES:
+            path = sound_file(name)
+            if path is None:
+                continue
+            effect = QSoundEffect(self)
+            effect.setSource(QUrl(f"qrc{path}") if path.startswith(':') else QUrl.fromLocalFile(path))
+            effect.playingChanged.connect(self._on_playing_changed)
+            self.effects[name] = effect
+        self.set_volume(volume)
+
+    @staticmethod
+    def available():
+        return QSoundEffect is not None
+
+    def set_volume(self, volume):
+        """设置音量（0-100）"""
+        for effect in self.effects.values():
+            effect.setVolume(max(0, min(100, volume)) / 100)
+
+    def is_ready(self, name):
+        effect = self.effects.get(name)
+        return effect is not None and effect.status() == QSoundEffect.Ready
+
+    def play(self, name):
+        """播放提示音，未加载完成的提示音直接跳过"""
+        if not self.enabled or not self.is_ready(name):
+            return False
+        self._triggered_at = time.perf_counter()
+        self.effects[name].play()
+        return True
+
+    def _on_playing_changed(self):
+        # 记录从触发到开始播放的延迟
+        if self._triggered_at is not None and self.sender().isPlaying():
+            self.last_latency_ms = (time.perf_counter() - self._triggered_at) * 1000
+            self._triggered_at = None
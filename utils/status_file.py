@@ -0,0 +1,197 @@
+"""内存映射的状态文件，供状态栏读取倒计时
+
+运行中的实例把当前阶段、结束时间和暂停状态写入运行时目录下一个64字节的文件，
+读取方映射一次后即可随时读取，无需每秒启动进程或访问套接字。
+只依赖标准库，状态栏脚本可直接导入。
+
+文件布局（小端）：
+    0   4s  魔数 b'TCYA'
+    4   H   布局版本
+    6   H   文件大小
+    8   Q   序号：写入前加一（奇数表示正在写入），写完再加一
+    16  B   阶段：0 未运行，1 工作，2 休息，3 推迟
+    17  B   是否暂停
+    24  q   阶段结束时间（Unix毫秒，暂停时为0）
+    32  i   写入时的剩余秒数（暂停时据此显示）
+    36  I   进程ID
+    40  q   写入时间（Unix毫秒）
+
+读取方先读序号，再复制数据，再读一次序号；两次相同且为偶数时数据一致，否则重试。
+实例崩溃或被强制结束时来不及标记为未运行，读取方在结束时间已过（或暂停）时检查进程是否存在。
+"""
+import os
+import mmap
+import struct
+import time
+from utils.log import get_logger
+
+logger = get_logger('status_file')
+
+MAGIC = b'TCYA'
+LAYOUT_VERSION = 1
+SIZE = 64
+
+HEADER = struct.Struct('<4sHH')
+SEQ = struct.Struct('<Q')
+BODY = struct.Struct('<BB6xqiIq')
+SEQ_OFFSET = 8
+BODY_OFFSET = 16
+
+PHASES = {'work': 1, 'break': 2, 'deferred': 3}
+PHASE_NAMES = {value: key for key, value in PHASES.items()}
+
+
+def status_path():
+    from utils.ipc import runtime_path
+    return runtime_path('.status')
+
+
+def process_alive(pid):
+    """进程是否存在，无法判断时视为存在"""
+    if pid <= 0:
+        return True
+    if os.name == 'nt':
+        # Windows 上 os.kill 会结束进程，只能查询进程句柄
+        import ctypes
+        PROCESS_QUERY_LIMITED_INFORMATION = 0x1000
+        STILL_ACTIVE = 259
+        ERROR_INVALID_PARAMETER = 87
+        kernel32 = ctypes.WinDLL('kernel32', use_last_error=True)
+        handle = kernel32.OpenProcess(PROCESS_QUERY_LIMITED_INFORMATION, False, pid)
+        if not handle:
+            # 进程不存在时为参数错误，其他错误（如拒绝访问）说明进程存在
+            return ctypes.get_last_error() != ERROR_INVALID_PARAMETER
+        try:
+            code = ctypes.c_ulong()
+            if not kernel32.GetExitCodeProcess(handle, ctypes.byref(code)):
+                return True
+            return code.value == STILL_ACTIVE
+        finally:
+            kernel32.CloseHandle(handle)
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        # 没有权限发送信号，进程存在
+        pass
+    return True
+
+
+class StatusFileWriter:
+    def __init__(self, path=None):
+        self.path = path or status_path()
+        self._mmap = None
+        self._seq = 0
+        self._last = None
+        self.writes = 0
+
+    def open(self):
+        """创建并映射状态文件，失败时返回False"""
+        try:
+            fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+            try:
+                os.ftruncate(fd, SIZE)
+                self._mmap = mmap.mmap(fd, SIZE)
+            finally:
+                os.close(fd)
+        except OSError as e:
+            logger.error(f"创建状态文件失败: {str(e)}")
+            self._mmap = None
+            return False
+        self._seq = 0
+        self._last = None
+        HEADER.pack_into(self._mmap, 0, MAGIC, LAYOUT_VERSION, SIZE)
+        SEQ.pack_into(self._mmap, SEQ_OFFSET, 0)
+        return True
+
+    def write(self, phase, remaining, paused, now=None):
+        """写入一次状态"""
+        if self._mmap is None:
+            return
+        now = time.time() if now is None else now
+        deadline_ms = 0 if paused or not phase else int((now + remaining) * 1000)
+        self._seq += 1
+        SEQ.pack_into(self._mmap, SEQ_OFFSET, self._seq)
+        BODY.pack_into(self._mmap, BODY_OFFSET, phase, int(paused), deadline_ms, int(remaining),
+                       os.getpid(), int(now * 1000))
+        self._seq += 1
+        SEQ.pack_into(self._mmap, SEQ_OFFSET, self._seq)
+        self.writes += 1
+
+    def update(self, status, now=None):
+        """根据 TimerWindow.get_status() 更新状态
+
+        运行中结束时间不变，每秒的倒计时不需要写入；
+        只有阶段、暂停状态变化或结束时间偏差超过1秒（加减时间）时才写入。
+        """
+        now = time.time() if now is None else now
+        phase = PHASES.get(status.get('phase'), 0)
+        paused = bool(status.get('paused'))
+        remaining = status.get('remaining_seconds', 0)
+        deadline = now + remaining
+        if self._last is not None:
+            last_phase, last_paused, last_deadline, last_remaining = self._last
+            if last_phase == phase and last_paused == paused:
+                if paused and last_remaining == remaining:
+                    return
+                if not paused and abs(last_deadline - deadline) < 1.5:
+                    return
+        self._last = (phase, paused, deadline, remaining)
+        self.write(phase, remaining, paused, now)
+
+    def close(self, remove=True):
+        """标记为未运行并关闭"""
+        if self._mmap is None:
+            return
+        self.write(0, 0, False)
+        self._mmap.close()
+        self._mmap = None
+        if remove:
+            try:
+                os.unlink(self.path)
+            except OSError:
+                pass
+
+
+class StatusFileReader:
+    """读取状态文件；文件不存在时抛出 FileNotFoundError"""
+
+    def __init__(self, path=None):
+        self.path = path or status_path()
+        with open(self.path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), SIZE, access=mmap.ACCESS_READ)
+        magic, version, _ = HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC or version != LAYOUT_VERSION:
+            self._mmap.close()
+            raise ValueError("状态文件格式不兼容")
+
+    def read_raw(self, retries=1000):
+        """读取一致的快照 (阶段, 是否暂停, 结束时间毫秒, 剩余秒数, 进程ID, 写入时间毫秒)"""
+        m = self._mmap
+        for _ in range(retries):
+            seq = SEQ.unpack_from(m, SEQ_OFFSET)[0]
+            if seq & 1:
+                continue
+            data = BODY.unpack_from(m, BODY_OFFSET)
+            if SEQ.unpack_from(m, SEQ_OFFSET)[0] == seq:
+                return data
+        return None
+
+    def read(self, now=None):
+        """读取状态，返回与 get_status() 相同格式的字典；实例未运行时返回None"""
+        data = self.read_raw()
+        if data is None or not data[0]:
+            return None
+        phase, paused, deadline_ms, remaining, pid, _ = data
+        now_ms = int((time.time() if now is None else now) * 1000)
+        if (paused or deadline_ms <= now_ms) and not process_alive(pid):
+            # 实例崩溃后文件中仍是最后写入的状态，否则会一直显示停住的倒计时
+            return None
+        if not paused:
+            remaining = max(0, (deadline_ms - now_ms) // 1000)
+        return {'phase': PHASE_NAMES.get(phase, 'work'), 'remaining_seconds': remaining,
+                'paused': bool(paused), 'pid': pid}
+
+    def close(self):
+        self._mmap.close()
@@ -0,0 +1,195 @@
+"""监督进程
+
+    python main.py --supervise
+
+启动程序并监视它：子进程异常退出或GUI线程无响应（心跳超时）时按退避时间重启，
+并恢复崩溃前的计时状态。用户从托盘菜单退出（退出码0）时监督进程也退出。
+
+为了缩短重启时间，始终保留一个已完成导入的备用进程（main.py --standby）：
+备用进程预先导入Qt和界面模块后阻塞在标准输入上，收到一行JSON后才创建QApplication和窗口。
+子进程崩溃时直接激活备用进程，随后在后台启动新的备用进程。
+
+心跳通过本地控制接口的 status 命令实现，该命令在GUI线程中处理，同时用于记录最近的计时状态。
+本模块只依赖标准库，不导入Qt。
+"""
+import os
+import sys
+import json
+import time
+import signal
+import threading
+import subprocess
+from utils.ipc import send_command, InstanceNotResponding
+from utils.log import get_logger
+
+logger = get_logger('supervisor')
+
+
+def child_command(script=None):
+    """启动子进程的命令（打包后的可执行文件不需要脚本路径）"""
+    if getattr(sys, 'frozen', False):
+        return [sys.executable]
+    return [sys.executable, os.path.abspath(script or sys.argv[0])]
+
+
+class Child:
+    """以 --standby 启动的子进程，激活前只完成导入"""
+
+    def __init__(self, command, env=None):
+        self.process = subprocess.Popen(command + ['--standby'], stdin=subprocess.PIPE,
+                                        stdout=subprocess.PIPE, env=env)
+        self.started = time.monotonic()
+        self.activated = None
+        self.ready = threading.Event()  # 导入已完成
+        threading.Thread(target=self._read_stdout, name='SupervisorChild', daemon=True).start()
+
+    def _read_stdout(self):
+        # 激活后继续读取，避免子进程写满管道而阻塞
+        for line in self.process.stdout:
+            if line.strip() == b'ready':
+                self.ready.set()
+
+    def activate(self, restore=None):
+        """通知子进程开始运行，返回是否成功"""
+        try:
+            self.process.stdin.write((json.dumps({'restore': restore}) + '\n').encode('utf-8'))
+            self.process.stdin.close()
+        except OSError:
+            return False
+        self.activated = time.monotonic()
+        return True
+
+    def alive(self):
+        return self.process.poll() is None
+
+    def kill(self):
+        if self.alive():
+            self.process.kill()
+        try:
+            self.process.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            pass
+
+
+class Supervisor:
+    def __init__(self, command, heartbeat=1.0, hang_timeout=10.0, startup_grace=30.0,
+                 backoff_base=1.0, backoff_max=60.0, stable_after=60.0, standby=True, env=None):
+        self.command = command
+        self.heartbeat = heartbeat
+        self.hang_timeout = hang_timeout  # 心跳连续失败多久视为卡死（秒）
+        self.startup_grace = startup_grace  # 启动后多久内不检查心跳（秒）
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.stable_after = stable_after  # 运行超过这个时间后重置退避
+        self.use_standby = standby
+        self.env = env
+        self.active = None
+        self.standby = None
+        self.failures = 0  # 连续的快速失败次数
+        self.restarts = 0
+        self.last_status = None
+        self.last_status_at = None
+        self.last_heartbeat = None
+        self._stop = threading.Event()
+
+    def backoff(self):
+        """第一次崩溃立即重启，连续的快速失败按指数退避"""
+        if self.failures <= 1:
+            return 0.0
+        return min(self.backoff_max, self.backoff_base * 2 ** (self.failures - 2))
+
+    def spawn_standby(self):
+        if self.use_standby and (self.standby is None or not self.standby.alive()):
+            self.standby = Child(self.command, self.env)
+
+    def start_active(self, restore=None):
+        """激活备用进程（没有可用的备用进程时冷启动一个）"""
+        child = self.standby if self.standby is not None and self.standby.alive() else None
+        self.standby = None
+        if child is None or not child.activate(restore):
+            if child is not None:
+                child.kill()
+            child = Child(self.command, self.env)
+            child.activate(restore)
+        self.active = child
+        self.last_heartbeat = None
+        logger.info(f"子进程 {child.process.pid} 已{'激活' if child.ready.is_set() else '启动'}")
+
+    def restore_state(self):
+        """崩溃前最近的计时状态，age 为距今的秒数"""
+        if self.last_status is None:
+            return None
+        state = dict(self.last_status)
+        state['age'] = time.monotonic() - self.last_status_at
+        return state
+
+    def check_heartbeat(self):
+        """返回子进程是否有响应；启动宽限期内总是返回True"""
+        now = time.monotonic()
+        try:
+            response = send_command('status', timeout=self.heartbeat)
+        except InstanceNotResponding:
+            response = None
+        if response is not None and response.get('ok'):
+            self.last_heartbeat = now
+            self.last_status = {key: response.get(key) for key in ('phase', 'remaining_seconds', 'paused')}
+            self.last_status_at = now
+            return True
+        if self.last_heartbeat is not None:
+            since = self.last_heartbeat
+        else:
+            since = (self.active.activated or self.active.started) + self.startup_grace
+        return now - since < self.hang_timeout
+
+    def run(self):
+        """运行直到子进程正常退出或收到终止信号，返回退出码"""
+        if threading.current_thread() is threading.main_thread():
+            for signum in (signal.SIGTERM, signal.SIGINT):
+                signal.signal(signum, lambda *args: self.stop())
+        self.start_active()
+        try:
+            while not self._stop.is_set():
+                try:
+                    code = self.active.process.wait(timeout=self.heartbeat)
+                except subprocess.TimeoutExpired:
+                    code = None
+                if code == 0:
+                    logger.info("子进程正常退出")
+                    return 0
+                if self._stop.is_set():
+                    break
+                if code is None:
+                    if self.check_heartbeat():
+                        if self.last_heartbeat is not None:
+                            # 新的子进程已经响应，再启动备用进程，避免和它争抢CPU
+                            self.spawn_standby()
+                        continue
+                    logger.error(f"子进程 {self.active.process.pid} 无响应，强制结束")
+                    self.active.kill()
+                    reason = '无响应'
+                else:
+                    reason = f'退出码 {code}'
+                self.restart(reason)
+            return 0
+        finally:
+            for child in (self.active, self.standby):
+                if child is not None and child.alive():
+                    child.process.terminate()
+                    try:
+                        child.process.wait(timeout=5)
+                    except subprocess.TimeoutExpired:
+                        child.kill()
+
+    def stop(self):
+        """结束监督和子进程（可在其他线程调用）"""
+        self._stop.set()
+
+    def restart(self, reason):
+        uptime = time.monotonic() - (self.active.activated or self.active.started)
+        self.failures = 1 if uptime >= self.stable_after else self.failures + 1
+        delay = self.backoff()
+        logger.warning(f"子进程异常结束（{reason}），运行了 {uptime:.0f} 秒，{delay:g} 秒后重启")
+        if delay and self._stop.wait(delay):
+            return
+        self.restarts += 1
+        self.start_active(self.restore_state())
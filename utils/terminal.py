@@ -0,0 +1,194 @@
+"""ANSI终端绘制
+
+Canvas 描述一帧的内容（每个单元格为 字符 + 样式），Screen 保存上一帧，
+绘制时只输出内容或样式变化的单元格：连续变化的单元格合并为一段，用一次光标定位输出。
+倒计时每秒只有一两个数字变化，每次刷新只需输出十几个字节。
+只依赖标准库，支持中文等宽字符（占两列）。
+"""
+import os
+import sys
+import unicodedata
+
+RESET = '0'
+# 宽字符第二列的占位
+WIDE_TAIL = ''
+
+
+def char_width(ch):
+    if unicodedata.combining(ch):
+        return 0
+    return 2 if unicodedata.east_asian_width(ch) in ('W', 'F') else 1
+
+
+def text_width(text):
+    return sum(char_width(ch) for ch in text)
+
+
+class Canvas:
+    def __init__(self, width, height, style=RESET):
+        self.width = width
+        self.height = height
+        self.cells = [[(' ', style)] * width for _ in range(height)]
+
+    def fill_row(self, row, style):
+        if 0 <= row < self.height:
+            self.cells[row] = [(' ', style)] * self.width
+
+    def put(self, row, col, text, style=RESET):
+        """从 (row, col) 开始写入文字，超出宽度的部分截断"""
+        if not 0 <= row < self.height:
+            return
+        cells = self.cells[row]
+        for ch in text:
+            width = char_width(ch)
+            if width == 0:
+                continue
+            if col < 0:
+                col += width
+                continue
+            if col + width > self.width:
+                break
+            cells[col] = (ch, style)
+            if width == 2:
+                cells[col + 1] = (WIDE_TAIL, style)
+            col += width
+
+    def center(self, row, text, style=RESET):
+        self.put(row, max(0, (self.width - text_width(text)) // 2), text, style)
+
+
+class Screen:
+    """保存已输出的帧，只输出变化的单元格"""
+
+    def __init__(self, out=None):
+        self.out = out or sys.stdout
+        self.previous = None
+        self.bytes_written = 0
+
+    def invalidate(self):
+        """下一次绘制时完整重绘（如终端大小变化后）"""
+        self.previous = None
+
+    def render(self, canvas):
+        """输出与上一帧的差异，返回输出的字符数"""
+        previous = self.previous
+        if previous is not None and (len(previous) != canvas.height or
+                                     (previous and len(previous[0]) != canvas.width)):
+            previous = None
+        parts = []
+        if previous is None:
+            # 清屏后所有单元格都是默认样式的空格，不需要再输出
+            parts.append('\x1b[0m\x1b[2J')
+            previous = Canvas(canvas.width, canvas.height).cells
+        current_style = None
+        for row, cells in enumerate(canvas.cells):
+            old = previous[row]
+            if old == cells:
+                continue
+            col = 0
+            width = len(cells)
+            while col < width:
+                if old[col] == cells[col]:
+                    col += 1
+                    continue
+                # 宽字符的第二列变化时从第一列开始输出
+                if cells[col][0] == WIDE_TAIL and col > 0:
+                    col -= 1
+                parts.append(f'\x1b[{row + 1};{col + 1}H')
+                while col < width and (old[col] != cells[col] or cells[col][0] == WIDE_TAIL):
+                    ch, style = cells[col]
+                    if ch == WIDE_TAIL:
+                        col += 1
+                        continue
+                    if style != current_style:
+                        parts.append(f'\x1b[{style}m')
+                        current_style = style
+                    parts.append(ch)
+                    col += 1
+        self.previous = [list(cells) for cells in canvas.cells]
+        if not parts:
+            return 0
+        parts.append('\x1b[0m')
+        data = ''.join(parts)
+        self.out.write(data)
+        self.out.flush()
+        self.bytes_written += len(data)
+        return len(data)
+
+
+class Terminal:
+    """终端模式：备用屏幕、隐藏光标、逐字符读取按键（仅POSIX）"""
+
+    def __init__(self, fd_in=None, out=None):
+        self.fd_in = sys.stdin.fileno() if fd_in is None else fd_in
+        self.out = out or sys.stdout
+        self._saved = None
+        # 输入已关闭（EOF，或终端挂断后读取出错），之后描述符一直可读
+        self.closed = False
+
+    @staticmethod
+    def available():
+        return os.name == 'posix' and sys.stdin is not None and sys.stdin.isatty()
+
+    def size(self):
+        try:
+            size = os.get_terminal_size(self.out.fileno())
+            return size.columns, size.lines
+        except (OSError, ValueError):
+            return 80, 24
+
+    def enter(self):
+        import termios
+        import tty
+        self._saved = termios.tcgetattr(self.fd_in)
+        tty.setcbreak(self.fd_in)
+        os.set_blocking(self.fd_in, False)
+        self.out.write('\x1b[?1049h\x1b[?25l')
+        self.out.flush()
+
+    def exit(self):
+        import termios
+        try:
+            self.out.write('\x1b[0m\x1b[?25h\x1b[?1049l')
+            self.out.flush()
+            os.set_blocking(self.fd_in, True)
+            if self._saved is not None:
+                termios.tcsetattr(self.fd_in, termios.TCSADRAIN, self._saved)
+        except (OSError, termios.error):
+            # 终端已挂断，无法恢复
+            pass
+        self._saved = None
+
+    def read_keys(self):
+        """读取已到达的按键：普通字符、'esc'；方向键等转义序列忽略
+
+        读到EOF或出错（终端挂断后为EIO）时设置 closed 并返回空列表。
+        """
+        try:
+            data = os.read(self.fd_in, 1024)
+        except (BlockingIOError, InterruptedError):
+            return []
+        except OSError:
+            self.closed = True
+            return []
+        if not data:
+            self.closed = True
+            return []
+        if data == b'\x1b':
+            return ['esc']
+        keys = []
+        text = data.decode('utf-8', errors='ignore')
+        i = 0
+        while i < len(text):
+            if text[i] == '\x1b':
+                # 跳过转义序列（ESC [ ... 字母）
+                i += 1
+                if i < len(text) and text[i] in '[O':
+                    i += 1
+                    while i < len(text) and not text[i].isalpha() and text[i] != '~':
+                        i += 1
+                i += 1
+                continue
+            keys.append(text[i])
+            i += 1
+        return keys
@@ -0,0 +1,138 @@
+import os
+import sys
+import time
+import threading
+import traceback
+import logging
+from logging.handlers import RotatingFileHandler
+from PySide6.QtCore import QObject, QTimer, Qt
+from utils import log
+
+logger = log.get_logger('watchdog')
+
+
+class StallWatchdog(QObject):
+    """GUI线程卡顿看门狗
+
+    GUI线程通过一个低频QTimer刷新心跳时间戳，后台线程定期检查心跳，
+    超过阈值未刷新即视为卡顿，并把主线程当前的Python调用栈写入滚动日志。
+    """
+
+    def __init__(self, threshold_ms=500, log_file=os.path.join('logs', 'stall.log'),
+                 max_bytes=1024 * 1024, backup_count=3):
+        super().__init__()
+        self.threshold = threshold_ms / 1000.0
+        # 心跳间隔取阈值的1/4，既能及时发现卡顿，又不会频繁唤醒GUI线程
+        self.heartbeat_interval_ms = max(50, threshold_ms // 4)
+        self.check_interval = self.heartbeat_interval_ms / 1000.0
+        self.log_file = log_file
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+
+        # 统计信息
+        self.stall_count = 0
+        self.total_stall_ms = 0.0
+        self.max_stall_ms = 0.0
+        self.last_stall_ms = 0.0
+
+        self._last_beat = time.monotonic()
+        self._main_thread_id = threading.main_thread().ident
+        self._stop_event = threading.Event()
+        self._thread = None
+        self._logger = None
+
+        self._heartbeat = QTimer(self)
+        self._heartbeat.setTimerType(Qt.CoarseTimer)
+        self._heartbeat.timeout.connect(self._beat)
+
+    def _get_logger(self):
+        """延迟创建滚动日志，没有卡顿时不产生任何文件"""
+        if self._logger is None:
+            stall_logger = logging.getLogger(log.ROOT_LOGGER + '.watchdog.stall')
+            stall_logger.setLevel(logging.WARNING)
+            stall_logger.propagate = False
+            try:
+                log_dir = os.path.dirname(self.log_file)
+                if log_dir:
+                    os.makedirs(log_dir, exist_ok=True)
+                handler = RotatingFileHandler(
+                    self.log_file, maxBytes=self.max_bytes,
+                    backupCount=self.backup_count, encoding='utf-8'
+                )
+                handler.setFormatter(logging.Formatter('%(asctime)s.%(msecs)03d %(message)s',
+                                                       '%Y-%m-%d %H:%M:%S'))
+                stall_logger.addHandler(handler)
+            except Exception as e:
+                # 卡顿日志没有处理器也不向上传递，错误通过看门狗自身的logger记录
+                logger.error(f"创建卡顿日志失败: {str(e)}")
+            self._logger = stall_logger
+        return self._logger
+
+    def _beat(self):
+        """GUI线程心跳"""
+        self._last_beat = time.monotonic()
+
+    def start(self):
+        """启动看门狗"""
+        if self._thread is not None:
+            return
+        self._last_beat = time.monotonic()
+        self._stop_event.clear()
+        self._heartbeat.start(self.heartbeat_interval_ms)
+        self._thread = threading.Thread(target=self._run, name='StallWatchdog', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """停止看门狗"""
+        self._heartbeat.stop()
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout=1)
+            self._thread = None
+
+    def _run(self):
+        """后台检查循环"""
+        stall_beat = None  # 卡顿开始前最后一次心跳的时间
+        while not self._stop_event.wait(self.check_interval):
+            last_beat = self._last_beat
+            now = time.monotonic()
+            if stall_beat is None:
+                if now - last_beat > self.threshold:
+                    stall_beat = last_beat
+                    self.stall_count += 1
+                    self._dump_stack(now - last_beat)
+                    # 保存卡顿前的最近日志，便于查看卡顿发生前在做什么
+                    path = log.dump_recent('stall')
+                    logger.warning(f"检测到GUI线程卡顿 #{self.stall_count}，最近的日志已保存到 {path}"
+                                   if path else f"检测到GUI线程卡顿 #{self.stall_count}")
+            elif last_beat != stall_beat:
+                # 心跳恢复，记录本次卡顿时长
+                duration_ms = (last_beat - stall_beat) * 1000
+                self.last_stall_ms = duration_ms
+                self.total_stall_ms += duration_ms
+                self.max_stall_ms = max(self.max_stall_ms, duration_ms)
+                self._get_logger().warning(f"GUI线程卡顿结束，持续 {duration_ms:.0f} ms")
+                logger.warning(f"GUI线程卡顿结束，持续 {duration_ms:.0f} ms",
+                               extra={'fields': {'stall_ms': round(duration_ms, 1)}})
+                stall_beat = None
+
+    def _dump_stack(self, elapsed):
+        """将主线程当前调用栈写入日志"""
+        frame = sys._current_frames().get(self._main_thread_id)
+        if frame is None:
+            stack = "（无法获取主线程调用栈）\n"
+        else:
+            stack = ''.join(traceback.format_stack(frame))
+        self._get_logger().warning(
+            f"检测到GUI线程卡顿 #{self.stall_count}，已持续 {elapsed * 1000:.0f} ms，主线程调用栈:\n{stack}"
+        )
+
+    def get_stats(self):
+        """获取卡顿统计信息"""
+        return {
+            'stall_count': self.stall_count,
+            'total_stall_ms': round(self.total_stall_ms, 1),
+            'max_stall_ms': round(self.max_stall_ms, 1),
+            'last_stall_ms': round(self.last_stall_ms, 1),
+            'threshold_ms': int(self.threshold * 1000),
+        }